@@ -6,14 +6,7 @@ import re
 
 # Configurazione
 DATA_DIR = './data'
-SOURCE_PRIORITY = {
-    'HYPERLIQUID': 100,
-    'BINANCE': 90,
-    'BYBIT': 80,
-    'OKX': 70,
-    'KUCOIN': 60,
-    'MEXC': 50
-}
+from scan_planner import SOURCE_PRIORITY
 
 def get_base_symbol(symbol):
     """
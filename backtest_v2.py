@@ -1,12 +1,111 @@
 
+import io
+import os
 import sys
 import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
-from strategies import calculate_reverse_rsi, QuantProBreakout
+from numpy.lib.stride_tricks import sliding_window_view
+from strategies import QuantProBreakout
 from strategy_config import StrategyConfig
 
+
+def rolling_peak_lines(rsi, window_size=20):
+    """
+    Vectorized BacktestEngineV2.find_trendlines for every bar at once.
+
+    For bar t (series rsi[:t+1]) the peak is the first maximum of
+    rsi[t-window_size+1 : t-1]; it counts if both neighbours are lower.
+    Returns (slope, intercept) arrays, NaN where there is no line.
+    """
+    rsi = np.asarray(rsi, dtype=np.float64)
+    n = len(rsi)
+    slopes = np.full(n, np.nan)
+    intercepts = np.full(n, np.nan)
+    span = window_size - 2
+    if n < window_size or span <= 0:
+        return slopes, intercepts
+
+    windows = sliding_window_view(np.where(np.isnan(rsi), -np.inf, rsi), span)
+    bars = np.arange(window_size - 1, n)
+    starts = bars - window_size + 1
+    offsets = windows[starts].argmax(axis=1)  # first occurrence, like idxmax
+    peaks = starts + offsets
+    peak_vals = rsi[peaks]
+
+    valid = np.isfinite(peak_vals) & (peaks >= 1)
+    left = rsi[np.maximum(peaks - 1, 0)]
+    right = rsi[peaks + 1]
+    valid &= (peak_vals > left) & (peak_vals > right)
+
+    # Mock line: slightly descending from the peak (-0.05 per bar)
+    m = -0.05
+    slopes[bars[valid]] = m
+    intercepts[bars[valid]] = peak_vals[valid] - m * peaks[valid]
+    return slopes, intercepts
+
+
+def wilder_averages(close, period=14):
+    """
+    Wilder-smoothed average gain/loss after each bar, seeded with the SMA of
+    bars 1..period - the same arithmetic as strategies.calculate_reverse_rsi
+    runs over close[:i+1]. NaN before bar `period`.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    avg_gain = np.full(n, np.nan)
+    avg_loss = np.full(n, np.nan)
+    if n < period + 1:
+        return avg_gain, avg_loss
+
+    delta = np.diff(close, prepend=np.nan)
+    gains = np.clip(delta, 0, None)
+    losses = -np.clip(delta, None, 0)
+    gain = np.mean(gains[1:period + 1])
+    loss = np.mean(losses[1:period + 1])
+    avg_gain[period], avg_loss[period] = gain, loss
+
+    gains, losses = gains.tolist(), losses.tolist()
+    out_gain, out_loss = avg_gain.tolist(), avg_loss.tolist()
+    for i in range(period + 1, n):
+        gain = (gain * (period - 1) + gains[i]) / period
+        loss = (loss * (period - 1) + losses[i]) / period
+        out_gain[i], out_loss[i] = gain, loss
+    return np.array(out_gain), np.array(out_loss)
+
+
+def reverse_rsi_prices(close, target_rsi, period=14):
+    """
+    Price at which RSI reaches target_rsi on bar i, using data up to bar i-1:
+    prices[i] == strategies.calculate_reverse_rsi(target_rsi, close[:i], period)
+    for i >= period + 1 (NaN before). One O(n) pass instead of one O(i) loop per bar.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    prices = np.full(len(close), np.nan)
+    if len(close) < period + 2:
+        return prices
+    avg_gain, avg_loss = wilder_averages(close, period)
+
+    prev_close = close[:-1]
+    prev_gain = avg_gain[:-1]
+    prev_loss = avg_loss[:-1]
+    if target_rsi >= 100:
+        prices[1:] = prev_close * 1.05
+    elif target_rsi <= 0:
+        prices[1:] = prev_close * 0.95
+    else:
+        rs_target = target_rsi / (100.0 - target_rsi)
+        delta_gain = (rs_target * prev_loss * (period - 1)) - (prev_gain * (period - 1))
+        delta_loss = ((prev_gain * (period - 1)) / rs_target) - (prev_loss * (period - 1))
+        prices[1:] = np.where(delta_gain >= 0, prev_close + delta_gain, prev_close - delta_loss)
+    prices[:period + 1] = np.nan
+    return prices
+
+
 class BacktestEngineV2:
     def __init__(self, file_path):
         self.file_path = file_path
@@ -50,35 +149,11 @@ class BacktestEngineV2:
         # Finds a resistance point in the past 'window_size' that is a local maximum
         # Only checks last known peak.
         # This is a basic simulation of the complex 'find_trendlines' from strategies.py
-        
-        if len(rsi_series) < window_size: return None
-        
-        # Look for peak in the window [current-window : current-5]
-        # (Avoiding immediate potential breakout noise)
-        recent_window = rsi_series.iloc[-window_size:-2] 
-        if len(recent_window) == 0: return None
-        
-        peak_idx = recent_window.idxmax()
-        peak_val = recent_window.max()
-        
-        # Check if 'real' peak (neighbors lower)
-        # If passed idx is global index, use iloc properly
-        try:
-           if rsi_series[peak_idx] > rsi_series[peak_idx-1] and rsi_series[peak_idx] > rsi_series[peak_idx+1]:
-               # Found a peak. Assume flat resistance line for simplicity or slightly descending
-               # Real strategy draws line between TWO peaks. 
-               # V2 Spec: "RSI Trendline Breakout". We need a line.
-               # Let's assume a descending line from a generic previous peak.
-               
-               # Mock: Return (Slope, Intercept)
-               # Assume slope is slightly negative (-0.05 per bar)
-               m = -0.05
-               c = peak_val - (m * peak_idx) # y = mx + c => c = y - mx
-               return {'m': m, 'c': c}
-        except:
+        # Same result as rolling_peak_lines(...)[-1] (positional indices)
+        slopes, intercepts = rolling_peak_lines(np.asarray(rsi_series, dtype=np.float64), window_size)
+        if len(slopes) == 0 or np.isnan(slopes[-1]):
             return None
-            
-        return None
+        return {'m': float(slopes[-1]), 'c': float(intercepts[-1])}
 
     def run_simulation(self):
         trades = []
@@ -90,34 +165,36 @@ class BacktestEngineV2:
         trade_entry_idx = 0
         
         retest_line_val = 0
+        retest_target_rsi = 60.0
         
         print(f"Starting simulation on {len(self.df)} candles...")
         
+        # Pre-extract columns once: list indexing instead of df.iloc row objects
+        rsi = self.df['rsi'].to_numpy(dtype=np.float64).tolist()
+        low = self.df['low'].to_numpy(dtype=np.float64).tolist()
+        high = self.df['high'].to_numpy(dtype=np.float64).tolist()
+        vol_zscore = self.df['vol_zscore'].to_numpy(dtype=np.float64).tolist()
+        pivot_low_10 = self.df['pivot_low_10'].to_numpy(dtype=np.float64).tolist()
+        # Reverse-RSI price of the retest level for every bar (data up to the previous bar)
+        target_prices = reverse_rsi_prices(self.df['close'].to_numpy(dtype=np.float64), retest_target_rsi,
+                                           StrategyConfig.RSI_PERIOD).tolist()
+        
         # Start enough candles in
-        for i in range(100, len(self.df)):
-            row = self.df.iloc[i]
-            prev = self.df.iloc[i-1]
-            
-            curr_rsi = row['rsi']
-            prev_rsi = prev['rsi']
+        for i in range(100, len(rsi)):
+            curr_rsi = rsi[i]
+            prev_rsi = rsi[i - 1]
             
-            if pd.isna(curr_rsi): continue
+            if curr_rsi != curr_rsi: continue  # NaN
 
             # --- STATE MACHINE ---
             
             if state == 'IDLE':
                 # Check for Breakout
-                # 1. Find Resistance Line
-                # (Ideally calculated every step strictly on past data)
-                # Using a synthetic check for "Crossing 60" or "Crossing 70" for reliable V2 demo if Trendline logic is too complex for single-script backtest
+                # Using a synthetic check for "Crossing 60" (see find_trendlines for the line proxy)
                 is_breakout = (prev_rsi <= 60 and curr_rsi > 60)
                 
                 if is_breakout:
-                    # check V1 Score
-                    # Pass slice up to current candle (inclusive)
-                    # NOTE: analyze expects proper setup. Passing slice 'df.iloc[:i+1]' creates a small DF.
-                    # This is inefficient but necessary for "point-in-time" score.
-                    # Optimization: only pass last 200 candles to analyze?
+                    # check V1 Score on the point-in-time slice (last 200 candles, inclusive)
                     # QuantProBreakout uses 'data' and 'df_htf'. We pass 'slice' as both.
                     slice_df = self.df.iloc[max(0, i-200):i+1].copy()
                     
@@ -133,22 +210,17 @@ class BacktestEngineV2:
                     if v1_score < StrategyConfig.V2_MIN_SCORE_V1:
                         # FILTERED OUT
                         self.filtered_count += 1
-                        # print(f"[{i}] Breakout Filtered. Score: {v1_score} < {StrategyConfig.V2_MIN_SCORE_V1}")
                         is_breakout = False
                     else:
                          print(f"[{i}] Breakout VALIDATED. Score: {v1_score}")
                 
                 # Filter: Z-Score > 1.5
-                if is_breakout and row['vol_zscore'] > 1.5:
+                if is_breakout and vol_zscore[i] > 1.5:
 
                     state = 'WAITING_RETEST'
-                    # Calculate Target RSI Level (Breakout Point)
-                    # We broke 60, so we want to retest ~60 (or slightly below/above)
-                    # Let's set target RSI for entry at 55 (Deep retest) or 60 (Touch)
-                    # Config: RETEST_REVERSE_RSI_TOLERANCE = 3.0
-                    # Target RSI range: 60 +/- 3
+                    # Target RSI for the retest entry: the 60 level we broke
+                    # (Config: RETEST_REVERSE_RSI_TOLERANCE = 3.0)
                     retest_target_rsi = 60.0
-                    # print(f"[{i}] BREAKOUT DETECTED! Vol Z: {row['vol_zscore']:.2f}. Waiting for Retest of RSI {retest_target_rsi}")
             
             elif state == 'WAITING_RETEST':
                 # Check for "Retest from Above"
@@ -157,20 +229,18 @@ class BacktestEngineV2:
                     state = 'IDLE'
                     continue
 
-                # 1. Calculate Target Price for RSI=60
-                # Using Utility
-                # Use data up to previous candle (simulation constraint)
-                # Note: calculated price effectively projects for the current candle 'i'
-                target_price = calculate_reverse_rsi(retest_target_rsi, self.df.iloc[:i], rsi_period=StrategyConfig.RSI_PERIOD)
+                # 1. Target Price for RSI=60, projected for the current candle 'i'
+                # from data up to the previous candle (simulation constraint)
+                target_price = target_prices[i]
                 
                 # Check if current LOW touched this price (and proper fill)
-                if row['low'] <= target_price <= row['high']:
+                if low[i] <= target_price <= high[i]:
                     # ENTRY TRIGGERED (Perfect Touch)
                     entry_price = target_price
                     trade_entry_idx = i
                     
                     # Set SL (Pivot Low of last 10)
-                    sl_price = self.df['pivot_low_10'].iloc[i-1]
+                    sl_price = pivot_low_10[i - 1]
                     if sl_price >= entry_price: sl_price = entry_price * 0.98 # Fallback
                     
                     risk = entry_price - sl_price
@@ -179,11 +249,9 @@ class BacktestEngineV2:
                     tp_price = entry_price + (risk * StrategyConfig.MIN_RR_RATIO)
                     
                     state = 'IN_TRADE'
-                    print(f"DEBUG: Entry Triggered at idx {i}. Prev RSI: {prev_rsi:.2f}. Target RSI: {retest_target_rsi}. Target Price: {target_price:.2f}. Range: {row['low']} - {row['high']}")
-
-                    # print(f"  -> ENTRY at {entry_price:.2f} (Target RSI {retest_target_rsi}). SL: {sl_price:.2f}, TP: {tp_price:.2f}")
+                    print(f"DEBUG: Entry Triggered at idx {i}. Prev RSI: {prev_rsi:.2f}. Target RSI: {retest_target_rsi}. Target Price: {target_price:.2f}. Range: {low[i]} - {high[i]}")
                 
-                elif row['high'] < target_price:
+                elif high[i] < target_price:
                     # Gapped down below target?
                     # The RSI support failed instantly.
                     state = 'IDLE' 
@@ -192,12 +260,12 @@ class BacktestEngineV2:
                     
             elif state == 'IN_TRADE':
                 # Check Outcome
-                if row['low'] <= sl_price:
+                if low[i] <= sl_price:
                     # STOP LOSS HIT
                     pnl = (sl_price - entry_price) / entry_price * 100
                     trades.append({'type': 'LOSS', 'pnl': pnl, 'entry': entry_price, 'exit': sl_price})
                     state = 'IDLE'
-                elif row['high'] >= tp_price:
+                elif high[i] >= tp_price:
                     # TAKE PROFIT HIT
                     pnl = (tp_price - entry_price) / entry_price * 100
                     trades.append({'type': 'WIN', 'pnl': pnl, 'entry': entry_price, 'exit': tp_price})
@@ -208,35 +276,74 @@ class BacktestEngineV2:
         return trades
 
     def print_report(self, trades):
-        if not trades:
-            print("No trades generated.")
-            return
+        print_report(trades, self.filtered_count)
+
+
+def print_report(trades, filtered_count):
+    if not trades:
+        print("No trades generated.")
+        return
+
+    df_t = pd.DataFrame(trades)
+    wins = df_t[df_t['type'] == 'WIN']
+    losses = df_t[df_t['type'] == 'LOSS']
+    
+    win_rate = len(wins) / len(trades) * 100
+    total_pnl = df_t['pnl'].sum()
+    max_dd = df_t['pnl'].cumsum().min()
+    
+    print("\n" + "="*40)
+    print(f"      STRATEGY V2 BACKTEST REPORT      ")
+    print("="*40)
+    print(f"Total Trades:      {len(trades)}")
+    print(f"Filtered Setups:   {filtered_count}")
+    print(f"Win Rate:          {win_rate:.2f}%")
+    print(f"Total Net Profit:  {total_pnl:.2f}%")
+    print(f"Max Drawdown:      {max_dd:.2f}%")
+    print("-"*40)
+    print(df_t.tail(10).to_string(index=False)) # Show last 10 trades
+    print("="*40)
+
+
+def backtest_file(file_path):
+    """Run one file; simulation output is captured so parallel runs print in order."""
+    log = io.StringIO()
+    try:
+        with redirect_stdout(log):
+            engine = BacktestEngineV2(file_path)
+            trades = engine.run_simulation()
+        return {'file': file_path, 'trades': trades, 'filtered_count': engine.filtered_count,
+                'log': log.getvalue(), 'error': None}
+    except Exception as e:
+        return {'file': file_path, 'trades': [], 'filtered_count': 0,
+                'log': log.getvalue(), 'error': f"{type(e).__name__}: {e}"}
+
+
+def run_backtests(files, workers=None):
+    """backtest_file for every file across a process pool; results in input order."""
+    workers = min(workers or os.cpu_count() or 1, len(files)) or 1
+    if workers == 1:
+        return [backtest_file(f) for f in files]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(backtest_file, files))
 
-        df_t = pd.DataFrame(trades)
-        wins = df_t[df_t['type'] == 'WIN']
-        losses = df_t[df_t['type'] == 'LOSS']
-        
-        win_rate = len(wins) / len(trades) * 100
-        total_pnl = df_t['pnl'].sum()
-        max_dd = df_t['pnl'].cumsum().min()
-        
-        print("\n" + "="*40)
-        print(f"      STRATEGY V2 BACKTEST REPORT      ")
-        print("="*40)
-        print(f"Total Trades:      {len(trades)}")
-        print(f"Filtered Setups:   {self.filtered_count}")
-        print(f"Win Rate:          {win_rate:.2f}%")
-        print(f"Total Net Profit:  {total_pnl:.2f}%")
-        print(f"Max Drawdown:      {max_dd:.2f}%")
-        print("-"*40)
-        print(df_t.tail(10).to_string(index=False)) # Show last 10 trades
-        print("="*40)
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python3 backtest_v2.py <json_file>")
-        sys.exit(1)
-        
-    engine = BacktestEngineV2(sys.argv[1])
-    results = engine.run_simulation()
-    engine.print_report(results)
+    parser = argparse.ArgumentParser(description='Strategy V2 backtest (IDLE -> WAITING_RETEST -> IN_TRADE)')
+    parser.add_argument('files', nargs='+', help='JSON candle files')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    if len(args.files) == 1:
+        engine = BacktestEngineV2(args.files[0])
+        results = engine.run_simulation()
+        engine.print_report(results)
+        sys.exit(0)
+
+    for result in run_backtests(args.files, args.workers):
+        print(f"\n[BACKTEST] {result['file']}")
+        sys.stdout.write(result['log'])
+        if result['error']:
+            print(f"[ERROR] {result['error']}")
+            continue
+        print_report(result['trades'], result['filtered_count'])
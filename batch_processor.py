@@ -7,6 +7,7 @@ import sys
 from typing import Dict, List, Tuple, Any, Optional
 from coinalyze_resolver import get_resolver
 from coinalyze_batch_client import get_batch_client
+from coinalyze_http import get_session
 
 
 class BatchProcessor:
@@ -45,14 +46,12 @@ class BatchProcessor:
         print(f"[BATCH] Processing {len(symbols)} symbols", file=sys.stderr)
         
         # Step 1: Resolve all symbols
-        resolved_map = {}  # (symbol, exchange) -> (coinalyze_symbol, status)
+        resolved_map = self.resolver.resolve_batch(symbols)  # "{symbol}_{exchange}" -> (coinalyze_symbol, status)
         coinalyze_symbols = []  # List of unique Coinalyze symbols
         symbol_to_locals = {}  # Coinalyze symbol -> list of (symbol, exchange)
         
         for symbol, exchange in symbols:
-            coinalyze_symbol, status = self.resolver.resolve(symbol, exchange)
-            key = f"{symbol}_{exchange}"
-            resolved_map[key] = (coinalyze_symbol, status)
+            coinalyze_symbol, status = resolved_map[f"{symbol}_{exchange}"]
             
             if coinalyze_symbol:
                 if coinalyze_symbol not in symbol_to_locals:
@@ -125,6 +124,8 @@ class BatchProcessor:
         # Display API statistics
         stats = self.batch_client.get_stats()
         print(f"[BATCH] API Statistics: {stats['successful']} successful, {stats['failed']} failed, {stats['total']} total requests", file=sys.stderr)
+        http = get_session().summary()
+        print(f"[BATCH] HTTP: {http['requests']} requests, {http['avg_ms']}ms avg, {http['connections']} connections opened", file=sys.stderr)
         
         return results
     
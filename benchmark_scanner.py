@@ -0,0 +1,232 @@
+"""
+Scanner Benchmark Suite
+Times the directory-mode pipeline against a synthetic universe of configurable size.
+
+Usage:
+    python benchmark_scanner.py --symbols 500 --ltf-candles 1000
+    python benchmark_scanner.py --symbols 5000 --ltf-candles 10000 --skip-analysis
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import tracemalloc
+import argparse
+import tempfile
+from typing import Dict, Any, List
+
+from synthetic_universe import generate_universe
+
+
+def _timed(label: str, timings: Dict[str, float]):
+    """Context manager recording wall time under `label`."""
+    class _Timer:
+        def __enter__(self):
+            self.start = time.perf_counter()
+            return self
+
+        def __exit__(self, *exc):
+            timings[label] = round(time.perf_counter() - self.start, 4)
+            return False
+
+    return _Timer()
+
+
+def measure_context_memory(
+    ltf_files: List[str],
+    external: Dict[str, Any],
+    strategy: str,
+    with_indicators: bool,
+) -> Dict[str, Any]:
+    """
+    Resident memory per symbol of warm SharedContexts vs CompactContexts.
+
+    Memory is measured with tracemalloc (NumPy buffers are traced) while all
+    contexts of the sample are held at once. Without pandas_ta the contexts
+    hold candles only.
+    """
+    import market_scanner_refactored as scanner
+    from shared_context import SharedContext
+    from compact_context import compact_context, required_lookback, shared_context_nbytes
+
+    strategies = scanner.build_strategies(strategy, {})
+    factory = scanner.FeatureFactory(scanner.build_feature_config({}))
+    window = required_lookback(strategies, factory.config)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        contexts = []
+        for path in ltf_files:
+            symbol = scanner.extract_symbol_from_filename(path)
+            exchange = scanner.extract_exchange_from_filename(path)
+            df_ltf, df_htf = scanner.load_source_frames(path)
+            if with_indicators:
+                contexts.append(factory.build_context(symbol, exchange, df_ltf, df_htf,
+                                                      metadata={'mcap': 0}, external_data=external[path]))
+            else:
+                contexts.append(SharedContext(symbol=symbol, canonical_symbol=symbol, exchange=exchange,
+                                              ltf_data=df_ltf, htf_data=df_htf, config=factory.config))
+            del df_ltf, df_htf
+        gc.collect()
+        shared_traced = tracemalloc.get_traced_memory()[0] - baseline
+        shared_arrays = sum(shared_context_nbytes(c) for c in contexts)
+
+        compacts = [compact_context(c, window) for c in contexts]
+        del contexts
+        gc.collect()
+        compact_traced = tracemalloc.get_traced_memory()[0] - baseline
+        compact_arrays = sum(c.nbytes for c in compacts)
+    finally:
+        tracemalloc.stop()
+
+    n = max(1, len(compacts))
+    return {
+        'sample': len(compacts),
+        'indicators': with_indicators,
+        'window': window,
+        'shared_bytes_per_symbol': int(shared_traced / n),
+        'compact_bytes_per_symbol': int(compact_traced / n),
+        'shared_array_bytes_per_symbol': int(shared_arrays / n),
+        'compact_array_bytes_per_symbol': int(compact_arrays / n),
+        'reduction': round(shared_traced / compact_traced, 2) if compact_traced > 0 else None,
+    }
+
+
+def run_benchmark(
+    data_dir: str,
+    strategy: str = 'all',
+    skip_analysis: bool = False,
+    limit: int = 0,
+    memory_sample: int = 50,
+) -> Dict[str, Any]:
+    """
+    Run each stage of directory mode over `data_dir` and report timings.
+
+    Stages: file discovery, candle loading, Coinalyze cache loading and, unless
+    skipped or pandas_ta is unavailable, full strategy analysis. Memory per
+    symbol (SharedContext vs CompactContext) is measured on the first
+    `memory_sample` files.
+    """
+    import market_scanner_refactored as scanner
+
+    timings: Dict[str, float] = {}
+    report: Dict[str, Any] = {'data_dir': data_dir, 'timings': timings}
+
+    with _timed('discover', timings):
+        ltf_files = sorted(
+            os.path.join(data_dir, f) for f in os.listdir(data_dir)
+            if f.endswith('_15m.json')
+        )
+        if limit > 0:
+            ltf_files = ltf_files[:limit]
+    report['symbols'] = len(ltf_files)
+
+    frames: List[Any] = []
+    with _timed('load_candles', timings):
+        for path in ltf_files:
+            df_ltf = scanner.load_data(path)
+            htf_path = path.replace('15m.json', '4h.json')
+            df_htf = scanner.load_data(htf_path) if os.path.exists(htf_path) else None
+            frames.append((path, df_ltf, df_htf))
+
+    previous_cache_dir = scanner.COINALYZE_CACHE_DIR
+    scanner.COINALYZE_CACHE_DIR = os.path.join(data_dir, 'coinalyze')
+    external: Dict[str, Any] = {}
+    try:
+        with _timed('load_coinalyze', timings):
+            for path, _, _ in frames:
+                symbol = scanner.extract_symbol_from_filename(path)
+                exchange = scanner.extract_exchange_from_filename(path)
+                external[path] = scanner.load_coinalyze_data_from_cache(symbol, exchange)
+    finally:
+        scanner.COINALYZE_CACHE_DIR = previous_cache_dir
+
+    report['candles_ltf'] = int(sum(len(f[1]) for f in frames))
+    report['candles_htf'] = int(sum(len(f[2]) for f in frames if f[2] is not None))
+
+    try:
+        import pandas_ta  # noqa: F401
+        analysis_available = True
+    except ImportError:
+        analysis_available = False
+
+    if skip_analysis or not analysis_available:
+        report['analysis'] = 'skipped' if skip_analysis else 'unavailable (pandas_ta not installed)'
+    else:
+        strategies = scanner.build_strategies(strategy, {})
+        factory = scanner.FeatureFactory(scanner.build_feature_config({}))
+        signals = 0
+        with _timed('analyze', timings):
+            for path, df_ltf, df_htf in frames:
+                results = scanner.analyze_symbol(
+                    symbol=scanner.extract_symbol_from_filename(path),
+                    exchange=scanner.extract_exchange_from_filename(path),
+                    df_ltf=df_ltf,
+                    df_htf=df_htf if df_htf is not None and len(df_htf) >= 50 else None,
+                    strategies=strategies,
+                    feature_factory=factory,
+                    metadata={'mcap': 0},
+                    external_data=external[path]
+                )
+                signals += len(results)
+        report['signals'] = signals
+        report['analysis'] = 'ok'
+
+    if memory_sample > 0 and ltf_files:
+        report['memory'] = measure_context_memory(
+            ltf_files[:memory_sample], external, strategy,
+            with_indicators=analysis_available and not skip_analysis
+        )
+
+    total = sum(timings.values())
+    timings['total'] = round(total, 4)
+    if report['symbols']:
+        report['ms_per_symbol'] = round(1000.0 * total / report['symbols'], 3)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='QuantPro scanner benchmark on a synthetic universe')
+    parser.add_argument('--data-dir', help='Existing universe directory (skips generation)', default=None)
+    parser.add_argument('--symbols', type=int, default=200, help='Synthetic symbols to generate')
+    parser.add_argument('--ltf-candles', type=int, default=1000, help='Candles per 15m file')
+    parser.add_argument('--htf-candles', type=int, default=1000, help='Candles per 4h file')
+    parser.add_argument('--model', choices=['gbm', 'regime'], default='regime', help='Price model')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--strategy', default='all', help='Strategy name (default: all)')
+    parser.add_argument('--limit', type=int, default=0, help='Limit number of symbols analyzed')
+    parser.add_argument('--skip-analysis', action='store_true', help='Only time I/O stages')
+    parser.add_argument('--memory-sample', type=int, default=50,
+                        help='Symbols used to measure context memory (0 = skip)')
+    parser.add_argument('--output', help='Write the JSON report to this file', default=None)
+    args = parser.parse_args()
+
+    if args.data_dir:
+        report = run_benchmark(args.data_dir, args.strategy, args.skip_analysis, args.limit, args.memory_sample)
+    else:
+        with tempfile.TemporaryDirectory(prefix='quantpro_bench_') as tmp:
+            start = time.perf_counter()
+            manifest = generate_universe(
+                tmp,
+                n_symbols=args.symbols,
+                ltf_candles=args.ltf_candles,
+                htf_candles=args.htf_candles,
+                seed=args.seed,
+                model=args.model,
+            )
+            gen_time = round(time.perf_counter() - start, 4)
+            report = run_benchmark(tmp, args.strategy, args.skip_analysis, args.limit, args.memory_sample)
+            report['generation'] = {'seconds': gen_time, 'seed': manifest['seed'], 'model': manifest['model']}
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
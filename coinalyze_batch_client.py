@@ -14,6 +14,9 @@ import sys
 from typing import Dict, List, Optional, Any
 from functools import wraps
 
+from coinalyze_http import base_url, get_session
+from coinalyze_rate_limiter import get_rate_limiter
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -28,24 +31,10 @@ def retry_with_backoff(max_retries=3, base_delay=2):
                     return func(*args, **kwargs)
                 except requests.exceptions.HTTPError as e:
                     if e.response.status_code == 429:
-                        # Rate limit - handle with Retry-After
+                        # Rate limit - the shared limiter already recorded Retry-After,
+                        # so the next attempt's acquire() waits it out (in every process)
                         retry_after = e.response.headers.get('Retry-After')
-                        if retry_after:
-                            try:
-                                # Convert string to float first to handle decimals like "57.366", then to int with safety buffer
-                                wait_time = int(float(retry_after)) + 1
-                                print(f"[RATE-LIMIT] 429 Detected. Waiting {wait_time}s as requested by API...", file=sys.stderr)
-                                time.sleep(wait_time)
-                            except (ValueError, TypeError) as parse_error:
-                                # Fallback to exponential backoff if Retry-After parsing fails
-                                wait_time = base_delay * (2 ** attempt)
-                                print(f"[RATE-LIMIT] 429 Detected (invalid Retry-After: '{retry_after}'). Waiting {wait_time}s (attempt {attempt+1}/{max_retries})...", file=sys.stderr)
-                                time.sleep(wait_time)
-                        else:
-                            # No Retry-After header, use exponential backoff
-                            wait_time = base_delay * (2 ** attempt)
-                            print(f"[RATE-LIMIT] 429 Detected (no Retry-After). Waiting {wait_time}s (attempt {attempt+1}/{max_retries})...", file=sys.stderr)
-                            time.sleep(wait_time)
+                        print(f"[RATE-LIMIT] 429 Detected (Retry-After: {retry_after}). Retrying after the limiter pause (attempt {attempt+1}/{max_retries})...", file=sys.stderr)
                         
                         if attempt == max_retries - 1:
                             raise
@@ -81,9 +70,8 @@ class CoinalyzeBatchClient:
     
     def __init__(self, api_key: str):
         self.api_key = api_key
-        self.base_url = "https://api.coinalyze.net/v1"
-        self.last_req_time = 0
-        self.req_interval = 1.5  # Rate limit: 40 requests/min = 1 req every 1.5s
+        self.base_url = base_url()
+        self.rate_limiter = get_rate_limiter()  # 40/min budget shared with every client and process
         self.cache_dir = "data/coinalyze_cache"
         self.cache_ttl = 3600  # 1 hour (3600 seconds)
         self.successful_requests = 0
@@ -91,14 +79,6 @@ class CoinalyzeBatchClient:
         
         os.makedirs(self.cache_dir, exist_ok=True)
     
-    def _wait_for_rate_limit(self):
-        """Enforce rate limit with adaptive spacing."""
-        elapsed = time.time() - self.last_req_time
-        if elapsed < self.req_interval:
-            wait_time = self.req_interval - elapsed
-            time.sleep(wait_time)
-        self.last_req_time = time.time()
-    
     def _get_cache_key(self, prefix: str, symbols: List[str], **kwargs) -> str:
         """Generate cache key for batch request."""
         symbols_str = ','.join(sorted(symbols))
@@ -161,7 +141,6 @@ class CoinalyzeBatchClient:
             return cached_data
         
         # Make batch API request
-        self._wait_for_rate_limit()
         endpoint = f"{self.base_url}/open-interest-history"
         params = {
             'symbols': ','.join(symbols),
@@ -227,7 +206,6 @@ class CoinalyzeBatchClient:
             return cached_data
         
         # Make batch API request
-        self._wait_for_rate_limit()
         endpoint = f"{self.base_url}/predicted-funding-rate"
         params = {
             'symbols': ','.join(symbols),
@@ -285,7 +263,6 @@ class CoinalyzeBatchClient:
             return cached_data
         
         # Make batch API request
-        self._wait_for_rate_limit()
         endpoint = f"{self.base_url}/long-short-ratio-history"
         params = {
             'symbols': ','.join(symbols),
@@ -361,7 +338,6 @@ class CoinalyzeBatchClient:
             return cached_data
         
         # Make batch API request
-        self._wait_for_rate_limit()
         endpoint = f"{self.base_url}/liquidation-history"
         params = {
             'symbols': ','.join(symbols),
@@ -447,7 +423,9 @@ class CoinalyzeBatchClient:
     @retry_with_backoff(max_retries=3, base_delay=2)
     def _make_request_with_retry(self, endpoint: str, params: dict) -> Optional[requests.Response]:
         """Make API request with retry logic and rate limit handling."""
-        response = requests.get(endpoint, params=params, timeout=30)
+        self.rate_limiter.acquire()  # Every attempt takes a slot; after a 429 this waits out Retry-After
+        response = get_session().get(endpoint, params=params, timeout=30)
+        self.rate_limiter.observe(response)
         response.raise_for_status()  # Raises HTTPError for bad status codes
         return response
     
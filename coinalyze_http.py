@@ -0,0 +1,119 @@
+"""
+Coinalyze HTTP - Pooled keep-alive session shared by every Coinalyze client
+
+CoinalyzeClient, CoinalyzeBatchClient and CoinalyzeResolver send their requests
+through one requests.Session per process:
+- keep-alive connections in a bounded urllib3 pool (POOL_SIZE per host), so
+  retries and consecutive calls reuse the TCP/TLS connection
+- gzip/deflate responses
+- per-request timing per endpoint, plus the number of connections opened
+
+The API base URL is COINALYZE_BASE_URL (default https://api.coinalyze.net/v1),
+so tests and benchmarks can point every client at a local stand-in server.
+
+    from coinalyze_http import base_url, get_session
+    response = get_session().get(f"{base_url()}/open-interest-history", params=params, timeout=30)
+"""
+
+import os
+import time
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scan_logging import get_logger
+
+logger = get_logger('http')
+
+DEFAULT_BASE_URL = "https://api.coinalyze.net/v1"
+POOL_SIZE = 8
+
+
+def base_url() -> str:
+    """Coinalyze API base URL (COINALYZE_BASE_URL or the public API)."""
+    return (os.environ.get('COINALYZE_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')
+
+
+class PooledSession:
+    """
+    requests.Session with a bounded keep-alive pool and request timings.
+
+    Retries stay with the callers (retry_with_backoff); the adapter never
+    retries on its own, so every attempt shows up in the stats.
+    """
+
+    def __init__(self, pool_size: int = POOL_SIZE):
+        self.session = requests.Session()
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                                   max_retries=0, pool_block=True)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Any] = {'requests': 0, 'errors': 0, 'total_ms': 0.0, 'endpoints': {}}
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        endpoint = urlparse(url).path.rsplit('/', 1)[-1] or '/'
+        started = time.perf_counter()
+        error = False
+        try:
+            response = self.session.get(url, **kwargs)
+            error = response.status_code >= 400
+            return response
+        except requests.exceptions.RequestException:
+            error = True
+            raise
+        finally:
+            self._record(endpoint, (time.perf_counter() - started) * 1000, error)
+
+    def _record(self, endpoint: str, elapsed_ms: float, error: bool):
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['errors'] += error
+            self.stats['total_ms'] += elapsed_ms
+            entry = self.stats['endpoints'].setdefault(endpoint, {'requests': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entry['requests'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+        logger.debug("[HTTP] %s %.1fms%s", endpoint, elapsed_ms, ' (error)' if error else '')
+
+    def connections_opened(self) -> int:
+        """TCP connections opened so far across all pooled hosts."""
+        pools = self.adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    def summary(self) -> Dict[str, Any]:
+        """Stats with averages, for logs and scan_status."""
+        with self._lock:
+            requests_made = self.stats['requests']
+            return {
+                'requests': requests_made,
+                'errors': self.stats['errors'],
+                'avg_ms': round(self.stats['total_ms'] / requests_made, 1) if requests_made else 0.0,
+                'connections': self.connections_opened(),
+                'endpoints': {name: {'requests': e['requests'], 'avg_ms': round(e['total_ms'] / e['requests'], 1),
+                                     'max_ms': round(e['max_ms'], 1)}
+                              for name, e in self.stats['endpoints'].items()}
+            }
+
+    def close(self):
+        self.session.close()
+
+
+# One session per process; a forked worker must not share its parent's sockets
+_session: Optional[PooledSession] = None
+_session_pid: Optional[int] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> PooledSession:
+    """The process-wide pooled session (recreated after fork)."""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = PooledSession()
+            _session_pid = os.getpid()
+        return _session
@@ -0,0 +1,208 @@
+"""
+Coinalyze Rate Limiter - Header-driven request budget shared across processes
+
+Coinalyze allows 40 requests per minute per API key. Instead of a fixed sleep
+per client, every request takes a slot from one budget stored in a SQLite row
+(data/coinalyze_rate_limit.db), so scan workers, the batch client and
+standalone scripts running at the same time share the key's quota:
+
+- remaining/reset come from the response headers when the API sends them
+  (X-RateLimit-Remaining / X-RateLimit-Reset, or the RateLimit-* draft names),
+  so usage by other consumers of the key is picked up too; otherwise the
+  limiter counts its own requests per window
+- the remaining budget is paced over the time left in the window:
+  40 left with 60s to go is one request per 1.5s, 40 left with 10s to go is
+  one per 0.25s, 5 left with 60s to go is one per 12s
+- a 429 blocks every process until Retry-After has passed
+
+    limiter = get_rate_limiter()
+    limiter.acquire()
+    response = get_session().get(url, params=params, timeout=30)
+    limiter.observe(response)
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from scan_logging import get_logger
+
+logger = get_logger('ratelimit')
+
+DEFAULT_DB = os.path.join(os.path.dirname(__file__), 'data', 'coinalyze_rate_limit.db')
+DEFAULT_LIMIT = 40  # requests per window per API key
+DEFAULT_WINDOW = 60.0  # seconds
+DEFAULT_BACKOFF = 10.0  # 429 without a usable Retry-After
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS budget (
+    name TEXT PRIMARY KEY,
+    remaining INTEGER NOT NULL,
+    reset_at REAL NOT NULL,
+    next_at REAL NOT NULL DEFAULT 0,
+    blocked_until REAL NOT NULL DEFAULT 0
+);
+"""
+
+REMAINING_HEADERS = ('X-RateLimit-Remaining', 'RateLimit-Remaining')
+RESET_HEADERS = ('X-RateLimit-Reset', 'RateLimit-Reset')
+
+
+def _header(headers, names) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            logger.debug("[RATELIMIT] Ignoring %s: %r", name, value)
+    return None
+
+
+def parse_reset(value: float, now: float) -> float:
+    """Absolute reset time from a reset header: epoch seconds, epoch ms or seconds from now."""
+    if value > 1e12:
+        return value / 1000.0
+    if value > 1e9:
+        return value
+    return now + value
+
+
+class AdaptiveRateLimiter:
+    """
+    Request budget in one SQLite row, updated in BEGIN IMMEDIATE transactions.
+
+    acquire() blocks until a slot is available and takes it; observe() feeds
+    the response headers back. Both are safe across threads and processes.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB, limit: int = DEFAULT_LIMIT,
+                 window: float = DEFAULT_WINDOW, name: str = 'coinalyze'):
+        self.db_path = db_path
+        self.limit = limit
+        self.window = window
+        self.name = name
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self.stats: Dict[str, Any] = {'acquired': 0, 'waits': 0, 'waited_s': 0.0, 'throttled': 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened lazily (constructing a client must not touch data/) and per process
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None,
+                                         check_same_thread=False)
+            self._conn.executescript(SCHEMA)
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def _load(self, conn: sqlite3.Connection, now: float) -> Tuple[int, float, float, float]:
+        row = conn.execute('SELECT remaining, reset_at, next_at, blocked_until FROM budget WHERE name = ?',
+                           (self.name,)).fetchone()
+        if row is None:
+            return self.limit, now + self.window, 0.0, 0.0
+        return row
+
+    def _store(self, conn: sqlite3.Connection, remaining: int, reset_at: float, next_at: float,
+               blocked_until: float) -> None:
+        conn.execute('INSERT OR REPLACE INTO budget (name, remaining, reset_at, next_at, blocked_until) '
+                     'VALUES (?, ?, ?, ?, ?)', (self.name, remaining, reset_at, next_at, blocked_until))
+
+    def try_acquire(self, now: Optional[float] = None) -> float:
+        """Take a slot and return 0, or return the seconds to wait before trying again."""
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            remaining, reset_at, next_at, blocked_until = self._load(conn, now)
+            if now < blocked_until:
+                return blocked_until - now
+            if now >= reset_at:
+                remaining, reset_at = self.limit, now + self.window
+            if remaining <= 0:
+                return reset_at - now
+            if now < next_at:
+                return next_at - now
+            # Spread what is left of the budget over what is left of the window
+            next_at = now + (reset_at - now) / remaining
+            self._store(conn, remaining - 1, reset_at, next_at, blocked_until)
+        return 0.0
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+            waited += wait
+        self.stats['acquired'] += 1
+        if waited:
+            self.stats['waits'] += 1
+            self.stats['waited_s'] += waited
+            logger.debug("[RATELIMIT] Waited %.2fs for a request slot", waited)
+        return waited
+
+    def observe(self, response, now: Optional[float] = None) -> None:
+        """Update the shared budget from a response's status and rate-limit headers."""
+        now = time.time() if now is None else now
+        headers = response.headers
+        header_remaining = _header(headers, REMAINING_HEADERS)
+        header_reset = _header(headers, RESET_HEADERS)
+        throttled = response.status_code == 429
+        if header_remaining is None and header_reset is None and not throttled:
+            return
+
+        with self._transaction() as conn:
+            remaining, reset_at, next_at, blocked_until = self._load(conn, now)
+            if header_reset is not None:
+                reset_at = parse_reset(header_reset, now)
+            if header_remaining is not None:
+                remaining = int(header_remaining)
+            if remaining > 0 and reset_at > now:
+                # Re-pace from the authoritative budget rather than the local estimate
+                next_at = now + (reset_at - now) / remaining
+            if throttled:
+                retry_after = _header(headers, ('Retry-After',))
+                blocked_until = max(blocked_until, now + (retry_after if retry_after is not None else DEFAULT_BACKOFF))
+                remaining = 0
+                # Without a reset header, Retry-After is the only reset time we know
+                reset_at = blocked_until if header_reset is None else max(reset_at, blocked_until)
+            self._store(conn, remaining, reset_at, next_at, blocked_until)
+
+        if throttled:
+            self.stats['throttled'] += 1
+            logger.warning("[RATELIMIT] 429 from Coinalyze, all clients paused for %.1fs", blocked_until - now)
+
+    def summary(self) -> Dict[str, Any]:
+        return {**self.stats, 'waited_s': round(self.stats['waited_s'], 2)}
+
+
+# One limiter per process; the budget itself lives in the database
+_limiter: Optional[AdaptiveRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """The process-wide limiter (COINALYZE_RATE_LIMIT_DB or data/coinalyze_rate_limit.db)."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = AdaptiveRateLimiter(os.environ.get('COINALYZE_RATE_LIMIT_DB') or DEFAULT_DB)
+        return _limiter
@@ -2,19 +2,41 @@
 Coinalyze Symbol Resolver
 Fetches and caches the official symbol mappings from Coinalyze API.
 Provides intelligent fallback to aggregated symbols when exchange-specific data is unavailable.
+
+The future-markets payload is compiled once into an index keyed by normalized
+local symbol, then by exchange name ('*' for the aggregated symbol):
+
+    {"BTCUSDT": {"MEXC": "BTCUSDT.6", "BINANCE": "BTCUSDT.4", "*": "BTCUSDT_PERP.A"}}
+
+It is persisted compactly in INDEX_FILE. The legacy CACHE_FILE written by the
+Node resolver (server/coinalyzeResolver.js) is compiled if no fresh index
+exists. resolve() results are memoized per (symbol, exchange) until the index
+is rebuilt, so the batch processor and get_batch_symbols don't redo lookups.
 """
 
 import os
 import json
 import time
-import requests
-from typing import Dict, Optional, Tuple
+from typing import Dict, Optional, Tuple, List, Any
 from pathlib import Path
 from dotenv import load_dotenv
 
+from scan_logging import get_logger
+from coinalyze_http import base_url as default_base_url, get_session
+
 # Load environment variables
 load_dotenv()
 
+logger = get_logger('resolver')
+
+INDEX_VERSION = 1
+AGGREGATED = '*'
+
+
+def normalize_symbol(symbol: str) -> str:
+    """Local symbol as used in the index (KuCoin's XBTUSDTM -> XBTUSDT)."""
+    return symbol.upper().replace('USDTM', 'USDT')
+
 
 class CoinalyzeResolver:
     """
@@ -26,9 +48,9 @@ class CoinalyzeResolver:
     3. Neutral (no data available)
     """
     
-    CACHE_FILE = "data/coinalyze_symbols.json"
+    CACHE_FILE = "data/coinalyze_symbols.json"  # Node resolver format (read-only here)
+    INDEX_FILE = "data/coinalyze_symbol_index.json"
     CACHE_DURATION = 24 * 60 * 60  # 24 hours in seconds
-    API_URL = "https://api.coinalyze.net/v1/future-markets"
     
     # Exchange ID mapping (from Coinalyze docs)
     EXCHANGE_IDS = {
@@ -43,63 +65,115 @@ class CoinalyzeResolver:
         'BITMEX': '.1'
     }
     
-    def __init__(self):
-        self.symbol_map: Dict[str, Dict] = {}
-        self.aggregated_symbols: Dict[str, str] = {}
-        self.exchange_symbols: Dict[str, Dict[str, str]] = {}
+    def __init__(self, index_file: Optional[str] = None, cache_file: Optional[str] = None,
+                 base_url: Optional[str] = None):
+        self.index_file = index_file or self.INDEX_FILE
+        self.cache_file = cache_file or self.CACHE_FILE
+        self.api_url = f"{(base_url or default_base_url()).rstrip('/')}/future-markets"
+        self.index: Dict[str, Dict[str, str]] = {}
         self.cache_timestamp: Optional[float] = None
+        self._memo: Dict[Tuple[str, str], Tuple[Optional[str], str]] = {}
         
         # Load from cache if available
         self._load_cache()
     
-    def _load_cache(self) -> bool:
-        """Load symbol mappings from cache if valid."""
-        if not os.path.exists(self.CACHE_FILE):
-            return False
-        
+    @classmethod
+    def compile_index(cls, markets: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+        """Index of a future-markets payload: normalized symbol -> exchange name (or '*') -> symbol."""
+        exchange_names = {suffix: name for name, suffix in cls.EXCHANGE_IDS.items()}
+        index: Dict[str, Dict[str, str]] = {}
+        for market in markets:
+            symbol = market.get('symbol', '')
+            base = market.get('base_asset', '')
+            quote = market.get('quote_asset', '')
+            if not symbol or not base:
+                continue
+            entry = index.setdefault(normalize_symbol(f"{base}{quote}" if quote else base), {})
+            if symbol.endswith('.A'):
+                entry[AGGREGATED] = symbol
+                continue
+            code = str(market.get('exchange') or symbol.rpartition('.')[2])
+            name = exchange_names.get(code if code.startswith('.') else f".{code}")
+            if name:
+                entry[name] = symbol
+        return index
+    
+    @classmethod
+    def index_from_legacy(cls, aggregated_symbols: Dict[str, str],
+                          exchange_symbols: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+        """Index of the Node resolver's {aggregated_symbols, exchange_symbols} cache."""
+        exchange_names = {suffix: name for name, suffix in cls.EXCHANGE_IDS.items()}
+        index: Dict[str, Dict[str, str]] = {}
+        for normalized, by_exchange in exchange_symbols.items():
+            for exchange_id, symbol in by_exchange.items():
+                name = exchange_names.get(exchange_id)
+                if name:
+                    index.setdefault(normalize_symbol(normalized), {})[name] = symbol
+        for normalized, symbol in aggregated_symbols.items():
+            index.setdefault(normalize_symbol(normalized), {})[AGGREGATED] = symbol
+        return index
+    
+    def _set_index(self, index: Dict[str, Dict[str, str]], timestamp: Optional[float]):
+        self.index = index
+        self.cache_timestamp = timestamp
+        self._memo.clear()
+    
+    def _read_fresh(self, path: str) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(path):
+            return None
         try:
-            with open(self.CACHE_FILE, 'r') as f:
+            with open(path, 'r') as f:
                 cache_data = json.load(f)
-            
-            cache_age = time.time() - cache_data.get('timestamp', 0)
-            
-            if cache_age < self.CACHE_DURATION:
-                self.symbol_map = cache_data.get('symbol_map', {})
-                self.aggregated_symbols = cache_data.get('aggregated_symbols', {})
-                self.exchange_symbols = cache_data.get('exchange_symbols', {})
-                self.cache_timestamp = cache_data.get('timestamp')
-                
-                print(f"[RESOLVER] Loaded {len(self.symbol_map)} symbols from cache (age: {cache_age/3600:.1f}h)")
-                return True
-            else:
-                print(f"[RESOLVER] Cache expired (age: {cache_age/3600:.1f}h)")
-                return False
-        
         except Exception as e:
-            print(f"[RESOLVER] Failed to load cache: {e}")
-            return False
+            logger.warning("[RESOLVER] Failed to load cache %s: %s", path, e)
+            return None
+        # The Node resolver writes milliseconds
+        timestamp = cache_data.get('timestamp', 0) or 0
+        cache_data['timestamp'] = timestamp / 1000 if timestamp > 1e11 else timestamp
+        cache_age = time.time() - cache_data['timestamp']
+        if cache_age >= self.CACHE_DURATION:
+            logger.debug("[RESOLVER] Cache %s expired (age: %.1fh)", path, cache_age/3600)
+            return None
+        return cache_data
+    
+    def _load_cache(self) -> bool:
+        """Load the compiled index, or compile the legacy cache, if fresh."""
+        cache_data = self._read_fresh(self.index_file)
+        if cache_data is not None and cache_data.get('version') == INDEX_VERSION:
+            self._set_index(cache_data.get('index', {}), cache_data.get('timestamp'))
+            logger.debug("[RESOLVER] Loaded index of %s symbols", len(self.index))
+            return True
+        
+        cache_data = self._read_fresh(self.cache_file)
+        if cache_data is not None:
+            self._set_index(self.index_from_legacy(cache_data.get('aggregated_symbols', {}),
+                                                   cache_data.get('exchange_symbols', {})),
+                            cache_data.get('timestamp'))
+            logger.debug("[RESOLVER] Compiled %s symbols from legacy cache", len(self.index))
+            self._save_cache()
+            return True
+        return False
     
     def _save_cache(self):
-        """Save symbol mappings to cache."""
+        """Save the compiled index (compact JSON)."""
         try:
-            os.makedirs(os.path.dirname(self.CACHE_FILE), exist_ok=True)
+            os.makedirs(os.path.dirname(self.index_file) or '.', exist_ok=True)
             
             cache_data = {
-                'timestamp': time.time(),
-                'symbol_map': self.symbol_map,
-                'aggregated_symbols': self.aggregated_symbols,
-                'exchange_symbols': self.exchange_symbols
+                'version': INDEX_VERSION,
+                'timestamp': self.cache_timestamp or time.time(),
+                'index': self.index
             }
             
-            temp_file = self.CACHE_FILE + '.tmp'
+            temp_file = f"{self.index_file}.{os.getpid()}.tmp"
             with open(temp_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
+                json.dump(cache_data, f, separators=(',', ':'))
             
-            os.replace(temp_file, self.CACHE_FILE)
-            print(f"[RESOLVER] Saved {len(self.symbol_map)} symbols to cache")
+            os.replace(temp_file, self.index_file)
+            logger.debug("[RESOLVER] Saved index of %s symbols", len(self.index))
         
         except Exception as e:
-            print(f"[RESOLVER] Failed to save cache: {e}")
+            logger.warning("[RESOLVER] Failed to save cache: %s", e)
     
     def fetch_symbols(self) -> bool:
         """
@@ -109,52 +183,20 @@ class CoinalyzeResolver:
         try:
             api_key = os.environ.get('COINALYZE_API_KEY')
             if not api_key:
-                print(f"[RESOLVER] No API key found, cannot fetch symbols")
+                logger.warning("[RESOLVER] No API key found, cannot fetch symbols")
                 return False
             
-            print(f"[RESOLVER] Fetching symbols from {self.API_URL}")
+            logger.debug("[RESOLVER] Fetching symbols from %s", self.api_url)
             
             headers = {'api_key': api_key}
-            response = requests.get(self.API_URL, headers=headers, timeout=30)
+            response = get_session().get(self.api_url, headers=headers, timeout=30)
             response.raise_for_status()
             
             markets = response.json()
-            print(f"[RESOLVER] Received {len(markets)} markets from API")
+            logger.debug("[RESOLVER] Received %s markets from API", len(markets))
             
-            # Process markets
-            for market in markets:
-                symbol = market.get('symbol', '')
-                base = market.get('base_asset', '')
-                quote = market.get('quote_asset', '')
-                exchange_id = market.get('exchange', '')
-                
-                if not symbol or not base:
-                    continue
-                
-                # Build normalized base symbol (e.g., BTCUSDT)
-                normalized = f"{base}{quote}" if quote else base
-                
-                # Store full market info
-                self.symbol_map[symbol] = {
-                    'symbol': symbol,
-                    'base': base,
-                    'quote': quote,
-                    'normalized': normalized,
-                    'exchange_id': exchange_id
-                }
-                
-                # Track aggregated symbols (suffix .A)
-                if symbol.endswith('.A'):
-                    self.aggregated_symbols[normalized] = symbol
-                
-                # Track exchange-specific symbols
-                if exchange_id:
-                    if normalized not in self.exchange_symbols:
-                        self.exchange_symbols[normalized] = {}
-                    self.exchange_symbols[normalized][exchange_id] = symbol
-            
-            print(f"[RESOLVER] Processed {len(self.aggregated_symbols)} aggregated symbols")
-            print(f"[RESOLVER] Processed {len(self.exchange_symbols)} unique base symbols")
+            self._set_index(self.compile_index(markets), time.time())
+            logger.debug("[RESOLVER] Compiled %s unique base symbols", len(self.index))
             
             # Save to cache
             self._save_cache()
@@ -162,7 +204,7 @@ class CoinalyzeResolver:
             return True
         
         except Exception as e:
-            print(f"[RESOLVER] Failed to fetch symbols: {e}")
+            logger.warning("[RESOLVER] Failed to fetch symbols: %s", e)
             return False
     
     def resolve(self, symbol: str, exchange: str) -> Tuple[Optional[str], str]:
@@ -177,24 +219,22 @@ class CoinalyzeResolver:
             Tuple of (coinalyze_symbol, status)
             status: "resolved" | "aggregated" | "neutral"
         """
-        # Normalize symbol (remove common suffixes)
-        normalized = symbol.upper().replace('USDT', 'USDT').replace('USDTM', 'USDT')
-        exchange_upper = exchange.upper()
-        
-        # Priority 1: Exchange-specific symbol
-        exchange_id = self.EXCHANGE_IDS.get(exchange_upper)
-        if exchange_id and normalized in self.exchange_symbols:
-            if exchange_id in self.exchange_symbols[normalized]:
-                coinalyze_symbol = self.exchange_symbols[normalized][exchange_id]
-                return coinalyze_symbol, "resolved"
-        
-        # Priority 2: Aggregated symbol
-        if normalized in self.aggregated_symbols:
-            coinalyze_symbol = self.aggregated_symbols[normalized]
-            return coinalyze_symbol, "aggregated"
+        key = (symbol, exchange)
+        result = self._memo.get(key)
+        if result is not None:
+            return result
         
-        # Priority 3: Neutral (no data)
-        return None, "neutral"
+        entry = self.index.get(normalize_symbol(symbol))
+        if entry is None:
+            result = None, "neutral"
+        elif exchange.upper() in entry:
+            result = entry[exchange.upper()], "resolved"
+        elif AGGREGATED in entry:
+            result = entry[AGGREGATED], "aggregated"
+        else:
+            result = None, "neutral"
+        self._memo[key] = result
+        return result
     
     def resolve_batch(self, symbols: list) -> Dict[str, Tuple[Optional[str], str]]:
         """
@@ -204,7 +244,7 @@ class CoinalyzeResolver:
             symbols: List of (symbol, exchange) tuples
         
         Returns:
-            Dict mapping (symbol, exchange) -> (coinalyze_symbol, status)
+            Dict mapping "{symbol}_{exchange}" -> (coinalyze_symbol, status)
         """
         results = {}
         for symbol, exchange in symbols:
@@ -257,7 +297,7 @@ class CoinalyzeResolver:
         Returns:
             True if initialized successfully, False otherwise.
         """
-        if self.symbol_map:
+        if self.index:
             return True
         
         # Try to load from cache
@@ -0,0 +1,190 @@
+"""
+Compact Context - Low-memory storage for warm SharedContexts.
+
+A SharedContext keeps both candle DataFrames plus a float64 pandas Series per
+indicator over the full history, while strategies only read the last
+50-150 values. When thousands of contexts stay resident (live mode, parallel
+workers) CompactContext stores the same data as:
+
+- a __slots__ dataclass per context and per timeframe (no per-instance dict)
+- timestamps as an int64 array, candle prices and volume as float64 arrays
+- indicators as float32 arrays
+- only a tail window per timeframe, sized from the strategies' declared
+  `history_lookback` and the RSI trendline lookback (required_lookback)
+
+Strategies still consume a SharedContext: to_shared_context() materializes a
+short-lived pandas view (float64, RangeIndex) of the window for one analysis.
+Index-valued output fields (candle_index, trendline pivot indices) are
+relative to the window instead of the full history: stored RSI trendlines are
+re-based onto the window (shift_trendlines), so projecting a line at the last
+window index gives the same RSI as at the last full-history index.
+"""
+
+import copy
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from shared_context import SharedContext
+
+
+CANDLE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# Fewer values than this and RSI trendline detection returns nothing
+MIN_TRENDLINE_HISTORY = 50
+
+
+def shift_trendlines(trendlines: Dict[str, Any], shift: int) -> Dict[str, Any]:
+    """
+    RSI trendlines re-based after dropping the first `shift` rows: pivot, touch
+    and projection indices move back by `shift`, intercepts move to the new
+    origin. Returns a copy.
+    """
+    shifted = copy.deepcopy(trendlines)
+    for line in shifted.values():
+        if not isinstance(line, dict) or 'slope' not in line:
+            continue
+        slope = line['slope']
+        line['intercept'] = float(line['intercept'] + slope * shift)
+        line['equation'] = f"y = {slope:.4f}x + {line['intercept']:.2f}"
+        for pivot in ('pivot_1', 'pivot_2'):
+            if pivot in line:
+                line[pivot]['index'] -= shift
+        line['touch_indices'] = [idx - shift for idx in line.get('touch_indices', [])]
+        if isinstance(line.get('reverse_rsi'), dict) and 'projection_index' in line['reverse_rsi']:
+            line['reverse_rsi']['projection_index'] -= shift
+    return shifted
+
+
+@dataclass(slots=True)
+class CompactFrame:
+    """Tail window of one timeframe: candles, float32 indicators and non-series extras."""
+    timestamp: np.ndarray
+    candles: Dict[str, np.ndarray]
+    indicators: Dict[str, np.ndarray] = field(default_factory=dict)
+    extras: Dict[str, Any] = field(default_factory=dict)  # e.g. rsi_trendlines
+    window: int = 0
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.timestamp, *self.candles.values(), *self.indicators.values()]
+        return int(sum(a.nbytes for a in arrays))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, indicators: Dict[str, Any], window: int,
+                   dtype=np.float32) -> 'CompactFrame':
+        tail = df.iloc[-window:] if window and len(df) > window else df
+        n = len(tail)
+        # Copies: a view would keep the full-history buffer alive
+        timestamp = (np.array(tail['timestamp'].to_numpy(), dtype=np.int64) if 'timestamp' in tail.columns
+                     else np.arange(n, dtype=np.int64))
+        candles = {c: np.array(tail[c].to_numpy(), dtype=np.float64) for c in CANDLE_COLUMNS if c in tail.columns}
+        series, extras = {}, {}
+        for key, value in indicators.items():
+            if isinstance(value, pd.Series):
+                # Indicators share the frame's index: take the same tail
+                series[key] = np.array(value.to_numpy()[len(value) - n:], dtype=dtype)
+            else:
+                extras[key] = value
+        # Strategies project trendlines at the last row position: re-base them
+        # by the rows that fell off the front of the window
+        dropped = len(df) - n
+        if dropped and extras.get('rsi_trendlines'):
+            extras['rsi_trendlines'] = shift_trendlines(extras['rsi_trendlines'], dropped)
+        return cls(timestamp=timestamp, candles=candles, indicators=series, extras=extras, window=n)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({'timestamp': self.timestamp, **self.candles})
+
+    def to_indicators(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {k: pd.Series(v, dtype=np.float64) for k, v in self.indicators.items()}
+        out.update(self.extras)
+        return out
+
+
+@dataclass(slots=True)
+class CompactContext:
+    """Compact, window-limited counterpart of SharedContext."""
+    symbol: str
+    canonical_symbol: str
+    exchange: str
+    ltf: CompactFrame
+    htf: Optional[CompactFrame] = None
+    external_data: Dict[str, Any] = field(default_factory=dict)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    config: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in NumPy arrays (candles + indicators)."""
+        return self.ltf.nbytes + (self.htf.nbytes if self.htf is not None else 0)
+
+    def frame(self, timeframe: str) -> Optional[CompactFrame]:
+        return self.ltf if timeframe == 'ltf' else self.htf
+
+    def to_shared_context(self) -> SharedContext:
+        """Materialize a SharedContext over the stored windows for strategy execution."""
+        return SharedContext(
+            symbol=self.symbol,
+            canonical_symbol=self.canonical_symbol,
+            exchange=self.exchange,
+            ltf_data=self.ltf.to_frame(),
+            htf_data=self.htf.to_frame() if self.htf is not None else None,
+            ltf_indicators=self.ltf.to_indicators(),
+            htf_indicators=self.htf.to_indicators() if self.htf is not None else {},
+            external_data=self.external_data,
+            metadata=self.metadata,
+            config=self.config
+        )
+
+
+def required_lookback(strategies: List[Any], config: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Candles each timeframe must keep for `strategies`: the largest declared
+    `history_lookback`, and at least the RSI trendline lookback. 0 means the
+    full history (a strategy without a declaration).
+    """
+    trendline = max(MIN_TRENDLINE_HISTORY, int(config.get('rsi_trendline_lookback', 100)))
+    window = {'ltf': trendline, 'htf': trendline}
+    for strategy in strategies:
+        declared = getattr(strategy, 'history_lookback', None)
+        if declared is None:
+            return {'ltf': 0, 'htf': 0}
+        for timeframe in window:
+            window[timeframe] = max(window[timeframe], int(declared.get(timeframe, 0)))
+    return window
+
+
+def compact_context(context: SharedContext, window: Dict[str, int], dtype=np.float32) -> CompactContext:
+    """Compact a built SharedContext to per-timeframe tail windows."""
+    htf = None
+    if context.has_htf_data():
+        htf = CompactFrame.from_frame(context.htf_data, context.htf_indicators, window.get('htf', 0), dtype)
+    return CompactContext(
+        symbol=context.symbol,
+        canonical_symbol=context.canonical_symbol,
+        exchange=context.exchange,
+        ltf=CompactFrame.from_frame(context.ltf_data, context.ltf_indicators, window.get('ltf', 0), dtype),
+        htf=htf,
+        external_data=context.external_data,
+        metadata=context.metadata,
+        config=context.config
+    )
+
+
+def shared_context_nbytes(context: SharedContext) -> int:
+    """Bytes held by a SharedContext's DataFrames and indicator Series (deep)."""
+    total = 0
+    for df in (context.ltf_data, context.htf_data):
+        if df is not None:
+            total += int(df.memory_usage(deep=True).sum())
+    for indicators in (context.ltf_indicators, context.htf_indicators):
+        for value in indicators.values():
+            if isinstance(value, pd.Series):
+                total += int(value.memory_usage(deep=True))
+    return total
@@ -0,0 +1,17 @@
+"""
+Shared pytest fixtures.
+
+The Coinalyze rate limiter keeps its request budget in a SQLite file under
+data/ by default; tests get their own file so the suite never writes into the
+checkout.
+"""
+
+import pytest
+
+import coinalyze_rate_limiter
+
+
+@pytest.fixture(autouse=True)
+def isolated_rate_limit_db(tmp_path, monkeypatch):
+    monkeypatch.setenv('COINALYZE_RATE_LIMIT_DB', str(tmp_path / 'coinalyze_rate_limit.db'))
+    monkeypatch.setattr(coinalyze_rate_limiter, '_limiter', None)
@@ -1,6 +1,6 @@
-import requests
 import time
-import logging
+import math
+import threading
 
 # Configure logging
 import logging
@@ -8,18 +8,100 @@ import json
 import os
 import hashlib
 
+from coinalyze_http import base_url, get_session
+from coinalyze_rate_limiter import get_rate_limiter
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+BUCKET_SECONDS = 900  # Request windows end on the last 15-minute boundary
+OI_WINDOW_HOURS = 48  # Canonical OI history window; longer requests round up to whole days
+LIQ_WINDOW_HOURS = 4
+
+
+class RequestCoalescer:
+    """
+    In-process memo + single-flight for parsed Coinalyze results.
+
+    get(bucket, key, fetch) returns the memoized value of `key`, or runs fetch()
+    once while concurrent callers of the same key wait for its result. Failed
+    fetches (None) are memoized too, so one bad symbol costs one request per
+    bucket rather than one per caller. Everything is dropped when the 15-minute
+    bucket moves on, which bounds the memo to the requests of one scan.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bucket = None
+        self._values = {}
+        self._inflight = {}
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+
+    def get(self, bucket, key, fetch):
+        while True:
+            with self._lock:
+                if bucket != self._bucket:
+                    self._bucket = bucket
+                    self._values.clear()
+                if key in self._values:
+                    self.stats['hits'] += 1
+                    return self._values[key]
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    self.stats['misses'] += 1
+                    break
+                self.stats['coalesced'] += 1
+            # Another thread is fetching this key; if it raised, retry as the fetcher
+            event.wait()
+
+        try:
+            value = fetch()
+            with self._lock:
+                if bucket == self._bucket:
+                    self._values[key] = value
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+# Shared by every CoinalyzeClient in the process (shared_context builds one per symbol)
+_shared_coalescer = RequestCoalescer()
+
+
+def _parse_history(data, fields):
+    """History rows of a Coinalyze response: [{'symbol', 'history': [...]}] or a flat list."""
+    if not isinstance(data, list) or len(data) == 0:
+        return []
+    first_item = data[0]
+    if 'history' in first_item:
+        rows = first_item['history']
+    elif all(field in first_item for field in fields):
+        rows = data
+    else:
+        return []
+    try:
+        return [{'t': int(row['t']), **{field: float(row.get(field, 0)) for field in fields}} for row in rows]
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning(f"Coinalyze history parse error: {e}")
+        return []
+
+
 class CoinalyzeClient:
-    def __init__(self, api_key):
+    def __init__(self, api_key, coalescer=None):
         self.api_key = api_key
-        self.base_url = "https://api.coinalyze.net/v1"
-        self.last_req_time = 0
-        self.req_interval = 2.2  # Slightly increased to be safer (limit is 40/min)
+        self.base_url = base_url()
+        self.rate_limiter = get_rate_limiter()  # 40/min budget shared with every client and process
         self.cache_dir = "data/coinalyze_cache"
         self.cache_ttl = 900  # 15 minutes in seconds
+        self.coalescer = coalescer or _shared_coalescer
 
         # Ensure cache directory exists
         if not os.path.exists(self.cache_dir):
@@ -40,13 +122,13 @@ class CoinalyzeClient:
         path = os.path.join(self.cache_dir, filename)
         if not os.path.exists(path):
             return None
-            
+
         try:
             # Check modification time
             mtime = os.path.getmtime(path)
             if (time.time() - mtime) > self.cache_ttl:
                 return None # Expired
-                
+
             with open(path, 'r') as f:
                 return json.load(f)
         except Exception as e:
@@ -63,12 +145,45 @@ class CoinalyzeClient:
             logger.warning(f"Cache Write Error ({filename}): {e}")
 
 
-    def _wait_for_rate_limit(self):
-        """Enforce rate limit by sleeping if needed."""
-        elapsed = time.time() - self.last_req_time
-        if elapsed < self.req_interval:
-            time.sleep(self.req_interval - elapsed)
-        self.last_req_time = time.time()
+    def _request(self, path, params, label):
+        """Rate-limited GET; parsed JSON or None on any failure."""
+        self.rate_limiter.acquire()
+        try:
+            response = get_session().get(f"{self.base_url}/{path}", params={**params, 'api_key': self.api_key}, timeout=5)
+            self.rate_limiter.observe(response)
+            if response.status_code == 200:
+                return response.json()
+            logger.error(f"Coinalyze {label} Error {response.status_code}: {response.text}")
+        except Exception as e:
+            logger.error(f"Coinalyze {label} Request Failed: {e}")
+        return None
+
+    def _cached(self, prefix, mapped_symbol, to_ts, fetch, **params):
+        """
+        Parsed result for one canonical request: in-process memo (coalesced),
+        then the file cache, then the API. Only parsed values are stored.
+        """
+        def load():
+            cache_filename = self._get_cache_key(prefix, mapped_symbol, t=to_ts, **params)
+            cached_data = self._get_from_cache(cache_filename)
+            if cached_data is not None:
+                return cached_data
+            data = fetch()
+            if data is not None:
+                self._save_to_cache(cache_filename, data)
+            return data
+        key = (prefix, mapped_symbol, tuple(sorted(params.items())))
+        return self.coalescer.get(to_ts, key, load)
+
+    @staticmethod
+    def _bucket_end():
+        now = int(time.time())
+        return now - (now % BUCKET_SECONDS)
+
+    @staticmethod
+    def _map_interval(interval):
+        interval_map = {'15m': '15min', '1h': '1hour', '4h': '4hour'}
+        return interval_map.get(interval, interval)
 
     def convert_symbol(self, symbol):
         """
@@ -77,227 +192,87 @@ class CoinalyzeClient:
         """
         # Remove any existing suffix if present weirdly (e.g. from file)
         clean = symbol.upper().replace('.csv', '').replace('_15m', '')
-        
+
         # If it doesn't have suffix, append standard Binance Futures suffix
         if not clean.endswith('_PERP.A'):
             return f"{clean}_PERP.A"
         return clean
 
-    def get_open_interest_delta(self, symbol, interval='15m'):
+    def _oi_rows(self, symbol, hours, interval='15min'):
         """
-        Fetch Open Interest history and return % change over last 3 periods.
+        OI candles (t, o, c) of the last `hours` before the current bucket end.
+        Every window up to OI_WINDOW_HOURS is sliced from one canonical request.
         """
-        # Note: This method reuses get_open_interest_history logic implicitly or explicitly.
-        # But for now I'll wrap the existing logic with a simple cache since it doesn't call the other method?
-        # Actually, let's cache the RESULT of this calculation or the raw request?
-        # Raw request is better for reusability.
-        
-        # This method duplicates a lot of request logic. 
-        # For simplicity and robust caching, I will cache the RAW REQUEST response.
-        
         mapped_symbol = self.convert_symbol(symbol)
-        
-        # Map Interval
-        interval_map = {'15m': '15min', '1h': '1hour', '4h': '4hour'}
-        mapped_interval = interval_map.get(interval, interval)
-        if mapped_interval == '15m': mapped_interval = '15min'
-        
-        # Calculate 'from' timestamp (rounded to hour to improve cache hit rate?)
-        # No, 'from' depends on 'now'. This makes caching hard if 'now' changes every second.
-        # FIX: Align 'to_ts' to the nearest 15-minute block?
-        # If we align timestamps, we get cache hits.
-        
-        now = int(time.time())
-        # snap to previous 15m candle close
-        to_ts = now - (now % 900) 
-        from_ts = to_ts - 3600
-        
-        cache_filename = self._get_cache_key("oi_delta", mapped_symbol, interval=mapped_interval, t=to_ts)
-        cached_data = self._get_from_cache(cache_filename)
-        
-        data = None
-        if cached_data:
-             data = cached_data
-        else:
-             self._wait_for_rate_limit()
-             endpoint = f"{self.base_url}/open-interest-history"
-             params = {
+        to_ts = self._bucket_end()
+        window = max(OI_WINDOW_HOURS, math.ceil(hours / 24) * 24)
+
+        def fetch():
+            data = self._request('open-interest-history', {
                 'symbols': mapped_symbol,
-                'interval': mapped_interval,
-                'from': from_ts,
-                'to': to_ts,
-                'api_key': self.api_key
-             }
-             try:
-                response = requests.get(endpoint, params=params, timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    self._save_to_cache(cache_filename, data)
-                else:
-                    logger.error(f"Coinalyze API Error {response.status_code}: {response.text}")
-                    return None
-             except Exception as e:
-                logger.error(f"Coinalyze Request Failed: {e}")
-                return None
+                'interval': interval,
+                'from': to_ts - window * 3600,
+                'to': to_ts
+            }, 'OI Hist')
+            return None if data is None else _parse_history(data, ('o', 'c'))
 
-        # Process Data (unchanged logic)
-        try:
-             # Expected format processing...
-                
-
-            # Expected format: list of objects usually, or dict with history
-            # Let's assume standard response: [{t:..., o:..., h:..., l:..., c:...}, ...]
-            # or data[0].history...
-            
-            # To be safe against structure, let's look at the raw data returned in verify step.
-            # But standard implementation for now:
-            
-            # Correct Parsing Logic
-            history = []
-            if isinstance(data, list) and len(data) > 0:
-                first_item = data[0]
-                if 'history' in first_item:
-                    # Format: [{'symbol': '...', 'history': [...]}]
-                    history = first_item['history']
-                elif 'o' in first_item and 'c' in first_item:
-                    # Format: [{'t':..., 'o':...}, ...] (Flat list)
-                    history = data
-            
-            if not history or len(history) < 3:
-                return 0.0 # Not enough data
-                
-            # Recent OI Change
-            # Use 'c' (close) of OI candles? Usually OI is 'open interest' value.
-            # Coinalyze fields: t, o, h, l, c (OI values)
-            
-            latest_oi = float(history[-1]['c'])
-            start_oi = float(history[-3]['o']) # 3 candles ago Open
-            
-            if start_oi == 0: return 0.0
-            
-            delta_pct = ((latest_oi - start_oi) / start_oi) * 100
-            return delta_pct
-            
-        except Exception as e:
-            logger.error(f"Coinalyze Request Failed: {e}")
+        rows = self._cached("oi_history", mapped_symbol, to_ts, fetch, interval=interval, hours=window)
+        if rows is None:
+            return None
+        from_ts = to_ts - int(hours * 3600)
+        return [row for row in rows if row['t'] >= from_ts]
+
+    def get_open_interest_delta(self, symbol, interval='15m'):
+        """
+        Fetch Open Interest history and return % change over last 3 periods.
+        """
+        history = self._oi_rows(symbol, 1, self._map_interval(interval))
+        if history is None:
             return None
+        if len(history) < 3:
+            return 0.0 # Not enough data
+
+        # Coinalyze fields: t, o, h, l, c (OI values)
+        latest_oi = history[-1]['c']
+        start_oi = history[-3]['o'] # 3 candles ago Open
+
+        if start_oi == 0: return 0.0
+
+        delta_pct = ((latest_oi - start_oi) / start_oi) * 100
+        return delta_pct
 
     def get_liquidation_history(self, symbol, interval='15min', lookback=3):
         mapped_symbol = self.convert_symbol(symbol)
-        
-        # Align time to improve caching
-        now = int(time.time())
-        to_ts = now - (now % 900)
-        from_ts = to_ts - (3600 * 4)
-        
-        # Map Interval
-        interval_map = {'15m': '15min', '1h': '1hour', '4h': '4hour'}
-        mapped_interval = interval_map.get(interval, interval)
-        if mapped_interval == '15m': mapped_interval = '15min'
-
-        cache_filename = self._get_cache_key("liqs", mapped_symbol, interval=mapped_interval, t=to_ts)
-        cached_data = self._get_from_cache(cache_filename)
-        
-        data = None
-        if cached_data:
-            data = cached_data
-        else:
-            self._wait_for_rate_limit()
-            endpoint = f"{self.base_url}/liquidation-history"
-            params = {
+        mapped_interval = self._map_interval(interval)
+        to_ts = self._bucket_end()
+
+        def fetch():
+            data = self._request('liquidation-history', {
                 'symbols': mapped_symbol,
                 'interval': mapped_interval,
-                'from': from_ts,
-                'to': to_ts,
-                'api_key': self.api_key
-            }
-            try:
-                response = requests.get(endpoint, params=params, timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    self._save_to_cache(cache_filename, data)
-                else:
-                    logger.error(f"Coinalyze Liq API Error {response.status_code}: {response.text}")
-                    return None
-            except Exception as e:
-                logger.error(f"Coinalyze Liq Request Failed: {e}")
-                return None
-            
-            # Parsing Logic (Reuse OI pattern)
-            history = []
-            if isinstance(data, list) and len(data) > 0:
-                first_item = data[0]
-                if 'history' in first_item:
-                    history = first_item['history']
-                elif 'l' in first_item and 's' in first_item:
-                    history = data
-            
-            if not history: return None
-            
-            # Sum last N periods
-            # Data usually: [{'t':..., 'l': 123.4, 's': 456.7}, ...]
-            # 'l' = Long Liquidations (Price Drop pain)
-            # 's' = Short Liquidations (Price Pump pain)
-            
-            relevant = history[-lookback:]
-            total_longs = sum(float(item.get('l', 0)) for item in relevant)
-            total_shorts = sum(float(item.get('s', 0)) for item in relevant)
-            
-            return {'longs': total_longs, 'shorts': total_shorts}
-            
+                'from': to_ts - LIQ_WINDOW_HOURS * 3600,
+                'to': to_ts
+            }, 'Liq API')
+            return None if data is None else _parse_history(data, ('l', 's'))
 
+        history = self._cached("liq_history", mapped_symbol, to_ts, fetch, interval=mapped_interval)
+        if not history: return None
 
-    def get_open_interest_history(self, symbol, hours=24):
-        mapped_symbol = self.convert_symbol(symbol)
-        
-        now = int(time.time())
-        to_ts = now - (now % 900)
-        from_ts = to_ts - (int(hours) * 3600)
-        
-        cache_filename = self._get_cache_key("oi_hist", mapped_symbol, hours=hours, t=to_ts)
-        cached_data = self._get_from_cache(cache_filename)
-        
-        data = None
-        if cached_data:
-            data = cached_data
-        else:
-            self._wait_for_rate_limit()
-            endpoint = f"{self.base_url}/open-interest-history"
-            params = {
-                'symbols': mapped_symbol,
-                'interval': '15min',
-                'from': from_ts,
-                'to': to_ts,
-                'api_key': self.api_key
-            }
-            try:
-                response = requests.get(endpoint, params=params, timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    self._save_to_cache(cache_filename, data)
-                else:
-                    logger.error(f"Coinalyze OI Hist Error {response.status_code}: {response.text}")
-                    return None
-            except Exception as e:
-                logger.error(f"Coinalyze OI Hist Request Failed: {e}")
-                return None
-            history_data = []
-            
-            # Parsing Logic
-            if isinstance(data, list) and len(data) > 0:
-                first_item = data[0]
-                if 'history' in first_item:
-                    # Format: [{'t': 123, 'o':..., 'c':...}, ...]
-                    # We use 'c' (close) as the OI value
-                    for h in first_item['history']:
-                        history_data.append({
-                            'timestamp': h['t'],
-                            'value': float(h['c']) 
-                        })
-                        
-            return history_data
-            
+        # Sum last N periods
+        # 'l' = Long Liquidations (Price Drop pain)
+        # 's' = Short Liquidations (Price Pump pain)
+        relevant = history[-lookback:]
+        total_longs = sum(item['l'] for item in relevant)
+        total_shorts = sum(item['s'] for item in relevant)
 
+        return {'longs': total_longs, 'shorts': total_shorts}
+
+    def get_open_interest_history(self, symbol, hours=24):
+        rows = self._oi_rows(symbol, hours)
+        if rows is None:
+            return None
+        # We use 'c' (close) as the OI value
+        return [{'timestamp': row['t'], 'value': row['c']} for row in rows]
 
     def get_funding_rate(self, symbol):
         """
@@ -305,31 +280,15 @@ class CoinalyzeClient:
         """
         mapped_symbol = self.convert_symbol(symbol)
         # Predicted funding is usually very volatile, but 15m cache is likely acceptable for "filtering".
-        # If user wants STRICT LIVE funding, we might lower TTL for this specific call, or keep simple 15m.
         # Given the "Funding > 0.05%" rule, 15m old data is probably safe.
-        
-        cache_filename = self._get_cache_key("funding", mapped_symbol)
-        cached_data = self._get_from_cache(cache_filename)
-        
-        data = None
-        if cached_data:
-            data = cached_data
-        else:
-            self._wait_for_rate_limit()
-            endpoint = f"{self.base_url}/predicted-funding-rate"
-            try:
-                response = requests.get(endpoint, params={'symbols': mapped_symbol, 'api_key': self.api_key}, timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    self._save_to_cache(cache_filename, data)
-                else:
-                    return None
-            except:
-                return None
-            
-        if isinstance(data, list) and len(data) > 0:
-            return float(data[0].get('pf', 0))
-        return None
+
+        def fetch():
+            data = self._request('predicted-funding-rate', {'symbols': mapped_symbol}, 'Funding')
+            if isinstance(data, list) and len(data) > 0:
+                return float(data[0].get('pf', 0))
+            return None
+
+        return self._cached("funding_rate", mapped_symbol, self._bucket_end(), fetch)
 
     def get_ls_ratio_top_traders(self, symbol):
         """
@@ -337,52 +296,21 @@ class CoinalyzeClient:
         Returns float (e.g. 1.5) or None.
         """
         mapped_symbol = self.convert_symbol(symbol)
-        
-        now = int(time.time())
-        to_ts = now - (now % 900)
-        from_ts = to_ts - 3600
-        
-        cache_filename = self._get_cache_key("ls_top", mapped_symbol, t=to_ts)
-        cached_data = self._get_from_cache(cache_filename)
-        
-        data = None
-        if cached_data:
-            data = cached_data
-        else:
-            self._wait_for_rate_limit()
-            endpoint = f"{self.base_url}/long-short-ratio-history"
-            params = {
+        to_ts = self._bucket_end()
+
+        def fetch():
+            data = self._request('long-short-ratio-history', {
                 'symbols': mapped_symbol,
                 'interval': '15min',
-                'from': from_ts,
-                'to': to_ts,
-                'api_key': self.api_key
-            }
-            try:
-                response = requests.get(endpoint, params=params, timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    self._save_to_cache(cache_filename, data)
-                else:
-                    return None
-            except:
+                'from': to_ts - 3600,
+                'to': to_ts
+            }, 'L/S')
+            history = _parse_history(data, ('l', 's'))
+            if not history:
                 return None
-        
-        # Process Data
-        if data is None: return None
+            last = history[-1]
+            if last['s'] > 0:
+                return last['l'] / last['s']
+            return 1.0
 
-        try:
-            if isinstance(data, list) and len(data) > 0:
-                first = data[0] # Coinalyze returns list of objects
-                if 'history' in first:
-                    hist = first['history']
-                    if hist:
-                        last = hist[-1]
-                        l = float(last.get('l', 0))
-                        s = float(last.get('s', 0))
-                        if s > 0:
-                            return l / s
-                        return 1.0
-            return None
-        except:
-            return None
+        return self._cached("ls_ratio", mapped_symbol, to_ts, fetch)
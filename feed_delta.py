@@ -0,0 +1,350 @@
+"""
+Feed Delta - Versioned delta encoding of the master feed.
+
+Every directory scan still writes the full master_feed.json. In addition, the
+scanner publishes a numbered delta with only the signals that were added,
+changed or removed since the previous scan, plus a compacted snapshot every N
+versions. Consumers that are behind replay deltas (or load the latest snapshot
+first when the deltas they need have been pruned).
+
+Layout (default data/feed_deltas/):
+    index.json                 {seq, snapshot_seq, oldest_delta_seq, last_updated}
+    state.json                 {seq, hashes: {key: content hash}}  (writer only)
+    delta_00000042.json        {seq, prev_seq, last_updated, added, changed, removed[, order]}
+    snapshot_00000040.json     {seq, last_updated, signals}
+
+Signals are keyed by canonical_symbol + strategy_name + exchange.
+
+A delta carries `order` (every key, in feed order) whenever the order of the
+feed changed, e.g. a signal was added or removed. Readers sort by the last
+order they saw, so a replayed feed lists signals exactly like master_feed.json.
+"""
+
+import os
+import json
+import hashlib
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from json_encoder import dumps_bytes
+
+
+DEFAULT_DELTA_DIR = os.path.join(os.path.dirname(__file__), 'data', 'feed_deltas')
+DEFAULT_SNAPSHOT_EVERY = 20
+
+
+def signal_key(signal: Dict[str, Any]) -> str:
+    """Stable identity of a signal across scans."""
+    canonical = signal.get('canonical_symbol') or signal.get('symbol', 'UNKNOWN')
+    strategy = signal.get('strategy_name') or signal.get('strategy', 'Unknown')
+    exchange = signal.get('exchange', 'UNKNOWN')
+    return f"{canonical}|{strategy}|{exchange}"
+
+
+def encode_signals(signals: List[Dict[str, Any]]) -> List[bytes]:
+    """Encode each signal once; the parts feed both hashing and the master feed."""
+    return [dumps_bytes(signal) for signal in signals]
+
+
+def build_feed_bytes(last_updated: int, encoded_signals: List[bytes]) -> bytes:
+    """Assemble master feed JSON from pre-encoded signals without re-encoding them."""
+    return (
+        b'{"last_updated":' + str(int(last_updated)).encode() +
+        b',"signals":[' + b','.join(encoded_signals) + b']}'
+    )
+
+
+def _content_hash(encoded: bytes) -> str:
+    return hashlib.md5(encoded).hexdigest()
+
+
+def _order_hash(keys: List[str]) -> str:
+    return hashlib.md5('\n'.join(keys).encode()).hexdigest()
+
+
+def ordered_signals(signals_by_key: Dict[str, Dict[str, Any]], order: List[str]) -> List[Dict[str, Any]]:
+    """Signals in `order`; keys missing from it keep their map order at the end."""
+    listed = [signals_by_key[key] for key in order if key in signals_by_key]
+    if len(listed) == len(signals_by_key):
+        return listed
+    known = set(order)
+    return listed + [signal for key, signal in signals_by_key.items() if key not in known]
+
+
+def _atomic_write(path: str, payload: bytes) -> None:
+    temp_file = path + '.tmp'
+    with open(temp_file, 'wb') as f:
+        f.write(payload)
+    os.replace(temp_file, path)
+
+
+def _read_json(path: str, default=None):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def delta_path(delta_dir: str, seq: int) -> str:
+    return os.path.join(delta_dir, f"delta_{seq:08d}.json")
+
+
+def snapshot_path(delta_dir: str, seq: int) -> str:
+    return os.path.join(delta_dir, f"snapshot_{seq:08d}.json")
+
+
+class FeedDeltaWriter:
+    """
+    Computes and publishes feed deltas. Only content hashes of the previous
+    version are persisted, so the writer never has to re-read the old feed.
+    """
+
+    def __init__(self, delta_dir: str = DEFAULT_DELTA_DIR,
+                 snapshot_every: int = DEFAULT_SNAPSHOT_EVERY):
+        self.delta_dir = delta_dir
+        self.snapshot_every = max(1, int(snapshot_every))
+        os.makedirs(self.delta_dir, exist_ok=True)
+        self._state_file = os.path.join(self.delta_dir, 'state.json')
+        self._index_file = os.path.join(self.delta_dir, 'index.json')
+        self._state: Optional[Dict[str, Any]] = None
+
+    def publish(
+        self,
+        signals: List[Dict[str, Any]],
+        last_updated: int,
+        encoded_signals: Optional[List[bytes]] = None
+    ) -> Dict[str, Any]:
+        """
+        Publish the next version of the feed.
+
+        Args:
+            signals: Full signal list of this scan
+            last_updated: Feed timestamp (ms)
+            encoded_signals: Optional output of encode_signals(signals)
+
+        Returns:
+            Summary dict: seq, added, changed, removed, snapshot (bool)
+        """
+        if encoded_signals is None:
+            encoded_signals = encode_signals(signals)
+
+        prev_hashes: Dict[str, str] = self._load_state().get('hashes', {})
+        new_hashes: Dict[str, str] = {}
+        added: List[bytes] = []
+        changed: List[bytes] = []
+        for signal, encoded in zip(signals, encoded_signals):
+            key = signal_key(signal)
+            digest = _content_hash(encoded)
+            new_hashes[key] = digest
+            if key not in prev_hashes:
+                added.append(encoded)
+            elif prev_hashes[key] != digest:
+                changed.append(encoded)
+        removed = [key for key in prev_hashes if key not in new_hashes]
+
+        return self._commit(new_hashes, added, changed, removed, last_updated,
+                            lambda: encoded_signals, list(new_hashes))
+
+    def publish_changes(
+        self,
+        upserts: List[Dict[str, Any]],
+        last_updated: int,
+        current_signals: Callable[[], List[Dict[str, Any]]],
+        removed_keys: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Publish a version from a partial update (live mode): only `upserts`
+        are encoded and hashed. `current_signals` returns the full feed and is
+        only called when a snapshot is due.
+
+        Returns:
+            Summary dict as publish(), or None if nothing changed
+        """
+        hashes: Dict[str, str] = dict(self._load_state().get('hashes', {}))
+        added: List[bytes] = []
+        changed: List[bytes] = []
+        for signal in upserts:
+            key = signal_key(signal)
+            encoded = dumps_bytes(signal)
+            digest = _content_hash(encoded)
+            if key not in hashes:
+                added.append(encoded)
+            elif hashes[key] != digest:
+                changed.append(encoded)
+            hashes[key] = digest
+        removed = [key for key in (removed_keys or []) if hashes.pop(key, None) is not None]
+
+        if not (added or changed or removed):
+            return None
+        full: List[List[Dict[str, Any]]] = []
+
+        def signals() -> List[Dict[str, Any]]:
+            if not full:
+                full.append(current_signals())
+            return full[0]
+
+        # Content-only updates keep the order; new or removed keys may move it
+        order = [signal_key(s) for s in signals()] if added or removed else None
+        return self._commit(hashes, added, changed, removed, last_updated,
+                            lambda: encode_signals(signals()), order)
+
+    def _load_state(self) -> Dict[str, Any]:
+        if self._state is None:
+            self._state = _read_json(self._state_file, {'seq': 0, 'hashes': {}})
+        return self._state
+
+    def _commit(
+        self,
+        hashes: Dict[str, str],
+        added: List[bytes],
+        changed: List[bytes],
+        removed: List[str],
+        last_updated: int,
+        snapshot_parts: Callable[[], List[bytes]],
+        order: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Write delta, optional snapshot, state and index for the next seq.
+        `order` (all keys in feed order) is written only if it changed.
+        """
+        state = self._load_state()
+        seq = int(state.get('seq', 0)) + 1
+        order_hash = state.get('order_hash')
+        order_part = b''
+        if order is not None and _order_hash(order) != order_hash:
+            order_hash = _order_hash(order)
+            order_part = b',"order":' + json.dumps(order).encode()
+
+        delta = (
+            b'{"seq":' + str(seq).encode() +
+            b',"prev_seq":' + str(seq - 1).encode() +
+            b',"last_updated":' + str(int(last_updated)).encode() +
+            b',"added":[' + b','.join(added) + b']' +
+            b',"changed":[' + b','.join(changed) + b']' +
+            b',"removed":' + json.dumps(removed).encode() + order_part + b'}'
+        )
+        _atomic_write(delta_path(self.delta_dir, seq), delta)
+
+        index = _read_json(self._index_file, {})
+        snapshot_seq = int(index.get('snapshot_seq', 0))
+        take_snapshot = snapshot_seq == 0 or seq - snapshot_seq >= self.snapshot_every
+        if take_snapshot:
+            snapshot = (
+                b'{"seq":' + str(seq).encode() +
+                b',"last_updated":' + str(int(last_updated)).encode() +
+                b',"signals":[' + b','.join(snapshot_parts()) + b']}'
+            )
+            _atomic_write(snapshot_path(self.delta_dir, seq), snapshot)
+            previous_snapshot = snapshot_seq
+            snapshot_seq = seq
+            oldest = self._prune(keep_from=previous_snapshot or seq)
+        else:
+            oldest = int(index.get('oldest_delta_seq', 1))
+
+        # State first, index last: readers only ever see fully written versions
+        self._state = {'seq': seq, 'hashes': hashes, 'order_hash': order_hash}
+        _atomic_write(self._state_file, json.dumps(self._state).encode())
+        _atomic_write(self._index_file, json.dumps({
+            'seq': seq,
+            'snapshot_seq': snapshot_seq,
+            'oldest_delta_seq': oldest,
+            'last_updated': int(last_updated)
+        }).encode())
+
+        return {
+            'seq': seq,
+            'added': len(added),
+            'changed': len(changed),
+            'removed': len(removed),
+            'snapshot': take_snapshot
+        }
+
+    def _prune(self, keep_from: int) -> int:
+        """
+        Drop deltas and snapshots older than `keep_from` (the previous snapshot),
+        so consumers up to two snapshot intervals behind can still replay.
+        Returns the oldest delta seq still on disk.
+        """
+        oldest = None
+        for name in os.listdir(self.delta_dir):
+            if not name.endswith('.json') or '_' not in name:
+                continue
+            prefix, _, rest = name.partition('_')
+            if prefix not in ('delta', 'snapshot'):
+                continue
+            try:
+                seq = int(rest[:-5])
+            except ValueError:
+                continue
+            if seq < keep_from:
+                os.remove(os.path.join(self.delta_dir, name))
+            elif prefix == 'delta':
+                oldest = seq if oldest is None else min(oldest, seq)
+        return oldest if oldest is not None else keep_from
+
+
+def apply_delta(signals_by_key: Dict[str, Dict[str, Any]], delta: Dict[str, Any]) -> None:
+    """Apply one delta in place to a {signal_key: signal} map (see FeedDeltaReader for `order`)."""
+    for key in delta.get('removed', []):
+        signals_by_key.pop(key, None)
+    for signal in delta.get('added', []):
+        signals_by_key[signal_key(signal)] = signal
+    for signal in delta.get('changed', []):
+        signals_by_key[signal_key(signal)] = signal
+
+
+class FeedDeltaReader:
+    """
+    Consumer side: keeps a local copy of the feed and catches up by replaying
+    deltas, falling back to the newest snapshot when the gap is too old.
+    """
+
+    def __init__(self, delta_dir: str = DEFAULT_DELTA_DIR):
+        self.delta_dir = delta_dir
+        self.seq = 0
+        self.last_updated = 0
+        self.signals_by_key: Dict[str, Dict[str, Any]] = {}
+        self.order: List[str] = []
+
+    def latest_seq(self) -> int:
+        index = _read_json(os.path.join(self.delta_dir, 'index.json'), {})
+        return int(index.get('seq', 0))
+
+    def catch_up(self) -> Tuple[int, int]:
+        """
+        Bring the local copy to the latest published version.
+
+        Returns:
+            (seq, deltas_replayed)
+        """
+        index = _read_json(os.path.join(self.delta_dir, 'index.json'), {})
+        latest = int(index.get('seq', 0))
+        if latest <= self.seq:
+            return self.seq, 0
+
+        oldest = int(index.get('oldest_delta_seq', 1))
+        if self.seq + 1 < oldest or self.seq == 0:
+            snap = _read_json(snapshot_path(self.delta_dir, int(index.get('snapshot_seq', 0))))
+            if snap is None:
+                raise FileNotFoundError(f"No snapshot available in {self.delta_dir}")
+            self.signals_by_key = {signal_key(s): s for s in snap.get('signals', [])}
+            self.order = list(self.signals_by_key)
+            self.seq = int(snap['seq'])
+            self.last_updated = int(snap.get('last_updated', 0))
+
+        replayed = 0
+        for seq in range(self.seq + 1, latest + 1):
+            delta = _read_json(delta_path(self.delta_dir, seq))
+            if delta is None:
+                raise FileNotFoundError(f"Missing delta {seq} in {self.delta_dir}")
+            apply_delta(self.signals_by_key, delta)
+            if 'order' in delta:
+                self.order = delta['order']
+            self.seq = seq
+            self.last_updated = int(delta.get('last_updated', self.last_updated))
+            replayed += 1
+        return self.seq, replayed
+
+    def feed(self) -> Dict[str, Any]:
+        """Current feed in master_feed.json shape."""
+        return {'last_updated': self.last_updated, 'signals': ordered_signals(self.signals_by_key, self.order)}
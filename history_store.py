@@ -0,0 +1,347 @@
+"""
+History Store - Indexed signal history in SQLite.
+
+data/history.json (symbol -> score, timestamp, consecutiveScans) and
+data/trade_history.json (array of tracked trades) are rewritten in full on
+every update and need deduplicate_history.js / cleanup_history.js to stay
+small. The history store appends every emitted signal of every scan to one
+SQLite table, indexed by symbol, strategy and scan time. Trade outcomes are
+columns on the signal row.
+
+Tables:
+    scans       (scan_ts PK, signals)                 one row per recorded scan
+    maintenance (task PK, last_run)                   last compaction time
+    signals  (id PK, scan_ts, canonical_symbol, symbol, exchange, strategy,
+              action, score, entry, stop_loss, take_profit, rr, calculated_at,
+              outcome, exit_price, exit_time, pnl)
+
+Queries:
+    consecutive_above(x)     (symbol, strategy) streaks of recent scans with score >= x
+    last_signals(symbol, n)  last N signals of a symbol
+    recent_scores(n)         best score per symbol over the last N scans
+    open_signals()           actionable signals without an outcome
+
+compact() applies retention: WAIT rows older than `wait_days`, everything
+older than `keep_days` (signals with an outcome included), then VACUUM.
+compact_if_due() runs it at most once per `interval_ms` (a day by default);
+directory and queue scans call it after recording, so the database stays
+bounded without a cron job.
+
+Usage:
+    python history_store.py import data/history.json data/trade_history.json
+    python history_store.py consecutive --min-score 50 --min-scans 3
+    python history_store.py last BTC -n 20
+    python history_store.py compact --wait-days 7 --keep-days 180
+"""
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterable
+
+from json_encoder import dumps
+
+
+DEFAULT_HISTORY_DB = os.path.join(os.path.dirname(__file__), 'data', 'history.db')
+DAY_MS = 24 * 3600 * 1000
+DEFAULT_WAIT_DAYS = 7
+DEFAULT_KEEP_DAYS = 180
+COMPACT_INTERVAL_MS = DAY_MS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    scan_ts INTEGER PRIMARY KEY,
+    signals INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY,
+    scan_ts INTEGER NOT NULL,
+    canonical_symbol TEXT NOT NULL,
+    symbol TEXT,
+    exchange TEXT,
+    strategy TEXT NOT NULL,
+    action TEXT,
+    score REAL,
+    entry REAL,
+    stop_loss REAL,
+    take_profit REAL,
+    rr REAL,
+    calculated_at INTEGER,
+    outcome TEXT,
+    exit_price REAL,
+    exit_time INTEGER,
+    pnl REAL
+);
+CREATE INDEX IF NOT EXISTS idx_signals_symbol ON signals (canonical_symbol, scan_ts);
+CREATE INDEX IF NOT EXISTS idx_signals_strategy ON signals (strategy, scan_ts);
+CREATE INDEX IF NOT EXISTS idx_signals_scan ON signals (scan_ts);
+CREATE TABLE IF NOT EXISTS maintenance (
+    task TEXT PRIMARY KEY,
+    last_run INTEGER NOT NULL
+);
+"""
+
+
+def _number(value) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value == value and abs(value) != float('inf') else None
+
+
+def signal_row(scan_ts: int, signal: Dict[str, Any]) -> tuple:
+    """Columns stored for one master feed signal."""
+    canonical = signal.get('canonical_symbol') or signal.get('symbol', 'UNKNOWN')
+    strategy = signal.get('strategy_name') or signal.get('strategy', 'Unknown')
+    calculated_at = signal.get('calculated_at')
+    return (
+        scan_ts, canonical, signal.get('symbol'), signal.get('exchange'), strategy,
+        signal.get('action'), _number(signal.get('score')), _number(signal.get('entry')),
+        _number(signal.get('stop_loss')), _number(signal.get('take_profit')), _number(signal.get('rr')),
+        int(calculated_at) if isinstance(calculated_at, (int, float)) else None
+    )
+
+
+class HistoryStore:
+    """Append-only signal history with indexed queries (see module docstring)."""
+
+    def __init__(self, db_path: str = DEFAULT_HISTORY_DB):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> 'HistoryStore':
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.close()
+        return False
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute('ROLLBACK')
+            raise
+        self._conn.execute('COMMIT')
+
+    # --- Writes ---------------------------------------------------------------
+
+    def record_scan(self, signals: Iterable[Dict[str, Any]], scan_ts: Optional[int] = None) -> int:
+        """Append every signal of one scan (the master feed's last_updated). Returns scan_ts."""
+        scan_ts = int(scan_ts if scan_ts is not None else time.time() * 1000)
+        rows = [signal_row(scan_ts, signal) for signal in signals]
+        with self._transaction() as conn:
+            conn.execute('INSERT OR REPLACE INTO scans (scan_ts, signals) VALUES (?, ?)', (scan_ts, len(rows)))
+            conn.execute('DELETE FROM signals WHERE scan_ts = ?', (scan_ts,))
+            conn.executemany(
+                """INSERT INTO signals (scan_ts, canonical_symbol, symbol, exchange, strategy, action, score,
+                                        entry, stop_loss, take_profit, rr, calculated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", rows
+            )
+        return scan_ts
+
+    def record_outcome(self, signal_id: int, outcome: str, exit_price: Optional[float] = None,
+                       exit_time: Optional[int] = None, pnl: Optional[float] = None) -> bool:
+        """Set the outcome (WIN / LOSS / EXPIRED ...) of a tracked signal."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                'UPDATE signals SET outcome = ?, exit_price = ?, exit_time = ?, pnl = ? WHERE id = ?',
+                (outcome, _number(exit_price), exit_time, _number(pnl), signal_id)
+            )
+            return cursor.rowcount == 1
+
+    # --- Queries --------------------------------------------------------------
+
+    def scan_times(self, limit: Optional[int] = None) -> List[int]:
+        """Recorded scans, newest first."""
+        sql = 'SELECT scan_ts FROM scans ORDER BY scan_ts DESC'
+        params: tuple = ()
+        if limit:
+            sql += ' LIMIT ?'
+            params = (limit,)
+        return [row[0] for row in self._conn.execute(sql, params)]
+
+    def consecutive_above(self, min_score: float, min_scans: int = 1, strategy: Optional[str] = None,
+                          lookback: int = 100) -> List[Dict[str, Any]]:
+        """
+        (symbol, strategy) pairs whose score was >= min_score in each of the
+        last `consecutive` scans (counted back from the newest scan, at most
+        `lookback` scans), longest streaks first.
+        """
+        scans = self.scan_times(lookback)
+        if not scans:
+            return []
+        sql = """SELECT canonical_symbol, strategy, scan_ts, score FROM signals
+                 WHERE scan_ts >= ? AND score >= ?"""
+        params: list = [scans[-1], min_score]
+        if strategy:
+            sql += ' AND strategy = ?'
+            params.append(strategy)
+
+        hits: Dict[tuple, Dict[int, float]] = {}
+        for row in self._conn.execute(sql, params):
+            hits.setdefault((row['canonical_symbol'], row['strategy']), {})[row['scan_ts']] = row['score']
+
+        streaks = []
+        for (symbol, strat), scores in hits.items():
+            count = 0
+            for scan_ts in scans:
+                if scan_ts not in scores:
+                    break
+                count += 1
+            if count >= min_scans:
+                streaks.append({'canonical_symbol': symbol, 'strategy': strat, 'consecutive': count,
+                                'score': scores[scans[0]], 'since': scans[count - 1]})
+        streaks.sort(key=lambda s: (-s['consecutive'], -s['score'], s['canonical_symbol']))
+        return streaks
+
+    def recent_scores(self, scans: int = 3) -> Dict[str, float]:
+        """Best score per symbol over the last `scans` recorded scans (scan prioritization)."""
+        times = self.scan_times(scans)
+        if not times:
+            return {}
+        rows = self._conn.execute("""SELECT canonical_symbol, MAX(score) FROM signals
+                                     WHERE scan_ts >= ? AND score IS NOT NULL
+                                     GROUP BY canonical_symbol""", (times[-1],))
+        return {row[0]: row[1] for row in rows}
+
+    def last_signals(self, canonical_symbol: str, n: int = 10, strategy: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Last N recorded signals for a symbol, newest first."""
+        sql = 'SELECT * FROM signals WHERE canonical_symbol = ?'
+        params: list = [canonical_symbol]
+        if strategy:
+            sql += ' AND strategy = ?'
+            params.append(strategy)
+        sql += ' ORDER BY scan_ts DESC, id DESC LIMIT ?'
+        params.append(n)
+        return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def open_signals(self, strategy: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Actionable (LONG/SHORT) signals without an outcome, oldest first."""
+        sql = "SELECT * FROM signals WHERE outcome IS NULL AND action IN ('LONG', 'SHORT')"
+        params: list = []
+        if strategy:
+            sql += ' AND strategy = ?'
+            params.append(strategy)
+        return [dict(row) for row in self._conn.execute(sql + ' ORDER BY scan_ts, id', params)]
+
+    # --- Maintenance ----------------------------------------------------------
+
+    def compact(self, wait_days: float = DEFAULT_WAIT_DAYS, keep_days: float = DEFAULT_KEEP_DAYS,
+                now_ms: Optional[int] = None) -> Dict[str, int]:
+        """Retention: drop old WAIT rows and everything past keep_days, then VACUUM."""
+        now_ms = int(now_ms if now_ms is not None else time.time() * 1000)
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO maintenance (task, last_run) VALUES ('compact', ?)", (now_ms,))
+            waits = conn.execute("DELETE FROM signals WHERE action = 'WAIT' AND scan_ts < ?",
+                                 (now_ms - int(wait_days * DAY_MS),)).rowcount
+            expired = conn.execute('DELETE FROM signals WHERE scan_ts < ?',
+                                   (now_ms - int(keep_days * DAY_MS),)).rowcount
+            scans = conn.execute('DELETE FROM scans WHERE scan_ts < ?',
+                                 (now_ms - int(keep_days * DAY_MS),)).rowcount
+        self._conn.execute('VACUUM')
+        return {'wait_rows': waits, 'expired_rows': expired, 'scans': scans}
+
+    def compact_if_due(self, interval_ms: int = COMPACT_INTERVAL_MS, wait_days: float = DEFAULT_WAIT_DAYS,
+                       keep_days: float = DEFAULT_KEEP_DAYS, now_ms: Optional[int] = None) -> Optional[Dict[str, int]]:
+        """compact() if the last compaction is `interval_ms` old (or never ran); None otherwise."""
+        now_ms = int(now_ms if now_ms is not None else time.time() * 1000)
+        row = self._conn.execute("SELECT last_run FROM maintenance WHERE task = 'compact'").fetchone()
+        if row is not None and now_ms - row[0] < interval_ms:
+            return None
+        return self.compact(wait_days, keep_days, now_ms)
+
+    def import_legacy(self, history_file: Optional[str] = None, trade_history_file: Optional[str] = None) -> Dict[str, int]:
+        """
+        One-off migration. history.json becomes one scan per distinct timestamp
+        (strategy 'Legacy import'); trade_history.json trades become actionable
+        signals with their outcome (not scans: they do not affect streaks).
+        """
+        counts = {'history': 0, 'trades': 0}
+        if history_file and os.path.exists(history_file):
+            with open(history_file, 'r') as f:
+                history = json.load(f)
+            by_scan: Dict[int, List[Dict[str, Any]]] = {}
+            for symbol, entry in history.items():
+                by_scan.setdefault(int(entry.get('timestamp', 0)), []).append(
+                    {'canonical_symbol': symbol, 'symbol': symbol, 'strategy_name': 'Legacy import',
+                     'score': entry.get('score'), 'action': 'WAIT'})
+            for scan_ts, signals in by_scan.items():
+                self.record_scan(signals, scan_ts)
+                counts['history'] += len(signals)
+        if trade_history_file and os.path.exists(trade_history_file):
+            with open(trade_history_file, 'r') as f:
+                trades = json.load(f)
+            with self._transaction() as conn:
+                for trade in trades:
+                    scan_ts = int(trade.get('signalTimestamp') or 0)
+                    row = signal_row(scan_ts, {
+                        'symbol': trade.get('symbol'), 'exchange': trade.get('exchange'),
+                        'strategy_name': trade.get('strategy'), 'action': trade.get('side'),
+                        'score': trade.get('score'), 'entry': trade.get('entryPrice'),
+                        'stop_loss': trade.get('sl'), 'take_profit': trade.get('tp'),
+                        'calculated_at': trade.get('signalTimestamp')
+                    })
+                    outcome = trade.get('result') if trade.get('status') == 'CLOSED' else None
+                    conn.execute(
+                        """INSERT INTO signals (scan_ts, canonical_symbol, symbol, exchange, strategy, action, score,
+                                                entry, stop_loss, take_profit, rr, calculated_at,
+                                                outcome, exit_price, pnl)
+                           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                        row + (outcome, _number(trade.get('exitPrice')), _number(trade.get('pnl')))
+                    )
+                    counts['trades'] += 1
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='QuantPro signal history store')
+    parser.add_argument('--db', default=DEFAULT_HISTORY_DB, help='History database')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    imp = sub.add_parser('import', help='Import data/history.json and data/trade_history.json')
+    imp.add_argument('history', nargs='?', default=None)
+    imp.add_argument('trade_history', nargs='?', default=None)
+
+    cons = sub.add_parser('consecutive', help='Symbols above a score for N consecutive scans')
+    cons.add_argument('--min-score', type=float, required=True)
+    cons.add_argument('--min-scans', type=int, default=1)
+    cons.add_argument('--strategy', default=None)
+
+    last = sub.add_parser('last', help='Last N signals for a symbol')
+    last.add_argument('symbol')
+    last.add_argument('-n', type=int, default=10)
+    last.add_argument('--strategy', default=None)
+
+    comp = sub.add_parser('compact', help='Apply retention and VACUUM')
+    comp.add_argument('--wait-days', type=float, default=DEFAULT_WAIT_DAYS)
+    comp.add_argument('--keep-days', type=float, default=DEFAULT_KEEP_DAYS)
+
+    args = parser.parse_args()
+    with HistoryStore(args.db) as store:
+        if args.command == 'import':
+            result = store.import_legacy(args.history, args.trade_history)
+        elif args.command == 'consecutive':
+            result = store.consecutive_above(args.min_score, args.min_scans, args.strategy)
+        elif args.command == 'last':
+            result = store.last_signals(args.symbol, args.n, args.strategy)
+        else:
+            result = store.compact(args.wait_days, args.keep_days)
+    print(dumps(result))
+
+
+if __name__ == '__main__':
+    main()
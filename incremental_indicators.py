@@ -0,0 +1,205 @@
+"""
+Incremental Indicators - O(1) per-candle updates for a warm SharedContext.
+
+FeatureFactory computes every indicator over the full history with pandas_ta.
+In live mode only one candle is appended at a time, so each indicator keeps
+the recursive state it needs (Wilder averages, EMA values, running windows)
+and produces the next value without touching the history.
+
+State is seeded from the FeatureFactory output where the last value is the
+whole state (EMA, ATR, OBV). RSI and ADX state is rebuilt with one
+vectorized pass at seed time. Those values converge to pandas_ta after the
+usual warm-up, so long histories match to float precision.
+
+If an indicator cannot be seeded (history shorter than its period), the
+timeframe reports `ready == False` and the caller rebuilds the context with
+FeatureFactory instead.
+"""
+
+from collections import deque
+from typing import Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from trigger_table import wilder_averages
+
+
+def _last_valid(series: Optional[pd.Series]) -> Optional[float]:
+    if series is None or len(series) == 0:
+        return None
+    value = series.iloc[-1]
+    return None if pd.isna(value) else float(value)
+
+
+def _rma(values: np.ndarray, period: int) -> np.ndarray:
+    """Wilder moving average (alpha = 1/period)."""
+    return pd.Series(values).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+
+
+class IncrementalIndicators:
+    """
+    Incremental state for the indicators of one timeframe of a SharedContext.
+
+    Args:
+        config: FeatureFactory config (periods, enabled_features)
+        timeframe: 'ltf' or 'htf' (HTF has no OBV / Bollinger / volume SMA)
+    """
+
+    LTF_FEATURES = ('rsi', 'ema', 'adx', 'atr', 'bollinger', 'obv', 'volume_sma')
+    HTF_FEATURES = ('rsi', 'ema', 'adx', 'atr')
+    # Computed by FeatureFactory but without an incremental form here
+    UNSUPPORTED_FEATURES = ('macd', 'stoch_rsi')
+
+    def __init__(self, config: Dict[str, Any], timeframe: str):
+        self.config = config
+        self.timeframe = timeframe
+        # Same rule as FeatureFactory._is_enabled: no list means everything is on
+        enabled = config.get('enabled_features') or self.LTF_FEATURES + self.UNSUPPORTED_FEATURES
+        supported = self.HTF_FEATURES if timeframe == 'htf' else self.LTF_FEATURES
+        self.features = [f for f in supported if f in enabled]
+        self.unsupported = timeframe == 'ltf' and any(f in enabled for f in self.UNSUPPORTED_FEATURES)
+        self.ready = False
+        self._prev: Optional[Dict[str, float]] = None
+        self._state: Dict[str, Any] = {}
+
+    def seed(self, df: pd.DataFrame, indicators: Dict[str, Any]) -> bool:
+        """Initialize state from the candles and FeatureFactory indicators."""
+        self.ready = False
+        if df is None or len(df) < 2 or self.unsupported:
+            return False
+
+        close = df['close'].to_numpy(dtype=float)
+        high = df['high'].to_numpy(dtype=float)
+        low = df['low'].to_numpy(dtype=float)
+        volume = df['volume'].to_numpy(dtype=float)
+        self._prev = {'close': close[-1], 'high': high[-1], 'low': low[-1]}
+        st = self._state = {}
+
+        if 'rsi' in self.features:
+            period = self.config.get('rsi_period', 14)
+            avg_gain, avg_loss = wilder_averages(close, period)
+            if np.isnan(avg_gain[-1]):
+                return False
+            st['rsi'] = [float(avg_gain[-1]), float(avg_loss[-1]), period]
+
+        if 'ema' in self.features:
+            for key, cfg_key, default in (('ema_fast', 'ema_fast', 50), ('ema_slow', 'ema_slow', 200)):
+                last = _last_valid(indicators.get(key))
+                if last is None:
+                    return False
+                st[key] = [last, 2.0 / (self.config.get(cfg_key, default) + 1)]
+
+        if 'atr' in self.features:
+            last = _last_valid(indicators.get('atr'))
+            if last is None:
+                return False
+            st['atr'] = [last, self.config.get('atr_period', 14)]
+
+        if 'adx' in self.features:
+            period = self.config.get('adx_period', 14)
+            if len(close) < 2 * period:
+                return False
+            prev_close = np.concatenate([[close[0]], close[:-1]])
+            tr = np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+            up = np.diff(high, prepend=high[0])
+            down = -np.diff(low, prepend=low[0])
+            plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+            minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+            atr_s = _rma(tr, period)
+            plus_s = _rma(plus_dm, period)
+            minus_s = _rma(minus_dm, period)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                di_sum = plus_s + minus_s
+                dx = np.where(di_sum > 0, 100.0 * np.abs(plus_s - minus_s) / di_sum, 0.0)
+            adx = _rma(dx, period)
+            st['adx'] = [float(atr_s[-1]), float(plus_s[-1]), float(minus_s[-1]), float(adx[-1]), period]
+
+        if 'obv' in self.features:
+            last = _last_valid(indicators.get('obv'))
+            if last is None:
+                return False
+            st['obv'] = last
+
+        if 'bollinger' in self.features:
+            period = self.config.get('bb_period', 20)
+            st['bollinger'] = (deque(close[-period:], maxlen=period), self.config.get('bb_std', 2))
+
+        if 'volume_sma' in self.features:
+            period = self.config.get('volume_sma_period', 20)
+            window = deque(volume[-period:], maxlen=period)
+            st['volume_sma'] = [window, float(sum(window))]
+
+        self.ready = True
+        return True
+
+    def update(self, candle: Dict[str, float]) -> Dict[str, float]:
+        """Advance every indicator by one closed candle; returns the new values by context key."""
+        if not self.ready:
+            raise RuntimeError("IncrementalIndicators not seeded")
+
+        c, h, l, v = (float(candle['close']), float(candle['high']),
+                      float(candle['low']), float(candle['volume']))
+        pc, ph, pl = self._prev['close'], self._prev['high'], self._prev['low']
+        st = self._state
+        out: Dict[str, float] = {}
+
+        if 'rsi' in st:
+            g, lo, n = st['rsi']
+            g = (g * (n - 1) + max(c - pc, 0.0)) / n
+            lo = (lo * (n - 1) + max(pc - c, 0.0)) / n
+            st['rsi'][:2] = [g, lo]
+            out['rsi'] = 100.0 if lo == 0 else 100.0 - 100.0 / (1.0 + g / lo)
+
+        for key in ('ema_fast', 'ema_slow'):
+            if key in st:
+                value, alpha = st[key]
+                value = alpha * c + (1 - alpha) * value
+                st[key][0] = value
+                out[key] = value
+
+        tr = max(h - l, abs(h - pc), abs(l - pc))
+        if 'atr' in st:
+            value, n = st['atr']
+            value = (value * (n - 1) + tr) / n
+            st['atr'][0] = value
+            out['atr'] = value
+
+        if 'adx' in st:
+            atr_s, plus_s, minus_s, adx, n = st['adx']
+            up, down = h - ph, pl - l
+            plus_dm = up if (up > down and up > 0) else 0.0
+            minus_dm = down if (down > up and down > 0) else 0.0
+            atr_s = (atr_s * (n - 1) + tr) / n
+            plus_s = (plus_s * (n - 1) + plus_dm) / n
+            minus_s = (minus_s * (n - 1) + minus_dm) / n
+            di_sum = plus_s + minus_s
+            dx = 100.0 * abs(plus_s - minus_s) / di_sum if di_sum > 0 else 0.0
+            adx = (adx * (n - 1) + dx) / n
+            st['adx'] = [atr_s, plus_s, minus_s, adx, n]
+            out['adx'] = adx
+            if self.timeframe == 'ltf' and atr_s > 0:
+                out['di_plus'] = 100.0 * plus_s / atr_s
+                out['di_minus'] = 100.0 * minus_s / atr_s
+
+        if 'obv' in st:
+            st['obv'] += v if c > pc else (-v if c < pc else 0.0)
+            out['obv'] = st['obv']
+
+        if 'bollinger' in st:
+            window, k = st['bollinger']
+            window.append(c)
+            values = np.fromiter(window, dtype=float)
+            mid, std = values.mean(), values.std()
+            out.update({'bb_upper': mid + k * std, 'bb_middle': mid, 'bb_lower': mid - k * std})
+
+        if 'volume_sma' in st:
+            window, total = st['volume_sma']
+            if len(window) == window.maxlen:
+                total -= window[0]
+            window.append(v)
+            st['volume_sma'][1] = total + v
+            out['volume_sma'] = (total + v) / len(window)
+
+        self._prev = {'close': c, 'high': h, 'low': l}
+        return out
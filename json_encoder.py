@@ -0,0 +1,113 @@
+"""
+JSON Encoder - Single-pass JSON-safe serialization for scanner output.
+
+Replaces the clean_nans -> sanitize_for_json -> json.dumps chain: numpy scalars,
+arrays, sets, pandas objects and non-finite floats are handled inline while
+encoding, so each signal list is walked exactly once.
+
+NaN/inf become 0.0, matching what clean_nans has always emitted to the dashboard.
+"""
+
+import json
+import math
+from json.encoder import encode_basestring, encode_basestring_ascii, _make_iterencode
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+def _finite_float(value: float) -> float:
+    """Map NaN/inf to 0.0 (dashboard contract), pass finite floats through."""
+    return value if math.isfinite(value) else 0.0
+
+
+class SignalJSONEncoder(json.JSONEncoder):
+    """
+    JSONEncoder that understands numpy/pandas values and non-finite floats.
+
+    The fast path uses the C encoder with allow_nan=False. Only the subtrees
+    that actually contain a NaN or inf fall back to the pure-Python iterencode
+    with a float formatter that writes 0.0 instead, so clean payloads never pay
+    for the fallback.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['allow_nan'] = False
+        super().__init__(**kwargs)
+
+    def default(self, obj: Any) -> Any:
+        if isinstance(obj, np.bool_):
+            return bool(obj)
+        if isinstance(obj, np.integer):
+            return int(obj)
+        if isinstance(obj, np.floating):
+            return _finite_float(float(obj))
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, (set, frozenset)):
+            return list(obj)
+        if isinstance(obj, pd.Series):
+            return obj.tolist()
+        if isinstance(obj, pd.DataFrame):
+            return obj.to_dict(orient='records')
+        if isinstance(obj, pd.Timestamp):
+            if pd.isna(obj):
+                return None
+            return int(obj.value // 1_000_000)  # epoch milliseconds
+        if obj is pd.NA or obj is pd.NaT:
+            return None
+        return super().default(obj)
+
+    def iterencode(self, o: Any, _one_shot: bool = False):
+        if not _one_shot or self.indent is not None:
+            return self._sanitizing_iterencode(o, _one_shot)
+        return iter([self._encode_compact(o)])
+
+    def _encode_compact(self, o: Any) -> str:
+        """
+        Encode with the C encoder; on a non-finite float, split the container
+        and retry per child so only the subtree holding the NaN takes the slow
+        path (one bad signal must not slow down the whole feed).
+        """
+        try:
+            return ''.join(super().iterencode(o, _one_shot=True))
+        except ValueError as e:
+            if 'Out of range float' not in str(e):
+                raise  # e.g. circular reference
+
+        if isinstance(o, dict) and all(isinstance(k, str) for k in o):
+            _encoder = encode_basestring_ascii if self.ensure_ascii else encode_basestring
+            items = sorted(o.items()) if self.sort_keys else o.items()
+            return '{' + self.item_separator.join(
+                _encoder(k) + self.key_separator + self._encode_compact(v) for k, v in items
+            ) + '}'
+        if isinstance(o, (list, tuple)):
+            return '[' + self.item_separator.join(self._encode_compact(v) for v in o) + ']'
+        return ''.join(self._sanitizing_iterencode(o, True))
+
+    def _sanitizing_iterencode(self, o: Any, _one_shot: bool):
+        """Pure-Python encoder pass that writes non-finite floats as 0.0."""
+        markers = {} if self.check_circular else None
+        _encoder = encode_basestring_ascii if self.ensure_ascii else encode_basestring
+
+        def floatstr(value, _repr=float.__repr__):
+            if value != value or value in (math.inf, -math.inf):
+                return '0.0'
+            return _repr(value)
+
+        _iterencode = _make_iterencode(
+            markers, self.default, _encoder, self.indent, floatstr,
+            self.key_separator, self.item_separator, self.sort_keys,
+            self.skipkeys, _one_shot)
+        return _iterencode(o, 0)
+
+
+def dumps(obj: Any, **kwargs) -> str:
+    """json.dumps with SignalJSONEncoder."""
+    return json.dumps(obj, cls=SignalJSONEncoder, **kwargs)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Compact UTF-8 encoding, ready to be written to a file and to stdout."""
+    return dumps(obj, separators=(',', ':')).encode('utf-8')
@@ -0,0 +1,480 @@
+"""
+Live Scanner - Event-driven re-analysis on candle close.
+
+Directory mode rebuilds every SharedContext from scratch on each scan. In live
+mode each symbol's context is built once (warm-up) and then kept warm: every
+candle-close event appends one candle, advances the indicators with
+IncrementalIndicators, re-detects RSI trendlines for that timeframe only and
+re-runs only the strategies that read that timeframe
+(Strategy.input_timeframes). Updated signals are published immediately as a
+feed delta (FeedDeltaWriter.publish_changes) and printed as JSON lines; the
+full master feed is rewritten every --feed-interval seconds and on exit.
+
+Event sources:
+- JSON lines (file or stdin), one closed candle per line:
+    {"exchange": "MEXC", "symbol": "BTCUSDT", "timeframe": "15m",
+     "candle": {"time": ..., "open": ..., "high": ..., "low": ..., "close": ..., "volume": ...}}
+  Candle fields may also be given at the top level.
+- --replay N: local stand-in for an exchange websocket. The last N LTF
+  candles of every data file (and the HTF candles closing in that window)
+  are held back at warm-up and replayed in close-time order.
+
+Usage:
+    python live_scanner.py data/ --replay 8
+    tail -f candles.jsonl | python live_scanner.py data/ --events -
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import argparse
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple, Iterable, Iterator
+
+import pandas as pd
+
+from shared_context import SharedContext, FeatureFactory
+from incremental_indicators import IncrementalIndicators
+from compact_context import CompactContext, compact_context, required_lookback, shared_context_nbytes
+from json_encoder import dumps_bytes
+from scan_planner import plan_scan
+from feed_delta import FeedDeltaWriter, encode_signals, build_feed_bytes, DEFAULT_SNAPSHOT_EVERY
+from scan_logging import get_logger, configure_logging, add_logging_arguments
+from market_scanner_refactored import (
+    COINALYZE_CACHE_DIR,
+    atomic_write_bytes,
+    build_feature_config,
+    build_strategies,
+    ensure_data_contract,
+    execute_strategies,
+    list_data_files,
+    load_coinalyze_data_from_cache,
+    load_source_frames,
+    write_stdout_bytes,
+)
+
+logger = get_logger('live')
+
+TIMEFRAMES = {'15m': 'ltf', '4h': 'htf', 'ltf': 'ltf', 'htf': 'htf'}
+TIMEFRAME_MS = {'ltf': 15 * 60 * 1000, 'htf': 4 * 60 * 60 * 1000}
+CANDLE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+DEFAULT_FEED_INTERVAL = 60
+
+
+@dataclass
+class CandleEvent:
+    """One closed candle for one symbol and timeframe ('ltf' or 'htf')."""
+    exchange: str
+    symbol: str
+    timeframe: str
+    candle: Dict[str, float]
+
+    @property
+    def close_time(self) -> int:
+        return int(self.candle['timestamp']) + TIMEFRAME_MS[self.timeframe]
+
+
+@dataclass
+class SymbolState:
+    """Warm context of one symbol plus the state needed to advance it."""
+    context: Optional[SharedContext]  # None while parked as `compact`
+    incremental: Dict[str, IncrementalIndicators]
+    max_candles: Dict[str, int]
+    metadata: Dict[str, Any]
+    external_file: str
+    external_mtime: float = 0.0
+    results: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    compact: Optional[CompactContext] = None
+
+
+def parse_event(payload: Dict[str, Any]) -> CandleEvent:
+    """Build a CandleEvent from a decoded JSON line. Raises KeyError/ValueError on bad input."""
+    timeframe = TIMEFRAMES[str(payload.get('timeframe', payload.get('interval', '15m'))).lower()]
+    raw = payload.get('candle', payload)
+    candle = {'timestamp': int(raw['time'] if 'time' in raw else raw['timestamp'])}
+    for name in CANDLE_FIELDS:
+        candle[name] = float(raw[name])
+    return CandleEvent(str(payload['exchange']).upper(), str(payload['symbol']), timeframe, candle)
+
+
+def read_events(stream: Iterable[str]) -> Iterator[CandleEvent]:
+    """Parse JSON-lines candle events, skipping malformed lines."""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield parse_event(json.loads(line))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("[WARN] Bad candle event %s: %s", line[:80], e)
+
+
+def frame_events(df: Optional[pd.DataFrame], exchange: str, symbol: str, timeframe: str) -> List[CandleEvent]:
+    """Candle events for the rows of a data frame (replay stand-in)."""
+    if df is None or len(df) == 0:
+        return []
+    rows = df[['timestamp', *CANDLE_FIELDS]].to_dict('records')
+    return [CandleEvent(exchange, symbol, timeframe, row) for row in rows]
+
+
+def merge_events(streams: List[List[CandleEvent]], interval: float = 0.0) -> Iterator[CandleEvent]:
+    """Merge per-source event lists (each in time order) by candle close time."""
+    for event in heapq.merge(*streams, key=lambda e: e.close_time):
+        yield event
+        if interval > 0:
+            time.sleep(interval)
+
+
+def _append_row(series: pd.Series, label: Any, value: Any, keep: int) -> pd.Series:
+    """Append one value under `label` and keep the last `keep` entries."""
+    extended = pd.concat([series, pd.Series([value], index=[label], dtype=series.dtype)])
+    return extended.iloc[-keep:] if len(extended) > keep else extended
+
+
+class LiveScanner:
+    """
+    Keeps one warm SharedContext per (exchange, symbol) and re-analyzes it per event.
+
+    Args:
+        strategies: Strategy instances (see build_strategies)
+        feature_factory: FeatureFactory used for warm-up and full rebuilds
+        output_file: Master feed path, rewritten every `feed_interval` seconds
+        delta_writer: Optional FeedDeltaWriter for per-event publishing
+        feed_interval: Seconds between full master feed writes
+        emit: Print updated signals as JSON lines to stdout
+        compact: Park idle contexts as CompactContext (float32, strategy-sized windows)
+    """
+
+    def __init__(
+        self,
+        strategies: List[Any],
+        feature_factory: FeatureFactory,
+        output_file: str,
+        delta_writer: Optional[FeedDeltaWriter] = None,
+        feed_interval: float = DEFAULT_FEED_INTERVAL,
+        emit: bool = True,
+        compact: bool = False
+    ):
+        self.strategies = strategies
+        self.feature_factory = feature_factory
+        self.output_file = output_file
+        self.delta_writer = delta_writer
+        self.feed_interval = feed_interval
+        self.emit = emit
+        self.compact_window = required_lookback(strategies, feature_factory.config) if compact else None
+        self.states: Dict[Tuple[str, str], SymbolState] = {}
+        self.stats = {'events': 0, 'ignored': 0, 'rebuilds': 0, 'published': 0}
+        self._last_feed_write = 0.0
+        # last_updated of the newest delta; the master feed carries the same
+        # stamp while it matches the deltas, so readers stay on the delta path
+        self._delta_stamp: Optional[int] = None
+
+    # ------------------------------------------------------------------ warm-up
+
+    def warm(self, data_file: str, symbol: str, exchange: str, holdback: int = 0) -> List[CandleEvent]:
+        """
+        Build the warm context for one data file.
+
+        With holdback > 0 the last `holdback` LTF candles and the HTF candles
+        closing after the remaining LTF history are not loaded; they are
+        returned as events for replay.
+        """
+        df_ltf, df_htf = load_source_frames(data_file)
+        held: List[CandleEvent] = []
+        if holdback > 0 and len(df_ltf) > holdback:
+            cutoff = int(df_ltf['timestamp'].iloc[-holdback - 1]) + TIMEFRAME_MS['ltf']
+            held = frame_events(df_ltf.iloc[-holdback:], exchange, symbol, 'ltf')
+            df_ltf = df_ltf.iloc[:-holdback]
+            if df_htf is not None:
+                closes = df_htf['timestamp'] + TIMEFRAME_MS['htf']
+                held += frame_events(df_htf[closes > cutoff], exchange, symbol, 'htf')
+                df_htf = df_htf[closes <= cutoff]
+                if len(df_htf) < 50:
+                    df_htf = None
+
+        metadata = {'mcap': 0}
+        context = self.feature_factory.build_context(
+            symbol=symbol,
+            exchange=exchange,
+            ltf_data=df_ltf,
+            htf_data=df_htf,
+            metadata=metadata,
+            external_data=load_coinalyze_data_from_cache(symbol, exchange)
+        )
+        self.attach(context, metadata)
+        # LTF events first within the same close time, like the exchange feed
+        held.sort(key=lambda e: (e.close_time, e.timeframe != 'ltf'))
+        return held
+
+    def attach(self, context: SharedContext, metadata: Optional[Dict[str, Any]] = None) -> SymbolState:
+        """Register a built context, seed its incremental state and run every strategy once."""
+        external_file = os.path.join(COINALYZE_CACHE_DIR, f"{context.symbol}_{context.exchange}.json")
+        state = SymbolState(
+            context=context,
+            incremental={},
+            max_candles={},
+            metadata=metadata or {},
+            external_file=external_file,
+            external_mtime=self._mtime(external_file)
+        )
+        self._seed(state)
+        self.states[(context.exchange.upper(), context.symbol)] = state
+        for result in ensure_data_contract(execute_strategies(context, self.strategies, metadata=state.metadata)):
+            state.results[result['strategy_name']] = result
+        self._park(state)
+        return state
+
+    def _park(self, state: SymbolState) -> None:
+        """Compact mode: keep only the CompactContext between events."""
+        if self.compact_window is not None:
+            state.compact = compact_context(state.context, self.compact_window)
+            state.context = None
+
+    def _unpark(self, state: SymbolState) -> SharedContext:
+        if state.context is None:
+            state.context = state.compact.to_shared_context()
+        return state.context
+
+    @staticmethod
+    def _last_timestamp(state: Optional[SymbolState], timeframe: str) -> Optional[int]:
+        if state is None:
+            return None
+        if state.compact is not None:
+            frame = state.compact.frame(timeframe)
+            return int(frame.timestamp[-1]) if frame is not None and len(frame) else None
+        df = state.context.ltf_data if timeframe == 'ltf' else state.context.htf_data
+        return int(df['timestamp'].iloc[-1]) if df is not None and len(df) else None
+
+    def resident_bytes(self) -> int:
+        """Array bytes held by the warm contexts."""
+        return sum(state.compact.nbytes if state.compact is not None else shared_context_nbytes(state.context)
+                   for state in self.states.values())
+
+    def _seed(self, state: SymbolState) -> None:
+        context = state.context
+        for timeframe, df, indicators in (('ltf', context.ltf_data, context.ltf_indicators),
+                                          ('htf', context.htf_data, context.htf_indicators)):
+            incremental = IncrementalIndicators(context.config, timeframe)
+            incremental.seed(df, indicators)
+            state.incremental[timeframe] = incremental
+            state.max_candles[timeframe] = max(len(df) if df is not None else 0,
+                                               state.max_candles.get(timeframe, 0))
+
+    @staticmethod
+    def _mtime(path: str) -> float:
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0.0
+
+    # ------------------------------------------------------------------ events
+
+    def on_event(self, event: CandleEvent) -> List[Dict[str, Any]]:
+        """Apply one closed candle; returns the re-computed signals (empty if ignored)."""
+        state = self.states.get((event.exchange, event.symbol))
+        last_timestamp = self._last_timestamp(state, event.timeframe)
+        # Unknown symbol, no HTF history, or a duplicate / out-of-order candle
+        if last_timestamp is None or event.candle['timestamp'] <= last_timestamp:
+            self.stats['ignored'] += 1
+            return []
+        self.stats['events'] += 1
+
+        self._unpark(state)
+        self._append_candle(state, event)
+        self._reload_external(state)
+
+        affected = [s for s in self.strategies if event.timeframe in s.input_timeframes]
+        # state.context is replaced on a full rebuild
+        results = ensure_data_contract(execute_strategies(state.context, affected, metadata=state.metadata))
+        for result in results:
+            state.results[result['strategy_name']] = result
+        self._park(state)
+        return results
+
+    def _append_candle(self, state: SymbolState, event: CandleEvent) -> None:
+        """Append the candle and advance indicators; full rebuild if incremental state is unavailable."""
+        context = state.context
+        timeframe = event.timeframe
+        incremental = state.incremental[timeframe]
+        keep = state.max_candles[timeframe]
+        df = context.ltf_data if timeframe == 'ltf' else context.htf_data
+        label = df.index[-1] + 1 if pd.api.types.is_integer_dtype(df.index) else len(df)
+
+        row = pd.DataFrame([event.candle], index=[label])
+        df = pd.concat([df, row[[c for c in row.columns if c in df.columns]]])
+        if len(df) > keep:
+            df = df.iloc[-keep:]
+
+        if not incremental.ready:
+            self._rebuild(state, timeframe, df)
+            return
+
+        values = incremental.update(event.candle)
+        indicators = context.ltf_indicators if timeframe == 'ltf' else context.htf_indicators
+        for key, series in list(indicators.items()):
+            if isinstance(series, pd.Series):
+                indicators[key] = _append_row(series, label, values.get(key, float('nan')), keep)
+        if timeframe == 'ltf':
+            context.ltf_data = df
+        else:
+            context.htf_data = df
+
+        indicators.pop('rsi_trendlines', None)
+        self.feature_factory.detect_trendlines(context, timeframes=(timeframe,))
+
+    def _rebuild(self, state: SymbolState, timeframe: str, df: pd.DataFrame) -> None:
+        """Recompute the whole context with FeatureFactory and re-seed the incremental state."""
+        self.stats['rebuilds'] += 1
+        old = state.context
+        state.context = self.feature_factory.build_context(
+            symbol=old.symbol,
+            exchange=old.exchange,
+            ltf_data=df if timeframe == 'ltf' else old.ltf_data,
+            htf_data=df if timeframe == 'htf' else old.htf_data,
+            metadata=state.metadata,
+            external_data=load_coinalyze_data_from_cache(old.symbol, old.exchange)
+        )
+        self._seed(state)
+
+    def _reload_external(self, state: SymbolState) -> None:
+        """Pick up a refreshed Coinalyze cache file (written by the JS fetch loop)."""
+        mtime = self._mtime(state.external_file)
+        if mtime and mtime != state.external_mtime:
+            state.external_mtime = mtime
+            context = state.context
+            self.feature_factory._use_prefetched_data(
+                context, load_coinalyze_data_from_cache(context.symbol, context.exchange))
+
+    # ------------------------------------------------------------------ publishing
+
+    def signals(self) -> List[Dict[str, Any]]:
+        """Current signal of every (symbol, strategy), in warm-up order."""
+        return [result for state in self.states.values() for result in state.results.values()]
+
+    def publish(self, updated: List[Dict[str, Any]]) -> None:
+        """Publish updated signals as a feed delta and JSON lines on stdout."""
+        if not updated:
+            return
+        now = int(time.time() * 1000)
+        if self.delta_writer is not None:
+            try:
+                delta = self.delta_writer.publish_changes(updated, now, self.signals)
+                if delta:
+                    self.stats['published'] += 1
+                    self._delta_stamp = now
+            except Exception as e:
+                self._delta_stamp = None
+                logger.warning("[WARN] Failed to publish feed delta: %s", e)
+        if self.emit:
+            for signal in updated:
+                write_stdout_bytes(dumps_bytes(signal))
+
+    def write_master_feed(self) -> None:
+        """Rewrite the full master feed from the warm signals."""
+        last_updated = self._delta_stamp or int(time.time() * 1000)
+        atomic_write_bytes(build_feed_bytes(last_updated, encode_signals(self.signals())), self.output_file)
+        self._last_feed_write = time.time()
+
+    def run(self, events: Iterable[CandleEvent]) -> None:
+        """Consume events until the source is exhausted or interrupted."""
+        if self.delta_writer is not None:
+            # Baseline version matching the warm signal set
+            self._delta_stamp = int(time.time() * 1000)
+            self.delta_writer.publish(self.signals(), self._delta_stamp)
+        self.write_master_feed()
+        try:
+            for event in events:
+                self.publish(self.on_event(event))
+                if time.time() - self._last_feed_write >= self.feed_interval:
+                    self.write_master_feed()
+        except KeyboardInterrupt:
+            logger.info("[LIVE] Interrupted")
+        finally:
+            self.write_master_feed()
+            logger.info("[LIVE] events=%d ignored=%d rebuilds=%d deltas=%d resident=%.1fMB",
+                        self.stats['events'], self.stats['ignored'], self.stats['rebuilds'],
+                        self.stats['published'], self.resident_bytes() / 1e6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='QuantPro live scanner (candle-close events)')
+    parser.add_argument('directory', help='Data directory used for warm-up')
+    parser.add_argument('--events', default=None, help='JSON-lines candle events file, "-" for stdin')
+    parser.add_argument('--replay', type=int, default=0,
+                        help='Hold back the last N LTF candles per file and replay them as events')
+    parser.add_argument('--replay-interval', type=float, default=0.0, help='Seconds between replayed events')
+    parser.add_argument('--strategy', default='all', help='Strategy name (default: all)')
+    parser.add_argument('--config', help='JSON Configuration string', default='{}')
+    parser.add_argument('--symbol', help='Only warm symbols containing this string', default=None)
+    parser.add_argument('--limit', type=int, help='Limit number of coins', default=0)
+    parser.add_argument('--all-exchanges', action='store_true',
+                        help='Warm every exchange copy of a coin instead of the primary source only')
+    parser.add_argument('--output', help='Output file for master feed', default='data/master_feed.json')
+    parser.add_argument('--feed-interval', type=float, default=DEFAULT_FEED_INTERVAL,
+                        help='Seconds between full master feed writes')
+    parser.add_argument('--delta-dir', help='Feed delta directory (default: feed_deltas/ next to --output)', default=None)
+    parser.add_argument('--snapshot-every', type=int, help='Compacted feed snapshot every N versions',
+                        default=DEFAULT_SNAPSHOT_EVERY)
+    parser.add_argument('--no-delta', action='store_true', help='Do not publish feed deltas')
+    parser.add_argument('--compact', action='store_true',
+                        help='Keep idle contexts as float32 tail windows (see compact_context.py)')
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_logging(args.log_level, args.log_json)
+
+    user_config = {}
+    try:
+        user_config = json.loads(args.config) if args.config else {}
+    except Exception as e:
+        logger.warning("[WARN] Failed to parse config: %s", e)
+
+    strategies = build_strategies(args.strategy, user_config)
+    if strategies is None:
+        logger.error("[ERROR] Unknown strategy: %s", args.strategy)
+        sys.exit(1)
+
+    delta_writer = None
+    if not args.no_delta:
+        delta_dir = args.delta_dir or os.path.join(os.path.dirname(args.output) or '.', 'feed_deltas')
+        delta_writer = FeedDeltaWriter(delta_dir, args.snapshot_every)
+
+    scanner = LiveScanner(strategies, FeatureFactory(build_feature_config(user_config)), args.output,
+                          delta_writer=delta_writer, feed_interval=args.feed_interval, compact=args.compact)
+
+    # Warm primary sources only (see scan_planner.py)
+    candidates = list_data_files(args.directory, args.symbol)
+    if args.all_exchanges:
+        sources = [[c] for c in candidates]
+    else:
+        sources = [[(s.data_file, s.symbol, s.exchange) for s in g.sources] for g in plan_scan(candidates)]
+    if args.limit > 0:
+        sources = sources[:args.limit]
+
+    replay_streams = []
+    for group in sources:
+        for data_file, symbol, exchange in group:
+            try:
+                replay_streams.append(scanner.warm(data_file, symbol, exchange, holdback=args.replay))
+                break
+            except Exception as e:
+                logger.error("[ERROR] Warm-up %s: %s: %s", data_file, type(e).__name__, e)
+    logger.info("[LIVE] Warmed %d symbols, %d signals, %.1fMB resident",
+                len(scanner.states), len(scanner.signals()), scanner.resident_bytes() / 1e6)
+
+    if args.replay > 0 and args.events is None:
+        scanner.run(merge_events(replay_streams, args.replay_interval))
+        return
+
+    stream = sys.stdin if args.events in (None, '-') else open(args.events, 'r')
+    try:
+        scanner.run(read_events(stream))
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+if __name__ == "__main__":
+    main()
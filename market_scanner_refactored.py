@@ -8,9 +8,10 @@ import json
 import argparse
 import os
 import time
+import logging
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 
 # Load environment variables from .env file
 from dotenv import load_dotenv
@@ -19,41 +20,28 @@ load_dotenv()
 # Import canonical architecture components
 from symbol_mapper import to_canonical, get_mapper
 from shared_context import SharedContext, FeatureFactory, create_default_config
+from json_encoder import dumps, dumps_bytes
+from scan_planner import ScanGroup, ScanSource, plan_scan, summarize_plan
+from trigger_table import build_symbol_triggers, save_trigger_table, load_trigger_table
+from feed_delta import FeedDeltaWriter, encode_signals, build_feed_bytes, DEFAULT_SNAPSHOT_EVERY
+from history_store import HistoryStore
+from scan_checkpoint import ScanCheckpoint, scan_key, DEFAULT_CHECKPOINT_NAME
+from scan_priority import prioritize, TierTracker, DEFAULT_TIER_SIZE, HISTORY_SCANS
+from watchdog import (TimeBudget, BudgetExceeded, WatchdogPool, active_budget, budget_stage,
+                      check_budget, parse_stage_budgets)
+from scan_logging import get_logger, configure_logging, add_logging_arguments, suppressed_count
+from trendline_cache import TrendlineCache, DEFAULT_CACHE_DIR_NAME
+from coinalyze_http import get_session
+from coinalyze_rate_limiter import get_rate_limiter
+from candle_validation import (CandleDataError, validate_candles, parse_interval_ms, summarize_quality,
+                               POLICIES, DEFAULT_POLICY)
 
+logger = get_logger('scanner')
 
-def json_serializable(obj):
-    """
-    Convert numpy types and other problematic types to JSON-serializable Python types.
-    This handles numpy.bool_, numpy.int64, numpy.float64, sets, etc.
-    """
-    if isinstance(obj, np.bool_):
-        return bool(obj)
-    elif isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, set):
-        return list(obj)
-    elif isinstance(obj, dict):
-        return {key: json_serializable(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [json_serializable(item) for item in obj]
-    else:
-        return obj
-
-
-def sanitize_for_json(data):
-    """
-    Recursively sanitize data structure to ensure all values are JSON-serializable.
-    """
-    return json_serializable(data)
 
-
-def atomic_save_json(data: Dict[str, Any], filename: str) -> None:
+def atomic_write_bytes(payload: bytes, filename: str) -> None:
     """
-    Atomically save JSON data to file.
+    Atomically write pre-encoded bytes to file.
     Writes to temporary file first, then replaces the target file.
     This ensures the dashboard sees old data until scan is 100% complete.
     """
@@ -64,10 +52,8 @@ def atomic_save_json(data: Dict[str, Any], filename: str) -> None:
     temp_file = filename + '.tmp'
     
     try:
-        # Sanitize and save to temporary file
-        sanitized_data = sanitize_for_json(data)
-        with open(temp_file, 'w') as f:
-            json.dump(sanitized_data, f, indent=2)
+        with open(temp_file, 'wb') as f:
+            f.write(payload)
         
         # Atomically replace the target file
         os.replace(temp_file, filename)
@@ -79,6 +65,23 @@ def atomic_save_json(data: Dict[str, Any], filename: str) -> None:
         raise e
 
 
+def atomic_save_json(data: Dict[str, Any], filename: str) -> bytes:
+    """
+    Encode data once with SignalJSONEncoder and atomically save it.
+    Returns the encoded bytes so callers can reuse them (e.g. for stdout).
+    """
+    payload = dumps_bytes(data)
+    atomic_write_bytes(payload, filename)
+    return payload
+
+
+def write_stdout_bytes(payload: bytes) -> None:
+    """Write pre-encoded JSON to stdout without re-serializing it."""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(payload + b'\n')
+    sys.stdout.buffer.flush()
+
+
 def ensure_data_contract(signals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Ensure every signal has required fields according to data contract.
@@ -96,8 +99,7 @@ def ensure_data_contract(signals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
 from strategies_refactored import (
     QuantProLegacyRefactored,
     QuantProBreakoutRefactored,
-    QuantProBreakoutV2Refactored,
-    clean_nans
+    QuantProBreakoutV2Refactored
 )
 from batch_processor import get_batch_processor
 
@@ -146,7 +148,7 @@ def load_coinalyze_data_from_cache(symbol: str, exchange: str) -> Dict[str, Any]
         }
     
     except Exception as e:
-        print(f"[CACHE-ERROR] Failed to load Coinalyze data for {symbol}_{exchange}: {e}", file=sys.stderr)
+        logger.warning("[CACHE-ERROR] Failed to load Coinalyze data for %s_%s: %s", symbol, exchange, e)
         # Return neutral data on error
         return {
             'oi_history': [],
@@ -159,12 +161,18 @@ def load_coinalyze_data_from_cache(symbol: str, exchange: str) -> Dict[str, Any]
 
 
 # DEBUG: Check API Key visibility
-print(f"[ENV-DEBUG] Coinalyze Key Present: {bool(os.getenv('COINALYZE_API_KEY'))}", file=sys.stderr)
-print(f"[ENV-DEBUG] Coinalyze Key (first 10 chars): {os.getenv('COINALYZE_API_KEY', '')[:10]}...", file=sys.stderr)
+logger.debug("[ENV-DEBUG] Coinalyze Key Present: %s", bool(os.getenv('COINALYZE_API_KEY')))
 
 
-def load_data(filename: str) -> pd.DataFrame:
-    """Load candle data from JSON file."""
+def load_data(filename: str, policy: str = DEFAULT_POLICY,
+              data_quality: Optional[Dict[str, Dict[str, Any]]] = None) -> pd.DataFrame:
+    """
+    Load candle data from JSON file.
+    
+    Timestamps are validated and repaired per `policy` (see candle_validation);
+    the file's stats go into `data_quality` if given.
+    Raises CandleDataError under the 'reject' policy.
+    """
     with open(filename, 'r') as f:
         data = json.load(f)
     
@@ -191,7 +199,25 @@ def load_data(filename: str) -> pd.DataFrame:
     df.dropna(subset=['close'], inplace=True)
     dropped = initial_len - len(df)
     if dropped > 0:
-        print(f"[WARN] Dropped {dropped} rows due to NaN values in {filename}", file=sys.stderr)
+        logger.warning("[WARN] Dropped %d rows due to NaN values in %s", dropped, filename)
+        df.reset_index(drop=True, inplace=True)
+    
+    try:
+        df, stats = validate_candles(df, parse_interval_ms(filename), policy, filename)
+    except CandleDataError as e:
+        e.stats['rejected'] = True
+        if data_quality is not None:
+            data_quality[filename] = e.stats
+        raise
+    if data_quality is not None:
+        data_quality[filename] = stats
+    if 'rows_out' in stats:
+        logger.warning("[DATA] %s: %d out of order, %d duplicates, %d missing bars -> %s: %d dropped, %d filled",
+                       filename, stats['out_of_order'], stats['duplicates'], stats.get('missing_bars', 0),
+                       policy, stats['dropped'], stats.get('filled', 0))
+    elif not stats['clean']:
+        logger.debug("[DATA] %s: %d zero-volume bars (longest run %d)", filename,
+                     stats['zero_volume_bars'], stats['max_zero_volume_run'])
     
     return df
 
@@ -214,6 +240,85 @@ def extract_symbol_from_filename(filename: str) -> str:
     return 'UNKNOWN'
 
 
+def load_source_frames(data_file: str, policy: str = DEFAULT_POLICY,
+                       data_quality: Optional[Dict[str, Dict[str, Any]]] = None) -> tuple:
+    """
+    Load an LTF data file and its HTF sibling (None if missing, rejected or
+    shorter than 50 candles). See load_data for `policy` and `data_quality`.
+    """
+    # Load LTF data
+    df_ltf = load_data(data_file, policy, data_quality)
+    
+    # Load HTF data
+    htf_filename = data_file.replace('15m.json', '4h.json')
+    df_htf = None
+    if os.path.exists(htf_filename):
+        try:
+            df_htf = load_data(htf_filename, policy, data_quality)
+            if len(df_htf) < 50:
+                df_htf = None
+        except:
+            pass
+    return df_ltf, df_htf
+
+
+def list_data_files(directory: str, symbol_filter: Optional[str] = None) -> List[tuple]:
+    """(data_file, symbol, exchange) for every LTF data file in a directory, sorted by name."""
+    candidates = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith('.json') and '_15m.json' in filename:
+            data_file = os.path.join(directory, filename)
+            symbol = extract_symbol_from_filename(data_file)
+            exchange = extract_exchange_from_filename(data_file)
+            
+            # Filter by symbol if requested
+            if symbol_filter and symbol_filter.upper() not in symbol.upper():
+                continue
+            
+            candidates.append((data_file, symbol, exchange))
+    return candidates
+
+
+def scan_data_file(
+    data_file: str,
+    symbol: str,
+    exchange: str,
+    strategies: List,
+    feature_factory: FeatureFactory,
+    prefilter: bool = False,
+    triggers: Optional[List[Dict[str, Any]]] = None,
+    budget: Optional[TimeBudget] = None,
+    candle_policy: str = DEFAULT_POLICY,
+    data_quality: Optional[Dict[str, Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Load one LTF file (plus its HTF file and cached Coinalyze data) and analyze it.
+    
+    Candle data is validated per `candle_policy`; per-file stats go into
+    `data_quality` if given (see load_data).
+    Raises BudgetExceeded if `budget` runs out (see analyze_symbol).
+    """
+    with active_budget(budget), budget_stage('load'):
+        df_ltf, df_htf = load_source_frames(data_file, candle_policy, data_quality)
+        
+        # Get cached external data from files
+        external_data = load_coinalyze_data_from_cache(symbol, exchange)
+    
+    return analyze_symbol(
+        symbol=symbol,
+        exchange=exchange,
+        df_ltf=df_ltf,
+        df_htf=df_htf,
+        strategies=strategies,
+        feature_factory=feature_factory,
+        metadata={'mcap': 0},
+        external_data=external_data,
+        prefilter=prefilter,
+        triggers=triggers,
+        budget=budget
+    )
+
+
 def build_feature_config(user_config: Dict[str, Any]) -> Dict[str, Any]:
     """Build feature factory configuration from user config."""
     # Start with defaults
@@ -236,6 +341,70 @@ def build_feature_config(user_config: Dict[str, Any]) -> Dict[str, Any]:
     return feature_config
 
 
+def build_strategies(strategy_name: str, user_config: Dict[str, Any]) -> Optional[List[Any]]:
+    """Instantiate the strategies selected by --strategy. Returns None if unknown."""
+    name = strategy_name.lower()
+    if name == 'all':
+        return [
+            QuantProBreakoutRefactored(user_config),
+            QuantProLegacyRefactored(user_config),
+            QuantProBreakoutV2Refactored(user_config)
+        ]
+    elif name == 'legacy':
+        return [QuantProLegacyRefactored(user_config)]
+    elif name == 'breakout':
+        return [QuantProBreakoutRefactored(user_config)]
+    elif name == 'breakoutv2':
+        return [QuantProBreakoutV2Refactored(user_config)]
+    return None
+
+
+ILLIQUID_REASON = "Illiquid"
+
+
+def evaluate_prefilters(context: SharedContext, strategies: List[Any]) -> Dict[str, str]:
+    """
+    Cheap gating stage run before trendline detection.
+    
+    Returns {strategy_name: reason} for strategies that can skip the expensive
+    stages. Strategy gates (Strategy.prefilter) only skip when analyze() would
+    WAIT anyway; the liquidity gate (prefilter_min_volume_24h) is a real filter
+    and is disabled by default.
+    """
+    reasons = {}
+    
+    min_volume = context.config.get('prefilter_min_volume_24h', 0)
+    if min_volume > 0:
+        tail = context.ltf_data.tail(96)
+        volume_24h = float((tail['close'] * tail['volume']).sum())
+        if volume_24h < min_volume:
+            reason = f"{ILLIQUID_REASON}: 24h volume {volume_24h:,.0f} < {min_volume:,.0f}"
+            return {strategy.name: reason for strategy in strategies}
+    
+    for strategy in strategies:
+        try:
+            reason = strategy.prefilter(context)
+        except Exception as e:
+            logger.warning("[WARN] Prefilter %s failed for %s: %s", strategy.name, context.symbol, e)
+            reason = None
+        if reason:
+            reasons[strategy.name] = reason
+    return reasons
+
+
+def trendline_timeframes(strategies: List[Any], skip_reasons: Dict[str, str]) -> Tuple[str, ...]:
+    """
+    Timeframes to detect RSI trendlines on after the prefilter: those a
+    surviving strategy decides on (Strategy.trendline_timeframes). Strategies
+    that only show trendlines (Legacy's rsi_visuals) do not force detection.
+    """
+    needed = set()
+    for strategy in strategies:
+        if strategy.name not in skip_reasons:
+            needed.update(getattr(strategy, 'trendline_timeframes', ('ltf', 'htf')))
+    return tuple(tf for tf in ('ltf', 'htf') if tf in needed)
+
+
 def analyze_symbol(
     symbol: str,
     exchange: str,
@@ -244,7 +413,10 @@ def analyze_symbol(
     strategies: List[Any],
     feature_factory: FeatureFactory,
     metadata: Optional[Dict[str, Any]] = None,
-    external_data: Optional[Dict[str, Any]] = None
+    external_data: Optional[Dict[str, Any]] = None,
+    prefilter: bool = False,
+    triggers: Optional[List[Dict[str, Any]]] = None,
+    budget: Optional[TimeBudget] = None
 ) -> List[Dict[str, Any]]:
     """
     Analyze a symbol using the canonical architecture.
@@ -252,42 +424,109 @@ def analyze_symbol(
     Flow:
     1. Normalize symbol to canonical form
     2. Build SharedContext with pre-calculated features
-    3. Execute strategies using SharedContext
-    4. Return results with canonical metadata
+    3. (prefilter) Evaluate cheap strategy gates; detect RSI trendlines only
+       on the timeframes a surviving strategy decides on
+    4. Execute strategies using SharedContext
+    5. Return results with canonical metadata
     
     Args:
         external_data: Pre-fetched external data from batch processor (optional)
+        prefilter: Run the staged pipeline (see evaluate_prefilters)
+        triggers: If given, reverse-RSI trigger rows for this symbol are appended
+        budget: Per-symbol/per-stage time budget; raises BudgetExceeded (with the
+            stage name) when it runs out. Trigger rows are only appended on success.
     """
     
     # Step 1: Normalize symbol
     canonical_symbol = to_canonical(symbol, exchange)
     
     # Create display_symbol by stripping USDT/USDTM suffixes
-    display_symbol = symbol
-    if symbol.endswith('USDTM'):
-        display_symbol = symbol[:-5] + 'USDT'  # Convert USDTM to USDT for charts
-    elif symbol.endswith('USDT'):
-        display_symbol = symbol  # Keep as is
+    display_symbol = display_symbol_for(symbol)
     
-    print(f"[CANONICAL] {symbol} ({exchange}) → {canonical_symbol} (Display: {display_symbol})", file=sys.stderr)
+    logger.debug("[CANONICAL] %s (%s) → %s (Display: %s)", symbol, exchange, canonical_symbol, display_symbol)
     
-    # Step 2: Build SharedContext
-    context = feature_factory.build_context(
-        symbol=symbol,
-        exchange=exchange,
-        ltf_data=df_ltf,
-        htf_data=df_htf,
-        metadata=metadata or {},
-        external_data=external_data
-    )
+    with active_budget(budget):
+        # Step 2: Build SharedContext (trendlines are a separate, budgeted stage)
+        with budget_stage('indicators'):
+            context = feature_factory.build_context(
+                symbol=symbol,
+                exchange=exchange,
+                ltf_data=df_ltf,
+                htf_data=df_htf,
+                metadata=metadata or {},
+                external_data=external_data,
+                detect_trendlines=False
+            )
+        
+        logger.debug("[CONTEXT] Built for %s | LTF: %d candles | HTF: %d candles",
+                     canonical_symbol, len(df_ltf), len(df_htf) if df_htf is not None else 0)
+        
+        # Step 3: Prefilter - trendlines only for symbols with a surviving strategy
+        skip_reasons = {}
+        timeframes = ('ltf', 'htf')
+        if prefilter:
+            with budget_stage('prefilter'):
+                skip_reasons = evaluate_prefilters(context, strategies)
+                timeframes = trendline_timeframes(strategies, skip_reasons)
+        if timeframes:
+            with budget_stage('trendlines'):
+                feature_factory.detect_trendlines(context, timeframes)
+        else:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[PREFILTER] %s no trendlines: %s", canonical_symbol,
+                             '; '.join(sorted(set(skip_reasons.values()))) or 'no strategy decides on them')
+        
+        symbol_triggers = []
+        if triggers is not None:
+            with budget_stage('triggers'):
+                try:
+                    symbol_triggers = build_symbol_triggers(context, strategies)
+                except Exception as e:
+                    logger.warning("[WARN] Trigger table failed for %s: %s", symbol, e)
+        
+        # Step 4: Execute strategies
+        with budget_stage('strategies'):
+            results = execute_strategies(context, strategies, metadata=metadata, skip_reasons=skip_reasons)
     
-    print(f"[CONTEXT] Built for {canonical_symbol} | LTF: {len(df_ltf)} candles | HTF: {len(df_htf) if df_htf is not None else 0} candles", file=sys.stderr)
+    if triggers is not None:
+        triggers.extend(symbol_triggers)
+    return results
+
+
+def display_symbol_for(symbol: str) -> str:
+    """Chart symbol: USDTM (KuCoin futures) is shown as USDT."""
+    if symbol.endswith('USDTM'):
+        return symbol[:-5] + 'USDT'  # Convert USDTM to USDT for charts
+    return symbol
+
+
+def execute_strategies(
+    context: SharedContext,
+    strategies: List[Any],
+    metadata: Optional[Dict[str, Any]] = None,
+    skip_reasons: Optional[Dict[str, str]] = None
+) -> List[Dict[str, Any]]:
+    """Run strategies on a built context and enrich results with canonical metadata."""
+    symbol = context.symbol
+    exchange = context.exchange
+    canonical_symbol = context.canonical_symbol
+    display_symbol = display_symbol_for(symbol)
+    skip_reasons = skip_reasons or {}
     
-    # Step 3: Execute strategies
     results = []
     for strategy in strategies:
+        check_budget()
         try:
-            result = strategy.analyze(context)
+            reason = skip_reasons.get(strategy.name)
+            if reason and reason.startswith(ILLIQUID_REASON):
+                result = strategy._empty_result(context)
+            else:
+                result = strategy.analyze(context)
+            
+            if reason:
+                result.setdefault('details', {})
+                result['details'].setdefault('reason', reason)
+                result['details']['skipped_by_prefilter'] = reason
             
             # Enrich with canonical metadata
             result['canonical_symbol'] = canonical_symbol
@@ -310,16 +549,228 @@ def analyze_symbol(
             
             results.append(result)
             
-            print(f"[STRATEGY] {strategy.name} → Score: {result.get('score', 0):.1f} | Action: {result.get('action', 'WAIT')}", file=sys.stderr)
+            logger.debug("[STRATEGY] %s → Score: %.1f | Action: %s",
+                         strategy.name, result.get('score', 0) or 0, result.get('action', 'WAIT'))
         
         except Exception as e:
-            print(f"[ERROR] Strategy {strategy.name} failed for {symbol}: {e}", file=sys.stderr)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+            logger.error("[ERROR] Strategy %s failed for %s: %s", strategy.name, symbol, e, exc_info=True)
     
     return results
 
 
+def load_last_known_signals(output_file: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Signals of the previous master feed grouped by canonical symbol (empty if unreadable).
+    
+    Each signal gets details.stale_since = the feed's last_updated, unless it
+    was already being served stale (then the original time is kept).
+    """
+    try:
+        with open(output_file, 'r') as f:
+            feed = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if isinstance(feed, list):
+        feed = {'signals': feed}
+    
+    by_symbol: Dict[str, List[Dict[str, Any]]] = {}
+    for signal in feed.get('signals', []):
+        details = dict(signal.get('details') or {})
+        details.setdefault('stale_since', feed.get('last_updated'))
+        by_symbol.setdefault(signal.get('canonical_symbol'), []).append(dict(signal, details=details))
+    return by_symbol
+
+
+def serve_last_known(last_known: Dict[str, List[Dict[str, Any]]], canonical_symbol: str,
+                     reason: str) -> List[Dict[str, Any]]:
+    """Last known good signals for a symbol that timed out in this scan, marked stale."""
+    served = []
+    for signal in last_known.get(canonical_symbol, []):
+        signal = dict(signal, details=dict(signal['details'], stale_reason=reason))
+        served.append(signal)
+    return served
+
+
+def publish_partial_feed(
+    group_results: Dict[int, List[Dict[str, Any]]],
+    scan_groups: List[ScanGroup],
+    last_known: Dict[str, List[Dict[str, Any]]],
+    output_file: str,
+    delta_writer: Optional[FeedDeltaWriter] = None,
+    fresh: Iterable[int] = ()
+) -> int:
+    """
+    Atomically write the master feed of a scan in progress: fresh results of
+    the coins analyzed so far, the previous feed's signals (details.stale_since)
+    for the rest.
+    
+    With a delta_writer, the results of the `fresh` coins (done since the last
+    partial publish) also go out as a feed delta, so delta consumers like the
+    dashboard see every tier. Pending coins keep their previous version there;
+    signals that disappeared are only removed by the final delta. Triggers,
+    history and scan_status are only written by publish_scan_results at the
+    end. Returns the number of signals written.
+    """
+    signals = []
+    for index, group in enumerate(scan_groups):
+        if index in group_results:
+            signals.extend(group_results[index])
+        else:
+            exchanges = {source.exchange for source in group.sources}
+            signals.extend(s for s in last_known.get(group.canonical_symbol, []) if s.get('exchange') in exchanges)
+    signals = ensure_data_contract(signals)
+    last_updated = int(time.time() * 1000)
+    atomic_write_bytes(build_feed_bytes(last_updated, encode_signals(signals)), output_file)
+    if delta_writer is not None:
+        upserts = [r for index in fresh for r in group_results.get(index, [])]
+        delta_writer.publish_changes(upserts, last_updated, lambda: signals)
+    return len(signals)
+
+
+def publish_scan_results(
+    all_results: List[Dict[str, Any]],
+    all_triggers: Optional[List[Dict[str, Any]]],
+    scan_status: Dict[str, Any],
+    output_file: str,
+    delta_dir: Optional[str] = None,
+    snapshot_every: int = DEFAULT_SNAPSHOT_EVERY,
+    publish_delta: bool = True,
+    trigger_file: Optional[str] = None,
+    history_db: Optional[str] = None
+) -> bytes:
+    """
+    Write the outputs of a directory scan: master feed, feed delta, trigger
+    table (if all_triggers is not None), signal history (if history_db is
+    given, compacted once a day) and data/scan_status.json.
+    
+    Returns the master feed bytes (also written to stdout by the caller).
+    """
+    scan_status['generated_signals'] = len(all_results)
+    skipped = [r['details']['skipped_by_prefilter'] for r in all_results
+               if (r.get('details') or {}).get('skipped_by_prefilter')]
+    scan_status['prefilter_skipped'] = len(skipped)
+    if skipped:
+        logger.info("[PREFILTER] %d/%d strategy results decided by prefilter", len(skipped), len(all_results))
+    
+    # Ensure data contract compliance
+    all_results = ensure_data_contract(all_results)
+    
+    # Create structured master feed with timestamp
+    master_feed = {
+        'last_updated': int(time.time() * 1000),
+        'signals': all_results
+    }
+    
+    # Encode each signal once; the same bytes go to the master feed file,
+    # the feed delta/snapshot and stdout
+    encoded_signals = encode_signals(all_results)
+    feed_bytes = build_feed_bytes(master_feed['last_updated'], encoded_signals)
+    atomic_write_bytes(feed_bytes, output_file)
+    
+    if publish_delta:
+        delta_dir = delta_dir or os.path.join(os.path.dirname(output_file) or '.', 'feed_deltas')
+        try:
+            delta = FeedDeltaWriter(delta_dir, snapshot_every).publish(
+                all_results, master_feed['last_updated'], encoded_signals
+            )
+            logger.info("[DELTA] seq=%s added=%s changed=%s removed=%s%s", delta['seq'], delta['added'],
+                        delta['changed'], delta['removed'], ' (snapshot)' if delta['snapshot'] else '')
+        except Exception as e:
+            # The full master feed is already written; consumers fall back to it
+            logger.warning("[WARN] Failed to publish feed delta: %s", e)
+    
+    if all_triggers is not None:
+        trigger_file = trigger_file or os.path.join(os.path.dirname(output_file) or '.', 'trigger_table.json')
+        try:
+            save_trigger_table(all_triggers, trigger_file, master_feed['last_updated'])
+            logger.info("[TRIGGERS] Saved %d trigger prices to %s", len(all_triggers), trigger_file)
+        except Exception as e:
+            logger.warning("[WARN] Failed to save trigger table: %s", e)
+    
+    if history_db:
+        try:
+            with HistoryStore(history_db) as history:
+                history.record_scan(all_results, master_feed['last_updated'])
+                logger.info("[HISTORY] Recorded %d signals in %s", len(all_results), history_db)
+                # Retention runs from the scan itself, at most once a day
+                compacted = history.compact_if_due(now_ms=master_feed['last_updated'])
+                if compacted is not None:
+                    logger.info("[HISTORY] Compacted: %s", compacted)
+        except Exception as e:
+            logger.warning("[WARN] Failed to record signal history: %s", e)
+    
+    # Save scan status
+    with open('data/scan_status.json', 'w') as f:
+        json.dump(scan_status, f, indent=2)
+    
+    logger.info("[SUCCESS] Saved %d signals to %s", len(all_results), output_file)
+    logger.info("[TIMESTAMP] Last Updated: %s", master_feed['last_updated'])
+    return feed_bytes
+
+
+# Per-process state of directory-mode pool workers (see _init_scan_worker)
+_scan_worker: Dict[str, Any] = {}
+
+
+def _init_scan_worker(strategy_name: str, user_config: Dict[str, Any],
+                      log_level: Optional[str] = None, log_json: Optional[str] = None,
+                      trendline_cache: Optional[str] = None, candle_policy: str = DEFAULT_POLICY) -> None:
+    configure_logging(log_level, log_json)
+    _scan_worker['candle_policy'] = candle_policy
+    _scan_worker['strategies'] = build_strategies(strategy_name, user_config)
+    _scan_worker['feature_factory'] = FeatureFactory(
+        build_feature_config(user_config),
+        TrendlineCache(trendline_cache) if trendline_cache else None
+    )
+
+
+def _scan_worker_task(data_file: str, symbol: str, exchange: str, prefilter: bool, want_triggers: bool,
+                      symbol_timeout: Optional[float], stage_timeouts: Dict[str, float]) -> tuple:
+    triggers = [] if want_triggers else None
+    data_quality: Dict[str, Dict[str, Any]] = {}
+    results = scan_data_file(
+        data_file, symbol, exchange,
+        _scan_worker['strategies'], _scan_worker['feature_factory'],
+        prefilter=prefilter, triggers=triggers,
+        budget=TimeBudget(symbol_timeout, stage_timeouts),
+        candle_policy=_scan_worker['candle_policy'], data_quality=data_quality
+    )
+    return results, triggers, data_quality
+
+
+DEFAULT_SYMBOL_TIMEOUT = 60.0
+
+
+def load_history_scores(history_db: Optional[str]) -> Dict[str, float]:
+    """Recent best score per coin from the history store (empty if there is none yet)."""
+    if not history_db or not os.path.exists(history_db):
+        return {}
+    try:
+        with HistoryStore(history_db) as history:
+            return history.recent_scores(HISTORY_SCANS)
+    except Exception as e:
+        logger.warning("[WARN] Failed to read signal history for prioritization: %s", e)
+        return {}
+
+
+def history_db_path(args: argparse.Namespace) -> Optional[str]:
+    """--history-db, history.db next to --output, or None with --no-history."""
+    if args.no_history:
+        return None
+    return args.history_db or os.path.join(os.path.dirname(args.output) or '.', 'history.db')
+
+
+def delta_dir_path(args: argparse.Namespace) -> str:
+    """--delta-dir or feed_deltas/ next to --output."""
+    return args.delta_dir or os.path.join(os.path.dirname(args.output) or '.', 'feed_deltas')
+
+
+def trendline_cache_path(args: argparse.Namespace) -> Optional[str]:
+    """--trendline-cache, trendline_cache/ next to --output, or None with --no-trendline-cache."""
+    if args.no_trendline_cache:
+        return None
+    return args.trendline_cache or os.path.join(os.path.dirname(args.output) or '.', DEFAULT_CACHE_DIR_NAME)
+
 
 def main():
     # Initialize status tracking
@@ -342,8 +793,48 @@ def main():
     parser.add_argument('--symbol', help='Specific symbol to scan', default=None)
     parser.add_argument('--htf-file', help='HTF data file path', default=None)
     parser.add_argument('--output', help='Output file for master feed', default='data/master_feed.json')
+    parser.add_argument('--no-prefilter', action='store_true',
+                        help='Run trendline detection for every symbol (disable the prefilter stage)')
+    parser.add_argument('--all-exchanges', action='store_true',
+                        help='Analyze every exchange copy of a coin instead of the primary source only')
+    parser.add_argument('--triggers', help='Trigger table file (default: trigger_table.json next to --output)', default=None)
+    parser.add_argument('--no-triggers', action='store_true', help='Do not export the reverse-RSI trigger table')
+    parser.add_argument('--delta-dir', help='Feed delta directory (default: feed_deltas/ next to --output)', default=None)
+    parser.add_argument('--snapshot-every', type=int, help='Compacted feed snapshot every N versions',
+                        default=DEFAULT_SNAPSHOT_EVERY)
+    parser.add_argument('--no-delta', action='store_true', help='Do not publish feed deltas')
+    parser.add_argument('--symbol-timeout', type=float, default=DEFAULT_SYMBOL_TIMEOUT,
+                        help='Per-symbol time budget in seconds (0 = unlimited)')
+    parser.add_argument('--stage-timeouts', default=None,
+                        help='Per-stage budgets, e.g. "trendlines=10,strategies=5"')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Directory mode: analyze symbols in N worker processes (hard-killed on timeout)')
+    parser.add_argument('--hard-timeout', type=float, default=None,
+                        help='Kill a worker after this many seconds (default: 2x --symbol-timeout)')
+    parser.add_argument('--checkpoint', default=None,
+                        help='Checkpoint file (default: scan_checkpoint.jsonl next to --output)')
+    parser.add_argument('--no-checkpoint', action='store_true', help='Do not checkpoint per-symbol results')
+    parser.add_argument('--fresh', action='store_true', help='Ignore an existing checkpoint and rescan everything')
+    parser.add_argument('--history-db', default=None,
+                        help='Signal history database (default: history.db next to --output)')
+    parser.add_argument('--no-history', action='store_true', help='Do not record signals in the history store')
+    parser.add_argument('--trendline-cache', default=None,
+                        help='Trendline memo directory (default: trendline_cache/ next to --output)')
+    parser.add_argument('--no-trendline-cache', action='store_true',
+                        help='Always run the full RSI trendline search')
+    parser.add_argument('--tier-size', type=int, default=DEFAULT_TIER_SIZE,
+                        help='Directory mode: publish master_feed.json after every N coins in priority order '
+                             '(0 = only when the scan completes)')
+    parser.add_argument('--no-priority', action='store_true',
+                        help='Analyze coins in plan order instead of priority order')
+    parser.add_argument('--bad-candles', choices=POLICIES, default=DEFAULT_POLICY,
+                        help='Duplicated, out-of-order or missing candles: fill (synthetic bars), '
+                             'drop (bad rows only) or reject (skip the file) (default: %(default)s)')
+    add_logging_arguments(parser)
     
     args = parser.parse_args()
+    configure_logging(args.log_level, args.log_json)
+    scan_started = time.time()
     
     try:
         # Parse user config
@@ -352,151 +843,272 @@ def main():
             try:
                 user_config = json.loads(args.config)
             except Exception as e:
-                print(f"[WARN] Failed to parse config: {e}", file=sys.stderr)
+                logger.warning("[WARN] Failed to parse config: %s", e)
         
         # Build feature factory config
         feature_config = build_feature_config(user_config)
-        feature_factory = FeatureFactory(feature_config)
+        cache_dir = trendline_cache_path(args)
+        feature_factory = FeatureFactory(feature_config, TrendlineCache(cache_dir) if cache_dir else None)
         
         # Initialize strategies
-        strategies_to_run = []
-        if args.strategy.lower() == 'all':
-            strategies_to_run = [
-                QuantProBreakoutRefactored(user_config),
-                QuantProLegacyRefactored(user_config),
-                QuantProBreakoutV2Refactored(user_config)
-            ]
-        elif args.strategy.lower() == 'legacy':
-            strategies_to_run = [QuantProLegacyRefactored(user_config)]
-        elif args.strategy.lower() == 'breakout':
-            strategies_to_run = [QuantProBreakoutRefactored(user_config)]
-        elif args.strategy.lower() == 'breakoutv2':
-            strategies_to_run = [QuantProBreakoutV2Refactored(user_config)]
-        else:
-            print(f"[ERROR] Unknown strategy: {args.strategy}", file=sys.stderr)
+        strategies_to_run = build_strategies(args.strategy, user_config)
+        if strategies_to_run is None:
+            logger.error("[ERROR] Unknown strategy: %s", args.strategy)
             sys.exit(1)
         
         # Check if directory mode
         if os.path.isdir(args.file):
-            print(f"[DIRECTORY MODE] Scanning all JSON files in {args.file}", file=sys.stderr)
+            logger.info("[DIRECTORY MODE] Scanning all JSON files in %s", args.file)
             
-            # Find all JSON files in directory
-            json_files = []
-            symbols_list = []  # For batch processing
+            # Find all LTF data files in directory
+            candidates = list_data_files(args.file, args.symbol)
             
-            for filename in os.listdir(args.file):
-                if filename.endswith('.json') and '_15m.json' in filename:
-                    data_file = os.path.join(args.file, filename)
-                    
-                    # Extract symbol and exchange for batch processing
-                    symbol = extract_symbol_from_filename(data_file)
-                    exchange = extract_exchange_from_filename(data_file)
-                    
-                    # Filter by symbol if requested
-                    if args.symbol and args.symbol.upper() not in symbol.upper():
-                        continue
-                    
-                    json_files.append(data_file)
-                    symbols_list.append((symbol, exchange))
-                    
-                    # Apply limit during scanning phase to avoid loading unnecessary files
-                    if args.limit > 0 and len(json_files) >= args.limit:
-                        print(f"[DIRECTORY MODE] Limit reached: {args.limit} files", file=sys.stderr)
-                        break
+            # Plan: one primary source per canonical coin, others deferred
+            if args.all_exchanges:
+                scan_groups = [
+                    ScanGroup(canonical_symbol=to_canonical(symbol, exchange),
+                              sources=[ScanSource(data_file, symbol, exchange, 0)])
+                    for data_file, symbol, exchange in candidates
+                ]
+            else:
+                scan_groups = plan_scan(candidates)
+            
+            # Apply limit to planned coins
+            if args.limit > 0 and len(scan_groups) > args.limit:
+                scan_groups = scan_groups[:args.limit]
+                logger.info("[DIRECTORY MODE] Limit reached: %d files", args.limit)
             
-            scan_status['total_files'] = len(json_files)
-            print(f"[DIRECTORY MODE] Found {len(json_files)} data files", file=sys.stderr)
-            print(f"[DIRECTORY MODE] Processing {len(symbols_list)} symbols", file=sys.stderr)
+            plan_summary = summarize_plan(scan_groups)
+            scan_status['total_files'] = len(scan_groups)
+            scan_status['plan'] = plan_summary
+            logger.info("[DIRECTORY MODE] Found %d data files", len(candidates))
+            logger.info("[PLAN] %d coins to analyze, %d cross-listed copies deferred",
+                        plan_summary['canonical_symbols'], plan_summary['deferred_duplicates'])
             
             # CACHE-BASED: Reading Coinalyze data from cached files
-            print(f"[CACHE] Using cached Coinalyze data from {COINALYZE_CACHE_DIR}", file=sys.stderr)
+            logger.info("[CACHE] Using cached Coinalyze data from %s", COINALYZE_CACHE_DIR)
             
-            # Now process each file with cached data
-            all_results = []
+            # Now process each coin with cached data
+            stage_timeouts = parse_stage_budgets(args.stage_timeouts)
+            want_triggers = not args.no_triggers
+            last_known = load_last_known_signals(args.output)
+            group_results: Dict[int, List[Dict[str, Any]]] = {}
+            group_triggers: Dict[int, List[Dict[str, Any]]] = {}
+            group_errors: Dict[int, List[Dict[str, Any]]] = {}
+            data_quality: Dict[str, Dict[str, Any]] = {}
             processed = 0
+            timed_out = 0
             
-            for data_file in json_files:
+            # Resume coins finished by a previous run with the same inputs
+            checkpoint = None
+            if not args.no_checkpoint:
+                checkpoint_file = args.checkpoint or os.path.join(os.path.dirname(args.output) or '.',
+                                                                  DEFAULT_CHECKPOINT_NAME)
+                key = scan_key(scan_groups, {'strategy': args.strategy, 'config': user_config,
+                                             'prefilter': not args.no_prefilter, 'triggers': want_triggers,
+                                             'candles': args.bad_candles})
+                checkpoint = ScanCheckpoint(checkpoint_file, key, resume=not args.fresh)
+                for index, entry in checkpoint.entries.items():
+                    group_results[index] = entry['results']
+                    group_triggers[index] = entry['triggers']
+                    scan_status['errors'].extend(entry['errors'])
+                    data_quality.update(entry.get('data_quality') or {})
+                    processed += entry['status'] == 'ok'
+                    timed_out += entry['status'] in ('timeout', 'killed')
+                if checkpoint.entries:
+                    logger.info("[CHECKPOINT] Resuming: %d/%d coins already done (%s)",
+                                len(checkpoint.entries), len(scan_groups), checkpoint_file)
+            resumed = set(checkpoint.entries) if checkpoint is not None else set()
+            scan_status['resumed'] = len(resumed)
+            
+            # Hottest coins first (near a trendline, high recent scores, high volume);
+            # indices stay plan indices, so checkpoints and the final feed keep plan order
+            order = list(range(len(scan_groups)))
+            if not args.no_priority:
+                trigger_file = args.triggers or os.path.join(os.path.dirname(args.output) or '.', 'trigger_table.json')
                 try:
-                    # Extract symbol and exchange
-                    symbol = extract_symbol_from_filename(data_file)
-                    exchange = extract_exchange_from_filename(data_file)
-                    
-                    # Filter by symbol if requested
-                    if args.symbol and args.symbol.upper() not in symbol.upper():
-                        continue
-                    
-                    # Load LTF data
-                    df_ltf = load_data(data_file)
-                    
-                    # Load HTF data
-                    htf_filename = data_file.replace('15m.json', '4h.json')
-                    df_htf = None
-                    if os.path.exists(htf_filename):
-                        try:
-                            df_htf = load_data(htf_filename)
-                            if len(df_htf) < 50:
-                                df_htf = None
-                        except:
-                            pass
-                    
-                    # Get cached external data from files
-                    external_data = load_coinalyze_data_from_cache(symbol, exchange)
-                    
-                    # Analyze with cached data
-                    results = analyze_symbol(
-                        symbol=symbol,
-                        exchange=exchange,
-                        df_ltf=df_ltf,
-                        df_htf=df_htf,
-                        strategies=strategies_to_run,
-                        feature_factory=feature_factory,
-                        metadata={'mcap': 0},
-                        external_data=external_data
-                    )
-                    
-                    all_results.extend(results)
+                    previous_triggers = load_trigger_table(trigger_file)
+                except (OSError, ValueError):
+                    previous_triggers = []
+                order, priorities = prioritize(scan_groups, last_known, previous_triggers,
+                                               load_history_scores(history_db_path(args)))
+                if order:
+                    logger.info("[PRIORITY] First: %s", ', '.join(
+                        f"{scan_groups[i].canonical_symbol} ({priorities[i]:.2f})" for i in order[:5]))
+            tiers = TierTracker(order, args.tier_size, resumed)
+            scan_status['partial_publishes'] = []
+            partial_deltas = None
+            if not args.no_delta:
+                partial_deltas = FeedDeltaWriter(delta_dir_path(args), args.snapshot_every)
+            unpublished = sorted(resumed)  # coins whose results are not in a delta yet
+            
+            def coin_done(index: int) -> None:
+                """Publish the feed (and a delta) early whenever the next priority tier is complete."""
+                group_results.setdefault(index, [])  # failed coins publish nothing, not their stale signals
+                unpublished.append(index)
+                if not tiers.complete(index):
+                    return
+                try:
+                    count = publish_partial_feed(group_results, scan_groups, last_known, args.output,
+                                                 partial_deltas, unpublished)
+                except Exception as e:
+                    logger.warning("[WARN] Failed to publish partial feed: %s", e)
+                    return
+                unpublished.clear()
+                elapsed = time.time() - scan_started
+                scan_status['partial_publishes'].append({'tier': tiers.published, 'coins': len(group_results),
+                                                         'signals': count, 'elapsed_s': round(elapsed, 2)})
+                logger.info("[PUBLISH] Tier %d/%d done: %d/%d coins fresh, %d signals published after %.1fs",
+                            tiers.published, len(tiers.tiers), len(group_results), len(scan_groups), count, elapsed)
+            
+            def record(index: int, attempt: int, status: str, payload: Any,
+                       quality: Dict[str, Dict[str, Any]]) -> bool:
+                """
+                Store one source's outcome and the data-quality stats of the files it loaded.
+                Returns True if the next alternate should be tried.
+                """
+                nonlocal processed, timed_out
+                group = scan_groups[index]
+                source = group.sources[attempt]
+                errors = group_errors.setdefault(index, [])
+                data_quality.update(quality)
+                if status == 'ok':
+                    group_results[index], group_triggers[index] = payload[:2]
                     processed += 1
-                    
                     if processed % 10 == 0:
                         current_time = time.strftime('%H:%M:%S')
-                        print(f"[PROGRESS] {current_time} | Processed {processed}/{len(json_files)} files", flush=True)
+                        print(f"[PROGRESS] {current_time} | Processed {processed}/{len(scan_groups)} files", flush=True)
+                else:
+                    logger.error("[ERROR] Processing %s: %s", source.data_file, payload['error'],
+                                 extra={'symbol': group.canonical_symbol, 'stage': payload['stage']})
+                    errors.append({
+                        'file': source.data_file,
+                        'error': payload['error'],
+                        'stage': payload['stage']
+                    })
+                    scan_status['errors'].append(errors[-1])
+                    if status in ('timeout', 'killed'):
+                        # Pathological data, not a broken source: serve the last known good signals
+                        timed_out += 1
+                        stale = serve_last_known(last_known, group.canonical_symbol,
+                                                 f"Timeout in {payload['stage']}: {payload['error']}")
+                        group_results[index] = stale
+                        logger.warning("[WATCHDOG] %s timed out in %s, serving %d last known signals",
+                                       group.canonical_symbol, payload['stage'], len(stale))
+                    elif attempt + 1 < len(group.sources):
+                        # Primary first; alternates are only analyzed if it fails
+                        return True
                 
-                except Exception as e:
-                    error_msg = f"{type(e).__name__}: {str(e)}"
-                    print(f"[ERROR] Processing {data_file}: {error_msg}", file=sys.stderr)
-                    scan_status['errors'].append({
-                        'file': data_file,
-                        'error': error_msg
+                if checkpoint is not None:
+                    checkpoint.record(index, {
+                        'canonical_symbol': group.canonical_symbol,
+                        'status': status,
+                        'results': group_results.get(index, []),
+                        'triggers': group_triggers.get(index),
+                        'errors': errors,
+                        'data_quality': quality
                     })
+                return False
             
-            scan_status['processed_files'] = processed
-            scan_status['generated_signals'] = len(all_results)
-            
-            print(f"[DIRECTORY MODE] Processed {processed} files, generated {len(all_results)} signals", file=sys.stderr)
+            if args.workers > 1:
+                hard_timeout = args.hard_timeout or (2 * args.symbol_timeout if args.symbol_timeout else None)
+                logger.info("[WATCHDOG] %d workers | symbol budget %ss | hard timeout %ss",
+                            args.workers, args.symbol_timeout or 'unlimited', hard_timeout or 'none')
+                
+                def task_args(source):
+                    return (source.data_file, source.symbol, source.exchange, not args.no_prefilter,
+                            want_triggers, args.symbol_timeout, stage_timeouts)
+                
+                with WatchdogPool(_scan_worker_task, args.workers, hard_timeout,
+                                  initializer=_init_scan_worker, initargs=(args.strategy, user_config, args.log_level, args.log_json,
+                                            cache_dir, args.bad_candles)) as pool:
+                    for index in order:
+                        if index not in resumed:
+                            pool.submit((index, 0), *task_args(scan_groups[index].sources[0]))
+                    for (index, attempt), status, payload in pool.results():
+                        # Workers return load stats with their results only
+                        quality = payload[2] if status == 'ok' else {}
+                        if record(index, attempt, status, payload, quality):
+                            pool.submit((index, attempt + 1), *task_args(scan_groups[index].sources[attempt + 1]))
+                        else:
+                            coin_done(index)
+            else:
+                for index in order:
+                    if index in resumed:
+                        continue
+                    group = scan_groups[index]
+                    for attempt, source in enumerate(group.sources):
+                        triggers = [] if want_triggers else None
+                        quality: Dict[str, Dict[str, Any]] = {}
+                        budget = TimeBudget(args.symbol_timeout, stage_timeouts)
+                        try:
+                            results = scan_data_file(
+                                source.data_file, source.symbol, source.exchange,
+                                strategies_to_run, feature_factory,
+                                prefilter=not args.no_prefilter,
+                                triggers=triggers,
+                                budget=budget,
+                                candle_policy=args.bad_candles,
+                                data_quality=quality
+                            )
+                            status, payload = 'ok', (results, triggers, quality)
+                        except BudgetExceeded as e:
+                            status, payload = 'timeout', {'stage': e.stage, 'error': str(e)}
+                        except Exception as e:
+                            status, payload = 'error', {'stage': budget.last_stage, 'error': f"{type(e).__name__}: {str(e)}"}
+                        if not record(index, attempt, status, payload, quality):
+                            break
+                    coin_done(index)
             
-            # Ensure data contract compliance
-            all_results = ensure_data_contract(all_results)
+            # Collect in plan order regardless of completion order
+            all_results = [r for index in sorted(group_results) for r in group_results[index]]
+            all_triggers = None
+            if want_triggers:
+                all_triggers = [t for index in sorted(group_triggers) for t in (group_triggers[index] or [])]
+            scan_status['timed_out'] = timed_out
+            scan_status['data_quality'] = summarize_quality(data_quality, args.bad_candles)
+            if scan_status['data_quality']['files_with_issues']:
+                totals = scan_status['data_quality']['totals']
+                logger.info("[DATA] %d/%d files with issues: %d duplicates, %d out of order, %d missing bars "
+                            "(%d filled, %d dropped), %d zero-volume bars",
+                            scan_status['data_quality']['files_with_issues'], len(data_quality),
+                            totals['duplicates'], totals['out_of_order'], totals['missing_bars'],
+                            totals['filled'], totals['dropped'], totals['zero_volume_bars'])
             
-            # Create structured master feed with timestamp
-            master_feed = {
-                'last_updated': int(time.time() * 1000),
-                'signals': clean_nans(all_results)
-            }
+            # Sequential scans only: pool workers keep their own counters
+            cache = feature_factory.trendline_cache
+            if cache is not None and cache.hit_rate() is not None:
+                scan_status['trendline_cache'] = dict(cache.stats)
+                logger.info("[TRENDLINE-CACHE] %d/%d trendline searches reused (%.0f%%)", cache.stats['hits'],
+                            cache.stats['hits'] + cache.stats['misses'], 100 * cache.hit_rate())
+            http = get_session().summary()
+            if http['requests']:
+                http['rate_limit'] = get_rate_limiter().summary()
+                scan_status['http'] = http
+                logger.info("[HTTP] %d Coinalyze requests, %.1fms avg, %d connections opened, "
+                            "%.1fs rate-limit wait, %d throttled",
+                            http['requests'], http['avg_ms'], http['connections'],
+                            http['rate_limit']['waited_s'], http['rate_limit']['throttled'])
             
-            # Atomic save to master feed file
-            output_file = args.output
-            atomic_save_json(master_feed, output_file)
+            scan_status['processed_files'] = processed
+            logger.info("[DIRECTORY MODE] Processed %d files, generated %d signals | %d errors, %d timed out | "
+                        "%.1fs%s", processed, len(all_results), len(scan_status['errors']), timed_out,
+                        time.time() - scan_started,
+                        f" | {suppressed_count()} repeated log lines suppressed" if suppressed_count() else '')
             
-            # Save scan status
-            with open('data/scan_status.json', 'w') as f:
-                json.dump(scan_status, f, indent=2)
+            feed_bytes = publish_scan_results(
+                all_results, all_triggers, scan_status, args.output,
+                delta_dir=args.delta_dir, snapshot_every=args.snapshot_every,
+                publish_delta=not args.no_delta, trigger_file=args.triggers,
+                history_db=history_db_path(args)
+            )
             
-            print(f"[SUCCESS] Saved {len(all_results)} signals to {output_file}", file=sys.stderr)
-            print(f"[TIMESTAMP] Last Updated: {master_feed['last_updated']}", file=sys.stderr)
+            # The master feed is written: the next scan starts over
+            if checkpoint is not None:
+                checkpoint.remove()
             
             # Also output to stdout for compatibility
-            sanitized_feed = sanitize_for_json(master_feed)
-            print(json.dumps(sanitized_feed))
+            write_stdout_bytes(feed_bytes)
             sys.exit(0)
         
         # Check if batch mode (text file with list of symbols)
@@ -535,7 +1147,7 @@ def main():
                         continue
                     
                     # Load LTF data
-                    df_ltf = load_data(data_file)
+                    df_ltf = load_data(data_file, args.bad_candles)
                     if args.limit > 0:
                         df_ltf = df_ltf.tail(args.limit)
                     
@@ -544,7 +1156,7 @@ def main():
                     df_htf = None
                     if os.path.exists(htf_filename):
                         try:
-                            df_htf = load_data(htf_filename)
+                            df_htf = load_data(htf_filename, args.bad_candles)
                             if len(df_htf) < 50:
                                 df_htf = None
                         except:
@@ -573,16 +1185,15 @@ def main():
                             all_batch_results.append(r)
                 
                 except Exception as e:
-                    print(f"[ERROR] Processing {symbol}: {e}", file=sys.stderr)
+                    logger.error("[ERROR] Processing %s: %s", symbol, e)
                     pass
             
-            # Output batch results with sanitization
-            sanitized_results = sanitize_for_json(clean_nans(all_batch_results))
-            print(json.dumps(sanitized_results))
+            # Output batch results (NaN/numpy handled by the encoder)
+            print(dumps(all_batch_results))
             sys.exit(0)
         
         # Single file mode
-        df_ltf = load_data(args.file)
+        df_ltf = load_data(args.file, args.bad_candles)
         if args.limit > 0:
             df_ltf = df_ltf.tail(args.limit)
         
@@ -594,13 +1205,13 @@ def main():
         df_htf = None
         if args.htf_file:
             if os.path.exists(args.htf_file):
-                df_htf = load_data(args.htf_file)
+                df_htf = load_data(args.htf_file, args.bad_candles)
         else:
             # Auto-detect HTF file
             htf_filename = args.file.replace('15m.json', '4h.json')
             if os.path.exists(htf_filename):
                 try:
-                    df_htf = load_data(htf_filename)
+                    df_htf = load_data(htf_filename, args.bad_candles)
                     if len(df_htf) < 50:
                         df_htf = None
                 except:
@@ -608,7 +1219,7 @@ def main():
         
         # Backtest mode
         if args.backtest:
-            print("[ERROR] Backtest mode not yet implemented in canonical architecture", file=sys.stderr)
+            logger.error("[ERROR] Backtest mode not yet implemented in canonical architecture")
             sys.exit(1)
         
         # Live analysis mode
@@ -622,16 +1233,13 @@ def main():
             metadata={'mcap': 0}
         )
         
-        # Output results with sanitization
-        sanitized_results = sanitize_for_json(clean_nans(results))
-        print(json.dumps(sanitized_results))
+        # Output results (NaN/numpy handled by the encoder)
+        print(dumps(results))
 
 
     except Exception as e:
         scan_status['fatal_error'] = str(e)
-        print(f"[FATAL ERROR] {e}", file=sys.stderr)
-        import traceback
-        traceback.print_exc(file=sys.stderr)
+        logger.critical("[FATAL ERROR] %s", e, exc_info=True)
         # Try to save status even on fatal error
         try:
             with open('data/scan_status.json', 'w') as f:
@@ -0,0 +1,467 @@
+"""
+Parameter Sweep - Evaluate many FeatureFactory / strategy configs on shared indicators.
+
+A sweep config mixes three kinds of keys, and each kind is computed once per
+distinct value and shared by every config that reuses it:
+
+1. Indicator keys (rsi_period, atr_period, ema_fast, ...): FeatureFactory runs
+   once per symbol and distinct indicator parameters, over the full history.
+   Indicators are causal, so every decision point slices the same series.
+2. Trendline keys (rsi_pivot_order, rsi_tolerance, rsi_min_slope, ...): HTF
+   RSI pivots/trendlines are detected once per decision point and distinct
+   trendline parameters (and only where trendline_possible() allows a line).
+3. Everything else (min_rr_ratio, atr_stop_multiplier, ...) is passed to the
+   strategies as their config; these configs only re-run analyze().
+
+Each config is evaluated on the last --points HTF candles of every symbol. A
+non-WAIT signal is scored over the next --horizon HTF candles: -1R if the stop
+is hit first (also when stop and target fall in the same candle), +RR if the
+target is hit, otherwise the open move at the horizon in R. Symbols run in
+parallel in a process pool; configs are grouped by indicator and trendline
+keys inside each worker so the caches are reused.
+
+Coinalyze data is point-in-time too (external_data_at): the OI history is cut
+at each decision point, and funding / long-short / liquidations, which the
+cache only holds as the latest snapshot, are treated as unavailable. OI-gated
+results therefore reflect what the scanner could have known then.
+
+Search space (JSON file or string):
+    {"rsi_pivot_order": [2, 3, 4], "rsi_tolerance": [0.5, 1.0],
+     "min_rr_ratio": [2.0, 3.0], "atr_stop_multiplier": {"min": 1.5, "max": 3.5}}
+Lists are grid axes; {"min", "max"} ranges require --random N.
+
+Usage:
+    python parameter_sweep.py data/ --space space.json --strategy breakoutv2
+    python parameter_sweep.py data/ --space space.json --random 50 --workers 8 --output data/sweep.csv
+"""
+
+import os
+import csv
+import json
+import random
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from shared_context import SharedContext, FeatureFactory, create_default_config, trendline_possible, align_timeframes
+from scan_planner import plan_scan
+from trendline_cache import TrendlineCache
+from scan_logging import get_logger, configure_logging, add_logging_arguments
+
+logger = get_logger('sweep')
+
+
+LTF_MS = 15 * 60 * 1000
+HTF_MS = 4 * 60 * 60 * 1000
+
+DEFAULT_POINTS = 60
+DEFAULT_HORIZON = 30
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), 'data', 'sweep_results.json')
+EXTERNAL_DATA_NOTE = 'point-in-time OI history; funding, long/short and liquidation snapshots unavailable'
+
+_DEFAULTS = create_default_config()
+TRENDLINE_KEYS = tuple(k for k in _DEFAULTS if k.startswith('rsi_') and k != 'rsi_period')
+FEATURE_KEYS = tuple(k for k in _DEFAULTS if k != 'enabled_features')
+INDICATOR_KEYS = tuple(k for k in FEATURE_KEYS if k not in TRENDLINE_KEYS and not k.startswith('prefilter_'))
+
+
+# ---------------------------------------------------------------------- search space
+
+def expand_space(space: Dict[str, Any], samples: int = 0, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Configs for a search space: full grid of the list axes, or `samples`
+    random draws (lists are sampled uniformly, {"min", "max"} ranges too;
+    integer bounds give integers).
+    """
+    if samples <= 0:
+        ranges = [k for k, v in space.items() if not isinstance(v, list)]
+        if ranges:
+            raise ValueError(f"Range axes {ranges} need random search (--random N)")
+        keys = list(space)
+        return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(samples):
+        config = {}
+        for key, axis in space.items():
+            if isinstance(axis, list):
+                config[key] = rng.choice(axis)
+            elif isinstance(axis.get('min'), int) and isinstance(axis.get('max'), int):
+                config[key] = rng.randint(axis['min'], axis['max'])
+            else:
+                config[key] = round(rng.uniform(axis['min'], axis['max']), 6)
+        configs.append(config)
+    return configs
+
+
+def split_config(params: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(FeatureFactory config, strategy config) for one sweep config."""
+    feature_config = create_default_config()
+    strategy_config = {}
+    for key, value in params.items():
+        if key in FEATURE_KEYS:
+            feature_config[key] = value
+        else:
+            strategy_config[key] = value
+    return feature_config, strategy_config
+
+
+def _cache_key(config: Dict[str, Any], keys: Tuple[str, ...]) -> Tuple:
+    return tuple(config.get(k) for k in keys)
+
+
+# ---------------------------------------------------------------------- evaluation
+
+def simulate_outcome(side: str, entry: float, stop: float, target: float,
+                     high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Optional[Tuple[str, float]]:
+    """Outcome of one setup over the following candles: ('WIN'|'LOSS'|'OPEN', R multiple)."""
+    risk = abs(entry - stop)
+    if risk <= 0 or len(close) == 0:
+        return None
+    if side == 'LONG':
+        hit_stop, hit_target = low <= stop, high >= target
+    else:
+        hit_stop, hit_target = high >= stop, low <= target
+    first_stop = int(np.argmax(hit_stop)) if hit_stop.any() else len(close)
+    first_target = int(np.argmax(hit_target)) if hit_target.any() else len(close)
+    if first_stop < len(close) and first_stop <= first_target:
+        return 'LOSS', -1.0
+    if first_target < len(close):
+        return 'WIN', abs(target - entry) / risk
+    move = close[-1] - entry if side == 'LONG' else entry - close[-1]
+    return 'OPEN', move / risk
+
+
+def _point_ms(point: Dict[str, Any]) -> float:
+    """Open time of a Coinalyze history point in ms (the API uses seconds); inf if unknown."""
+    ts = point.get('timestamp', point.get('t'))
+    if ts is None:
+        return float('inf')
+    ts = float(ts)
+    return ts * 1000 if ts < 1e11 else ts
+
+
+def external_data_at(external_data: Optional[Dict[str, Any]], end_ms: int) -> Dict[str, Any]:
+    """
+    Coinalyze data (batch format) as known at end_ms.
+
+    OI history is cut to the points that opened before end_ms. Funding rate,
+    long/short ratio and liquidations are single snapshots taken at fetch time,
+    with no history to cut, so they are left out (the strategies treat them as
+    unavailable).
+    """
+    external_data = external_data or {}
+    oi_history = [p for p in external_data.get('oi_history') or [] if _point_ms(p) < end_ms]
+    return {
+        'oi_history': oi_history,
+        'funding_rate': None,
+        'ls_ratio': None,
+        'liquidations': {'longs': 0, 'shorts': 0},
+        'oi_status': external_data.get('oi_status', 'neutral') if oi_history else 'neutral',
+        'coinalyze_symbol': external_data.get('coinalyze_symbol')
+    }
+
+
+def context_at(base: SharedContext, htf_end: int, external_data: Optional[Dict[str, Any]] = None) -> SharedContext:
+    """
+    Point-in-time view of a full-history context: HTF up to htf_end, LTF closed by
+    then, and the raw `external_data` cut at the HTF close (external_data_at).
+    The base context's external data is never reused: it was derived from the
+    latest fetch.
+    """
+    htf = base.htf_data.iloc[:htf_end + 1]
+    ltf_to_htf, htf_to_ltf = base.alignment()
+    ltf_end = int(htf_to_ltf[htf_end]) + 1
+    context = SharedContext(
+        symbol=base.symbol,
+        canonical_symbol=base.canonical_symbol,
+        exchange=base.exchange,
+        ltf_data=base.ltf_data.iloc[:ltf_end],
+        htf_data=htf,
+        metadata=base.metadata,
+        config=base.config,
+        ltf_to_htf=ltf_to_htf[:ltf_end],
+        htf_to_ltf=htf_to_ltf[:htf_end + 1]
+    )
+    for source, target, end in ((base.ltf_indicators, context.ltf_indicators, ltf_end),
+                                (base.htf_indicators, context.htf_indicators, htf_end + 1)):
+        for key, value in source.items():
+            if isinstance(value, pd.Series):
+                target[key] = value.iloc[:end]
+    end_ms = int(htf['timestamp'].iloc[-1]) + HTF_MS
+    FeatureFactory(base.config)._use_prefetched_data(context, external_data_at(external_data, end_ms))
+    return context
+
+
+class SymbolSweep:
+    """
+    Evaluates sweep configs on one symbol, caching indicators per indicator key
+    and trendlines per (indicator key, trendline key, decision point).
+    """
+
+    def __init__(self, symbol: str, exchange: str, df_ltf: pd.DataFrame, df_htf: pd.DataFrame,
+                 external_data: Optional[Dict[str, Any]] = None, trendline_cache: Optional[TrendlineCache] = None):
+        self.symbol = symbol
+        self.exchange = exchange
+        self.df_ltf = df_ltf
+        self.df_htf = df_htf
+        self.external_data = external_data
+        self.contexts: Dict[Tuple, SharedContext] = {}
+        self.trendlines: Dict[Tuple, Dict[str, Any]] = {}
+        # In-memory trendline memo per (indicator key, trendline key); decision
+        # points move forward, so unchanged pivot sets skip the search
+        self.trendline_cache = trendline_cache
+        self.memos: Dict[Tuple, Dict[str, Any]] = {}
+        # One LTF/HTF index for every indicator config and decision point
+        self.alignment = align_timeframes(df_ltf['timestamp'].to_numpy(), df_htf['timestamp'].to_numpy(),
+                                          LTF_MS, HTF_MS)
+        self.stats = {'indicator_builds': 0, 'trendline_runs': 0, 'analyses': 0}
+
+    def base_context(self, feature_config: Dict[str, Any]) -> SharedContext:
+        key = _cache_key(feature_config, INDICATOR_KEYS)
+        if key not in self.contexts:
+            self.stats['indicator_builds'] += 1
+            self.contexts[key] = FeatureFactory(feature_config).build_context(
+                symbol=self.symbol,
+                exchange=self.exchange,
+                ltf_data=self.df_ltf,
+                htf_data=self.df_htf,
+                metadata={'mcap': 0},
+                external_data=self.external_data,
+                detect_trendlines=False
+            )
+            self.contexts[key].ltf_to_htf, self.contexts[key].htf_to_ltf = self.alignment
+        return self.contexts[key]
+
+    def htf_trendlines(self, context: SharedContext, feature_config: Dict[str, Any], htf_end: int) -> Dict[str, Any]:
+        key = (_cache_key(feature_config, INDICATOR_KEYS), _cache_key(feature_config, TRENDLINE_KEYS), htf_end)
+        if key not in self.trendlines:
+            rsi = context.get_htf_indicator('rsi')
+            lines = {}
+            if rsi is not None and (trendline_possible(rsi, 'RESISTANCE', feature_config) or
+                                    trendline_possible(rsi, 'SUPPORT', feature_config)):
+                self.stats['trendline_runs'] += 1
+                context.config = feature_config
+                if self.trendline_cache is None:
+                    FeatureFactory(feature_config).detect_trendlines(context, timeframes=('htf',))
+                    lines = context.htf_indicators.pop('rsi_trendlines', {})
+                elif len(rsi) > 50:
+                    memo = self.memos.setdefault(key[:2], {})
+                    lines = FeatureFactory(feature_config, self.trendline_cache)._detect_rsi_trendlines(
+                        rsi, context.htf_data['timestamp'], memo, 'htf') or {}
+            self.trendlines[key] = lines
+        return self.trendlines[key]
+
+    def evaluate(self, configs: List[Dict[str, Any]], strategy_name: str,
+                 points: int = DEFAULT_POINTS, horizon: int = DEFAULT_HORIZON,
+                 step: int = 1) -> Dict[Tuple[int, str], Dict[str, float]]:
+        """Per (config index, strategy name) outcome totals for this symbol."""
+        from market_scanner_refactored import build_strategies
+
+        n = len(self.df_htf)
+        last = n - 1 - horizon
+        decision_points = [i for i in range(last - (points - 1) * step, last + 1, step) if i >= 50]
+        high = self.df_htf['high'].to_numpy(dtype=float)
+        low = self.df_htf['low'].to_numpy(dtype=float)
+        close = self.df_htf['close'].to_numpy(dtype=float)
+
+        # Group configs so indicator/trendline caches are hit back to back
+        order = sorted(range(len(configs)), key=lambda i: (
+            repr(_cache_key(configs[i], INDICATOR_KEYS)), repr(_cache_key(configs[i], TRENDLINE_KEYS))))
+        totals: Dict[Tuple[int, str], Dict[str, float]] = {}
+        for idx in order:
+            feature_config, strategy_config = split_config(configs[idx])
+            base = self.base_context(feature_config)
+            strategies = build_strategies(strategy_name, strategy_config) or []
+            for htf_end in decision_points:
+                context = context_at(base, htf_end, self.external_data)
+                context.config = feature_config
+                context.htf_indicators['rsi_trendlines'] = self.htf_trendlines(context, feature_config, htf_end)
+                for strategy in strategies:
+                    stats = totals.setdefault((idx, strategy.name), _empty_stats())
+                    self.stats['analyses'] += 1
+                    try:
+                        result = strategy.analyze(context)
+                    except Exception:
+                        stats['errors'] += 1
+                        continue
+                    _score(stats, result, high[htf_end + 1:htf_end + 1 + horizon],
+                           low[htf_end + 1:htf_end + 1 + horizon], close[htf_end + 1:htf_end + 1 + horizon])
+        return totals
+
+
+def _empty_stats() -> Dict[str, float]:
+    return {'signals': 0, 'wins': 0, 'losses': 0, 'open': 0, 'total_r': 0.0, 'errors': 0}
+
+
+def _score(stats: Dict[str, float], result: Dict[str, Any], high, low, close) -> None:
+    if result.get('action') not in ('LONG', 'SHORT'):
+        return
+    if None in (result.get('entry'), result.get('stop_loss'), result.get('take_profit')):
+        return
+    outcome = simulate_outcome(result['action'], result['entry'], result['stop_loss'],
+                               result['take_profit'], high, low, close)
+    if outcome is None:
+        return
+    kind, r_multiple = outcome
+    stats['signals'] += 1
+    stats[{'WIN': 'wins', 'LOSS': 'losses', 'OPEN': 'open'}[kind]] += 1
+    stats['total_r'] += r_multiple
+
+
+def sweep_symbol(task: Tuple) -> Tuple[str, Dict[Tuple[int, str], Dict[str, float]], Dict[str, int]]:
+    """Process pool entry point: load one data file and evaluate every config."""
+    from market_scanner_refactored import load_source_frames, load_coinalyze_data_from_cache
+
+    data_file, symbol, exchange, configs, strategy_name, points, horizon, step = task
+    df_ltf, df_htf = load_source_frames(data_file)
+    if df_htf is None or len(df_htf) < 50 + horizon:
+        return data_file, {}, {}
+    sweep = SymbolSweep(symbol, exchange, df_ltf, df_htf, load_coinalyze_data_from_cache(symbol, exchange))
+    return data_file, sweep.evaluate(configs, strategy_name, points, horizon, step), sweep.stats
+
+
+def rank_results(configs: List[Dict[str, Any]], totals: Dict[Tuple[int, str], Dict[str, float]]) -> List[Dict[str, Any]]:
+    """Ranked table rows: total R, then win rate, then fewer losses."""
+    rows = []
+    for (idx, strategy), stats in totals.items():
+        decided = stats['wins'] + stats['losses']
+        rows.append({
+            'config_id': idx,
+            'strategy': strategy,
+            **configs[idx],
+            'signals': int(stats['signals']),
+            'wins': int(stats['wins']),
+            'losses': int(stats['losses']),
+            'open': int(stats['open']),
+            'win_rate': round(stats['wins'] / decided, 4) if decided else 0.0,
+            'total_r': round(stats['total_r'], 4),
+            'avg_r': round(stats['total_r'] / stats['signals'], 4) if stats['signals'] else 0.0,
+            'errors': int(stats['errors'])
+        })
+    rows.sort(key=lambda r: (-r['total_r'], -r['win_rate'], r['losses'], r['config_id']))
+    for rank, row in enumerate(rows, 1):
+        row['rank'] = rank
+    return rows
+
+
+def save_results(rows: List[Dict[str, Any]], filename: str, meta: Dict[str, Any]) -> None:
+    """Write the ranked table as CSV (by extension) or JSON."""
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    if filename.endswith('.csv'):
+        columns = ['rank'] + [c for c in (rows[0] if rows else {}) if c != 'rank']
+        with open(filename, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+        return
+    with open(filename, 'w') as f:
+        json.dump({**meta, 'results': rows}, f, indent=2)
+
+
+def run_sweep(
+    files: List[Tuple[str, str, str]],
+    configs: List[Dict[str, Any]],
+    strategy_name: str = 'all',
+    points: int = DEFAULT_POINTS,
+    horizon: int = DEFAULT_HORIZON,
+    step: int = 1,
+    workers: int = 1
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Evaluate `configs` on every (data_file, symbol, exchange); returns (ranked rows, cache stats)."""
+    tasks = [(data_file, symbol, exchange, configs, strategy_name, points, horizon, step)
+             for data_file, symbol, exchange in files]
+    totals: Dict[Tuple[int, str], Dict[str, float]] = {}
+    cache_stats = {'symbols': 0, 'indicator_builds': 0, 'trendline_runs': 0, 'analyses': 0}
+
+    def merge(data_file, symbol_totals, stats):
+        if symbol_totals:
+            cache_stats['symbols'] += 1
+        for key, value in stats.items():
+            cache_stats[key] = cache_stats.get(key, 0) + value
+        for key, stats_row in symbol_totals.items():
+            target = totals.setdefault(key, _empty_stats())
+            for field_name, value in stats_row.items():
+                target[field_name] += value
+
+    if workers <= 1:
+        results = map(sweep_symbol, tasks)
+        for data_file, symbol_totals, stats in results:
+            merge(data_file, symbol_totals, stats)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(sweep_symbol, task) for task in tasks]
+            for task, future in zip(tasks, futures):
+                try:
+                    merge(*future.result())
+                except Exception as e:
+                    logger.error("[ERROR] Sweep %s: %s: %s", task[0], type(e).__name__, e)
+    return rank_results(configs, totals), cache_stats
+
+
+def main():
+    from market_scanner_refactored import list_data_files
+
+    parser = argparse.ArgumentParser(description='QuantPro parameter sweep (shared indicators)')
+    parser.add_argument('directory', help='Data directory (LTF + HTF files)')
+    parser.add_argument('--space', required=True, help='Search space: JSON file path or JSON string')
+    parser.add_argument('--random', type=int, default=0, help='Random search with N samples (default: grid)')
+    parser.add_argument('--seed', type=int, default=0, help='Random search seed')
+    parser.add_argument('--strategy', default='all', help='Strategy name (default: all)')
+    parser.add_argument('--symbol', help='Only symbols containing this string', default=None)
+    parser.add_argument('--limit', type=int, help='Limit number of coins', default=0)
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS, help='HTF decision points per symbol')
+    parser.add_argument('--step', type=int, default=1, help='HTF candles between decision points')
+    parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON, help='HTF candles to score each signal')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Ranked table (.json or .csv)')
+    parser.add_argument('--top', type=int, default=10, help='Rows to print')
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_logging(args.log_level, args.log_json)
+
+    if os.path.exists(args.space):
+        with open(args.space, 'r') as f:
+            space = json.load(f)
+    else:
+        space = json.loads(args.space)
+    configs = expand_space(space, args.random, args.seed)
+
+    # One primary source per coin (see scan_planner.py)
+    groups = plan_scan(list_data_files(args.directory, args.symbol))
+    if args.limit > 0:
+        groups = groups[:args.limit]
+    files = [(g.primary.data_file, g.primary.symbol, g.primary.exchange) for g in groups]
+
+    distinct_indicators = len({_cache_key(split_config(c)[0], INDICATOR_KEYS) for c in configs})
+    distinct_trendlines = len({(_cache_key(split_config(c)[0], INDICATOR_KEYS),
+                                _cache_key(split_config(c)[0], TRENDLINE_KEYS)) for c in configs})
+    logger.info("[SWEEP] %d configs x %d symbols | %d indicator sets, %d trendline sets | workers=%d",
+                len(configs), len(files), distinct_indicators, distinct_trendlines, args.workers)
+
+    rows, cache_stats = run_sweep(files, configs, args.strategy, args.points, args.horizon,
+                                  args.step, args.workers)
+    save_results(rows, args.output, {
+        'space': space,
+        'strategy': args.strategy,
+        'points': args.points,
+        'horizon': args.horizon,
+        'external_data': EXTERNAL_DATA_NOTE,
+        'stats': cache_stats
+    })
+    logger.info("[SWEEP] %s | saved %d rows to %s", cache_stats, len(rows), args.output)
+
+    swept = list(space)
+    for row in rows[:args.top]:
+        params = ' '.join(f"{k}={row[k]}" for k in swept)
+        print(f"#{row['rank']:<3} {row['strategy']:<10} R={row['total_r']:>8.2f} "
+              f"win={row['win_rate']:.2f} n={row['signals']:<4} {params}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""
+Portfolio Backtest - Take the scanner's signals across the whole universe with
+position limits and capital allocation.
+
+backtest_results.json / analyze_results.py only describe signals one file at a
+time. This simulates an account trading every symbol at once:
+
+1. Signal generation (parallel, one symbol per task): the canonical pipeline
+   (FeatureFactory + strategies_refactored) is evaluated at each of the last
+   --points HTF closes, reusing parameter_sweep's point-in-time contexts (OI
+   history cut at the decision time, no funding / long-short snapshots) and an
+   in-memory trendline memo. Each LONG/SHORT setup is resolved on the HTF
+   candles that follow, independent of the portfolio:
+   - fill: the first of the next --fill-bars candles whose range contains the
+     entry price (otherwise the setup expires unfilled)
+   - exit: from the candle after the fill, stop or target (stop first when both
+     fall in one candle), else the close after --max-hold candles or at the
+     end of the data
+2. Portfolio (single process): the per-symbol candidate lists are merged into
+   one time-ordered stream with heapq.merge. Exits due by a fill's time are
+   closed first, then the fill is accepted if the symbol has no open
+   position, a position slot is free and leverage leaves room for it. Size risks
+   --risk of realized equity at the stop, scaled down to the remaining
+   leverage room; fees are charged per side on notional.
+
+The report has the closed-trade equity curve, max drawdown, skip reasons and
+per-strategy attribution (trades, win rate, R, PnL and share of total PnL).
+
+Usage:
+    python portfolio_backtest.py data/
+    python portfolio_backtest.py data/ --strategy breakoutv2 --max-positions 8 --risk 0.005 --workers 8
+"""
+
+import os
+import json
+import time
+import heapq
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+import numpy as np
+
+from parameter_sweep import SymbolSweep, context_at, HTF_MS, EXTERNAL_DATA_NOTE
+from scan_planner import plan_scan
+from scan_logging import get_logger, configure_logging, add_logging_arguments
+from trendline_cache import TrendlineCache
+
+logger = get_logger('portfolio')
+
+DEFAULT_POINTS = 180  # 30 days of 4h decision points
+DEFAULT_FILL_BARS = 3
+DEFAULT_MAX_HOLD = 30
+DEFAULT_CAPITAL = 10000.0
+DEFAULT_RISK = 0.01
+DEFAULT_MAX_POSITIONS = 5
+DEFAULT_LEVERAGE = 1.0
+DEFAULT_FEE_BPS = 5.0
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), 'data', 'portfolio_backtest.json')
+
+SKIP_REASONS = ('max_positions', 'symbol_busy', 'capital')
+
+
+# ---------------------------------------------------------------------- per-symbol signals
+
+def resolve_trade(side: str, entry: float, stop: float, target: float,
+                  high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                  start: int, fill_bars: int = DEFAULT_FILL_BARS,
+                  max_hold: int = DEFAULT_MAX_HOLD) -> Optional[Tuple[int, int, float, str]]:
+    """
+    (fill index, exit index, exit price, reason) for a setup decided on the
+    candle before `start`; None if the entry is not touched within fill_bars.
+    Reasons: 'STOP', 'TARGET', 'TIME' (max_hold reached) or 'END' (data ran out).
+    """
+    n = len(close)
+    window = slice(start, min(start + fill_bars, n))
+    touched = (low[window] <= entry) & (high[window] >= entry)
+    if not touched.any():
+        return None
+    fill = start + int(np.argmax(touched))
+
+    last = min(fill + max_hold, n - 1)
+    if last == fill:
+        return fill, fill, float(close[fill]), 'END'
+    path = slice(fill + 1, last + 1)
+    if side == 'LONG':
+        hit_stop, hit_target = low[path] <= stop, high[path] >= target
+    else:
+        hit_stop, hit_target = high[path] >= stop, low[path] <= target
+    span = last - fill
+    first_stop = int(np.argmax(hit_stop)) if hit_stop.any() else span
+    first_target = int(np.argmax(hit_target)) if hit_target.any() else span
+    if first_stop < span and first_stop <= first_target:
+        return fill, fill + 1 + first_stop, stop, 'STOP'
+    if first_target < span:
+        return fill, fill + 1 + first_target, target, 'TARGET'
+    return fill, last, float(close[last]), 'TIME' if last == fill + max_hold else 'END'
+
+
+def symbol_candidates(sweep: SymbolSweep, strategy_name: str, user_config: Dict[str, Any],
+                      points: int = DEFAULT_POINTS, step: int = 1, fill_bars: int = DEFAULT_FILL_BARS,
+                      max_hold: int = DEFAULT_MAX_HOLD) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Filled trade candidates of one symbol sorted by fill time, plus counters."""
+    from market_scanner_refactored import build_feature_config, build_strategies
+
+    df_htf = sweep.df_htf
+    n = len(df_htf)
+    last = n - 2  # at least one candle left to fill on
+    decision_points = [i for i in range(last - (points - 1) * step, last + 1, step) if i >= 50]
+    timestamps = df_htf['timestamp'].to_numpy(dtype=np.int64)
+    high = df_htf['high'].to_numpy(dtype=float)
+    low = df_htf['low'].to_numpy(dtype=float)
+    close = df_htf['close'].to_numpy(dtype=float)
+
+    feature_config = build_feature_config(user_config)
+    strategies = build_strategies(strategy_name, user_config) or []
+    stats = {'decision_points': len(decision_points), 'analyses': 0, 'signals': 0, 'unfilled': 0, 'errors': 0}
+    candidates = []
+    if not decision_points or not strategies:
+        return candidates, stats
+
+    base = sweep.base_context(feature_config)
+    for htf_end in decision_points:
+        context = context_at(base, htf_end, sweep.external_data)
+        context.config = feature_config
+        context.htf_indicators['rsi_trendlines'] = sweep.htf_trendlines(context, feature_config, htf_end)
+        for strategy in strategies:
+            stats['analyses'] += 1
+            try:
+                result = strategy.analyze(context)
+            except Exception:
+                stats['errors'] += 1
+                continue
+            side = result.get('action')
+            entry, stop, target = result.get('entry'), result.get('stop_loss'), result.get('take_profit')
+            if side not in ('LONG', 'SHORT') or None in (entry, stop, target) or entry == stop:
+                continue
+            stats['signals'] += 1
+            trade = resolve_trade(side, entry, stop, target, high, low, close, htf_end + 1, fill_bars, max_hold)
+            if trade is None:
+                stats['unfilled'] += 1
+                continue
+            fill, exit_index, exit_price, reason = trade
+            candidates.append({
+                'symbol': sweep.symbol,
+                'exchange': sweep.exchange,
+                'strategy': strategy.name,
+                'side': side,
+                'score': float(result.get('score') or 0.0),
+                'signal_time': int(timestamps[htf_end]) + HTF_MS,
+                'entry': float(entry),
+                'stop_loss': float(stop),
+                'take_profit': float(target),
+                'fill_time': int(timestamps[fill]),
+                'exit_time': int(timestamps[exit_index]) + HTF_MS,
+                'exit_price': float(exit_price),
+                'exit_reason': reason
+            })
+    candidates.sort(key=_event_key)
+    return candidates, stats
+
+
+def _event_key(candidate: Dict[str, Any]) -> Tuple:
+    return candidate['fill_time'], candidate['symbol'], candidate['strategy'], candidate['signal_time']
+
+
+def generate_symbol(task: Tuple) -> Tuple[str, List[Dict[str, Any]], Dict[str, int]]:
+    """Process pool entry point: load one data file and collect its trade candidates."""
+    from market_scanner_refactored import load_source_frames, load_coinalyze_data_from_cache
+
+    data_file, symbol, exchange, strategy_name, user_config, points, step, fill_bars, max_hold = task
+    df_ltf, df_htf = load_source_frames(data_file)
+    if df_htf is None or len(df_htf) < 52:
+        return data_file, [], {}
+    sweep = SymbolSweep(symbol, exchange, df_ltf, df_htf, load_coinalyze_data_from_cache(symbol, exchange),
+                        trendline_cache=TrendlineCache())
+    candidates, stats = symbol_candidates(sweep, strategy_name, user_config, points, step, fill_bars, max_hold)
+    stats['trendline_hits'] = sweep.trendline_cache.stats['hits']
+    stats['trendline_misses'] = sweep.trendline_cache.stats['misses']
+    return data_file, candidates, stats
+
+
+def generate_candidates(files: List[Tuple[str, str, str]], strategy_name: str = 'all',
+                        user_config: Optional[Dict[str, Any]] = None, points: int = DEFAULT_POINTS,
+                        step: int = 1, fill_bars: int = DEFAULT_FILL_BARS, max_hold: int = DEFAULT_MAX_HOLD,
+                        workers: int = 1) -> Tuple[List[List[Dict[str, Any]]], Dict[str, int]]:
+    """Per-symbol candidate streams (each sorted by fill time) and summed counters."""
+    tasks = [(data_file, symbol, exchange, strategy_name, user_config or {}, points, step, fill_bars, max_hold)
+             for data_file, symbol, exchange in files]
+    streams = []
+    totals = {'symbols': 0}
+
+    def merge(data_file, candidates, stats):
+        if stats:
+            totals['symbols'] += 1
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+        if candidates:
+            streams.append(candidates)
+
+    if workers <= 1:
+        for result in map(generate_symbol, tasks):
+            merge(*result)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(generate_symbol, task) for task in tasks]
+            for task, future in zip(tasks, futures):
+                try:
+                    merge(*future.result())
+                except Exception as e:
+                    logger.error("[ERROR] Portfolio signals %s: %s: %s", task[0], type(e).__name__, e)
+    return streams, totals
+
+
+# ---------------------------------------------------------------------- portfolio
+
+def simulate_portfolio(streams: Iterable[List[Dict[str, Any]]], initial_capital: float = DEFAULT_CAPITAL,
+                       risk_per_trade: float = DEFAULT_RISK, max_positions: int = DEFAULT_MAX_POSITIONS,
+                       max_leverage: float = DEFAULT_LEVERAGE, fee_bps: float = DEFAULT_FEE_BPS) -> Dict[str, Any]:
+    """Replay the merged candidate stream against one account; returns trades, curve and counters."""
+    fee_rate = fee_bps / 10000.0
+    equity = initial_capital
+    open_notional = 0.0
+    open_positions: List[Tuple[int, int, Dict[str, Any]]] = []  # heap of (exit_time, seq, trade)
+    open_symbols = set()
+    trades = []
+    equity_curve = [(None, equity)]
+    skipped = dict.fromkeys(SKIP_REASONS, 0)
+    max_open = 0
+
+    def close_until(time_ms):
+        nonlocal equity, open_notional
+        while open_positions and open_positions[0][0] <= time_ms:
+            _, _, trade = heapq.heappop(open_positions)
+            direction = 1 if trade['side'] == 'LONG' else -1
+            gross = trade['size'] * (trade['exit_price'] - trade['entry']) * direction
+            fees = fee_rate * trade['size'] * (trade['entry'] + trade['exit_price'])
+            trade['pnl'] = gross - fees
+            trade['r_multiple'] = (trade['exit_price'] - trade['entry']) * direction / abs(trade['entry'] - trade['stop_loss'])
+            equity += trade['pnl']
+            open_notional -= trade['notional']
+            open_symbols.discard(trade['symbol'])
+            trade['equity'] = equity
+            trades.append(trade)
+            equity_curve.append((trade['exit_time'], equity))
+
+    seq = 0
+    for candidate in heapq.merge(*streams, key=_event_key):
+        if equity_curve[0][0] is None:
+            equity_curve[0] = (candidate['fill_time'], equity)
+        close_until(candidate['fill_time'])
+        if candidate['symbol'] in open_symbols:
+            skipped['symbol_busy'] += 1
+            continue
+        if len(open_positions) >= max_positions:
+            skipped['max_positions'] += 1
+            continue
+        room = equity * max_leverage - open_notional
+        entry = candidate['entry']
+        size = min(equity * risk_per_trade / abs(entry - candidate['stop_loss']), room / entry)
+        if size <= 0:
+            skipped['capital'] += 1
+            continue
+        trade = dict(candidate, size=size, notional=size * entry, risk=size * abs(entry - candidate['stop_loss']))
+        heapq.heappush(open_positions, (trade['exit_time'], seq, trade))
+        seq += 1
+        open_notional += trade['notional']
+        open_symbols.add(trade['symbol'])
+        max_open = max(max_open, len(open_positions))
+    close_until(float('inf'))
+
+    return {'trades': trades, 'equity_curve': equity_curve, 'skipped': skipped, 'max_open_positions': max_open}
+
+
+def max_drawdown(equity: List[float]) -> Tuple[float, float]:
+    """(absolute, fractional) largest peak-to-trough drop of an equity series."""
+    if not equity:
+        return 0.0, 0.0
+    values = np.asarray(equity, dtype=float)
+    peaks = np.maximum.accumulate(values)
+    drops = peaks - values
+    worst = int(np.argmax(drops))
+    return float(drops[worst]), float(drops[worst] / peaks[worst]) if peaks[worst] > 0 else 0.0
+
+
+def strategy_attribution(trades: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-strategy rows sorted by PnL; pnl_share is the fraction of total PnL."""
+    rows: Dict[str, Dict[str, Any]] = {}
+    for trade in trades:
+        row = rows.setdefault(trade['strategy'], {'strategy': trade['strategy'], 'trades': 0, 'wins': 0,
+                                                  'losses': 0, 'pnl': 0.0, 'total_r': 0.0})
+        row['trades'] += 1
+        row['wins' if trade['pnl'] > 0 else 'losses'] += 1
+        row['pnl'] += trade['pnl']
+        row['total_r'] += trade['r_multiple']
+    total_pnl = sum(row['pnl'] for row in rows.values())
+    for row in rows.values():
+        row['win_rate'] = round(row['wins'] / row['trades'], 4)
+        row['avg_r'] = round(row['total_r'] / row['trades'], 4)
+        row['pnl_share'] = round(row['pnl'] / total_pnl, 4) if total_pnl else 0.0
+        row['pnl'] = round(row['pnl'], 2)
+        row['total_r'] = round(row['total_r'], 4)
+    return sorted(rows.values(), key=lambda r: -r['pnl'])
+
+
+def build_report(result: Dict[str, Any], initial_capital: float) -> Dict[str, Any]:
+    """Summary, drawdown and attribution for a simulate_portfolio result."""
+    trades = result['trades']
+    curve = result['equity_curve']
+    final = curve[-1][1]
+    drawdown, drawdown_pct = max_drawdown([equity for _, equity in curve])
+    wins = sum(1 for t in trades if t['pnl'] > 0)
+    return {
+        'summary': {
+            'initial_capital': initial_capital,
+            'final_equity': round(final, 2),
+            'return_pct': round((final / initial_capital - 1) * 100, 2),
+            'trades': len(trades),
+            'win_rate': round(wins / len(trades), 4) if trades else 0.0,
+            'total_r': round(sum(t['r_multiple'] for t in trades), 4),
+            'max_drawdown': round(drawdown, 2),
+            'max_drawdown_pct': round(drawdown_pct * 100, 2),
+            'max_open_positions': result['max_open_positions'],
+            'skipped': result['skipped']
+        },
+        'strategies': strategy_attribution(trades),
+        'equity_curve': [[time_ms, round(equity, 2)] for time_ms, equity in curve],
+        'trades': trades
+    }
+
+
+def main():
+    from market_scanner_refactored import list_data_files
+
+    parser = argparse.ArgumentParser(description='QuantPro portfolio backtest (whole universe)')
+    parser.add_argument('directory', help='Data directory (LTF + HTF files)')
+    parser.add_argument('--strategy', default='all', help='Strategy name (default: all)')
+    parser.add_argument('--config', default='{}', help='JSON Configuration string')
+    parser.add_argument('--symbol', help='Only symbols containing this string', default=None)
+    parser.add_argument('--limit', type=int, help='Limit number of coins', default=0)
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS, help='HTF decision points per symbol')
+    parser.add_argument('--step', type=int, default=1, help='HTF candles between decision points')
+    parser.add_argument('--fill-bars', type=int, default=DEFAULT_FILL_BARS, help='HTF candles an entry may take to fill')
+    parser.add_argument('--max-hold', type=int, default=DEFAULT_MAX_HOLD, help='HTF candles before a time exit')
+    parser.add_argument('--capital', type=float, default=DEFAULT_CAPITAL, help='Initial capital')
+    parser.add_argument('--risk', type=float, default=DEFAULT_RISK, help='Fraction of equity risked per trade')
+    parser.add_argument('--max-positions', type=int, default=DEFAULT_MAX_POSITIONS, help='Concurrent positions')
+    parser.add_argument('--leverage', type=float, default=DEFAULT_LEVERAGE, help='Max open notional / equity')
+    parser.add_argument('--fee-bps', type=float, default=DEFAULT_FEE_BPS, help='Fee per side in basis points')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Report JSON file')
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_logging(args.log_level, args.log_json)
+
+    user_config = json.loads(args.config) if args.config else {}
+    groups = plan_scan(list_data_files(args.directory, args.symbol))
+    if args.limit > 0:
+        groups = groups[:args.limit]
+    files = [(g.primary.data_file, g.primary.symbol, g.primary.exchange) for g in groups]
+
+    started = time.time()
+    logger.info("[PORTFOLIO] %d symbols x %d points | strategy=%s workers=%d",
+                len(files), args.points, args.strategy, args.workers)
+    streams, stats = generate_candidates(files, args.strategy, user_config, args.points, args.step,
+                                         args.fill_bars, args.max_hold, args.workers)
+    logger.info("[PORTFOLIO] Signals in %.1fs: %s", time.time() - started, stats)
+
+    result = simulate_portfolio(streams, args.capital, args.risk, args.max_positions, args.leverage, args.fee_bps)
+    report = build_report(result, args.capital)
+    report['settings'] = {key: getattr(args, key) for key in (
+        'strategy', 'points', 'step', 'fill_bars', 'max_hold', 'capital', 'risk', 'max_positions', 'leverage', 'fee_bps')}
+    report['settings']['external_data'] = EXTERNAL_DATA_NOTE
+    report['stats'] = stats
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    summary = report['summary']
+    logger.info("[PORTFOLIO] Equity %.2f -> %.2f (%+.2f%%) | %d trades, win %.2f, %.2fR | max DD %.2f%% | skipped %s",
+                args.capital, summary['final_equity'], summary['return_pct'], summary['trades'],
+                summary['win_rate'], summary['total_r'], summary['max_drawdown_pct'], summary['skipped'])
+    for row in report['strategies']:
+        logger.info("[PORTFOLIO] %-10s n=%-4d win=%.2f R=%8.2f PnL=%10.2f (%5.1f%%)", row['strategy'], row['trades'],
+                    row['win_rate'], row['total_r'], row['pnl'], row['pnl_share'] * 100)
+    logger.info("[PORTFOLIO] Saved report to %s (%.1fs)", args.output, time.time() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Scan Checkpoint - Crash-safe progress file for directory scans.
+
+Directory mode only writes master_feed.json at the end, so a scanner killed
+halfway (OOM, deploy, the Node parent restarting it) used to lose every
+analyzed symbol. Each finished coin is now appended to a JSON Lines
+checkpoint (flushed and fsynced), and a restarted scan with the same inputs
+skips the coins already in it. The final feed is assembled from the
+checkpointed and freshly analyzed results; the checkpoint is deleted once the
+master feed is written.
+
+Layout (default data/scan_checkpoint.jsonl):
+    {"scan_key": "...", "created": ms}                    header
+    {"index": 0, "canonical_symbol": "BTC", "results": [...],
+     "triggers": [...], "errors": [...], "processed": true, "timed_out": false}
+
+The scan key hashes the planned source files (path, size, mtime of the LTF
+and HTF file) and the settings that change results, so new candles or a
+different strategy/config start a fresh checkpoint. A torn last line from a
+crash mid-write is dropped on load.
+"""
+
+import os
+import json
+import time
+import hashlib
+from typing import Dict, Any, List, Optional
+
+from json_encoder import dumps_bytes
+
+
+DEFAULT_CHECKPOINT_NAME = 'scan_checkpoint.jsonl'
+
+
+def _file_signature(path: str) -> List[Any]:
+    try:
+        stat = os.stat(path)
+        return [path, stat.st_size, stat.st_mtime_ns]
+    except OSError:
+        return [path, None, None]
+
+
+def scan_key(groups: List[Any], settings: Dict[str, Any]) -> str:
+    """Identity of a scan: planned sources (with file stats) plus result-affecting settings."""
+    plan = []
+    for group in groups:
+        for source in group.sources:
+            htf_file = source.data_file.replace('15m.json', '4h.json')
+            plan.append([group.canonical_symbol, _file_signature(source.data_file), _file_signature(htf_file)])
+    payload = json.dumps({'plan': plan, 'settings': settings}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+class ScanCheckpoint:
+    """
+    Append-only per-coin checkpoint for one scan.
+
+    Args:
+        path: Checkpoint file
+        key: scan_key() of the current scan
+        resume: Load entries of a previous run with the same key (False = start over)
+    """
+
+    def __init__(self, path: str, key: str, resume: bool = True):
+        self.path = path
+        self.key = key
+        self.entries: Dict[int, Dict[str, Any]] = self._load() if resume else {}
+        self._rewrite()
+        self._file = open(self.path, 'ab')
+
+    def _load(self) -> Dict[int, Dict[str, Any]]:
+        entries = {}
+        try:
+            with open(self.path, 'rb') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return entries
+        if not lines:
+            return entries
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return entries
+        if header.get('scan_key') != self.key:
+            return entries
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn write from a crash
+            entries[entry['index']] = entry
+        return entries
+
+    def _rewrite(self) -> None:
+        """Start the file over with the header and the entries kept from a previous run."""
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        lines = [dumps_bytes({'scan_key': self.key, 'created': int(time.time() * 1000)})]
+        lines += [dumps_bytes(self.entries[index]) for index in sorted(self.entries)]
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(b'\n'.join(lines) + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def record(self, index: int, entry: Dict[str, Any]) -> None:
+        """Durably append the final outcome of one planned coin."""
+        entry = dict(entry, index=index)
+        self._file.write(dumps_bytes(entry) + b'\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.entries[index] = entry
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def remove(self) -> None:
+        """Delete the checkpoint once the scan's master feed is written."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
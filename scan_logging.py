@@ -0,0 +1,170 @@
+"""
+Scan Logging - Level-gated, rate-limited log output for the scanner
+
+Every module logs through a child of the "quantopro" logger:
+
+    from scan_logging import get_logger
+    logger = get_logger('scanner')
+    logger.debug("[CONTEXT] Built for %s", canonical_symbol)
+
+Messages keep the bracketed tags ([WARN], [ERROR], [DIRECTORY MODE], ...) the
+Node server greps for. Levels:
+- DEBUG: per-symbol detail ([CANONICAL], [CONTEXT], [STRATEGY], OI z-scores, [SCORE-DEBUG])
+- INFO:  scan progress and the final summary (production default)
+- WARNING / ERROR: degraded or failed symbols
+
+Repeated messages (same logger, level and format string) are rate-limited on
+stderr: at most `burst` per `window` seconds, then one line with the number
+suppressed. DEBUG output is never rate-limited; it is opt-in.
+
+An optional JSON-lines sink writes every record that passes the level as
+{"ts", "level", "logger", "tag", "msg", ...extra} for offline analysis.
+
+Configuration: configure_logging(level, json_path), or the QUANTOPRO_LOG_LEVEL
+and QUANTOPRO_LOG_JSON environment variables (--log-level / --log-json).
+"""
+
+import os
+import re
+import sys
+import json
+import logging
+from typing import Dict, Optional, Tuple
+
+ROOT_LOGGER = 'quantopro'
+DEFAULT_LEVEL = 'INFO'
+DEFAULT_RATE_WINDOW = 60.0
+DEFAULT_RATE_BURST = 5
+
+_TAG = re.compile(r'^\[([^\]]+)\]')
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Per-module logger under the shared "quantopro" hierarchy."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Pass at most `burst` records per (logger, level, format string) every
+    `window` seconds. The first record after a suppressed stretch carries
+    "(+N similar suppressed)". Records below `min_level` always pass.
+    """
+
+    def __init__(self, window: float = DEFAULT_RATE_WINDOW, burst: int = DEFAULT_RATE_BURST,
+                 min_level: int = logging.INFO):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.min_level = min_level
+        self.suppressed_total = 0
+        # key -> [window start, passed in window, suppressed in window]
+        self._state: Dict[Tuple[str, int, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level or self.burst <= 0:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        state = self._state.get(key)
+        if state is None or record.created - state[0] >= self.window:
+            suppressed = state[2] if state else 0
+            self._state[key] = [record.created, 1, 0]
+            if suppressed:
+                record.msg = f"{record.getMessage()} (+{suppressed} similar suppressed)"
+                record.args = None
+            return True
+        if state[1] < self.burst:
+            state[1] += 1
+            return True
+        state[2] += 1
+        self.suppressed_total += 1
+        return False
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record; fields passed via extra={...} are included."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        match = _TAG.match(message)
+        entry = {
+            'ts': int(record.created * 1000),
+            'level': record.levelname,
+            'logger': record.name,
+            'tag': match.group(1) if match else None,
+            'msg': message
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+# Handlers installed by configure_logging (replaced on reconfiguration)
+_installed = {'handlers': [], 'rate_limit': None}
+
+
+def configure_logging(level=None, json_path: Optional[str] = None,
+                      rate_window: float = DEFAULT_RATE_WINDOW,
+                      rate_burst: int = DEFAULT_RATE_BURST) -> logging.Logger:
+    """
+    Install the stderr handler (plain "%(message)s", rate-limited) and, if
+    json_path is given, a JSON-lines file handler on the "quantopro" logger.
+
+    level/json_path default to QUANTOPRO_LOG_LEVEL / QUANTOPRO_LOG_JSON.
+    Safe to call again (e.g. in worker processes); previous handlers are replaced.
+    """
+    level = level or os.environ.get('QUANTOPRO_LOG_LEVEL') or DEFAULT_LEVEL
+    json_path = json_path or os.environ.get('QUANTOPRO_LOG_JSON') or None
+
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in _installed['handlers']:
+        root.removeHandler(handler)
+        handler.close()
+
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    root.propagate = False
+
+    rate_limit = RateLimitFilter(rate_window, rate_burst)
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(logging.Formatter('%(message)s'))
+    stream.addFilter(rate_limit)
+    handlers = [stream]
+
+    if json_path:
+        os.makedirs(os.path.dirname(os.path.abspath(json_path)), exist_ok=True)
+        sink = logging.FileHandler(json_path, mode='a', encoding='utf-8')
+        sink.setFormatter(JsonLinesFormatter())
+        handlers.append(sink)
+
+    for handler in handlers:
+        root.addHandler(handler)
+    _installed['handlers'] = handlers
+    _installed['rate_limit'] = rate_limit
+    return root
+
+
+def ensure_logging() -> None:
+    """configure_logging() with environment defaults unless already configured."""
+    if not _installed['handlers']:
+        configure_logging()
+
+
+def suppressed_count() -> int:
+    """Number of stderr lines dropped by the rate limiter so far."""
+    rate_limit = _installed['rate_limit']
+    return rate_limit.suppressed_total if rate_limit else 0
+
+
+def add_logging_arguments(parser) -> None:
+    """--log-level / --log-json for scanner entry points."""
+    parser.add_argument('--log-level', default=None,
+                        help=f"DEBUG, INFO, WARNING or ERROR (default: $QUANTOPRO_LOG_LEVEL or {DEFAULT_LEVEL})")
+    parser.add_argument('--log-json', default=None,
+                        help='Also append JSON-lines log records to this file (default: $QUANTOPRO_LOG_JSON)')
+
@@ -0,0 +1,141 @@
+"""
+Scan Planner - Cross-exchange de-duplication before analysis.
+
+The same coin is usually present as HYPERLIQUID_XUSDT, KUCOIN_XUSDTM and
+MEXC_XUSDT. Instead of analyzing every copy and de-duplicating the results
+afterwards (aggregator_test.py), directory mode groups the data files by
+canonical symbol and analyzes one primary source per coin. The remaining
+copies are kept as ordered alternates and are only analyzed when the primary
+fails or when every exchange is requested explicitly (--all-exchanges).
+
+Primary selection:
+1. Sources whose last LTF candle is older than the freshest copy by more than
+   `stale_tolerance_ms` are demoted (stale feed, delisted market).
+2. Among the remaining sources, the highest SOURCE_PRIORITY wins.
+3. Ties are broken by freshness, then by exchange name for determinism.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from symbol_mapper import to_canonical
+
+
+# Source ranking shared with aggregator_test.py
+SOURCE_PRIORITY = {
+    'HYPERLIQUID': 100,
+    'BINANCE': 90,
+    'BYBIT': 80,
+    'OKX': 70,
+    'KUCOIN': 60,
+    'MEXC': 50
+}
+
+# Two 15m candles
+DEFAULT_STALE_TOLERANCE_MS = 2 * 15 * 60 * 1000
+
+_TIME_PATTERN = re.compile(rb'"time"\s*:\s*(\d+)')
+_TAIL_BYTES = 1024
+
+
+@dataclass
+class ScanSource:
+    """One exchange copy of a coin."""
+    data_file: str
+    symbol: str
+    exchange: str
+    last_candle_ms: int
+
+
+@dataclass
+class ScanGroup:
+    """All copies of one canonical coin, best source first."""
+    canonical_symbol: str
+    sources: List[ScanSource] = field(default_factory=list)
+
+    @property
+    def primary(self) -> ScanSource:
+        return self.sources[0]
+
+    @property
+    def alternates(self) -> List[ScanSource]:
+        return self.sources[1:]
+
+
+def read_last_candle_time(data_file: str) -> int:
+    """
+    Timestamp (ms) of the last candle, read from the file tail so the whole
+    JSON does not have to be parsed. Falls back to the file mtime.
+    """
+    try:
+        with open(data_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - _TAIL_BYTES))
+            matches = _TIME_PATTERN.findall(f.read())
+        if matches:
+            return int(matches[-1])
+    except OSError:
+        return 0
+    return int(os.path.getmtime(data_file) * 1000)
+
+
+def source_priority(exchange: str) -> int:
+    return SOURCE_PRIORITY.get(exchange.upper(), 0)
+
+
+def rank_sources(sources: List[ScanSource],
+                 stale_tolerance_ms: int = DEFAULT_STALE_TOLERANCE_MS) -> List[ScanSource]:
+    """Order sources best-first (see module docstring)."""
+    if not sources:
+        return []
+    freshest = max(s.last_candle_ms for s in sources)
+
+    def sort_key(s: ScanSource) -> Tuple:
+        stale = freshest - s.last_candle_ms > stale_tolerance_ms
+        return (stale, -source_priority(s.exchange), -s.last_candle_ms, s.exchange)
+
+    return sorted(sources, key=sort_key)
+
+
+def plan_scan(
+    files: List[Tuple[str, str, str]],
+    stale_tolerance_ms: int = DEFAULT_STALE_TOLERANCE_MS
+) -> List[ScanGroup]:
+    """
+    Group LTF data files by canonical symbol and rank their sources.
+
+    Args:
+        files: (data_file, symbol, exchange) tuples
+        stale_tolerance_ms: Freshness window for primary selection
+
+    Returns:
+        ScanGroups in first-seen order of their canonical symbol
+    """
+    groups: Dict[str, ScanGroup] = {}
+    for data_file, symbol, exchange in files:
+        canonical = to_canonical(symbol, exchange)
+        group = groups.setdefault(canonical, ScanGroup(canonical_symbol=canonical))
+        group.sources.append(ScanSource(
+            data_file=data_file,
+            symbol=symbol,
+            exchange=exchange,
+            last_candle_ms=read_last_candle_time(data_file)
+        ))
+
+    for group in groups.values():
+        group.sources = rank_sources(group.sources, stale_tolerance_ms)
+    return list(groups.values())
+
+
+def summarize_plan(groups: List[ScanGroup]) -> Dict[str, int]:
+    """Counts for scan_status / logging."""
+    total = sum(len(g.sources) for g in groups)
+    return {
+        'files': total,
+        'canonical_symbols': len(groups),
+        'deferred_duplicates': total - len(groups),
+        'cross_listed': sum(1 for g in groups if len(g.sources) > 1)
+    }
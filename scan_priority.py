@@ -0,0 +1,152 @@
+"""
+Scan Priority - Expected-value ordering of directory scans.
+
+Directory mode used to analyze coins in plan (file name) order, and the
+dashboard saw nothing until the last coin was done. The scheduler ranks the
+planned coins by how likely they are to produce a useful signal right now and
+splits them into tiers; the scanner publishes master_feed.json after each
+tier, so the hottest coins reach the dashboard first.
+
+Priority (0..1, higher first) is a weighted sum of:
+1. trendline: the previous scan's trigger table gives, per coin, the price
+   where RSI reaches its projected HTF trendline (reverse RSI). Its distance
+   from the last price scores 1 at the line and 0.5 at NEAR_TRENDLINE_PCT.
+2. score: best score of the coin over the last HISTORY_SCANS recorded scans
+   (history store), or in the previous master feed, divided by 100.
+3. volume: percentile of the last candles' quote volume (read from the data
+   file tail) among the planned coins.
+
+A coin without any previous data still gets its volume component. Ordering
+only changes which coins are analyzed first: the final feed keeps plan order.
+"""
+
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from scan_planner import ScanGroup
+
+WEIGHTS = {'trendline': 0.5, 'score': 0.3, 'volume': 0.2}
+NEAR_TRENDLINE_PCT = 2.0
+HISTORY_SCANS = 3
+DEFAULT_TIER_SIZE = 25
+
+_CANDLE_PATTERN = re.compile(rb'"close"\s*:\s*"?([-\d.eE+]+)"?[^}]*?"volume"\s*:\s*"?([-\d.eE+]+)"?')
+_TAIL_BYTES = 1024
+
+
+def read_tail_quote_volume(data_file: str) -> float:
+    """Mean close * volume of the complete candles in the file tail (0 if unreadable)."""
+    try:
+        with open(data_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - _TAIL_BYTES))
+            matches = _CANDLE_PATTERN.findall(f.read())
+    except OSError:
+        return 0.0
+    values = []
+    for close, volume in matches:
+        try:
+            values.append(float(close) * float(volume))
+        except ValueError:
+            continue
+    return sum(values) / len(values) if values else 0.0
+
+
+def trendline_distances(triggers: Iterable[Dict[str, Any]],
+                        last_known: Dict[str, List[Dict[str, Any]]]) -> Dict[str, float]:
+    """Smallest |trigger price - last price| in % per canonical symbol."""
+    prices = {}
+    for symbol, signals in last_known.items():
+        for signal in signals:
+            if signal.get('price'):
+                prices[symbol] = float(signal['price'])
+                break
+    distances: Dict[str, float] = {}
+    for row in triggers:
+        symbol = row.get('canonical_symbol')
+        price = prices.get(symbol)
+        if not price or row.get('trigger_price') is None:
+            continue
+        distance = abs(float(row['trigger_price']) - price) / price * 100
+        distances[symbol] = min(distance, distances.get(symbol, distance))
+    return distances
+
+
+def prior_scores(last_known: Dict[str, List[Dict[str, Any]]],
+                 history_scores: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """Best previous score per canonical symbol (history store first, then the previous feed)."""
+    scores = {symbol: max(float(s.get('score') or 0) for s in signals)
+              for symbol, signals in last_known.items() if signals}
+    scores.update(history_scores or {})
+    return scores
+
+
+def _percentiles(values: Sequence[float]) -> List[float]:
+    """Rank of each value in [0, 1]; zeros (unknown volume) stay 0."""
+    ranked = sorted(v for v in values if v > 0)
+    if not ranked:
+        return [0.0] * len(values)
+    position = {v: i for i, v in enumerate(ranked)}  # ties share the highest rank
+    return [(position[v] + 1) / len(ranked) if v > 0 else 0.0 for v in values]
+
+
+def priority_scores(groups: List[ScanGroup], distances: Dict[str, float], scores: Dict[str, float],
+                    volumes: Sequence[float]) -> List[float]:
+    """Priority of each planned coin (see module docstring)."""
+    volume_ranks = _percentiles(volumes)
+    priorities = []
+    for group, volume_rank in zip(groups, volume_ranks):
+        symbol = group.canonical_symbol
+        trendline = 0.0
+        if symbol in distances:
+            trendline = 1.0 / (1.0 + distances[symbol] / NEAR_TRENDLINE_PCT)
+        score = min(max(scores.get(symbol, 0.0) / 100.0, 0.0), 1.0)
+        priorities.append(WEIGHTS['trendline'] * trendline + WEIGHTS['score'] * score +
+                          WEIGHTS['volume'] * volume_rank)
+    return priorities
+
+
+def prioritize(groups: List[ScanGroup], last_known: Dict[str, List[Dict[str, Any]]],
+               triggers: Iterable[Dict[str, Any]] = (),
+               history_scores: Optional[Dict[str, float]] = None) -> Tuple[List[int], List[float]]:
+    """
+    Scan order for `groups` (indices, hottest first; ties keep plan order)
+    and the priority of every group.
+    """
+    volumes = [read_tail_quote_volume(group.primary.data_file) for group in groups]
+    priorities = priority_scores(groups, trendline_distances(triggers, last_known),
+                                 prior_scores(last_known, history_scores), volumes)
+    order = sorted(range(len(groups)), key=lambda i: (-priorities[i], i))
+    return order, priorities
+
+
+class TierTracker:
+    """
+    Splits a scan order into tiers of `tier_size` coins and reports when the
+    next tier (and every tier before it) is complete.
+
+    Coins restored from a checkpoint count as complete. The last tier is never
+    reported: the full publish at the end of the scan covers it.
+    """
+
+    def __init__(self, order: List[int], tier_size: int, done: Iterable[int] = ()):
+        size = tier_size if tier_size > 0 else max(len(order), 1)
+        self.tiers = [order[start:start + size] for start in range(0, len(order), size)]
+        self._tier_of = {index: n for n, tier in enumerate(self.tiers) for index in tier}
+        done = set(done)
+        self._left = [sum(1 for index in tier if index not in done) for tier in self.tiers]
+        self.published = 0
+        while self.published < len(self.tiers) and self._left[self.published] == 0:
+            self.published += 1
+
+    def complete(self, index: int) -> bool:
+        """Mark one coin done. True if this finished a tier that should be published now."""
+        self._left[self._tier_of[index]] -= 1
+        finished = self.published
+        while finished < len(self.tiers) and self._left[finished] == 0:
+            finished += 1
+        if finished == self.published:
+            return False
+        self.published = finished
+        return finished < len(self.tiers)
@@ -0,0 +1,493 @@
+"""
+Scan Queue - Sharded directory scans across processes and hosts.
+
+A coordinator plans the scan exactly like directory mode (one primary source
+per coin, alternates only on failure), splits the planned coins into shards
+and inserts them into a SQLite work queue. Any number of workers, on any
+number of hosts sharing the data directory and the queue database, claim
+shards, analyze them and write a partial feed per shard. The coordinator
+waits for every shard, merges the partial feeds in plan order and publishes
+master_feed.json, the feed delta, the trigger table and scan_status.json
+through the same path as directory mode (publish_scan_results).
+
+Leases:
+    A claimed shard carries `lease_until`; workers renew it after every coin.
+    A shard whose lease expired (dead or partitioned worker) is claimable
+    again. A late result from the previous owner is discarded. After
+    `max_attempts` claims the shard is marked failed and its coins are served
+    their last known signals.
+
+Usage:
+    python scan_queue.py coordinate data/ --db data/scan_queue.db --shard-size 25 --workers 2
+    python scan_queue.py work --db data/scan_queue.db            # on any host
+
+The database must live on a filesystem with working POSIX locks (local disk
+or a shared volume that supports them), and hosts need roughly synchronized
+clocks for lease expiry.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import subprocess
+from contextlib import contextmanager
+from dataclasses import asdict
+from typing import Dict, Any, List, Optional, Callable
+
+from json_encoder import dumps_bytes
+from candle_validation import POLICIES, DEFAULT_POLICY, summarize_quality
+from scan_planner import ScanGroup, ScanSource, plan_scan, summarize_plan
+from symbol_mapper import to_canonical
+from watchdog import TimeBudget, BudgetExceeded, parse_stage_budgets
+from market_scanner_refactored import (
+    list_data_files, scan_data_file, build_strategies, build_feature_config, publish_scan_results,
+    load_last_known_signals, serve_last_known, atomic_write_bytes, history_db_path, trendline_cache_path,
+    DEFAULT_SYMBOL_TIMEOUT
+)
+from shared_context import FeatureFactory
+from trendline_cache import TrendlineCache
+from feed_delta import DEFAULT_SNAPSHOT_EVERY
+from scan_logging import get_logger, configure_logging, add_logging_arguments
+
+logger = get_logger('queue')
+
+
+DEFAULT_QUEUE_DB = os.path.join('data', 'scan_queue.db')
+DEFAULT_SHARD_SIZE = 25
+DEFAULT_LEASE_SECONDS = 120.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    scan_id TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    settings TEXT NOT NULL,
+    result_dir TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'open'
+);
+CREATE TABLE IF NOT EXISTS shards (
+    scan_id TEXT NOT NULL,
+    shard INTEGER NOT NULL,
+    groups TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result_file TEXT,
+    PRIMARY KEY (scan_id, shard)
+);
+"""
+
+
+def encode_groups(groups: List[ScanGroup]) -> str:
+    return json.dumps([asdict(group) for group in groups])
+
+
+def decode_groups(payload: str) -> List[ScanGroup]:
+    return [ScanGroup(canonical_symbol=g['canonical_symbol'], sources=[ScanSource(**s) for s in g['sources']])
+            for g in json.loads(payload)]
+
+
+class WorkQueue:
+    """
+    SQLite-backed shard queue with lease expiry.
+
+    Every state change runs in a BEGIN IMMEDIATE transaction, so concurrent
+    workers never claim the same shard.
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute('ROLLBACK')
+            raise
+        self._conn.execute('COMMIT')
+
+    def create_scan(self, groups: List[ScanGroup], settings: Dict[str, Any], shard_size: int,
+                    result_dir: str) -> str:
+        """Insert a scan and its shards (consecutive runs of `shard_size` planned coins)."""
+        scan_id = f"{int(time.time() * 1000)}-{os.getpid()}"
+        shard_size = max(1, shard_size)
+        with self._transaction() as conn:
+            conn.execute('INSERT INTO scans (scan_id, created, settings, result_dir) VALUES (?, ?, ?, ?)',
+                         (scan_id, time.time(), json.dumps(settings), os.path.abspath(result_dir)))
+            conn.executemany(
+                'INSERT INTO shards (scan_id, shard, groups) VALUES (?, ?, ?)',
+                [(scan_id, n, encode_groups(groups[start:start + shard_size]))
+                 for n, start in enumerate(range(0, len(groups), shard_size))]
+            )
+        return scan_id
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Claim the oldest pending (or lease-expired) shard of any open scan."""
+        now = time.time()
+        with self._transaction() as conn:
+            while True:
+                row = conn.execute(
+                    """SELECT s.scan_id, s.shard, s.groups, s.attempts, sc.settings, sc.result_dir
+                       FROM shards s JOIN scans sc ON sc.scan_id = s.scan_id
+                       WHERE sc.state = 'open'
+                         AND (s.state = 'pending' OR (s.state = 'claimed' AND s.lease_until < ?))
+                       ORDER BY sc.created, s.shard LIMIT 1""", (now,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row['attempts'] >= self.max_attempts:
+                    conn.execute("UPDATE shards SET state = 'failed', worker = NULL WHERE scan_id = ? AND shard = ?",
+                                 (row['scan_id'], row['shard']))
+                    continue
+                conn.execute(
+                    """UPDATE shards SET state = 'claimed', worker = ?, lease_until = ?, attempts = attempts + 1
+                       WHERE scan_id = ? AND shard = ?""",
+                    (worker, now + self.lease_seconds, row['scan_id'], row['shard'])
+                )
+                return {
+                    'scan_id': row['scan_id'],
+                    'shard': row['shard'],
+                    'groups': decode_groups(row['groups']),
+                    'settings': json.loads(row['settings']),
+                    'result_dir': row['result_dir'],
+                    'attempt': row['attempts'] + 1
+                }
+
+    def renew(self, scan_id: str, shard: int, worker: str) -> bool:
+        """Extend the lease. False if the shard was re-claimed by someone else."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """UPDATE shards SET lease_until = ?
+                   WHERE scan_id = ? AND shard = ? AND worker = ? AND state = 'claimed'""",
+                (time.time() + self.lease_seconds, scan_id, shard, worker)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, scan_id: str, shard: int, worker: str, result_file: str) -> bool:
+        """Mark a shard done. False (result discarded) if the lease was lost."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """UPDATE shards SET state = 'done', result_file = ?, lease_until = NULL
+                   WHERE scan_id = ? AND shard = ? AND worker = ? AND state = 'claimed'""",
+                (result_file, scan_id, shard, worker)
+            )
+            return cursor.rowcount == 1
+
+    def fail_expired(self, scan_id: str) -> None:
+        """Mark lease-expired shards that used up their attempts as failed."""
+        with self._transaction() as conn:
+            conn.execute(
+                """UPDATE shards SET state = 'failed', worker = NULL
+                   WHERE scan_id = ? AND state IN ('pending', 'claimed') AND attempts >= ?
+                     AND (state = 'pending' OR lease_until < ?)""",
+                (scan_id, self.max_attempts, time.time())
+            )
+
+    def progress(self, scan_id: str) -> Dict[str, int]:
+        rows = self._conn.execute('SELECT state, COUNT(*) AS n FROM shards WHERE scan_id = ? GROUP BY state',
+                                  (scan_id,)).fetchall()
+        return {row['state']: row['n'] for row in rows}
+
+    def shards(self, scan_id: str) -> List[sqlite3.Row]:
+        return self._conn.execute('SELECT * FROM shards WHERE scan_id = ? ORDER BY shard', (scan_id,)).fetchall()
+
+    def close_scan(self, scan_id: str) -> None:
+        """Stop handing out shards of a merged (or abandoned) scan and drop its rows."""
+        with self._transaction() as conn:
+            conn.execute("UPDATE scans SET state = 'closed' WHERE scan_id = ?", (scan_id,))
+            conn.execute('DELETE FROM shards WHERE scan_id = ?', (scan_id,))
+
+
+def analyze_group(group: ScanGroup, strategies: List[Any], feature_factory: FeatureFactory,
+                  settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Analyze one planned coin like directory mode: primary source first,
+    alternates only if it fails, no alternates after a timeout.
+    `data_quality` holds the load stats of every file read on the way.
+    """
+    errors = []
+    quality: Dict[str, Dict[str, Any]] = {}
+    for source in group.sources:
+        triggers = [] if settings['triggers'] else None
+        budget = TimeBudget(settings['symbol_timeout'], settings['stage_timeouts'])
+        try:
+            results = scan_data_file(source.data_file, source.symbol, source.exchange,
+                                     strategies, feature_factory, prefilter=settings['prefilter'],
+                                     triggers=triggers, budget=budget,
+                                     candle_policy=settings.get('candles', DEFAULT_POLICY), data_quality=quality)
+            return {'canonical_symbol': group.canonical_symbol, 'status': 'ok',
+                    'results': results, 'triggers': triggers, 'errors': errors, 'data_quality': quality}
+        except BudgetExceeded as e:
+            errors.append({'file': source.data_file, 'error': str(e), 'stage': e.stage})
+            return {'canonical_symbol': group.canonical_symbol, 'status': 'timeout',
+                    'results': [], 'triggers': None, 'errors': errors, 'data_quality': quality}
+        except Exception as e:
+            errors.append({'file': source.data_file, 'error': f"{type(e).__name__}: {str(e)}",
+                           'stage': budget.last_stage})
+    return {'canonical_symbol': group.canonical_symbol, 'status': 'error',
+            'results': [], 'triggers': None, 'errors': errors, 'data_quality': quality}
+
+
+def run_worker(db_path: str, worker_id: Optional[str] = None, idle_exit: float = 30.0, poll: float = 2.0,
+               lease_seconds: float = DEFAULT_LEASE_SECONDS, analyze: Callable = analyze_group) -> int:
+    """
+    Claim and process shards until no work has shown up for `idle_exit`
+    seconds. Returns the number of shards completed.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    queue = WorkQueue(db_path, lease_seconds)
+    runtimes: Dict[str, tuple] = {}  # scan_id -> (strategies, feature_factory)
+    completed = 0
+    idle_since = time.monotonic()
+    try:
+        while True:
+            task = queue.claim(worker_id)
+            if task is None:
+                if time.monotonic() - idle_since >= idle_exit:
+                    return completed
+                time.sleep(poll)
+                continue
+
+            scan_id, shard, settings = task['scan_id'], task['shard'], task['settings']
+            if scan_id not in runtimes:
+                cache_dir = settings.get('trendline_cache')
+                runtimes[scan_id] = (build_strategies(settings['strategy'], settings['config']),
+                                     FeatureFactory(build_feature_config(settings['config']),
+                                                    TrendlineCache(cache_dir) if cache_dir else None))
+            strategies, feature_factory = runtimes[scan_id]
+            logger.info("[QUEUE] %s claimed shard %d of scan %s (%d coins)",
+                        worker_id, shard, scan_id, len(task['groups']))
+
+            outcomes = []
+            for group in task['groups']:
+                outcomes.append(analyze(group, strategies, feature_factory, settings))
+                if not queue.renew(scan_id, shard, worker_id):
+                    logger.warning("[QUEUE] Lost lease on shard %d, abandoning", shard)
+                    outcomes = None
+                    break
+
+            if outcomes is not None:
+                result_file = os.path.join(task['result_dir'], f"shard_{scan_id}_{shard:05d}_a{task['attempt']}.json")
+                os.makedirs(task['result_dir'], exist_ok=True)
+                atomic_write_bytes(dumps_bytes({'scan_id': scan_id, 'shard': shard, 'worker': worker_id,
+                                                'groups': outcomes}), result_file)
+                if queue.complete(scan_id, shard, worker_id, result_file):
+                    completed += 1
+                else:
+                    os.remove(result_file)
+            idle_since = time.monotonic()
+    finally:
+        queue.close()
+
+
+def merge_scan(queue: WorkQueue, scan_id: str, last_known: Dict[str, List[Dict[str, Any]]],
+               want_triggers: bool) -> tuple:
+    """
+    Merge the partial feeds of a finished scan in plan order.
+
+    Returns (all_results, all_triggers, errors, counts, data_quality) where
+    counts holds processed / timed_out / failed_shards and data_quality the
+    per-file load stats of every shard.
+    """
+    all_results, errors = [], []
+    data_quality: Dict[str, Dict[str, Any]] = {}
+    all_triggers = [] if want_triggers else None
+    counts = {'processed': 0, 'timed_out': 0, 'failed_shards': 0}
+    for row in queue.shards(scan_id):
+        if row['state'] == 'done':
+            with open(row['result_file'], 'r') as f:
+                outcomes = json.load(f)['groups']
+        else:
+            # Worker(s) died on it max_attempts times
+            counts['failed_shards'] += 1
+            outcomes = [{'canonical_symbol': group.canonical_symbol, 'status': 'failed', 'results': [],
+                         'triggers': None,
+                         'errors': [{'file': group.primary.data_file, 'stage': 'queue',
+                                     'error': f"Shard {row['shard']} failed after {row['attempts']} attempts"}]}
+                        for group in decode_groups(row['groups'])]
+            # (served their last known signals below, like timeouts)
+        for outcome in outcomes:
+            errors.extend(outcome['errors'])
+            data_quality.update(outcome.get('data_quality') or {})
+            results = outcome['results']
+            if outcome['status'] == 'ok':
+                counts['processed'] += 1
+            elif outcome['status'] in ('timeout', 'failed'):
+                counts['timed_out'] += outcome['status'] == 'timeout'
+                last_error = outcome['errors'][-1]
+                results = serve_last_known(last_known, outcome['canonical_symbol'],
+                                           f"Timeout in {last_error['stage']}: {last_error['error']}")
+            all_results.extend(results)
+            if want_triggers and outcome['triggers']:
+                all_triggers.extend(outcome['triggers'])
+    return all_results, all_triggers, errors, counts, data_quality
+
+
+def coordinate(args: argparse.Namespace) -> int:
+    scan_status = {
+        'timestamp': int(time.time() * 1000),
+        'command': ' '.join(sys.argv),
+        'total_files': 0,
+        'processed_files': 0,
+        'generated_signals': 0,
+        'errors': []
+    }
+    user_config = json.loads(args.config) if args.config else {}
+    if build_strategies(args.strategy, user_config) is None:
+        logger.error("[ERROR] Unknown strategy: %s", args.strategy)
+        return 1
+
+    candidates = list_data_files(args.directory, args.symbol)
+    if args.all_exchanges:
+        scan_groups = [ScanGroup(canonical_symbol=to_canonical(symbol, exchange),
+                                 sources=[ScanSource(data_file, symbol, exchange, 0)])
+                       for data_file, symbol, exchange in candidates]
+    else:
+        scan_groups = plan_scan(candidates)
+    if args.limit > 0:
+        scan_groups = scan_groups[:args.limit]
+
+    settings = {
+        'strategy': args.strategy,
+        'config': user_config,
+        'prefilter': not args.no_prefilter,
+        'triggers': not args.no_triggers,
+        'symbol_timeout': args.symbol_timeout,
+        'stage_timeouts': parse_stage_budgets(args.stage_timeouts),
+        'candles': args.bad_candles,
+        'trendline_cache': trendline_cache_path(args)
+    }
+    result_dir = args.result_dir or os.path.join(os.path.dirname(args.db) or '.', 'scan_shards')
+    queue = WorkQueue(args.db, args.lease)
+    scan_id = queue.create_scan(scan_groups, settings, args.shard_size, result_dir)
+    scan_status['total_files'] = len(scan_groups)
+    scan_status['plan'] = summarize_plan(scan_groups)
+    total_shards = len(queue.shards(scan_id))
+    scan_status['shards'] = total_shards
+    logger.info("[QUEUE] Scan %s: %d coins in %d shards (%s)", scan_id, len(scan_groups), total_shards, args.db)
+
+    # Local workers outlive a momentarily empty queue to pick up expired leases;
+    # they are stopped once the scan is merged
+    worker_cmd = [sys.executable, os.path.abspath(__file__), 'work', '--db', args.db,
+                  '--lease', str(args.lease), '--idle-exit', str(2 * args.lease)]
+    if args.log_level:
+        worker_cmd += ['--log-level', args.log_level]
+    if args.log_json:
+        worker_cmd += ['--log-json', args.log_json]
+    local = [subprocess.Popen(worker_cmd) for _ in range(args.workers)]
+    try:
+        started = time.monotonic()
+        while True:
+            queue.fail_expired(scan_id)
+            progress = queue.progress(scan_id)
+            finished = progress.get('done', 0) + progress.get('failed', 0)
+            if finished >= total_shards:
+                break
+            if args.wait_timeout and time.monotonic() - started > args.wait_timeout:
+                logger.error("[QUEUE] Gave up after %.0fs: %s", args.wait_timeout, progress)
+                queue.close_scan(scan_id)
+                return 1
+            time.sleep(args.poll)
+
+        last_known = load_last_known_signals(args.output)
+        all_results, all_triggers, errors, counts, data_quality = merge_scan(queue, scan_id, last_known,
+                                                                            settings['triggers'])
+        scan_status['errors'].extend(errors)
+        scan_status['processed_files'] = counts['processed']
+        scan_status['timed_out'] = counts['timed_out']
+        scan_status['failed_shards'] = counts['failed_shards']
+        scan_status['data_quality'] = summarize_quality(data_quality, args.bad_candles)
+        logger.info("[QUEUE] Merged %d shards: %d coins processed, %d signals",
+                    total_shards, counts['processed'], len(all_results))
+
+        publish_scan_results(all_results, all_triggers, scan_status, args.output,
+                             delta_dir=args.delta_dir, snapshot_every=args.snapshot_every,
+                             publish_delta=not args.no_delta, trigger_file=args.triggers,
+                             history_db=history_db_path(args))
+
+        for row in queue.shards(scan_id):
+            if row['result_file'] and os.path.exists(row['result_file']):
+                os.remove(row['result_file'])
+        queue.close_scan(scan_id)
+        return 0
+    finally:
+        for proc in local:
+            if proc.poll() is None:
+                proc.terminate()
+            proc.wait()
+        queue.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='QuantPro sharded scan queue')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    coord = sub.add_parser('coordinate', help='Plan a directory scan into shards and merge the results')
+    coord.add_argument('directory', help='Directory with _15m.json / _4h.json data files')
+    coord.add_argument('--db', default=DEFAULT_QUEUE_DB, help='Queue database')
+    coord.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE, help='Coins per shard')
+    coord.add_argument('--workers', type=int, default=0, help='Local worker processes to start')
+    coord.add_argument('--result-dir', default=None, help='Partial feeds (default: scan_shards/ next to --db)')
+    coord.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS, help='Shard lease in seconds')
+    coord.add_argument('--poll', type=float, default=2.0, help='Progress poll interval in seconds')
+    coord.add_argument('--wait-timeout', type=float, default=None, help='Give up after this many seconds')
+    coord.add_argument('--strategy', default='all', help='Strategy name (default: all)')
+    coord.add_argument('--config', default='{}', help='JSON Configuration string')
+    coord.add_argument('--limit', type=int, default=0, help='Limit planned coins')
+    coord.add_argument('--symbol', default=None, help='Specific symbol to scan')
+    coord.add_argument('--output', default='data/master_feed.json', help='Output file for master feed')
+    coord.add_argument('--no-prefilter', action='store_true', help='Disable the prefilter stage')
+    coord.add_argument('--all-exchanges', action='store_true', help='Analyze every exchange copy of a coin')
+    coord.add_argument('--triggers', default=None, help='Trigger table file')
+    coord.add_argument('--no-triggers', action='store_true', help='Do not export the reverse-RSI trigger table')
+    coord.add_argument('--delta-dir', default=None, help='Feed delta directory')
+    coord.add_argument('--snapshot-every', type=int, default=DEFAULT_SNAPSHOT_EVERY)
+    coord.add_argument('--no-delta', action='store_true', help='Do not publish feed deltas')
+    coord.add_argument('--history-db', default=None, help='Signal history database (default: next to --output)')
+    coord.add_argument('--no-history', action='store_true', help='Do not record signals in the history store')
+    coord.add_argument('--trendline-cache', default=None, help='Trendline memo directory (default: next to --output)')
+    coord.add_argument('--no-trendline-cache', action='store_true', help='Always run the full RSI trendline search')
+    coord.add_argument('--symbol-timeout', type=float, default=DEFAULT_SYMBOL_TIMEOUT,
+                       help='Per-symbol time budget in seconds (0 = unlimited)')
+    coord.add_argument('--stage-timeouts', default=None, help='Per-stage budgets, e.g. "trendlines=10"')
+    coord.add_argument('--bad-candles', choices=POLICIES, default=DEFAULT_POLICY,
+                       help='Duplicated, out-of-order or missing candles: fill (synthetic bars), '
+                            'drop (bad rows only) or reject (skip the file) (default: %(default)s)')
+
+    work = sub.add_parser('work', help='Claim and analyze shards')
+    work.add_argument('--db', default=DEFAULT_QUEUE_DB, help='Queue database')
+    work.add_argument('--worker-id', default=None, help='Worker name (default: host:pid)')
+    work.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS, help='Shard lease in seconds')
+    work.add_argument('--poll', type=float, default=2.0, help='Poll interval while idle')
+    work.add_argument('--idle-exit', type=float, default=30.0,
+                      help='Exit after this many idle seconds (0 = as soon as the queue is empty)')
+    for command in (coord, work):
+        add_logging_arguments(command)
+
+    args = parser.parse_args()
+    configure_logging(args.log_level, args.log_json)
+    if args.command == 'coordinate':
+        sys.exit(coordinate(args))
+    completed = run_worker(args.db, args.worker_id, args.idle_exit, args.poll, args.lease)
+    logger.info("[QUEUE] Worker done: %d shards", completed)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,26 +1,72 @@
 import json
 import os
-import sys
+import logging
+
+import numpy as np
+
+from scan_logging import get_logger, ensure_logging
 
 # Load Settings
 SETTINGS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'scoring_settings.json')
 
+DEFAULT_SETTINGS = {
+    "GEOMETRY_WEIGHT": 40.0,
+    "MOMENTUM_WEIGHT": 40.0,
+    "BASE_WEIGHT": 20.0,
+    "TARGET_AREA": 500.0,
+    "DIV_SCORES": {"0": 0, "1": 10, "2": 30, "3": 60}
+}
+
+# [SCORE-DEBUG] lines are emitted at DEBUG level only: QUANTOPRO_LOG_LEVEL=DEBUG
+# (or --log-level DEBUG) for the whole scanner, SCORING_LOG_LEVEL=DEBUG (or
+# set_log_level('DEBUG')) for this module alone.
+logger = get_logger('scoring')
+
+
+def set_log_level(level) -> None:
+    """Set the scoring log level (name or logging constant); DEBUG prints per-score lines to stderr."""
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    if logger.isEnabledFor(logging.DEBUG):
+        ensure_logging()
+
+
+if os.environ.get('SCORING_LOG_LEVEL'):
+    set_log_level(os.environ['SCORING_LOG_LEVEL'])
+
+
 def load_settings():
     try:
         with open(SETTINGS_PATH, 'r') as f:
             return json.load(f)
     except Exception as e:
-        print(f"Error loading settings from {SETTINGS_PATH}: {e}")
+        logger.warning("[WARN] Error loading settings from %s: %s", SETTINGS_PATH, e)
         # Fallback defaults
-        return {
-            "GEOMETRY_WEIGHT": 40.0,
-            "MOMENTUM_WEIGHT": 40.0,
-            "BASE_WEIGHT": 20.0,
-            "TARGET_AREA": 500.0,
-            "DIV_SCORES": {"0": 0, "1": 10, "2": 30, "3": 60}
-        }
+        return dict(DEFAULT_SETTINGS)
+
+
+def _settings_mtime():
+    try:
+        return os.stat(SETTINGS_PATH).st_mtime_ns
+    except OSError:
+        return None
+
 
 SETTINGS = load_settings()
+_settings_mtime_ns = _settings_mtime()
+
+
+def get_settings() -> dict:
+    """
+    Current scoring settings. The file is re-read only when its mtime changes
+    (one stat per call instead of a JSON parse).
+    """
+    global SETTINGS, _settings_mtime_ns
+    mtime = _settings_mtime()
+    if mtime != _settings_mtime_ns:
+        SETTINGS = load_settings()
+        _settings_mtime_ns = mtime
+    return SETTINGS
+
 
 def calculate_score(data: dict) -> float:
     """
@@ -33,47 +79,49 @@ def calculate_score(data: dict) -> float:
     - rsi_slope (float): Slope of RSI regression.
     - divergence_type (int): 0=None, 1=Classic, 2=Double, 3=Triple.
     """
-    
+    settings = get_settings()
+
     # --- 1. Geometry Score (Trendline Force) ---
     change = abs(data.get('price_change_pct', 0))
     duration = data.get('duration_candles', 0)
-    
+
     triangle_area = change * duration
-    
-    target_area = SETTINGS.get('TARGET_AREA', 500.0)
-    geo_weight = SETTINGS.get('GEOMETRY_WEIGHT', 40.0)
-    
+
+    target_area = settings.get('TARGET_AREA', 500.0)
+    geo_weight = settings.get('GEOMETRY_WEIGHT', 40.0)
+
     geometry_score = min(geo_weight, (triangle_area / target_area) * geo_weight)
-    
+
     # --- 2. Momentum Score (Divergence Force) ---
     div_type = str(data.get('divergence_type', 0)) # keys are strings in JSON
-    
-    div_scores = SETTINGS.get('DIV_SCORES', {})
+
+    div_scores = settings.get('DIV_SCORES', {})
     base_div_score = div_scores.get(div_type, 0)
-    
+
     # Decoupling logic
     p_slope = data.get('price_slope', 0)
     r_slope = data.get('rsi_slope', 0)
     slope_diff = r_slope - p_slope
-    
+
     # Bonus for strong decoupling (capped at 5 pts)
     # Allow slope bonus even if no explicit divergence pattern found yet
     slope_bonus = min(10.0, abs(slope_diff) * 5.0)
-    
-    mom_weight = SETTINGS.get('MOMENTUM_WEIGHT', 40.0)
+
+    mom_weight = settings.get('MOMENTUM_WEIGHT', 40.0)
     momentum_score = min(mom_weight, base_div_score + slope_bonus)
-    
+
     # --- 3. Base / Quality Score ---
-    base_weight = SETTINGS.get('BASE_WEIGHT', 20.0)
-    
+    base_weight = settings.get('BASE_WEIGHT', 20.0)
+
     # --- Total ---
     total_score = geometry_score + momentum_score + base_weight
-    
+
     # Debug Print
-    symbol = data.get('symbol', 'Unknown')
     # Only print if we have real data (area > 0) to avoid spam
-    if triangle_area > 0:
-        print(f"[SCORE-DEBUG] {symbol}: Area={triangle_area:.1f}, Div={div_type}, Geo={geometry_score:.1f}, Mom={momentum_score:.1f}, Base={base_weight:.1f}, Total={total_score:.1f}", file=sys.stderr, flush=True)
+    if triangle_area > 0 and logger.isEnabledFor(logging.DEBUG):
+        symbol = data.get('symbol', 'Unknown')
+        logger.debug("[SCORE-DEBUG] %s: Area=%.1f, Div=%s, Geo=%.1f, Mom=%.1f, Base=%.1f, Total=%.1f",
+                     symbol, triangle_area, div_type, geometry_score, momentum_score, base_weight, total_score)
 
     return {
         "total": min(100.0, max(0.0, total_score)),
@@ -88,17 +136,59 @@ def calculate_score(data: dict) -> float:
         "base_component": float(base_weight)         # Keep for legacy compatibility
     }
 
+
+def calculate_scores_batch(price_change_pct, duration_candles, price_slope=0.0, rsi_slope=0.0,
+                           divergence_type=0) -> dict:
+    """
+    Vectorized calculate_score for many candidates at once (backtests, sweeps).
+
+    Arguments are array-likes (or scalars, broadcast) with the same meaning as
+    calculate_score's keys. Returns float64 arrays "geometry", "momentum",
+    "base" and "total" (clipped to 0-100 like calculate_score's "total").
+    Unknown divergence types score 0. No debug output.
+    """
+    settings = get_settings()
+    change, duration, p_slope, r_slope, div_type = np.broadcast_arrays(
+        np.abs(np.asarray(price_change_pct, dtype=np.float64)),
+        np.asarray(duration_candles, dtype=np.float64),
+        np.asarray(price_slope, dtype=np.float64),
+        np.asarray(rsi_slope, dtype=np.float64),
+        np.asarray(divergence_type, dtype=np.int64)
+    )
+
+    # --- 1. Geometry ---
+    geo_weight = settings.get('GEOMETRY_WEIGHT', 40.0)
+    geometry = np.minimum(geo_weight, (change * duration / settings.get('TARGET_AREA', 500.0)) * geo_weight)
+
+    # --- 2. Momentum: divergence lookup table + capped slope bonus ---
+    div_scores = {int(k): float(v) for k, v in settings.get('DIV_SCORES', {}).items()}
+    table = np.zeros(max(div_scores, default=0) + 2, dtype=np.float64)  # last slot: unknown types
+    for key, value in div_scores.items():
+        if key >= 0:
+            table[key] = value
+    base_div = table[np.where((div_type >= 0) & (div_type < len(table) - 1), div_type, len(table) - 1)]
+    slope_bonus = np.minimum(10.0, np.abs(r_slope - p_slope) * 5.0)
+    momentum = np.minimum(settings.get('MOMENTUM_WEIGHT', 40.0), base_div + slope_bonus)
+
+    # --- 3. Base ---
+    base = np.full(geometry.shape, float(settings.get('BASE_WEIGHT', 20.0)))
+
+    return {
+        "geometry": geometry,
+        "momentum": momentum,
+        "base": base,
+        "total": np.clip(geometry + momentum + base, 0.0, 100.0)
+    }
+
+
 if __name__ == "__main__":
-    # Reload settings to ensure we have latest
-    SETTINGS = load_settings()
-    
-    print(f"Loaded Settings: TARGET_AREA={SETTINGS['TARGET_AREA']}")
+    print(f"Loaded Settings: TARGET_AREA={get_settings()['TARGET_AREA']}")
 
     test_cases = [
         # 1. Weak Setup: Small TL, No Div
         # Area = 1% * 10 candles = 10. (10/500)*40 = 0.8 pts. Total = 0.8 + 0 + 20 = 20.8
         {"price_change_pct": 1.0, "duration_candles": 10, "price_slope": -0.1, "rsi_slope": -0.1, "divergence_type": 0},
-        
+
         # 2. Medium Setup: Good TL (5% * 40 = 200 area), No Div
         # Area = 200. (200/500)*40 = 16 pts. Total = 16 + 0 + 20 = 36.
         {"price_change_pct": 5.0, "duration_candles": 40, "price_slope": -0.1, "rsi_slope": -0.1, "divergence_type": 0},
@@ -108,16 +198,16 @@ if __name__ == "__main__":
         {"price_change_pct": 5.0, "duration_candles": 40, "price_slope": -0.5, "rsi_slope": 0.5, "divergence_type": 1},
 
         # 4. God Mode: Huge TL + Triple Div
-        # Area = 10% * 60 = 600. (600/500)*40 = 40 (capped). 
+        # Area = 10% * 60 = 600. (600/500)*40 = 40 (capped).
         # Div(3) = 60. Momentum = min(40, 60+bonus) = 40.
         # Total = 40 + 40 + 20 = 100.
         {"price_change_pct": 10.0, "duration_candles": 60, "price_slope": -0.8, "rsi_slope": 0.9, "divergence_type": 3},
     ]
-    
-    print(f"{'Geometry':<10} | {'Momentum':<10} | {'Total':<10}")
+
+    print(f"{'Area':<10} | {'Div':<10} | {'Total':<10}")
     print("-" * 36)
-    
+
     for case in test_cases:
         s = calculate_score(case)
         area = case['price_change_pct']*case['duration_candles']
-        print(f"{area:<10.1f} | {case['divergence_type']:<10} | {s:<10.2f}")
+        print(f"{area:<10.1f} | {case['divergence_type']:<10} | {s['total']:<10.2f}")
@@ -0,0 +1,121 @@
+import fs from 'fs/promises';
+import path from 'path';
+
+// ==========================================
+// MASTER FEED READER (DELTA-AWARE)
+// ==========================================
+// The scanner publishes <dataDir>/feed_deltas/ (see feed_delta.py). We keep the
+// last parsed feed in memory and replay only the new deltas; the full
+// master_feed.json is read only on a cold start or when deltas are missing.
+// Deltas carry `order` whenever the feed order changed, so the replayed feed
+// lists signals in the same (plan) order as master_feed.json.
+// A scan run with --no-delta (or any other writer) replaces master_feed.json
+// without advancing the deltas, so every read compares the `last_updated`
+// at the head of master_feed.json with the replayed feed and serves the full
+// file when it is newer.
+
+export const signalKey = (s) => `${s.canonical_symbol || s.symbol || 'UNKNOWN'}|${s.strategy_name || s.strategy || 'Unknown'}|${s.exchange || 'UNKNOWN'}`;
+const pad = (seq) => String(seq).padStart(8, '0');
+const readJson = async (filePath) => JSON.parse(await fs.readFile(filePath, 'utf-8'));
+const FEED_HEAD_BYTES = 64;
+
+const orderedSignals = (signals, order) => {
+    const listed = order.filter(key => signals.has(key)).map(key => signals.get(key));
+    if (listed.length === signals.size) return listed;
+    const known = new Set(order);
+    return listed.concat(Array.from(signals.entries()).filter(([key]) => !known.has(key)).map(([, s]) => s));
+};
+
+export const createFeedReader = (dataDir) => {
+    const deltaDir = path.join(dataDir, 'feed_deltas');
+    const feedCache = { seq: 0, lastUpdated: 0, signals: new Map(), order: [] };
+
+    const loadFeedFromDeltas = async () => {
+        const index = await readJson(path.join(deltaDir, 'index.json'));
+        if (index.seq <= feedCache.seq) return feedCache;
+
+        if (feedCache.seq === 0 || feedCache.seq + 1 < index.oldest_delta_seq) {
+            const snap = await readJson(path.join(deltaDir, `snapshot_${pad(index.snapshot_seq)}.json`));
+            feedCache.signals = new Map(snap.signals.map(s => [signalKey(s), s]));
+            feedCache.order = Array.from(feedCache.signals.keys());
+            feedCache.seq = snap.seq;
+            feedCache.lastUpdated = snap.last_updated;
+        }
+
+        for (let seq = feedCache.seq + 1; seq <= index.seq; seq++) {
+            const delta = await readJson(path.join(deltaDir, `delta_${pad(seq)}.json`));
+            delta.removed.forEach(key => feedCache.signals.delete(key));
+            delta.added.forEach(s => feedCache.signals.set(signalKey(s), s));
+            delta.changed.forEach(s => feedCache.signals.set(signalKey(s), s));
+            if (delta.order) feedCache.order = delta.order;
+            feedCache.seq = seq;
+            feedCache.lastUpdated = delta.last_updated;
+        }
+        return feedCache;
+    };
+
+    const feedFile = path.join(dataDir, 'master_feed.json');
+
+    // last_updated of master_feed.json from its first bytes (the scanner writes it first),
+    // null if there is no feed, Infinity if the head has no stamp (legacy or foreign writer)
+    const readFeedStamp = async () => {
+        let handle;
+        try {
+            handle = await fs.open(feedFile, 'r');
+        } catch {
+            return null;
+        }
+        try {
+            const { buffer, bytesRead } = await handle.read(Buffer.alloc(FEED_HEAD_BYTES), 0, FEED_HEAD_BYTES, 0);
+            const match = /^\s*\{\s*"last_updated"\s*:\s*(\d+)/.exec(buffer.toString('utf-8', 0, bytesRead));
+            return match ? Number(match[1]) : Infinity;
+        } finally {
+            await handle.close();
+        }
+    };
+
+    const readFullMasterFeed = async () => {
+        try {
+            const data = await fs.readFile(feedFile, 'utf-8');
+            const parsed = JSON.parse(data);
+
+            // Handle new structured format: { last_updated, signals }
+            if (parsed && typeof parsed === 'object' && 'signals' in parsed) {
+                return parsed; // Return the full object with timestamp
+            }
+
+            // Handle legacy flat array format
+            if (Array.isArray(parsed)) {
+                return parsed;
+            }
+
+            return [];
+        } catch {
+            return [];
+        }
+    };
+
+    const resetAndReadFull = () => {
+        feedCache.seq = 0;
+        feedCache.signals = new Map();
+        feedCache.order = [];
+        return readFullMasterFeed();
+    };
+
+    const getMasterFeed = async () => {
+        try {
+            const feed = await loadFeedFromDeltas();
+            const stamp = await readFeedStamp();
+            if (stamp !== null && stamp > feed.lastUpdated) {
+                // master_feed.json was rewritten without a delta (--no-delta scan)
+                return resetAndReadFull();
+            }
+            return { last_updated: feed.lastUpdated, signals: orderedSignals(feed.signals, feed.order) };
+        } catch {
+            // No deltas yet (or a gap we cannot replay): reset and use the full feed
+            return resetAndReadFull();
+        }
+    };
+
+    return { getMasterFeed };
+};
@@ -12,6 +12,7 @@ import { CONFIG } from './config.js';
 import { AnalysisEngine } from './analysis.js';
 import { Logger } from './logger.js';
 import { McapService } from './mcapService.js';
+import { createFeedReader } from './feedReader.js';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
@@ -42,27 +43,10 @@ const saveScanHistory = async (history) => {
     }
 };
 
-export const getMasterFeed = async () => {
-    try {
-        const filePath = path.join(DATA_DIR, 'master_feed.json');
-        const data = await fs.readFile(filePath, 'utf-8');
-        const parsed = JSON.parse(data);
-
-        // Handle new structured format: { last_updated, signals }
-        if (parsed && typeof parsed === 'object' && 'signals' in parsed) {
-            return parsed; // Return the full object with timestamp
-        }
-
-        // Handle legacy flat array format
-        if (Array.isArray(parsed)) {
-            return parsed;
-        }
-
-        return [];
-    } catch {
-        return [];
-    }
-};
+// ==========================================
+// MASTER FEED (DELTA-AWARE, see feedReader.js)
+// ==========================================
+export const { getMasterFeed } = createFeedReader(DATA_DIR);
 
 const appendSignalLog = async (results) => {
     try {
@@ -207,7 +191,7 @@ export const runServerScan = async (source = 'KUCOIN', strategy = 'all', force =
                 if (line.includes('[SUCCESS]') ||
                     line.includes('[DIRECTORY MODE]') ||
                     line.includes('[BATCH]') ||
-                    line.includes('[CANONICAL]')) {
+                    line.includes('[PLAN]')) {
                     Logger.info(`[SCANNER] ${line}`);
                 }
                 if (line.includes('[ERROR]') || line.includes('[WARN]')) {
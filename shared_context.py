@@ -4,12 +4,54 @@ Feature Factory for calculating indicators and external data ONCE per canonical
 """
 
 from dataclasses import dataclass, field
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import pandas as pd
 import numpy as np
 from symbol_mapper import to_canonical
+from watchdog import check_budget
+from scan_logging import get_logger
+from trendline_cache import TrendlineCache
 import os
 
+logger = get_logger('features')
+
+
+def bar_interval_ms(timestamps: np.ndarray) -> int:
+    """Bar spacing of a candle series in ms (median step, so gaps do not skew it)."""
+    if len(timestamps) < 2:
+        return 0
+    return int(np.median(np.diff(timestamps)))
+
+
+def align_timeframes(ltf_timestamps, htf_timestamps, ltf_ms: Optional[int] = None,
+                     htf_ms: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Index arrays between two candle series keyed by open time (ms, sorted).
+
+    ltf_to_htf[i]: last HTF bar closed when LTF bar i closes (-1 if none)
+    htf_to_ltf[j]: last LTF bar closed when HTF bar j closes (-1 if none)
+
+    A bar closes at open + interval (inferred when not given). The forming HTF
+    bar is never mapped, so gathers through ltf_to_htf have no look-ahead.
+    """
+    ltf_ts = np.asarray(ltf_timestamps, dtype=np.int64)
+    htf_ts = np.asarray(htf_timestamps, dtype=np.int64)
+    ltf_close = ltf_ts + (bar_interval_ms(ltf_ts) if ltf_ms is None else ltf_ms)
+    htf_close = htf_ts + (bar_interval_ms(htf_ts) if htf_ms is None else htf_ms)
+    ltf_to_htf = np.searchsorted(htf_close, ltf_close, side='right') - 1
+    htf_to_ltf = np.searchsorted(ltf_close, htf_close, side='right') - 1
+    return ltf_to_htf, htf_to_ltf
+
+
+def gather(values, index: np.ndarray) -> np.ndarray:
+    """values[index] as floats, NaN where index is -1 (e.g. HTF values per LTF bar)."""
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return np.full(len(index), np.nan)
+    out = values[np.maximum(index, 0)]
+    out[index < 0] = np.nan
+    return out
+
 
 @dataclass
 class SharedContext:
@@ -41,6 +83,10 @@ class SharedContext:
     # Configuration
     config: Dict[str, Any] = field(default_factory=dict)
     
+    # HTF/LTF alignment, built on first use (see align_timeframes)
+    ltf_to_htf: Optional[np.ndarray] = field(default=None, repr=False)
+    htf_to_ltf: Optional[np.ndarray] = field(default=None, repr=False)
+    
     def get_ltf_indicator(self, name: str, default=None):
         """Safely retrieve LTF indicator."""
         return self.ltf_indicators.get(name, default)
@@ -61,6 +107,17 @@ class SharedContext:
         """Check if HTF data is available."""
         return self.htf_data is not None and len(self.htf_data) > 0
     
+    def alignment(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(ltf_to_htf, htf_to_ltf) index arrays, computed once per context."""
+        if self.ltf_to_htf is None or self.htf_to_ltf is None:
+            if self.has_htf_data() and 'timestamp' in self.htf_data.columns and 'timestamp' in self.ltf_data.columns:
+                self.ltf_to_htf, self.htf_to_ltf = align_timeframes(self.ltf_data['timestamp'].to_numpy(),
+                                                                    self.htf_data['timestamp'].to_numpy())
+            else:
+                self.ltf_to_htf = np.full(len(self.ltf_data), -1, dtype=np.int64)
+                self.htf_to_ltf = np.full(len(self.htf_data) if self.htf_data is not None else 0, -1, dtype=np.int64)
+        return self.ltf_to_htf, self.htf_to_ltf
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert context to dictionary for serialization."""
         return {
@@ -80,15 +137,17 @@ class FeatureFactory:
     Plug & Play: Add new indicators by adding methods and config keys.
     """
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], trendline_cache: Optional[TrendlineCache] = None):
         """
         Initialize the feature factory with configuration.
         
         Args:
             config: Configuration dict containing indicator settings
+            trendline_cache: Optional persistent memo of the RSI trendline search
         """
         self.config = config
         self.enabled_features = config.get('enabled_features', [])
+        self.trendline_cache = trendline_cache
     
     def build_context(
         self,
@@ -97,7 +156,8 @@ class FeatureFactory:
         ltf_data: pd.DataFrame,
         htf_data: Optional[pd.DataFrame] = None,
         metadata: Optional[Dict[str, Any]] = None,
-        external_data: Optional[Dict[str, Any]] = None
+        external_data: Optional[Dict[str, Any]] = None,
+        detect_trendlines: bool = True
     ) -> SharedContext:
         """
         Build a complete SharedContext with all enabled features.
@@ -109,6 +169,8 @@ class FeatureFactory:
             htf_data: Optional high timeframe DataFrame
             metadata: Optional metadata dict
             external_data: Pre-fetched external data from batch processor (optional)
+            detect_trendlines: If False, skip RSI trendline detection (the expensive
+                stage); call detect_trendlines() later for symbols that pass the prefilter
             
         Returns:
             Fully populated SharedContext
@@ -133,6 +195,9 @@ class FeatureFactory:
         if context.has_htf_data():
             self._calculate_htf_indicators(context)
         
+        if detect_trendlines:
+            self.detect_trendlines(context)
+        
         # Use pre-fetched data if available, otherwise fetch
         if external_data:
             self._use_prefetched_data(context, external_data)
@@ -146,7 +211,7 @@ class FeatureFactory:
         df = context.ltf_data
         
         if len(df) < 50:
-            print(f"[FEATURE_FACTORY] Insufficient LTF data ({len(df)} candles) for {context.symbol}", flush=True)
+            logger.debug("[FEATURE_FACTORY] Insufficient LTF data (%s candles) for %s", len(df), context.symbol)
             return  # Insufficient data
         
         # Import pandas_ta here to avoid circular imports
@@ -158,16 +223,8 @@ class FeatureFactory:
                 period = self.config.get('rsi_period', 14)
                 rsi_series = ta.rsi(df['close'], length=period)
                 context.ltf_indicators['rsi'] = rsi_series
-                
-                # RSI Trendline Pivot Detection for Observability
-                if rsi_series is not None and len(rsi_series) > 50:
-                    # Pass timestamps for LTF
-                    timestamps = df['timestamp'] if 'timestamp' in df.columns else None
-                    trendline_data = self._detect_rsi_trendlines(rsi_series, timestamps)
-                    if trendline_data:
-                        context.ltf_indicators['rsi_trendlines'] = trendline_data
             except Exception as e:
-                print(f"[FEATURE_FACTORY] Warning: RSI calculation failed for {context.symbol}: {e}", flush=True)
+                logger.warning("[FEATURE_FACTORY] Warning: RSI calculation failed for %s: %s", context.symbol, e)
         
         # EMA
         if self._is_enabled('ema'):
@@ -177,7 +234,7 @@ class FeatureFactory:
                 context.ltf_indicators['ema_fast'] = ta.ema(df['close'], length=fast)
                 context.ltf_indicators['ema_slow'] = ta.ema(df['close'], length=slow)
             except Exception as e:
-                print(f"[FEATURE_FACTORY] Warning: EMA calculation failed for {context.symbol}: {e}", flush=True)
+                logger.warning("[FEATURE_FACTORY] Warning: EMA calculation failed for %s: %s", context.symbol, e)
         
         # ADX
         if self._is_enabled('adx'):
@@ -189,7 +246,7 @@ class FeatureFactory:
                     context.ltf_indicators['di_plus'] = adx_df[f'DMP_{period}']
                     context.ltf_indicators['di_minus'] = adx_df[f'DMN_{period}']
             except Exception as e:
-                print(f"[FEATURE_FACTORY] Warning: ADX calculation failed for {context.symbol}: {e}", flush=True)
+                logger.warning("[FEATURE_FACTORY] Warning: ADX calculation failed for %s: %s", context.symbol, e)
         
         # ATR
         if self._is_enabled('atr'):
@@ -197,7 +254,7 @@ class FeatureFactory:
                 period = self.config.get('atr_period', 14)
                 context.ltf_indicators['atr'] = ta.atr(df['high'], df['low'], df['close'], length=period)
             except Exception as e:
-                print(f"[FEATURE_FACTORY] Warning: ATR calculation failed for {context.symbol}: {e}", flush=True)
+                logger.warning("[FEATURE_FACTORY] Warning: ATR calculation failed for %s: %s", context.symbol, e)
         
         # Bollinger Bands
         if self._is_enabled('bollinger'):
@@ -217,14 +274,14 @@ class FeatureFactory:
                         context.ltf_indicators['bb_middle'] = bb_df[bb_middle_col[0]]
                         context.ltf_indicators['bb_lower'] = bb_df[bb_lower_col[0]]
             except Exception as e:
-                print(f"[FEATURE_FACTORY] Warning: Bollinger Bands calculation failed for {context.symbol}: {e}", flush=True)
+                logger.warning("[FEATURE_FACTORY] Warning: Bollinger Bands calculation failed for %s: %s", context.symbol, e)
         
         # OBV
         if self._is_enabled('obv'):
             try:
                 context.ltf_indicators['obv'] = ta.obv(df['close'], df['volume'])
             except Exception as e:
-                print(f"[FEATURE_FACTORY] Warning: OBV calculation failed for {context.symbol}: {e}", flush=True)
+                logger.warning("[FEATURE_FACTORY] Warning: OBV calculation failed for %s: %s", context.symbol, e)
         
         # MACD (example of plug & play)
         if self._is_enabled('macd'):
@@ -279,24 +336,51 @@ class FeatureFactory:
             period = self.config.get('rsi_period', 14)
             rsi_series = ta.rsi(df['close'], length=period)
             context.htf_indicators['rsi'] = rsi_series
-            
-            # HTF RSI Trendlines (Critical for Breakout V2)
-            if rsi_series is not None and len(rsi_series) > 50:
-                timestamps = None
-                if 'timestamp' in df.columns:
-                     timestamps = df['timestamp']
-                elif 'time' in df.columns:
-                     timestamps = df['time']
-                
-                trendline_data = self._detect_rsi_trendlines(rsi_series, timestamps)
-                if trendline_data:
-                    context.htf_indicators['rsi_trendlines'] = trendline_data
         
         # HTF ATR
         if self._is_enabled('atr'):
             period = self.config.get('atr_period', 14)
             context.htf_indicators['atr'] = ta.atr(df['high'], df['low'], df['close'], length=period)
     
+    def detect_trendlines(self, context: SharedContext, timeframes: tuple = ('ltf', 'htf')):
+        """
+        RSI trendline detection for LTF (observability) and HTF (Breakout / V2).
+        Requires the RSI series computed by the indicator stage.
+        With a trendline_cache, unchanged pivot sets reuse the last search result.
+        """
+        cache = self.trendline_cache
+        memo = cache.load(context.exchange, context.symbol) if cache is not None else None
+        misses = cache.stats['misses'] if cache is not None else 0
+        
+        # LTF RSI Trendline Pivot Detection for Observability
+        rsi_series = context.get_ltf_indicator('rsi') if 'ltf' in timeframes else None
+        if rsi_series is not None and len(rsi_series) > 50:
+            try:
+                df = context.ltf_data
+                timestamps = df['timestamp'] if 'timestamp' in df.columns else None
+                trendline_data = self._detect_rsi_trendlines(rsi_series, timestamps, memo, 'ltf')
+                if trendline_data:
+                    context.ltf_indicators['rsi_trendlines'] = trendline_data
+            except Exception as e:
+                logger.warning("[FEATURE_FACTORY] Warning: RSI trendline detection failed for %s: %s", context.symbol, e)
+        
+        # HTF RSI Trendlines (Critical for Breakout V2)
+        rsi_series = context.get_htf_indicator('rsi') if 'htf' in timeframes else None
+        if rsi_series is not None and len(rsi_series) > 50:
+            df = context.htf_data
+            timestamps = None
+            if 'timestamp' in df.columns:
+                 timestamps = df['timestamp']
+            elif 'time' in df.columns:
+                 timestamps = df['time']
+            
+            trendline_data = self._detect_rsi_trendlines(rsi_series, timestamps, memo, 'htf')
+            if trendline_data:
+                context.htf_indicators['rsi_trendlines'] = trendline_data
+        
+        if cache is not None and cache.stats['misses'] != misses:
+            cache.save(context.exchange, context.symbol, memo)
+    
     def _use_prefetched_data(self, context: SharedContext, external_data: Dict[str, Any]):
         """
         Use pre-fetched external data from batch processor.
@@ -342,19 +426,19 @@ class FeatureFactory:
                         oi_z_score = (current_oi - mean_oi) / std_oi
                         context.external_data['oi_z_score'] = float(oi_z_score)
                         context.external_data['oi_z_score_valid'] = oi_z_score > 1.5
-                        print(f"[BATCH] OI Z-Score for {context.symbol}: {oi_z_score:.2f} (Current: {current_oi:.0f})", flush=True)
+                        logger.debug("[BATCH] OI Z-Score for %s: %.2f (Current: %.0f)", context.symbol, oi_z_score, current_oi)
                     else:
                         # Std dev is 0 - use raw value
                         context.external_data['oi_z_score'] = 0.0
                         context.external_data['oi_z_score_valid'] = False
-                        print(f"[BATCH] OI Z-Score invalid (std=0), using raw OI: {current_oi:.0f}", flush=True)
+                        logger.debug("[BATCH] OI Z-Score invalid (std=0), using raw OI: %.0f", current_oi)
                 else:
                     # Insufficient data for Z-score - use raw value
                     context.external_data['oi_z_score'] = 0.0
                     context.external_data['oi_z_score_valid'] = False
-                    print(f"[BATCH] OI Z-Score invalid (n={len(oi_values)}), using raw OI: {current_oi:.0f}", flush=True)
+                    logger.debug("[BATCH] OI Z-Score invalid (n=%s), using raw OI: %.0f", len(oi_values), current_oi)
             except Exception as e:
-                print(f"[BATCH] OI Z-Score calculation failed: {e}, using raw value", flush=True)
+                logger.warning("[BATCH] OI Z-Score calculation failed: %s, using raw value", e)
                 # Still store raw value even if calculation fails
                 try:
                     current_oi = oi_values[-1] if oi_values else 0
@@ -421,7 +505,7 @@ class FeatureFactory:
                         context.external_data['open_interest'] = oi_data
                         context.external_data['oi_available'] = True
                         
-                        print(f"[COINALYZE] Fetched OI for {symbol}: {len(oi_data)} data points (cached)", flush=True)
+                        logger.debug("[COINALYZE] Fetched OI for %s: %s data points (cached)", symbol, len(oi_data))
                         
                         # Calculate OI Z-Score per RSI_calc.md specification
                         # Z-Score = (Current_OI - Mean_OI) / StdDev_OI
@@ -437,7 +521,7 @@ class FeatureFactory:
                                     oi_z_score = (current_oi - mean_oi) / std_oi
                                     context.external_data['oi_z_score'] = float(oi_z_score)
                                     context.external_data['oi_z_score_valid'] = oi_z_score > 1.5
-                                    print(f"[COINALYZE] OI Z-Score for {symbol}: {oi_z_score:.2f} (Valid: {oi_z_score > 1.5})", flush=True)
+                                    logger.debug("[COINALYZE] OI Z-Score for %s: %.2f (Valid: %s)", symbol, oi_z_score, oi_z_score > 1.5)
                                 else:
                                     context.external_data['oi_z_score'] = 0.0
                                     context.external_data['oi_z_score_valid'] = False
@@ -445,15 +529,15 @@ class FeatureFactory:
                                 context.external_data['oi_z_score'] = 0.0
                                 context.external_data['oi_z_score_valid'] = False
                         except Exception as z_err:
-                            print(f"[FEATURE_FACTORY] Warning: OI Z-Score calculation failed: {z_err}", flush=True)
+                            logger.warning("[FEATURE_FACTORY] Warning: OI Z-Score calculation failed: %s", z_err)
                             context.external_data['oi_z_score'] = 0.0
                             context.external_data['oi_z_score_valid'] = False
                     else:
                         context.external_data['oi_available'] = False
                         context.external_data['oi_z_score_valid'] = False
-                        print(f"[COINALYZE] No OI data for {symbol}", flush=True)
+                        logger.debug("[COINALYZE] No OI data for %s", symbol)
                 except Exception as e:
-                    print(f"[FEATURE_FACTORY] Warning: Open Interest fetch failed for {symbol}: {e}", flush=True)
+                    logger.warning("[FEATURE_FACTORY] Warning: Open Interest fetch failed for %s: %s", symbol, e)
                     context.external_data['oi_available'] = False
                     context.external_data['oi_z_score_valid'] = False
             
@@ -463,9 +547,9 @@ class FeatureFactory:
                     funding_rate = client.get_funding_rate(symbol)
                     if funding_rate is not None:
                         context.external_data['funding_rate'] = funding_rate
-                        print(f"[COINALYZE] Funding Rate for {symbol}: {funding_rate:.4f}% (cached)", flush=True)
+                        logger.debug("[COINALYZE] Funding Rate for %s: %.4f%% (cached)", symbol, funding_rate)
                 except Exception as e:
-                    print(f"[FEATURE_FACTORY] Warning: Funding Rate fetch failed for {symbol}: {e}", flush=True)
+                    logger.warning("[FEATURE_FACTORY] Warning: Funding Rate fetch failed for %s: %s", symbol, e)
             
             # Long/Short Ratio - isolated error handling with caching
             if self._is_enabled('long_short_ratio'):
@@ -473,9 +557,9 @@ class FeatureFactory:
                     ls_ratio = client.get_ls_ratio_top_traders(symbol)
                     if ls_ratio is not None:
                         context.external_data['long_short_ratio'] = ls_ratio
-                        print(f"[COINALYZE] L/S Ratio for {symbol}: {ls_ratio:.2f} (cached)", flush=True)
+                        logger.debug("[COINALYZE] L/S Ratio for %s: %.2f (cached)", symbol, ls_ratio)
                 except Exception as e:
-                    print(f"[FEATURE_FACTORY] Warning: Long/Short Ratio fetch failed for {symbol}: {e}", flush=True)
+                    logger.warning("[FEATURE_FACTORY] Warning: Long/Short Ratio fetch failed for %s: %s", symbol, e)
             
             # Liquidations - isolated error handling with caching
             if self._is_enabled('liquidations'):
@@ -483,12 +567,12 @@ class FeatureFactory:
                     liq_data = client.get_liquidation_history(symbol, interval='15min', lookback=3)
                     if liq_data:
                         context.external_data['liquidations'] = liq_data
-                        print(f"[COINALYZE] Liquidations for {symbol}: L={liq_data.get('longs', 0):.0f}, S={liq_data.get('shorts', 0):.0f} (cached)", flush=True)
+                        logger.debug("[COINALYZE] Liquidations for %s: L=%.0f, S=%.0f (cached)", symbol, liq_data.get('longs', 0), liq_data.get('shorts', 0))
                 except Exception as e:
-                    print(f"[FEATURE_FACTORY] Warning: Liquidations fetch failed for {symbol}: {e}", flush=True)
+                    logger.warning("[FEATURE_FACTORY] Warning: Liquidations fetch failed for %s: %s", symbol, e)
         
         except Exception as e:
-            print(f"[FEATURE_FACTORY] Error initializing external data client for {context.symbol}: {e}", flush=True)
+            logger.warning("[FEATURE_FACTORY] Error initializing external data client for %s: %s", context.symbol, e)
             context.external_data['oi_available'] = False
     
     def _is_enabled(self, feature: str) -> bool:
@@ -498,7 +582,8 @@ class FeatureFactory:
             return True
         return feature in self.enabled_features
     
-    def _detect_rsi_trendlines(self, rsi_series: pd.Series, timestamp_series: pd.Series = None) -> Dict[str, Any]:
+    def _detect_rsi_trendlines(self, rsi_series: pd.Series, timestamp_series: pd.Series = None,
+                               memo: Optional[Dict[str, Any]] = None, memo_key: str = '') -> Dict[str, Any]:
         """
         Detect RSI trendline pivots using k-order pivot logic per RSI_calc.md specification.
         
@@ -510,6 +595,8 @@ class FeatureFactory:
         Args:
             rsi_series: RSI values as pandas Series
             timestamp_series: Optional Series of timestamps corresponding to RSI series
+            memo: Per-symbol trendline_cache entries (used with self.trendline_cache)
+            memo_key: Timeframe prefix of the memo keys ('ltf' / 'htf')
             
         Returns:
             Dictionary containing validated pivot coordinates and trendline parameters
@@ -560,7 +647,7 @@ class FeatureFactory:
             
             if len(pivot_highs) >= 2:
                 # Find best valid trendline (chronological, no violations)
-                trendline = self._find_valid_trendline(recent_rsi, pivot_highs, 'RESISTANCE')
+                trendline = self._search_trendline(recent_rsi, pivot_highs, 'RESISTANCE', memo, memo_key)
                 
                 if trendline:
                     # Convert relative indices to absolute
@@ -593,7 +680,7 @@ class FeatureFactory:
                         'touch_indices': touch_indices
                     }
         except Exception as e:
-            print(f"[FEATURE_FACTORY] Warning: RSI resistance trendline detection failed: {e}", flush=True)
+            logger.warning("[FEATURE_FACTORY] Warning: RSI resistance trendline detection failed: %s", e)
         
         # Detect SUPPORT (Pivot Lows)
         try:
@@ -601,7 +688,7 @@ class FeatureFactory:
             
             if len(pivot_lows) >= 2:
                 # Find best valid trendline (chronological, no violations)
-                trendline = self._find_valid_trendline(recent_rsi, pivot_lows, 'SUPPORT')
+                trendline = self._search_trendline(recent_rsi, pivot_lows, 'SUPPORT', memo, memo_key)
                 
                 if trendline:
                     # Convert relative indices to absolute
@@ -634,7 +721,7 @@ class FeatureFactory:
                         'touch_indices': touch_indices
                     }
         except Exception as e:
-            print(f"[FEATURE_FACTORY] Warning: RSI support trendline detection failed: {e}", flush=True)
+            logger.warning("[FEATURE_FACTORY] Warning: RSI support trendline detection failed: %s", e)
         
         return result
     
@@ -668,6 +755,20 @@ class FeatureFactory:
         
         return pivots
     
+    def _search_trendline(self, rsi_values: np.ndarray, pivots: list, direction: str,
+                          memo: Optional[Dict[str, Any]], memo_key: str) -> Dict[str, Any]:
+        """_find_valid_trendline, memoized per pivot set when a trendline cache is attached."""
+        cache = self.trendline_cache
+        if cache is None or memo is None:
+            return self._find_valid_trendline(rsi_values, pivots, direction)
+        key = f"{memo_key}:{direction}"
+        hit, trendline = cache.lookup(memo, key, rsi_values, pivots, direction, self.config)
+        logger.debug("[TRENDLINE-CACHE] %s %s", key, 'hit' if hit else 'miss')
+        if not hit:
+            trendline = self._find_valid_trendline(rsi_values, pivots, direction)
+            cache.store(memo, key, rsi_values, pivots, direction, self.config, trendline)
+        return trendline
+    
     def _find_valid_trendline(self, rsi_values: np.ndarray, pivots: list, direction: str) -> Dict[str, Any]:
         """
         Find trendline touching MAXIMUM pivots (TradingView-style).
@@ -738,6 +839,7 @@ class FeatureFactory:
             
             # Check potential P2s
             for j in range(start_j_idx + 1, len(pivots)):
+                check_budget()  # cooperative cancellation (watchdog.TimeBudget)
                 p2 = pivots[j]
                 
                 # Calculate distance between defining pivots
@@ -892,6 +994,36 @@ class FeatureFactory:
         }
 
 
+def trendline_possible(rsi_series: Optional[pd.Series], direction: str, config: Dict[str, Any]) -> bool:
+    """
+    Cheap necessary condition for _detect_rsi_trendlines to find a line.
+    
+    A RESISTANCE line needs a first pivot >= rsi_first_pivot_resistance_min
+    (SUPPORT: <= rsi_first_pivot_support_max) inside the lookback window, at
+    least rsi_min_pivot_distance bars before a second pivot. If no RSI value in
+    that range reaches the extreme zone, no line can exist. False positives are
+    fine (full detection runs), false negatives are not.
+    """
+    if rsi_series is None:
+        return False
+    rsi_values = rsi_series.dropna().values
+    if len(rsi_values) < 50:
+        return False
+    
+    k_order = config.get('rsi_pivot_order', 5)
+    lookback = config.get('rsi_trendline_lookback', 100)
+    min_distance = config.get('rsi_min_pivot_distance', 14)
+    recent_rsi = rsi_values[-lookback:] if len(rsi_values) > lookback else rsi_values
+    
+    # p1 in [k, len - k - min_distance): p2 must be a pivot at least min_distance later
+    window = recent_rsi[k_order:len(recent_rsi) - k_order - min_distance]
+    if len(window) == 0:
+        return False
+    if direction == 'RESISTANCE':
+        return bool(window.max() >= config.get('rsi_first_pivot_resistance_min', 70))
+    return bool(window.min() <= config.get('rsi_first_pivot_support_max', 30))
+
+
 def create_default_config() -> Dict[str, Any]:
     """Create default configuration for FeatureFactory."""
     return {
@@ -921,4 +1053,6 @@ def create_default_config() -> Dict[str, Any]:
         'rsi_first_pivot_resistance_min': 70,  # Minimum RSI for first resistance pivot
         'rsi_first_pivot_support_max': 30,  # Maximum RSI for first support pivot
         'rsi_min_pivot_distance': 14,  # Minimum candles between p1 and p2 (longer = better)
+        # Prefilter (directory mode)
+        'prefilter_min_volume_24h': 0,  # Min quote volume over last 96 LTF candles (0 = disabled)
     }
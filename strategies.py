@@ -13,6 +13,7 @@ plt.switch_backend('Agg')
 from abc import ABC, abstractmethod
 from scoring_engine import calculate_score
 from strategy_config import StrategyConfig
+from shared_context import align_timeframes, gather
 
 # Common LTF Default Structure for Frontend Compatibility
 DEFAULT_LTF = {
@@ -530,19 +531,17 @@ class QuantProLegacy(Strategy):
             else:
                 df_htf['htf_adx'] = htf_adx_df_data.iloc[:, 0]
             
-            # Rename columns for merge to avoid collision validation
-            # We want: open, close, htf_ema_50, htf_ema_200, htf_adx
-            # We must use merge_asof
-            df = df.sort_values('timestamp')
-            df_htf = df_htf.sort_values('timestamp')
-            
-            # Select relevant HTF columns
-            htf_subset = df_htf[['timestamp', 'close', 'htf_ema_50', 'htf_ema_200', 'htf_adx']].copy()
-            htf_subset.rename(columns={'close': 'htf_close'}, inplace=True)
-            
-            # Merge: For each LTF row, get the latest HTF row available (timestamp <= ltf.timestamp)
-            df = pd.merge_asof(df, htf_subset, on='timestamp', direction='backward')
+            # For each LTF row, gather the last HTF row closed by then
+            # (one index array instead of a merge; the forming HTF bar is never used)
+            df = df.sort_values('timestamp').reset_index(drop=True)
+            df_htf = df_htf.sort_values('timestamp').reset_index(drop=True)
+            htf_index, _ = align_timeframes(df['timestamp'].to_numpy(), df_htf['timestamp'].to_numpy())
+            htf_closes = df_htf['close'].to_numpy(dtype=float)
+            df['htf_close'] = gather(htf_closes, htf_index)
+            for col in ('htf_ema_50', 'htf_ema_200', 'htf_adx'):
+                df[col] = gather(df_htf[col], htf_index)
         else:
+            htf_index = None
             # Init empty HTF cols if missing
             df['htf_close'] = np.nan
             df['htf_ema_50'] = np.nan
@@ -611,13 +610,13 @@ class QuantProLegacy(Strategy):
                     elif close < l_ema50 and l_ema50 < l_ema200:
                          bias = 'SHORT'
             
-            # Trend Structure (HTF)
+            # Trend Structure (HTF): last closed HTF candle vs 3 candles before, as in analyze()
             trend_struct = 'DOWN'
-            # Look at HTF History? 
-            # Ideally we need last 4 HTF candles. merge_asof gives only current.
-            # Using LTF fallback for structure in backtest for simplicity/speed
-            # Or assume bias encapsulates structure
-            if i > 4 and close > rows[i-4]['close']:
+            htf_i = htf_index[i] if htf_index is not None else -1
+            if htf_i >= 4:
+                if htf_closes[htf_i] > htf_closes[htf_i - 3]:
+                    trend_struct = 'UP'
+            elif i > 4 and close > rows[i-4]['close']:
                  trend_struct = 'UP'
 
             htf_adx = row.get('htf_adx', 0)
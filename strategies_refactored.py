@@ -8,7 +8,7 @@ import pandas as pd
 import numpy as np
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
-from shared_context import SharedContext
+from shared_context import SharedContext, trendline_possible
 from scoring_engine import calculate_score
 from strategy_config import StrategyConfig
 from scipy.signal import find_peaks
@@ -36,6 +36,17 @@ def clean_nans(obj):
 class Strategy(ABC):
     """Base strategy class - all strategies consume SharedContext."""
     
+    # Timeframes whose candle close can change the result (live mode re-runs on these)
+    input_timeframes = ('ltf', 'htf')
+    
+    # Timeframes whose RSI trendlines can change the action; with the prefilter on,
+    # trendlines are only detected for these while the strategy survives its gate
+    trendline_timeframes = ('ltf', 'htf')
+    
+    # Candles read back from the last one per timeframe (compact_context.py);
+    # None = unknown, keep the full history
+    history_lookback: Optional[Dict[str, int]] = None
+    
     @abstractmethod
     def analyze(self, context: SharedContext) -> Dict[str, Any]:
         """
@@ -60,6 +71,16 @@ class Strategy(ABC):
         """Strategy name."""
         pass
     
+    def prefilter(self, context: SharedContext) -> Optional[str]:
+        """
+        Cheap gate evaluated before RSI trendline detection.
+        
+        Return a reason when analyze() is certain to WAIT regardless of the
+        trendlines (it then runs on the context without them), or None to send
+        the symbol through trendline detection. Default: always run.
+        """
+        return None
+    
     def _build_market_context(self, context: SharedContext, local_vars: Dict[str, Any]) -> Dict[str, Any]:
         """
         Build unified market context (Tier 2) - shared across all strategies.
@@ -116,6 +137,12 @@ class QuantProLegacyRefactored(Strategy):
     Reads EMA, RSI, ADX, OBV, Bollinger from context instead of calculating.
     """
     
+    # Trendlines only feed rsi_visuals, never the action
+    trendline_timeframes = ()
+    
+    # 96-candle volume window and 100-candle swing range on LTF
+    history_lookback = {'ltf': 100, 'htf': 50}
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or {}
         
@@ -651,6 +678,14 @@ class QuantProBreakoutRefactored(Strategy):
     Reads RSI, OBV, external data (OI, funding, sentiment) from context.
     """
     
+    # RSI must close beyond the trendline (see trigger_table.py)
+    trigger_rsi_buffer = 0.0
+    
+    # Reads HTF data only
+    input_timeframes = ('htf',)
+    trendline_timeframes = ('htf',)
+    history_lookback = {'ltf': 0, 'htf': 50}
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or {}
         self.rsi_len = StrategyConfig.RSI_PERIOD_V1
@@ -1044,6 +1079,18 @@ class QuantProBreakoutRefactored(Strategy):
             }
         }
     
+    def prefilter(self, context: SharedContext) -> Optional[str]:
+        """No breakout is possible without a resistance or support line."""
+        df = context.htf_data
+        rsi_series = context.get_htf_indicator('rsi')
+        if df is None or len(df) < 50 or rsi_series is None:
+            return "Insufficient HTF data"
+        
+        if not (trendline_possible(rsi_series, 'RESISTANCE', context.config) or
+                trendline_possible(rsi_series, 'SUPPORT', context.config)):
+            return "No plausible RSI trendline (no extreme pivot in lookback)"
+        return None
+    
     def backtest(self, context: SharedContext) -> list:
         """Backtest implementation."""
         return []
@@ -1079,6 +1126,15 @@ class QuantProBreakoutV2Refactored(Strategy):
     5. Risk Management: 3.0 ATR stop loss, Cardwell projection TP
     """
     
+    # 1.0 point confirmation buffer beyond the trendline (see trigger_table.py)
+    trigger_rsi_buffer = 1.0
+    
+    # Breaks HTF lines; LTF is read for OBV and retests only
+    trendline_timeframes = ('htf',)
+    
+    # 50-candle structure TP and retest scans on HTF, OBV slope on LTF
+    history_lookback = {'ltf': 50, 'htf': 50}
+    
     def __init__(self, config: Dict[str, Any] = None):
         """
         Initialize with optional config.
@@ -1441,6 +1497,32 @@ class QuantProBreakoutV2Refactored(Strategy):
             }
         }
     
+    def prefilter(self, context: SharedContext) -> Optional[str]:
+        """
+        Same Cardwell / OBV gates as analyze(), plus the existence of a line in
+        the bias direction. All of them only need RSI and OBV on the last bars.
+        """
+        df = context.htf_data
+        rsi_series = context.get_htf_indicator('rsi')
+        if df is None or len(df) < 50 or rsi_series is None or len(rsi_series) < 50:
+            return "Insufficient HTF data"
+        
+        obv_series = context.get_htf_indicator('obv')
+        if obv_series is None:
+            obv_series = context.get_ltf_indicator('obv')
+        obv_slope = self._calculate_obv_slope(obv_series) if obv_series is not None else 0.0
+        
+        bias, _ = self._apply_cardwell_rules(rsi_series.iloc[-1])
+        if bias == 'LONG' and obv_slope <= 0:
+            return "OBV Slope not positive for LONG"
+        if bias == 'SHORT' and obv_slope >= 0:
+            return "OBV Slope not negative for SHORT"
+        
+        direction = 'RESISTANCE' if bias == 'LONG' else 'SUPPORT'
+        if not trendline_possible(rsi_series, direction, context.config):
+            return f"No plausible RSI {direction.lower()} line for {bias}"
+        return None
+    
     def _build_observability_dict(self, context: SharedContext, rsi_val: float, 
                                    close: float, oi_z_score: float, oi_z_score_valid: bool,
                                    obv_slope: float, cardwell_range: str, breakout_type: str = None,
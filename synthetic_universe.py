@@ -0,0 +1,428 @@
+"""
+Synthetic Market Universe Generator
+Writes realistic OHLCV candle files and Coinalyze snapshots for scale testing.
+
+Output layout matches what the scanner reads in directory mode:
+    {out_dir}/{EXCHANGE}_{SYMBOL}_15m.json           (load_data)
+    {out_dir}/{EXCHANGE}_{SYMBOL}_4h.json            (load_data)
+    {out_dir}/coinalyze/{SYMBOL}_{EXCHANGE}.json     (load_coinalyze_data_from_cache)
+
+Each coin is one simulated 15m price path: its 4h candles are that path
+resampled, and cross-listed copies trade the same path at a small basis, so
+timeframes and exchanges agree the way real feeds do.
+
+Everything is driven by a single seed, so the same arguments always produce
+byte-identical files.
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+
+
+LTF_INTERVAL_MS = 15 * 60 * 1000
+HTF_INTERVAL_MS = 4 * 60 * 60 * 1000
+
+# Exchange naming conventions (suffix appended to the base asset)
+EXCHANGE_SUFFIXES = {
+    'HYPERLIQUID': 'USDT',
+    'KUCOIN': 'USDTM',
+    'MEXC': 'USDT',
+}
+
+# Regime-switching parameters per bar: (drift, volatility)
+REGIMES = {
+    'BULL': (0.0008, 0.010),
+    'BEAR': (-0.0008, 0.012),
+    'RANGE': (0.0, 0.006),
+}
+REGIME_STAY_PROB = 0.97
+
+# Fixed "now" so generated timestamps are stable across runs
+DEFAULT_END_MS = 1768838400000
+
+
+def _round_price(value: float) -> float:
+    """Round a price to a realistic number of decimals for its magnitude."""
+    if value >= 1000:
+        return round(value, 1)
+    if value >= 10:
+        return round(value, 2)
+    if value >= 1:
+        return round(value, 4)
+    return float(f"{value:.5g}")
+
+
+def _simulate_log_returns(rng: np.random.Generator, n: int, model: str,
+                          drift: float, vol: float) -> np.ndarray:
+    """Generate per-bar log returns for GBM or a 3-state regime-switching model."""
+    if model == 'gbm':
+        return (drift - 0.5 * vol ** 2) + vol * rng.standard_normal(n)
+
+    if model != 'regime':
+        raise ValueError(f"Unknown price model: {model}")
+
+    names = list(REGIMES.keys())
+    drifts = np.array([REGIMES[name][0] for name in names])
+    vols = np.array([REGIMES[name][1] for name in names])
+
+    # Markov chain over regimes, vectorised by drawing switch points up front
+    switches = rng.random(n) > REGIME_STAY_PROB
+    new_states = rng.integers(0, len(names), n)
+    states = np.empty(n, dtype=np.int64)
+    current = int(rng.integers(0, len(names)))
+    switch_idx = np.flatnonzero(switches)
+    prev = 0
+    for idx in switch_idx:
+        states[prev:idx] = current
+        current = int(new_states[idx])
+        prev = idx
+    states[prev:] = current
+
+    scale = vol / REGIMES['RANGE'][1]
+    v = vols[states] * scale
+    return (drifts[states] - 0.5 * v ** 2) + v * rng.standard_normal(n)
+
+
+def simulate_bars(
+    rng: np.random.Generator,
+    n_candles: int,
+    interval_ms: int,
+    start_price: float,
+    end_ms: int = DEFAULT_END_MS,
+    model: str = 'regime',
+    drift: float = 0.0,
+    vol: float = 0.01,
+) -> Dict[str, np.ndarray]:
+    """
+    Simulate one continuous price path as OHLCV arrays (time, open, high, low,
+    close, volume), the last bar opening at `end_ms`.
+    """
+    log_ret = _simulate_log_returns(rng, n_candles, model, drift, vol)
+    close = start_price * np.exp(np.cumsum(log_ret))
+    open_ = np.empty(n_candles)
+    open_[0] = start_price
+    open_[1:] = close[:-1] * (1 + 0.0005 * rng.standard_normal(n_candles - 1))
+
+    wick = np.abs(rng.standard_normal((2, n_candles))) * vol * 0.6
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+
+    # Volume reacts to the size of the move
+    base_volume = rng.lognormal(mean=8.0, sigma=1.0)
+    volume = base_volume * rng.lognormal(0.0, 0.5, n_candles) * (1 + 50 * np.abs(log_ret))
+
+    times = end_ms - (n_candles - 1 - np.arange(n_candles, dtype=np.int64)) * interval_ms
+    return {'time': times, 'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}
+
+
+def resample_bars(bars: Dict[str, np.ndarray], interval_ms: int) -> Dict[str, np.ndarray]:
+    """
+    Aggregate bars into `interval_ms` buckets aligned to the epoch (first open,
+    max high, min low, last close, summed volume). The last bucket may still be
+    forming, like the newest candle of a live feed.
+    """
+    buckets = bars['time'] // interval_ms * interval_ms
+    times, starts = np.unique(buckets, return_index=True)
+    ends = np.append(starts[1:], len(buckets))
+    return {
+        'time': times,
+        'open': bars['open'][starts],
+        'high': np.maximum.reduceat(bars['high'], starts),
+        'low': np.minimum.reduceat(bars['low'], starts),
+        'close': bars['close'][ends - 1],
+        'volume': np.add.reduceat(bars['volume'], starts),
+    }
+
+
+def bars_to_candles(
+    rng: np.random.Generator,
+    bars: Dict[str, np.ndarray],
+    gap_prob: float = 0.002,
+    nan_prob: float = 0.001,
+) -> List[Dict[str, Any]]:
+    """
+    Candle list in the exchange JSON format (time/open/high/low/close/volume).
+
+    Real feeds are imperfect, so some bars are dropped (gaps in `time`) and some
+    carry null values, which `load_data` coerces and drops. By default load_data
+    then fills the gaps with synthetic bars (see candle_validation).
+    """
+    n_candles = len(bars['time'])
+    if n_candles == 0:
+        return []
+    keep = rng.random(n_candles) >= gap_prob
+    keep[-1] = True
+    null_mask = rng.random(n_candles) < nan_prob
+    null_field = rng.integers(0, 5, n_candles)
+    fields = ('open', 'high', 'low', 'close', 'volume')
+
+    candles = []
+    for i in np.flatnonzero(keep):
+        candle = {
+            'time': int(bars['time'][i]),
+            'open': _round_price(float(bars['open'][i])),
+            'high': _round_price(float(bars['high'][i])),
+            'low': _round_price(float(bars['low'][i])),
+            'close': _round_price(float(bars['close'][i])),
+            'volume': round(float(bars['volume'][i]), 2),
+        }
+        if null_mask[i]:
+            candle[fields[null_field[i]]] = None
+        candles.append(candle)
+
+    return candles
+
+
+def generate_ohlcv(
+    rng: np.random.Generator,
+    n_candles: int,
+    interval_ms: int,
+    start_price: float,
+    end_ms: int = DEFAULT_END_MS,
+    model: str = 'regime',
+    drift: float = 0.0,
+    vol: float = 0.01,
+    gap_prob: float = 0.002,
+    nan_prob: float = 0.001,
+) -> List[Dict[str, Any]]:
+    """
+    Generate a single-timeframe candle list (see simulate_bars / bars_to_candles).
+
+    Args:
+        rng: Seeded NumPy generator
+        n_candles: Number of bars before gaps are removed
+        interval_ms: Bar length in milliseconds
+        start_price: Opening price of the first bar
+        end_ms: Open time of the last bar
+        model: 'gbm' or 'regime'
+        drift: Per-bar drift (GBM only)
+        vol: Per-bar volatility
+        gap_prob: Probability that a bar is missing
+        nan_prob: Probability that a bar has a null field
+    """
+    if n_candles <= 0:
+        return []
+    bars = simulate_bars(rng, n_candles, interval_ms, start_price, end_ms, model, drift, vol)
+    return bars_to_candles(rng, bars, gap_prob, nan_prob)
+
+
+def path_length(ltf_candles: int, htf_candles: int, end_ms: int = DEFAULT_END_MS) -> int:
+    """LTF bars needed to cover `ltf_candles` and `htf_candles` complete-from-the-start HTF buckets."""
+    if htf_candles <= 0:
+        return ltf_candles
+    first_htf = end_ms // HTF_INTERVAL_MS * HTF_INTERVAL_MS - (htf_candles - 1) * HTF_INTERVAL_MS
+    return max(ltf_candles, (end_ms - first_htf) // LTF_INTERVAL_MS + 1)
+
+
+def generate_coinalyze_snapshot(
+    rng: np.random.Generator,
+    symbol: str,
+    exchange: str,
+    end_ms: int = DEFAULT_END_MS,
+    points: int = 97,
+) -> Dict[str, Any]:
+    """
+    Generate a Coinalyze snapshot in the unified JS fetch-loop format.
+
+    OI history uses second-resolution timestamps on a 15-minute grid, like the
+    real cache files.
+    """
+    base_oi = float(rng.lognormal(16.0, 1.5))
+    oi_walk = base_oi * np.exp(np.cumsum(0.004 * rng.standard_normal(points)))
+    end_s = (end_ms // 1000) - ((end_ms // 1000) % 900)
+    oi_ts = end_s - (points - 1 - np.arange(points)) * 900
+
+    status = str(rng.choice(['resolved', 'aggregated', 'neutral'], p=[0.3, 0.6, 0.1]))
+    if status == 'neutral':
+        return {
+            'oi_history': [],
+            'funding_rate': None,
+            'ls_ratio': None,
+            'liquidations': {'longs': 0, 'shorts': 0},
+            'oi_status': 'neutral',
+            'coinalyze_symbol': None,
+            'fetched_at': int(end_ms),
+        }
+
+    base = symbol[:-1] if symbol.endswith('USDTM') else symbol
+    return {
+        'oi_history': [
+            {'timestamp': int(t), 'value': int(v)} for t, v in zip(oi_ts, oi_walk)
+        ],
+        'funding_rate': round(float(rng.normal(0.0, 0.01)), 6) if rng.random() < 0.7 else None,
+        'ls_ratio': float(rng.lognormal(0.0, 0.3)),
+        'liquidations': {
+            'longs': round(float(rng.lognormal(7.0, 2.0)), 1),
+            'shorts': round(float(rng.lognormal(7.0, 2.0)), 1),
+        },
+        'oi_status': status,
+        'coinalyze_symbol': f"{base}_PERP.A",
+        'fetched_at': int(end_ms),
+    }
+
+
+def synthetic_base_names(count: int) -> List[str]:
+    """Deterministic alphabetic base asset names (SYNAA, SYNAB, ...)."""
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    names = []
+    width = 2
+    while len(letters) ** width < count:
+        width += 1
+    for i in range(count):
+        code = ''
+        n = i
+        for _ in range(width):
+            code = letters[n % 26] + code
+            n //= 26
+        names.append(f"SYN{code}")
+    return names
+
+
+def plan_universe(
+    n_symbols: int,
+    exchanges: List[str],
+    seed: int = 42,
+    overlap: float = 0.5,
+) -> List[Tuple[str, str]]:
+    """
+    Decide which (symbol, exchange) pairs exist.
+
+    `overlap` is the probability that a coin listed on one exchange is also
+    listed on each other exchange, so cross-exchange duplicates appear the way
+    they do in production.
+    """
+    rng = np.random.default_rng(seed)
+    pairs: List[Tuple[str, str]] = []
+    bases = synthetic_base_names(n_symbols)
+    i = 0
+    while len(pairs) < n_symbols:
+        base = bases[i % len(bases)] if i < len(bases) else f"{bases[i % len(bases)]}X{i // len(bases)}"
+        i += 1
+        primary = exchanges[int(rng.integers(0, len(exchanges)))]
+        listed = [ex for ex in exchanges if ex == primary or rng.random() < overlap]
+        for ex in listed:
+            if len(pairs) >= n_symbols:
+                break
+            pairs.append((f"{base}{EXCHANGE_SUFFIXES.get(ex, 'USDT')}", ex))
+    return pairs
+
+
+def _write_json(path: str, payload: Any) -> None:
+    with open(path, 'w') as f:
+        json.dump(payload, f, separators=(',', ':'))
+
+
+def generate_universe(
+    out_dir: str,
+    n_symbols: int = 100,
+    exchanges: Optional[List[str]] = None,
+    ltf_candles: int = 1000,
+    htf_candles: int = 1000,
+    seed: int = 42,
+    model: str = 'regime',
+    overlap: float = 0.5,
+    gap_prob: float = 0.002,
+    nan_prob: float = 0.001,
+    with_coinalyze: bool = True,
+    end_ms: int = DEFAULT_END_MS,
+) -> Dict[str, Any]:
+    """
+    Write a synthetic universe to `out_dir`.
+
+    Returns:
+        Manifest dict with the seed, the generated pairs and file counts.
+    """
+    exchanges = [ex.upper() for ex in (exchanges or list(EXCHANGE_SUFFIXES.keys()))]
+    os.makedirs(out_dir, exist_ok=True)
+    coinalyze_dir = os.path.join(out_dir, 'coinalyze')
+    if with_coinalyze:
+        os.makedirs(coinalyze_dir, exist_ok=True)
+
+    pairs = plan_universe(n_symbols, exchanges, seed=seed, overlap=overlap)
+    base_rng = np.random.default_rng(seed)
+    child_seeds = base_rng.integers(0, 2 ** 32 - 1, len(pairs))
+
+    # Cross-listed coins share one underlying 15m path; the 4h candles are that
+    # path resampled, so both timeframes agree on every timestamp
+    # (plan_universe lists a coin's exchanges consecutively, so one path is kept at a time)
+    path_base, path = None, {}
+    n_path = path_length(ltf_candles, htf_candles, end_ms)
+
+    for (symbol, exchange), child_seed in zip(pairs, child_seeds):
+        rng = np.random.default_rng(int(child_seed))
+        base = symbol[:-5] if symbol.endswith('USDTM') else symbol[:-4]
+        if base != path_base:
+            start_price = float(10 ** rng.uniform(-4, 4.5))
+            vol = float(rng.uniform(0.005, 0.02))
+            path_base, path = base, simulate_bars(rng, n_path, LTF_INTERVAL_MS, start_price,
+                                                  end_ms=end_ms, model=model, vol=vol)
+
+        # Each listing trades at a small basis with its own volume level
+        basis = 1 + 0.0005 * rng.standard_normal()
+        listing = {key: path[key] * basis for key in ('open', 'high', 'low', 'close')}
+        listing['time'] = path['time']
+        listing['volume'] = path['volume'] * float(rng.lognormal(0.0, 0.5))
+
+        htf_bars = resample_bars(listing, HTF_INTERVAL_MS)
+        htf_bars = {key: values[-htf_candles:] if htf_candles > 0 else values[:0]
+                    for key, values in htf_bars.items()}
+        ltf_bars = {key: values[-ltf_candles:] if ltf_candles > 0 else values[:0]
+                    for key, values in listing.items()}
+        ltf = bars_to_candles(rng, ltf_bars, gap_prob, nan_prob)
+        htf = bars_to_candles(rng, htf_bars, gap_prob, nan_prob)
+
+        _write_json(os.path.join(out_dir, f"{exchange}_{symbol}_15m.json"), ltf)
+        _write_json(os.path.join(out_dir, f"{exchange}_{symbol}_4h.json"), htf)
+
+        if with_coinalyze:
+            snapshot = generate_coinalyze_snapshot(rng, symbol, exchange, end_ms=end_ms)
+            _write_json(os.path.join(coinalyze_dir, f"{symbol}_{exchange}.json"), snapshot)
+
+    return {
+        'seed': seed,
+        'model': model,
+        'pairs': pairs,
+        'symbols': len(pairs),
+        'ltf_candles': ltf_candles,
+        'htf_candles': htf_candles,
+        'files': len(pairs) * 2,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic market universe for scale testing')
+    parser.add_argument('output', help='Output directory (e.g. /tmp/synthetic_data)')
+    parser.add_argument('--symbols', type=int, default=100, help='Number of (symbol, exchange) pairs')
+    parser.add_argument('--exchanges', default='HYPERLIQUID,KUCOIN,MEXC', help='Comma-separated exchanges')
+    parser.add_argument('--ltf-candles', type=int, default=1000, help='Candles per 15m file')
+    parser.add_argument('--htf-candles', type=int, default=1000, help='Candles per 4h file')
+    parser.add_argument('--model', choices=['gbm', 'regime'], default='regime', help='Price model')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--overlap', type=float, default=0.5, help='Cross-listing probability per exchange')
+    parser.add_argument('--gap-prob', type=float, default=0.002, help='Probability of a missing bar')
+    parser.add_argument('--nan-prob', type=float, default=0.001, help='Probability of a null field in a bar')
+    parser.add_argument('--no-coinalyze', action='store_true', help='Skip Coinalyze snapshots')
+    args = parser.parse_args()
+
+    manifest = generate_universe(
+        args.output,
+        n_symbols=args.symbols,
+        exchanges=[e.strip() for e in args.exchanges.split(',') if e.strip()],
+        ltf_candles=args.ltf_candles,
+        htf_candles=args.htf_candles,
+        seed=args.seed,
+        model=args.model,
+        overlap=args.overlap,
+        gap_prob=args.gap_prob,
+        nan_prob=args.nan_prob,
+        with_coinalyze=not args.no_coinalyze,
+    )
+    print(f"[SYNTHETIC] Wrote {manifest['files']} candle files for {manifest['symbols']} symbols to {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Backtest V2 Test - Verify the array-based simulation matches the per-bar originals.
+
+Checks:
+1. reverse_rsi_prices equals calculate_reverse_rsi on every prefix
+2. rolling_peak_lines equals the per-bar idxmax peak search
+3. run_backtests returns per-file trades in input order, errors per file
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from strategies import calculate_reverse_rsi
+from backtest_v2 import BacktestEngineV2, reverse_rsi_prices, rolling_peak_lines, run_backtests
+
+
+def _closes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+
+
+def test_reverse_rsi_prices_match_per_bar_calculation():
+    close = pd.Series(_closes(300))
+    prices = reverse_rsi_prices(close.values, 60.0, 14)
+    expected = [calculate_reverse_rsi(60.0, close.iloc[:i], 14) for i in range(15, len(close))]
+    assert np.isnan(prices[:15]).all()
+    assert np.array_equal(prices[15:], np.array(expected, dtype=np.float64))
+
+
+def _legacy_peak_line(rsi_series, window_size=20):
+    """The original find_trendlines: idxmax over iloc[-window_size:-2] on the prefix."""
+    if len(rsi_series) < window_size:
+        return None
+    recent_window = rsi_series.iloc[-window_size:-2]
+    peak_idx = recent_window.idxmax()
+    peak_val = recent_window.max()
+    try:
+        if rsi_series[peak_idx] > rsi_series[peak_idx - 1] and rsi_series[peak_idx] > rsi_series[peak_idx + 1]:
+            m = -0.05
+            return {'m': m, 'c': peak_val - (m * peak_idx)}
+    except KeyError:
+        return None
+    return None
+
+
+def test_rolling_peak_lines_match_idxmax_search():
+    rng = np.random.default_rng(1)
+    rsi = pd.Series(np.clip(50 + np.cumsum(rng.normal(0, 3, 400)), 5, 95))
+    rsi.iloc[:14] = np.nan
+    slopes, intercepts = rolling_peak_lines(rsi.values, 20)
+    for t in range(35, len(rsi)):  # legacy idxmax needs a non-NaN window
+        line = _legacy_peak_line(rsi.iloc[:t + 1], 20)
+        if line is None:
+            assert np.isnan(slopes[t])
+        else:
+            assert (slopes[t], intercepts[t]) == (line['m'], line['c'])
+
+
+def test_run_backtests_in_input_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'MEXC_AAAUSDT_4h.json')
+        close = _closes(600, seed=5)
+        candles = [{'time': i * 14400000, 'open': c, 'high': c * 1.01, 'low': c * 0.99, 'close': c, 'volume': 1 + i % 7}
+                   for i, c in enumerate(close)]
+        with open(path, 'w') as f:
+            json.dump(candles, f)
+
+        engine = BacktestEngineV2(path)
+        expected = engine.run_simulation()
+        results = run_backtests([path, os.path.join(tmp, 'missing.json'), path], workers=2)
+        assert [r['file'] for r in results] == [path, os.path.join(tmp, 'missing.json'), path]
+        assert results[0]['trades'] == expected and results[2]['trades'] == expected
+        assert results[0]['filtered_count'] == engine.filtered_count
+        assert results[0]['log'].startswith('Starting simulation on 600 candles...')
+        assert results[1]['error'].startswith('FileNotFoundError')
+
+
+if __name__ == "__main__":
+    test_reverse_rsi_prices_match_per_bar_calculation()
+    test_rolling_peak_lines_match_idxmax_search()
+    test_run_backtests_in_input_order()
+    print("✓ Backtest V2 tests passed")
@@ -0,0 +1,195 @@
+"""
+Candle Validation Test - Verify timestamp checks and repair policies.
+
+Checks:
+1. Clean data passes through untouched on the fast path
+2. Duplicates, disorder, gaps and zero-volume stretches are counted
+3. fill sorts, keeps the last copy of a bar and inserts flat synthetic bars;
+   drop removes bad rows only; reject raises with the stats
+   Gaps over MAX_GAP_BARS intervals are never filled: the rows beyond them are
+   dropped as corrupt
+4. load_data validates with the interval from the file name
+5. A directory scan records per-file stats in scan_status
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from candle_validation import (CandleDataError, validate_candles, parse_interval_ms, summarize_quality,
+                               _zero_volume_runs, MAX_GAP_BARS)
+from market_scanner_refactored import load_data
+
+SCANNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'market_scanner_refactored.py')
+T0 = 1768838400000
+STEP = 900000
+
+
+def _frame(times, volume=1.0):
+    n = len(times)
+    close = np.arange(n, dtype=float) + 100.0
+    return pd.DataFrame({'timestamp': np.asarray(times, dtype=np.int64), 'open': close - 0.5,
+                         'high': close + 1.0, 'low': close - 1.0, 'close': close,
+                         'volume': np.full(n, volume) if np.isscalar(volume) else np.asarray(volume, dtype=float)})
+
+
+def _write_candles(path, times, close=1.0):
+    candles = [{'time': t, 'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1.0}
+               for t in times]
+    with open(path, 'w') as f:
+        json.dump(candles, f, indent=2)
+
+
+def test_clean_fast_path():
+    df = _frame([T0 + k * STEP for k in range(1000)])
+    out, stats = validate_candles(df, STEP)
+    assert out is df and stats == {'rows': 1000, 'clean': True}
+    # Microseconds, not milliseconds (generous bound for slow machines)
+    assert timeit.timeit(lambda: validate_candles(df, STEP), number=200) / 200 < 0.001
+
+
+def test_detects_problems():
+    times = [T0 + k * STEP for k in range(10)]
+    # 2 missing bars after k=3, bar 6 repeated, bars 7/8 swapped
+    times = times[:4] + times[6:7] + [times[6]] + [times[8], times[7]] + times[9:]
+    _, stats = validate_candles(_frame(times, volume=[1, 0, 0, 0, 1, 1, 1, 0, 1]), STEP, policy='drop')
+    assert stats['out_of_order'] == 1 and stats['duplicates'] == 1
+    assert stats['gaps'] == 1 and stats['missing_bars'] == 2
+    assert stats['zero_volume_bars'] == 4 and stats['max_zero_volume_run'] == 3
+    assert not stats['clean']
+
+    # Zero volume alone is reported, not repaired
+    df = _frame([T0 + k * STEP for k in range(5)], volume=[1, 0, 0, 1, 1])
+    out, stats = validate_candles(df, STEP, policy='reject')
+    assert out is df and not stats['clean'] and 'rows_out' not in stats
+    assert _zero_volume_runs(np.array([0.0, 1.0, 0.0])) == (2, 1)
+
+    # Interval inferred from the most common step
+    _, stats = validate_candles(_frame([T0, T0 + STEP, T0 + 4 * STEP, T0 + 5 * STEP]))
+    assert stats['interval_ms'] == STEP and stats['missing_bars'] == 2
+
+
+def test_fill_policy():
+    times = [T0, T0 + 2 * STEP, T0 + STEP, T0 + 2 * STEP, T0 + 5 * STEP]
+    df = _frame(times)
+    out, stats = validate_candles(df, STEP, policy='fill')
+    assert out['timestamp'].tolist() == [T0 + k * STEP for k in range(6)]
+    assert stats['filled'] == 2 and stats['dropped'] == 1 and stats['rows_out'] == 6
+    # The later copy of the repeated bar wins
+    assert out['close'].iloc[2] == 103.0
+    # Synthetic bars are flat at the previous close with no volume
+    assert out.loc[3, ['open', 'high', 'low', 'close']].tolist() == [103.0] * 4
+    assert out['volume'].tolist() == [1.0, 1.0, 1.0, 0.0, 0.0, 1.0]
+    assert out['timestamp'].dtype == np.int64 and list(out.index) == list(range(6))
+
+
+def test_drop_and_reject_policies():
+    times = [T0, T0 + 2 * STEP, T0 + STEP, T0 + 2 * STEP, T0 + 5 * STEP]
+    out, stats = validate_candles(_frame(times), STEP, policy='drop')
+    assert out['timestamp'].tolist() == [T0, T0 + 2 * STEP, T0 + 5 * STEP]
+    assert stats['dropped'] == 2 and 'filled' not in stats
+
+    try:
+        validate_candles(_frame(times), STEP, policy='reject', source='x_15m.json')
+        assert False, "reject should raise"
+    except CandleDataError as e:
+        assert 'x_15m.json' in str(e) and e.stats['duplicates'] == 1
+
+    try:
+        validate_candles(_frame(times), STEP, policy='skip')
+        assert False, "unknown policy should raise"
+    except ValueError:
+        pass
+
+
+def test_far_gaps_are_corrupt_rows():
+    times = [T0 + k * STEP for k in range(1000)]
+
+    # One open time in seconds instead of ms: sorts first, ~1.9M intervals before the rest
+    seconds = times[:500] + [times[500] // 1000] + times[501:]
+    out, stats = validate_candles(_frame(seconds), STEP, policy='fill')
+    assert out['timestamp'].tolist() == times and stats['rows_out'] == 1000
+    assert stats['corrupt_rows'] == 1 and stats['far_gaps'] == 1 and stats['dropped'] == 1
+    assert stats['filled'] == 1 and stats['missing_bars'] == 1  # the hole it left
+
+    # Far-future typo at the end: dropped, nothing appended
+    future = times + [times[-1] + 10_000 * STEP]
+    for policy in ('fill', 'drop'):
+        out, stats = validate_candles(_frame(future), STEP, policy=policy)
+        assert out['timestamp'].tolist() == times and stats['corrupt_rows'] == 1 and stats['dropped'] == 1
+
+    # Up to the cap a gap is still missing bars; the longest stretch wins either way
+    edge = times[:10] + [t + (MAX_GAP_BARS - 1) * STEP for t in times[10:]]
+    out, stats = validate_candles(_frame(edge), STEP)
+    assert stats['corrupt_rows'] == 0 and stats['filled'] == MAX_GAP_BARS - 1
+    split = times[:10] + [t + MAX_GAP_BARS * STEP for t in times[10:]]
+    out, stats = validate_candles(_frame(split), STEP)
+    assert stats['corrupt_rows'] == 10 and out['timestamp'].iloc[0] == split[10] and len(out) == 990
+
+    try:
+        validate_candles(_frame(future), STEP, policy='reject', source='x_15m.json')
+        assert False, "reject should raise"
+    except CandleDataError as e:
+        assert '1 corrupt rows' in str(e) and e.stats['corrupt_rows'] == 1
+
+
+def test_load_data_and_summary():
+    assert parse_interval_ms('data/MEXC_BTCUSDT_15m.json') == STEP
+    assert parse_interval_ms('KUCOIN_XBTUSDTM_4h.json') == 16 * STEP
+    assert parse_interval_ms('master_feed.json') is None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'MEXC_BTCUSDT_15m.json')
+        _write_candles(path, [T0, T0 + STEP, T0 + 3 * STEP, T0 + 3 * STEP])
+        quality = {}
+        df = load_data(path, data_quality=quality)
+        assert df['timestamp'].tolist() == [T0 + k * STEP for k in range(4)]
+        assert quality[path]['filled'] == 1 and quality[path]['duplicates'] == 1
+
+        try:
+            load_data(path, 'reject', quality)
+            assert False, "reject should raise"
+        except CandleDataError:
+            assert quality[path]['rejected']
+
+        summary = summarize_quality({**quality, 'clean.json': {'rows': 10, 'clean': True}}, 'reject')
+        assert summary['files_checked'] == 2 and summary['files_with_issues'] == 1
+        assert summary['files_rejected'] == 1 and summary['totals']['missing_bars'] == 1
+        assert list(summary['files']) == [path]
+
+
+def test_scan_records_data_quality():
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'data')
+        os.makedirs(data_dir)
+        _write_candles(os.path.join(data_dir, 'MEXC_AAAUSDT_15m.json'), [T0 + k * STEP for k in range(60)])
+        gappy = [T0 + k * STEP for k in range(60) if not 10 <= k < 13]
+        _write_candles(os.path.join(data_dir, 'MEXC_BBBUSDT_15m.json'), gappy + gappy[-2:])
+        output = os.path.join(data_dir, 'master_feed.json')
+
+        proc = subprocess.run([sys.executable, SCANNER, data_dir, '--output', output, '--no-delta',
+                               '--no-history', '--no-checkpoint', '--no-priority'],
+                              cwd=tmp, capture_output=True, text=True, timeout=120)
+        assert proc.returncode == 0, proc.stderr
+        with open(os.path.join(data_dir, 'scan_status.json')) as f:
+            quality = json.load(f)['data_quality']
+        assert quality['policy'] == 'fill' and quality['files_checked'] == 2
+        assert list(quality['files']) == [os.path.join(data_dir, 'MEXC_BBBUSDT_15m.json')]
+        assert quality['totals']['filled'] == 3 and quality['totals']['duplicates'] == 2
+
+
+if __name__ == "__main__":
+    test_clean_fast_path()
+    test_detects_problems()
+    test_fill_policy()
+    test_drop_and_reject_policies()
+    test_far_gaps_are_corrupt_rows()
+    test_load_data_and_summary()
+    test_scan_records_data_quality()
+    print("✓ Candle validation tests passed")
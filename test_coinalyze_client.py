@@ -0,0 +1,165 @@
+"""
+Coinalyze Client Test - Verify the coalescing request layer against a local
+stand-in of the API.
+
+Checks:
+1. OI windows up to the canonical one are sliced from a single request
+2. Repeated and concurrent identical requests hit the API once
+3. File-cache hits return the same parsed results as fresh requests
+4. Failures are memoized for the bucket; a new bucket starts empty
+"""
+
+import os
+import json
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from data_fetcher import CoinalyzeClient, RequestCoalescer, OI_WINDOW_HOURS
+from coinalyze_rate_limiter import AdaptiveRateLimiter
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    seen = []
+    delay = 0.0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        endpoint = url.path.rsplit('/', 1)[-1]
+        self.seen.append((endpoint, query))
+        time.sleep(self.delay)
+        if query['symbols'].startswith('FAIL'):
+            self.send_response(500)
+            self.end_headers()
+            return
+        if endpoint == 'predicted-funding-rate':
+            payload = [{'symbol': query['symbols'], 'pf': 0.0001}]
+        else:
+            start, end = int(query['from']), int(query['to'])
+            rows = []
+            for t in range(start, end + 1, 900):
+                rows.append({'t': t, 'o': t % 7919 + 1000.0, 'c': t % 7907 + 1000.0,
+                             'l': float(t % 13), 's': float(t % 17 + 1)})
+            payload = [{'symbol': query['symbols'], 'history': rows}]
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _client(base_url, cache_dir, coalescer=None):
+    client = CoinalyzeClient('test-key', coalescer or RequestCoalescer())
+    client.base_url = base_url
+    client.cache_dir = cache_dir
+    client.rate_limiter = AdaptiveRateLimiter(os.path.join(cache_dir, 'rate_limit.db'), limit=100000)
+    return client
+
+
+def _serve():
+    _StandIn.seen.clear()
+    _StandIn.delay = 0.0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def test_oi_windows_share_one_request():
+    server, base_url = _serve()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            client = _client(base_url, tmp)
+            day = client.get_open_interest_history('BTCUSDT', hours=24)
+            longer = client.get_open_interest_history('BTCUSDT', hours=26.5)
+            delta = client.get_open_interest_delta('BTCUSDT')
+            assert [e for e, _ in _StandIn.seen] == ['open-interest-history']
+            assert int(_StandIn.seen[0][1]['to']) - int(_StandIn.seen[0][1]['from']) == OI_WINDOW_HOURS * 3600
+
+            assert len(day) == 24 * 4 + 1 and len(longer) == 26 * 4 + 3
+            assert longer[-len(day):] == day
+            assert all(isinstance(row['value'], float) for row in day)
+            assert isinstance(delta, float)
+
+            # A window past the canonical one rounds up to whole days
+            week = client.get_open_interest_history('BTCUSDT', hours=72)
+            assert len(_StandIn.seen) == 2 and len(week) == 72 * 4 + 1
+            assert week[-len(day):] == day
+    finally:
+        server.shutdown()
+
+
+def test_concurrent_requests_coalesced():
+    server, base_url = _serve()
+    _StandIn.delay = 0.2
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            coalescer = RequestCoalescer()
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(
+                _client(base_url, tmp, coalescer).get_liquidation_history('ETHUSDT'))) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert len(_StandIn.seen) == 1
+            assert len(results) == 8 and all(r == results[0] for r in results)
+            assert coalescer.stats['misses'] == 1 and coalescer.stats['coalesced'] >= 1
+
+            # check_coinalyze_confirmation + calculate_sentiment_score: one request between them
+            client = _client(base_url, tmp, coalescer)
+            assert client.get_liquidation_history('ETHUSDT') == results[0]
+            assert len(_StandIn.seen) == 1
+    finally:
+        server.shutdown()
+
+
+def test_file_cache_hit_returns_parsed_results():
+    server, base_url = _serve()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            first = _client(base_url, tmp)
+            expected = (first.get_liquidation_history('SOLUSDT'), first.get_open_interest_history('SOLUSDT'),
+                        first.get_funding_rate('SOLUSDT'), first.get_ls_ratio_top_traders('SOLUSDT'))
+            assert None not in expected
+            requests_made = len(_StandIn.seen)
+
+            # New process, same 15-minute bucket: served from the file cache, parsed
+            second = _client(base_url, tmp)
+            assert (second.get_liquidation_history('SOLUSDT'), second.get_open_interest_history('SOLUSDT'),
+                    second.get_funding_rate('SOLUSDT'), second.get_ls_ratio_top_traders('SOLUSDT')) == expected
+            assert len(_StandIn.seen) == requests_made
+    finally:
+        server.shutdown()
+
+
+def test_failures_memoized_per_bucket():
+    server, base_url = _serve()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            client = _client(base_url, tmp)
+            assert client.get_liquidation_history('FAILUSDT') is None
+            assert client.get_liquidation_history('FAILUSDT') is None
+            assert len(_StandIn.seen) == 1
+
+        coalescer = RequestCoalescer()
+        calls = []
+        assert coalescer.get(1, 'k', lambda: calls.append(1) or 'a') == 'a'
+        assert coalescer.get(1, 'k', lambda: calls.append(1) or 'b') == 'a'
+        assert coalescer.get(2, 'k', lambda: calls.append(1) or 'c') == 'c'
+        assert len(calls) == 2
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_oi_windows_share_one_request()
+    test_concurrent_requests_coalesced()
+    test_file_cache_hit_returns_parsed_results()
+    test_failures_memoized_per_bucket()
+    print("✓ Coinalyze client tests passed")
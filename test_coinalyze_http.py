@@ -0,0 +1,125 @@
+"""
+Coinalyze HTTP Test - Verify the pooled session against a local keep-alive
+stand-in server.
+
+Checks:
+1. Consecutive requests (and retries) reuse one connection; gzip is decoded
+2. Per-endpoint timings and error counts are recorded
+3. COINALYZE_BASE_URL points every client at the stand-in
+4. A forked process gets its own session
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+import coinalyze_http
+from coinalyze_http import PooledSession, get_session
+from coinalyze_rate_limiter import AdaptiveRateLimiter
+
+
+class _KeepAlive(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    seen = []
+    fail_next = 0
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        self.seen.append((path, self.headers.get('Accept-Encoding')))
+        if _KeepAlive.fail_next:
+            _KeepAlive.fail_next -= 1
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = gzip.compress(json.dumps([{'symbol': 'BTCUSDT_PERP.A', 'pf': 0.0001}]).encode('utf-8'))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    _KeepAlive.seen.clear()
+    _KeepAlive.fail_next = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _KeepAlive)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def test_connections_reused_and_gzip_decoded():
+    server, url = _serve()
+    session = PooledSession(pool_size=2)
+    try:
+        for _ in range(10):
+            response = session.get(f"{url}/predicted-funding-rate", params={'symbols': 'BTCUSDT_PERP.A'}, timeout=5)
+            assert response.json()[0]['pf'] == 0.0001
+        assert session.connections_opened() == 1
+        assert all('gzip' in accept for _, accept in _KeepAlive.seen)
+
+        _KeepAlive.fail_next = 1
+        assert session.get(f"{url}/open-interest-history", timeout=5).status_code == 503
+        assert session.get(f"{url}/open-interest-history", timeout=5).status_code == 200
+        assert session.connections_opened() == 1
+
+        summary = session.summary()
+        assert summary['requests'] == 12 and summary['errors'] == 1
+        assert summary['endpoints']['predicted-funding-rate']['requests'] == 10
+        assert summary['endpoints']['open-interest-history']['requests'] == 2
+        assert summary['avg_ms'] > 0
+    finally:
+        session.close()
+        server.shutdown()
+
+
+def test_base_url_routes_clients_to_stand_in():
+    server, url = _serve()
+    saved = os.environ.get('COINALYZE_BASE_URL')
+    os.environ['COINALYZE_BASE_URL'] = url + '/'
+    tmp = tempfile.TemporaryDirectory()
+    limiter = AdaptiveRateLimiter(os.path.join(tmp.name, 'rate_limit.db'), limit=100000)
+    try:
+        from data_fetcher import CoinalyzeClient, RequestCoalescer
+        from coinalyze_batch_client import CoinalyzeBatchClient
+
+        assert coinalyze_http.base_url() == url
+        client = CoinalyzeClient('test-key', RequestCoalescer())
+        client.rate_limiter = limiter
+        assert client._request('predicted-funding-rate', {'symbols': 'BTCUSDT_PERP.A'}, 'Funding')[0]['pf'] == 0.0001
+
+        batch = CoinalyzeBatchClient('test-key')
+        assert batch.base_url == url
+        batch.rate_limiter = limiter
+        assert batch._make_request_with_retry(f"{batch.base_url}/predicted-funding-rate", {}).status_code == 200
+        assert [path for path, _ in _KeepAlive.seen] == ['/v1/predicted-funding-rate'] * 2
+        assert get_session().summary()['endpoints']['predicted-funding-rate']['requests'] >= 2
+    finally:
+        if saved is None:
+            del os.environ['COINALYZE_BASE_URL']
+        else:
+            os.environ['COINALYZE_BASE_URL'] = saved
+        server.shutdown()
+        tmp.cleanup()
+
+
+def test_new_session_after_fork():
+    session = get_session()
+    assert get_session() is session
+    coinalyze_http._session_pid = -1  # as seen from a forked child
+    assert get_session() is not session
+
+
+if __name__ == "__main__":
+    test_connections_reused_and_gzip_decoded()
+    test_base_url_routes_clients_to_stand_in()
+    test_new_session_after_fork()
+    print("✓ Coinalyze HTTP tests passed")
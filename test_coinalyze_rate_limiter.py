@@ -0,0 +1,177 @@
+"""
+Coinalyze Rate Limiter Test - Verify the shared budget against a simulated
+API that enforces its own quota.
+
+Checks:
+1. Budget math: header remaining/reset, pacing, Retry-After, window fallback
+2. A limiter unaware of the real quota paces to the server's headers (no 429)
+3. Two processes sharing the budget row stay under the quota; separate
+   budgets do not
+4. The batch client waits out a 429's Retry-After and retries
+"""
+
+import os
+import time
+import tempfile
+import threading
+import multiprocessing
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+from coinalyze_rate_limiter import AdaptiveRateLimiter, parse_reset
+
+
+class _Response:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class _QuotaServer(BaseHTTPRequestHandler):
+    """Fixed-window quota like the real API: `limit` requests per `window` seconds."""
+    protocol_version = 'HTTP/1.1'
+    limit = 5
+    window = 1.0
+    send_headers = True
+    lock = threading.Lock()
+    count = 0
+    reset_at = 0.0
+    served = 0
+    throttled = 0
+
+    def do_GET(self):
+        cls = _QuotaServer
+        with cls.lock:
+            now = time.time()
+            if now >= cls.reset_at:
+                cls.count, cls.reset_at = 0, now + cls.window
+            allowed = cls.count < cls.limit
+            if allowed:
+                cls.count += 1
+                cls.served += 1
+            else:
+                cls.throttled += 1
+            remaining, reset_at = cls.limit - cls.count, cls.reset_at
+        body = b'[]' if allowed else b'{"message":"Too Many Requests"}'
+        self.send_response(200 if allowed else 429)
+        if cls.send_headers:
+            self.send_header('X-RateLimit-Remaining', str(remaining))
+            self.send_header('X-RateLimit-Reset', f"{reset_at:.3f}")
+        if not allowed:
+            self.send_header('Retry-After', f"{max(0.0, reset_at - now):.3f}")
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(limit, window, send_headers=True):
+    _QuotaServer.limit, _QuotaServer.window, _QuotaServer.send_headers = limit, window, send_headers
+    _QuotaServer.count = _QuotaServer.served = _QuotaServer.throttled = 0
+    _QuotaServer.reset_at = 0.0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _QuotaServer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def _worker(args):
+    db_path, url, n, limit, window = args
+    limiter = AdaptiveRateLimiter(db_path, limit=limit, window=window)
+    statuses = []
+    with requests.Session() as session:
+        for _ in range(n):
+            limiter.acquire()
+            response = session.get(f"{url}/predicted-funding-rate", timeout=5)
+            limiter.observe(response)
+            statuses.append(response.status_code)
+    return statuses
+
+
+def test_budget_math():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, 'rl.db')
+        limiter = AdaptiveRateLimiter(db, limit=4, window=60.0)
+        now = 1_000_000.0
+
+        # No headers: the local window paces 4 requests over 60s
+        assert limiter.try_acquire(now) == 0
+        assert limiter.try_acquire(now + 1) == 14.0
+
+        # Headers override the estimate: 2 left, reset in 10s -> one request per 5s
+        limiter.observe(_Response(200, {'X-RateLimit-Remaining': '2', 'X-RateLimit-Reset': '10'}), now=now)
+        assert limiter.try_acquire(now + 1) == 4.0
+        assert limiter.try_acquire(now + 5) == 0
+        assert limiter.try_acquire(now + 6) == 1.5  # 2 left at +5 with 5s to go
+        limiter.observe(_Response(200, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '10'}), now=now + 6)
+        assert limiter.try_acquire(now + 7) == 9.0  # budget spent until the reset
+
+        # A 429 blocks every limiter on the same database until Retry-After
+        other = AdaptiveRateLimiter(db, limit=4, window=60.0)
+        limiter.observe(_Response(429, {'Retry-After': '30'}), now=now + 20)
+        assert other.try_acquire(now + 25) == 25.0
+        assert other.try_acquire(now + 50) == 0
+        assert limiter.stats['throttled'] == 1
+
+        assert parse_reset(1_700_000_000_000, now) == 1_700_000_000.0
+        assert parse_reset(1_700_000_000, now) == 1_700_000_000
+        assert parse_reset(12.5, now) == now + 12.5
+
+
+def test_paces_to_server_headers():
+    server, url = _serve(limit=4, window=1.0)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Believes it may send 1000/min; the headers say 4/s
+            statuses = _worker((os.path.join(tmp, 'rl.db'), url, 10, 1000, 60.0))
+        assert statuses == [200] * 10 and _QuotaServer.throttled == 0
+    finally:
+        server.shutdown()
+
+
+def test_budget_shared_across_processes():
+    server, url = _serve(limit=6, window=1.0, send_headers=False)
+    context = multiprocessing.get_context('fork')
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            shared = os.path.join(tmp, 'shared.db')
+            with context.Pool(2) as pool:
+                results = pool.map(_worker, [(shared, url, 6, 5, 1.0)] * 2)
+            assert sum(results, []) == [200] * 12 and _QuotaServer.throttled == 0
+
+            # Each process on its own budget: together they overrun the quota
+            with context.Pool(2) as pool:
+                pool.map(_worker, [(os.path.join(tmp, f'own{i}.db'), url, 6, 5, 1.0) for i in range(2)])
+            assert _QuotaServer.throttled > 0
+    finally:
+        server.shutdown()
+
+
+def test_batch_client_waits_out_retry_after():
+    from coinalyze_batch_client import CoinalyzeBatchClient
+
+    server, url = _serve(limit=2, window=0.5)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            batch = CoinalyzeBatchClient('test-key')
+            # Unaware of the quota and ignoring headers, so the third request gets a 429
+            batch.rate_limiter = AdaptiveRateLimiter(os.path.join(tmp, 'rl.db'), limit=1000, window=60.0)
+            batch.rate_limiter.observe = lambda response, now=None, original=batch.rate_limiter.observe: \
+                original(_Response(response.status_code, {k: v for k, v in response.headers.items()
+                                                          if k == 'Retry-After'}), now)
+            for _ in range(3):
+                assert batch._make_request_with_retry(f"{url}/predicted-funding-rate", {}).status_code == 200
+            assert _QuotaServer.throttled == 1 and batch.rate_limiter.stats['throttled'] == 1
+            assert batch.rate_limiter.stats['waits'] >= 1
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_budget_math()
+    test_paces_to_server_headers()
+    test_budget_shared_across_processes()
+    test_batch_client_waits_out_retry_after()
+    print("✓ Coinalyze rate limiter tests passed")
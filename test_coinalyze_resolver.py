@@ -0,0 +1,136 @@
+"""
+Coinalyze Resolver Test - Verify the compiled symbol index against a local
+stand-in of the future-markets endpoint.
+
+Checks:
+1. fetch_symbols compiles exchange-specific and aggregated symbols
+2. A new resolver loads the compact index without calling the API
+3. resolve() is memoized per (symbol, exchange) until the index changes
+4. The Node resolver's cache file is compiled when no index exists
+"""
+
+import os
+import json
+import time
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from coinalyze_resolver import CoinalyzeResolver
+
+MARKETS = [
+    {'symbol': 'BTCUSDT_PERP.A', 'exchange': 'A', 'base_asset': 'BTC', 'quote_asset': 'USDT'},
+    {'symbol': 'BTCUSDT.6', 'exchange': '6', 'base_asset': 'BTC', 'quote_asset': 'USDT'},
+    {'symbol': 'BTCUSDT_PERP.4', 'exchange': '4', 'base_asset': 'BTC', 'quote_asset': 'USDT'},
+    {'symbol': 'XBTUSDTM.8', 'exchange': '8', 'base_asset': 'XBT', 'quote_asset': 'USDT'},
+    {'symbol': 'MAVUSDT_PERP.A', 'exchange': 'A', 'base_asset': 'MAV', 'quote_asset': 'USDT'},
+    {'symbol': 'ODDUSDT.Z', 'exchange': 'Z', 'base_asset': 'ODD', 'quote_asset': 'USDT'},
+    {'symbol': '', 'exchange': '6', 'base_asset': 'BAD', 'quote_asset': 'USDT'},
+]
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get('api_key')))
+        body = json.dumps(MARKETS).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def test_fetch_compile_and_reload():
+    server, base_url = _serve()
+    _StandIn.requests_seen.clear()
+    saved_key = os.environ.get('COINALYZE_API_KEY')
+    os.environ['COINALYZE_API_KEY'] = 'test-key'
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            index_file = os.path.join(tmp, 'index.json')
+            resolver = CoinalyzeResolver(index_file, os.path.join(tmp, 'legacy.json'), base_url)
+            assert resolver.ensure_initialized()
+            assert _StandIn.requests_seen == [('/v1/future-markets', 'test-key')]
+            assert resolver.index['BTCUSDT'] == {'*': 'BTCUSDT_PERP.A', 'MEXC': 'BTCUSDT.6',
+                                                 'BINANCE': 'BTCUSDT_PERP.4'}
+            assert 'ODDUSDT' in resolver.index and resolver.index['ODDUSDT'] == {}
+
+            assert resolver.resolve('BTCUSDT', 'mexc') == ('BTCUSDT.6', 'resolved')
+            assert resolver.resolve('BTCUSDT', 'HYPERLIQUID') == ('BTCUSDT_PERP.A', 'aggregated')
+            assert resolver.resolve('XBTUSDTM', 'KUCOIN') == ('XBTUSDTM.8', 'resolved')
+            assert resolver.resolve('ODDUSDT', 'MEXC') == (None, 'neutral')
+            assert resolver.resolve('NOPEUSDT', 'MEXC') == (None, 'neutral')
+
+            # Compact on disk, loaded by the next run without an API call
+            with open(index_file) as f:
+                raw = f.read()
+            assert '\n' not in raw and json.loads(raw)['version'] == 1
+            again = CoinalyzeResolver(index_file, os.path.join(tmp, 'legacy.json'), base_url)
+            assert again.ensure_initialized() and len(_StandIn.requests_seen) == 1
+            assert again.index == resolver.index
+
+            batches = again.get_batch_symbols([('BTCUSDT', 'MEXC'), ('MAVUSDT', 'BYBIT'), ('NOPEUSDT', 'MEXC')])
+            assert batches[0]['symbols'] == ['BTCUSDT.6', 'MAVUSDT_PERP.A']
+    finally:
+        server.shutdown()
+        if saved_key is None:
+            del os.environ['COINALYZE_API_KEY']
+        else:
+            os.environ['COINALYZE_API_KEY'] = saved_key
+
+
+def test_resolution_memoized_per_run():
+    with tempfile.TemporaryDirectory() as tmp:
+        resolver = CoinalyzeResolver(os.path.join(tmp, 'index.json'), os.path.join(tmp, 'legacy.json'))
+        resolver._set_index(CoinalyzeResolver.compile_index(MARKETS), time.time())
+        resolver.resolve_batch([('BTCUSDT', 'MEXC'), ('BTCUSDT', 'OKX'), ('BTCUSDT', 'MEXC')])
+        assert len(resolver._memo) == 2
+
+        # Lookups after the first never touch the index
+        resolver.index = {}
+        assert resolver.resolve('BTCUSDT', 'OKX') == ('BTCUSDT_PERP.A', 'aggregated')
+        # Rebuilding the index drops the memo
+        resolver._set_index({}, time.time())
+        assert resolver.resolve('BTCUSDT', 'OKX') == (None, 'neutral')
+
+
+def test_legacy_cache_compiled():
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = os.path.join(tmp, 'coinalyze_symbols.json')
+        with open(legacy, 'w') as f:
+            json.dump({
+                'timestamp': time.time() * 1000,  # Node writes milliseconds
+                'symbol_map': {},
+                'aggregated_symbols': {'ETHUSDT': 'ETHUSDT_PERP.A'},
+                'exchange_symbols': {'ETHUSDT': {'.5': 'ETHUSDT.5', 'A': 'ETHUSDT_PERP.A'}}
+            }, f)
+        index_file = os.path.join(tmp, 'index.json')
+        resolver = CoinalyzeResolver(index_file, legacy, 'http://127.0.0.1:9')
+        assert resolver.resolve('ETHUSDT', 'BYBIT') == ('ETHUSDT.5', 'resolved')
+        assert resolver.resolve('ETHUSDT', 'MEXC') == ('ETHUSDT_PERP.A', 'aggregated')
+        assert os.path.exists(index_file)
+
+        # Expired caches are ignored
+        with open(legacy, 'w') as f:
+            json.dump({'timestamp': time.time() - 2 * CoinalyzeResolver.CACHE_DURATION,
+                       'aggregated_symbols': {'ETHUSDT': 'ETHUSDT_PERP.A'}, 'exchange_symbols': {}}, f)
+        os.remove(index_file)
+        assert CoinalyzeResolver(index_file, legacy).index == {}
+
+
+if __name__ == "__main__":
+    test_fetch_compile_and_reload()
+    test_resolution_memoized_per_run()
+    test_legacy_cache_compiled()
+    print("✓ Coinalyze resolver tests passed")
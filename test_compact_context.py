@@ -0,0 +1,141 @@
+"""
+Compact Context Test - Verify compact storage keeps what strategies read.
+"""
+
+import numpy as np
+import pandas as pd
+
+from shared_context import SharedContext, FeatureFactory, create_default_config
+from trigger_table import wilder_averages
+from strategies_refactored import (
+    QuantProBreakoutRefactored, QuantProBreakoutV2Refactored, QuantProLegacyRefactored
+)
+from compact_context import compact_context, required_lookback, shared_context_nbytes
+from live_scanner import LiveScanner, CandleEvent, TIMEFRAME_MS
+
+
+def _frame(seed, n, step):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({
+        'timestamp': np.arange(n) * step,
+        'open': np.concatenate([[close[0]], close[:-1]]),
+        'high': close * 1.01,
+        'low': close * 0.99,
+        'close': close,
+        'volume': rng.uniform(100, 1000, n),
+    })
+
+
+def _context(config, n=1000):
+    ltf = _frame(6, n, TIMEFRAME_MS['ltf'])
+    htf = _frame(7, n, TIMEFRAME_MS['htf'])
+    context = SharedContext(symbol='TESTUSDT', canonical_symbol='TEST', exchange='MEXC',
+                            ltf_data=ltf, htf_data=htf, config=config)
+    for df, indicators in ((ltf, context.ltf_indicators), (htf, context.htf_indicators)):
+        avg_gain, avg_loss = wilder_averages(df['close'].to_numpy(), 14)
+        indicators['rsi'] = pd.Series(100 - 100 / (1 + avg_gain / avg_loss))
+        indicators['atr'] = (df['high'] - df['low']).ewm(alpha=1 / 14, adjust=False).mean()
+        indicators['obv'] = (np.sign(df['close'].diff().fillna(0)) * df['volume']).cumsum()
+    FeatureFactory(config).detect_trendlines(context)
+    return context
+
+
+def test_required_lookback():
+    config = create_default_config()
+    strategies = [QuantProLegacyRefactored({}), QuantProBreakoutRefactored({}), QuantProBreakoutV2Refactored({})]
+    window = required_lookback(strategies, config)
+    assert window == {'ltf': 150, 'htf': 150}
+
+    class Undeclared:
+        name = 'Undeclared'
+
+    assert required_lookback(strategies + [Undeclared()], config) == {'ltf': 0, 'htf': 0}
+
+
+def test_compact_round_trip():
+    config = create_default_config()
+    context = _context(config)
+    compact = compact_context(context, {'ltf': 200, 'htf': 150})
+    assert compact.nbytes * 4 < shared_context_nbytes(context)
+    assert not hasattr(compact, '__dict__') and not hasattr(compact.ltf, '__dict__')
+    assert compact.htf.indicators['rsi'].dtype == np.float32
+    assert compact.htf.timestamp.dtype == np.int64
+
+    view = compact.to_shared_context()
+    assert len(view.ltf_data) == 200 and len(view.htf_data) == 150
+    assert view.htf_data['close'].iloc[-1] == context.htf_data['close'].iloc[-1]
+    assert np.allclose(view.htf_indicators['rsi'].to_numpy(), context.htf_indicators['rsi'].iloc[-150:].to_numpy(),
+                       rtol=1e-6)
+    # Trendlines are re-based onto the window: same projection at the last row
+    full, window = context.htf_indicators['rsi_trendlines'], view.htf_indicators['rsi_trendlines']
+    assert full and set(window) == set(full)
+    for key, line in full.items():
+        shifted = window[key]
+        assert shifted['pivot_1']['index'] == line['pivot_1']['index'] - (len(context.htf_data) - 150)
+        assert np.isclose(shifted['slope'] * 149 + shifted['intercept'],
+                          line['slope'] * (len(context.htf_data) - 1) + line['intercept'])
+    assert full['resistance']['pivot_1']['index'] > 150  # original left untouched
+
+
+def test_live_scanner_compact_mode():
+    config = create_default_config()
+    config['enabled_features'] = ['rsi', 'atr', 'obv']
+    strategies = [QuantProBreakoutRefactored({}), QuantProBreakoutV2Refactored({})]
+    scanner = LiveScanner(strategies, FeatureFactory(config), '/tmp/unused.json', emit=False, compact=True)
+    context = _context(config)
+    state = scanner.attach(context, {'mcap': 0})
+    assert state.context is None and state.compact is not None
+    assert len(state.compact.htf) == 150
+
+    last = context.htf_data.iloc[-1]
+    candle = {'timestamp': int(last['timestamp']) + TIMEFRAME_MS['htf'], 'open': last['close'],
+              'high': last['close'] * 1.01, 'low': last['close'] * 0.99, 'close': last['close'], 'volume': 500.0}
+    results = scanner.on_event(CandleEvent('MEXC', 'TESTUSDT', 'htf', candle))
+    assert {r['strategy_name'] for r in results} == {'Breakout', 'BreakoutV2'}
+    assert state.context is None and len(state.compact.htf) == 150
+    assert state.compact.htf.timestamp[-1] == candle['timestamp']
+    assert scanner.on_event(CandleEvent('MEXC', 'TESTUSDT', 'htf', candle)) == []
+
+
+def _projections(result, htf_rows):
+    """RSI of every visual (HTF) trendline at the last HTF row, plus V2's rsi_vs_trendline."""
+    observability = result['observability']
+    last = htf_rows - 1
+    lines = {key: line['slope'] * last + line['intercept'] for key, line in observability['rsi_visuals'].items()}
+    inputs = observability.get('core_strategy', {}).get('components', {}).get('breakout_geometry', {}).get('inputs', {})
+    return lines, inputs.get('rsi_vs_trendline')
+
+
+def test_ltf_event_matches_full_context():
+    config = create_default_config()
+    config['enabled_features'] = ['rsi', 'atr', 'obv']
+    strategies = [QuantProBreakoutRefactored({}), QuantProBreakoutV2Refactored({})]
+    scanners = [LiveScanner(strategies, FeatureFactory(config), '/tmp/unused.json', emit=False, compact=compact)
+                for compact in (False, True)]
+    for scanner in scanners:
+        scanner.attach(_context(config), {'mcap': 0})
+
+    ltf = _context(config).ltf_data
+    last = ltf.iloc[-1]
+    candle = {'timestamp': int(last['timestamp']) + TIMEFRAME_MS['ltf'], 'open': last['close'],
+              'high': last['close'] * 1.01, 'low': last['close'] * 0.99, 'close': last['close'], 'volume': 500.0}
+    full, compact = (scanner.on_event(CandleEvent('MEXC', 'TESTUSDT', 'ltf', candle)) for scanner in scanners)
+    assert [r['strategy_name'] for r in full] == [r['strategy_name'] for r in compact] == ['BreakoutV2']
+
+    full, compact = full[0], compact[0]
+    assert full['action'] == compact['action']
+    full_lines, full_gap = _projections(full, len(scanners[0].states[('MEXC', 'TESTUSDT')].context.htf_data))
+    compact_lines, compact_gap = _projections(compact, len(scanners[1].states[('MEXC', 'TESTUSDT')].compact.htf))
+    assert full_lines and set(full_lines) == set(compact_lines)
+    for key in full_lines:
+        assert abs(full_lines[key] - compact_lines[key]) < 1e-3, key
+    assert full_gap is not None and abs(full_gap - compact_gap) < 1e-3
+
+
+if __name__ == "__main__":
+    test_required_lookback()
+    test_compact_round_trip()
+    test_live_scanner_compact_mode()
+    test_ltf_event_matches_full_context()
+    print("✓ Compact context tests passed")
@@ -0,0 +1,177 @@
+"""
+Feed Delta Test - Verify delta publishing and consumer catch-up reproduce the full feed.
+
+Also reads the feed back through the server's read path (server/feedReader.js)
+when node is installed.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from feed_delta import (
+    FeedDeltaWriter, FeedDeltaReader, encode_signals, build_feed_bytes, signal_key
+)
+
+
+def _signal(base, strategy='Breakout', exchange='MEXC', score=50.0):
+    return {
+        'symbol': f'{base}USDT',
+        'canonical_symbol': base,
+        'strategy_name': strategy,
+        'exchange': exchange,
+        'score': score,
+    }
+
+
+def _as_map(signals):
+    return {signal_key(s): s for s in signals}
+
+
+def test_delta_contents_and_sequence():
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = FeedDeltaWriter(tmp, snapshot_every=10)
+        first = writer.publish([_signal('BTC'), _signal('ETH')], 1)
+        assert first == {'seq': 1, 'added': 2, 'changed': 0, 'removed': 0, 'snapshot': True}
+
+        second = writer.publish([_signal('BTC', score=70.0), _signal('SOL')], 2)
+        assert (second['seq'], second['added'], second['changed'], second['removed']) == (2, 1, 1, 1)
+        assert second['snapshot'] is False
+
+        with open(os.path.join(tmp, 'delta_00000002.json')) as f:
+            delta = json.load(f)
+        assert delta['prev_seq'] == 1
+        assert [s['canonical_symbol'] for s in delta['added']] == ['SOL']
+        assert delta['changed'][0]['score'] == 70.0
+        assert delta['removed'] == ['ETH|Breakout|MEXC']
+
+
+def test_reader_catches_up_across_pruned_deltas():
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = FeedDeltaWriter(tmp, snapshot_every=3)
+        reader = FeedDeltaReader(tmp)
+        stale = FeedDeltaReader(tmp)
+
+        signals = []
+        for version in range(1, 12):
+            signals = [_signal(f'C{i}', score=float(version * i % 7)) for i in range(version % 5 + 2)]
+            signals.append(_signal('C0', strategy='Legacy', exchange='KUCOIN'))
+            writer.publish(signals, version)
+            if version == 1:
+                stale.catch_up()
+            reader.catch_up()
+            assert reader.seq == version
+            assert _as_map(reader.feed()['signals']) == _as_map(signals)
+
+        # Deltas before the previous snapshot are gone; stale reader reloads a snapshot
+        assert not os.path.exists(os.path.join(tmp, 'delta_00000002.json'))
+        seq, _ = stale.catch_up()
+        assert seq == 11
+        assert stale.feed()['last_updated'] == 11
+        assert _as_map(stale.feed()['signals']) == _as_map(signals)
+
+
+FEED_READER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server', 'feedReader.js')
+
+
+def server_feed(data_dir, reads=1):
+    """getMasterFeed() results of one server feed reader over `data_dir` (None without node)."""
+    if shutil.which('node') is None:
+        return None
+    script = (f"import {{ createFeedReader }} from {json.dumps(FEED_READER)};\n"
+              f"const reader = createFeedReader({json.dumps(data_dir)});\n"
+              f"const feeds = [];\n"
+              f"for (let i = 0; i < {reads}; i++) feeds.push(await reader.getMasterFeed());\n"
+              f"console.log(JSON.stringify(feeds));")
+    proc = subprocess.run(['node', '--input-type=module', '-e', script], capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    return json.loads(proc.stdout)
+
+
+def test_replayed_feed_keeps_feed_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        delta_dir = os.path.join(tmp, 'feed_deltas')
+        writer = FeedDeltaWriter(delta_dir, snapshot_every=10)
+        reader = FeedDeltaReader(delta_dir)
+        writer.publish([_signal('BTC'), _signal('ETH')], 1)
+        reader.catch_up()
+
+        # SOL lands between BTC and ETH, then ETH moves to the front
+        versions = [[_signal('BTC'), _signal('SOL'), _signal('ETH')],
+                    [_signal('ETH'), _signal('BTC', score=60.0), _signal('SOL')]]
+        for version, signals in enumerate(versions, start=2):
+            writer.publish(signals, version)
+            reader.catch_up()
+            assert [s['canonical_symbol'] for s in reader.feed()['signals']] == \
+                [s['canonical_symbol'] for s in signals]
+
+        # Content-only changes do not repeat the order
+        writer.publish([_signal('ETH'), _signal('BTC', score=70.0), _signal('SOL')], 4)
+        with open(os.path.join(delta_dir, 'delta_00000004.json')) as f:
+            assert 'order' not in json.load(f)
+        with open(os.path.join(delta_dir, 'delta_00000003.json')) as f:
+            assert json.load(f)['order'] == ['ETH|Breakout|MEXC', 'BTC|Breakout|MEXC', 'SOL|Breakout|MEXC']
+
+        # Live-mode partial updates: a new key records the full order
+        writer.publish_changes([_signal('ADA')], 5, lambda: [_signal('ADA'), _signal('ETH'),
+                                                             _signal('BTC', score=70.0), _signal('SOL')])
+        reader.catch_up()
+        assert [s['canonical_symbol'] for s in reader.feed()['signals']] == ['ADA', 'ETH', 'BTC', 'SOL']
+
+        feeds = server_feed(tmp)
+        if feeds is not None:
+            assert [s['canonical_symbol'] for s in feeds[0]['signals']] == ['ADA', 'ETH', 'BTC', 'SOL']
+            assert feeds[0]['last_updated'] == 5
+
+
+def _scan(data_dir, signals, publish_delta):
+    from market_scanner_refactored import publish_scan_results
+    time.sleep(0.005)  # distinct last_updated per scan
+    cwd = os.getcwd()
+    os.makedirs(os.path.join(data_dir, 'data'), exist_ok=True)
+    os.chdir(data_dir)  # scan_status.json goes to ./data
+    try:
+        publish_scan_results(signals, None, {'errors': []}, os.path.join(data_dir, 'master_feed.json'),
+                             publish_delta=publish_delta)
+    finally:
+        os.chdir(cwd)
+
+
+def test_no_delta_scan_replaces_replayed_feed():
+    with tempfile.TemporaryDirectory() as tmp:
+        _scan(tmp, [_signal('BTC'), _signal('ETH')], True)
+        # --no-delta scan: only master_feed.json changes, index.json stays behind
+        _scan(tmp, [_signal('SOL')], False)
+        feeds = server_feed(tmp)
+        if feeds is None:
+            return
+        with open(os.path.join(tmp, 'master_feed.json')) as f:
+            master = json.load(f)
+        assert [s['canonical_symbol'] for s in feeds[0]['signals']] == ['SOL']
+        assert feeds[0]['last_updated'] == master['last_updated']
+
+        # The next delta scan is served from the deltas again
+        _scan(tmp, [_signal('ADA'), _signal('BTC')], True)
+        feeds = server_feed(tmp)
+        with open(os.path.join(tmp, 'feed_deltas', 'index.json')) as f:
+            assert feeds[0]['last_updated'] == json.load(f)['last_updated']
+        assert [s['canonical_symbol'] for s in feeds[0]['signals']] == ['ADA', 'BTC']
+
+
+def test_feed_bytes_match_single_encode():
+    signals = [_signal('BTC'), _signal('ETH', score=float('nan'))]
+    payload = build_feed_bytes(5, encode_signals(signals))
+    decoded = json.loads(payload)
+    assert decoded['last_updated'] == 5
+    assert decoded['signals'][1]['score'] == 0.0
+
+
+if __name__ == "__main__":
+    test_delta_contents_and_sequence()
+    test_reader_catches_up_across_pruned_deltas()
+    test_replayed_feed_keeps_feed_order()
+    test_no_delta_scan_replaces_replayed_feed()
+    test_feed_bytes_match_single_encode()
+    print("✓ Feed delta tests passed")
@@ -0,0 +1,128 @@
+"""
+History Store Test - Verify signal recording, indexed queries and retention.
+
+Checks:
+1. Consecutive-scan streaks above a score (a missing or low scan breaks the streak)
+   and recent best scores
+2. Last N signals per symbol and outcome tracking
+3. Retention compaction keeps recent rows, and scans run it at most once a day
+4. Legacy history.json / trade_history.json import
+"""
+
+import json
+import os
+import tempfile
+
+from history_store import HistoryStore, DAY_MS
+from market_scanner_refactored import publish_scan_results
+
+
+def _signal(symbol, score, strategy='BreakoutV2', action='WAIT'):
+    return {'canonical_symbol': symbol, 'symbol': f"{symbol}USDT", 'exchange': 'MEXC',
+            'strategy_name': strategy, 'action': action, 'score': score, 'entry': 1.0,
+            'stop_loss': float('nan'), 'take_profit': 2.0, 'rr': 2.0, 'calculated_at': 5}
+
+
+def test_streaks_and_last_signals():
+    with tempfile.TemporaryDirectory() as tmp, HistoryStore(os.path.join(tmp, 'history.db')) as store:
+        scans = [
+            [_signal('BTC', 60), _signal('ETH', 70), _signal('SOL', 90)],
+            [_signal('BTC', 65), _signal('ETH', 40), _signal('SOL', 95)],
+            [_signal('BTC', 70), _signal('ETH', 75)],                       # SOL missing
+            [_signal('BTC', 80), _signal('ETH', 80), _signal('SOL', 99)],
+        ]
+        for i, signals in enumerate(scans):
+            store.record_scan(signals, scan_ts=1000 + i)
+
+        streaks = store.consecutive_above(50)
+        assert [(s['canonical_symbol'], s['consecutive']) for s in streaks] == [('BTC', 4), ('ETH', 2), ('SOL', 1)]
+        assert streaks[0]['score'] == 80 and streaks[0]['since'] == 1000
+        assert [s['canonical_symbol'] for s in store.consecutive_above(50, min_scans=3)] == ['BTC']
+        assert store.consecutive_above(50, strategy='Legacy') == []
+        assert store.recent_scores(2) == {'BTC': 80, 'ETH': 80, 'SOL': 99}
+        assert store.recent_scores(4)['SOL'] == 99 and store.recent_scores(1)['ETH'] == 80
+
+        # Re-recording a scan replaces it
+        store.record_scan(scans[3], scan_ts=1003)
+        last = store.last_signals('BTC', n=2)
+        assert [s['score'] for s in last] == [80, 70]
+        assert last[0]['stop_loss'] is None  # NaN stored as NULL
+
+        store.record_scan([_signal('BTC', 85, action='LONG')], scan_ts=1004)
+        open_signals = store.open_signals()
+        assert [s['canonical_symbol'] for s in open_signals] == ['BTC']
+        assert store.record_outcome(open_signals[0]['id'], 'WIN', exit_price=2.0, exit_time=1100, pnl=100.0)
+        assert store.open_signals() == []
+        assert store.last_signals('BTC', n=1)[0]['outcome'] == 'WIN'
+
+
+def test_compact_retention():
+    with tempfile.TemporaryDirectory() as tmp, HistoryStore(os.path.join(tmp, 'history.db')) as store:
+        now = 400 * DAY_MS
+        store.record_scan([_signal('BTC', 10), _signal('ETH', 80, action='LONG')], scan_ts=now - 200 * DAY_MS)
+        store.record_scan([_signal('BTC', 10), _signal('ETH', 80, action='LONG')], scan_ts=now - 10 * DAY_MS)
+        store.record_scan([_signal('BTC', 10)], scan_ts=now - DAY_MS)
+
+        result = store.compact(wait_days=7, keep_days=180, now_ms=now)
+        assert result == {'wait_rows': 2, 'expired_rows': 1, 'scans': 1}
+        assert [s['scan_ts'] for s in store.last_signals('ETH', n=5)] == [now - 10 * DAY_MS]
+        assert [s['scan_ts'] for s in store.last_signals('BTC', n=5)] == [now - DAY_MS]
+
+
+def test_compact_runs_once_a_day():
+    with tempfile.TemporaryDirectory() as tmp, HistoryStore(os.path.join(tmp, 'history.db')) as store:
+        now = 400 * DAY_MS
+        store.record_scan([_signal('BTC', 10)], scan_ts=now - 10 * DAY_MS)
+        assert store.compact_if_due(now_ms=now) == {'wait_rows': 1, 'expired_rows': 0, 'scans': 0}
+        store.record_scan([_signal('BTC', 10)], scan_ts=now - 9 * DAY_MS)
+        assert store.compact_if_due(now_ms=now + DAY_MS // 2) is None
+        assert len(store.last_signals('BTC')) == 1
+        assert store.compact_if_due(now_ms=now + DAY_MS)['wait_rows'] == 1
+
+
+def test_scan_applies_retention():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, 'history.db')
+        with HistoryStore(db) as store:
+            store.record_scan([_signal('OLD', 10)], scan_ts=1000)
+        cwd = os.getcwd()
+        os.makedirs(os.path.join(tmp, 'data'))
+        os.chdir(tmp)
+        try:
+            publish_scan_results([_signal('BTC', 10)], None, {}, os.path.join(tmp, 'master_feed.json'),
+                                 publish_delta=False, history_db=db)
+            with HistoryStore(db) as store:
+                assert store.last_signals('OLD') == [] and len(store.last_signals('BTC')) == 1
+                # Compacted moments ago: the next scan does not compact again
+                assert store.compact_if_due() is None
+        finally:
+            os.chdir(cwd)
+
+
+def test_import_legacy_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        history_file = os.path.join(tmp, 'history.json')
+        trades_file = os.path.join(tmp, 'trade_history.json')
+        with open(history_file, 'w') as f:
+            json.dump({'LITUSDT': {'score': 55, 'timestamp': 1000, 'consecutiveScans': 8},
+                       'ARBUSDT': {'score': 20, 'timestamp': 1000, 'consecutiveScans': 1}}, f)
+        with open(trades_file, 'w') as f:
+            json.dump([{'symbol': 'SOLUSDT', 'exchange': 'MEXC', 'strategy': 'Breakout', 'signalTimestamp': 900,
+                        'status': 'CLOSED', 'result': 'LOSS', 'side': 'LONG', 'entryPrice': 10, 'tp': 12,
+                        'sl': 9, 'score': 70, 'exitPrice': 9, 'pnl': -10.0}], f)
+
+        with HistoryStore(os.path.join(tmp, 'history.db')) as store:
+            assert store.import_legacy(history_file, trades_file) == {'history': 2, 'trades': 1}
+            assert [s['canonical_symbol'] for s in store.consecutive_above(50)] == ['LITUSDT']
+            trade = store.last_signals('SOLUSDT')[0]
+            assert (trade['action'], trade['outcome'], trade['pnl']) == ('LONG', 'LOSS', -10.0)
+            assert store.scan_times() == [1000]
+
+
+if __name__ == "__main__":
+    test_streaks_and_last_signals()
+    test_compact_retention()
+    test_compact_runs_once_a_day()
+    test_scan_applies_retention()
+    test_import_legacy_files()
+    print("✓ History store tests passed")
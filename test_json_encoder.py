@@ -0,0 +1,76 @@
+"""
+JSON Encoder Test - Verify single-pass encoding matches the old clean_nans output.
+"""
+
+import json
+import math
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from json_encoder import dumps, dumps_bytes
+from strategies_refactored import clean_nans
+from market_scanner_refactored import atomic_save_json
+
+
+def _signal(i, with_nan=True):
+    return {
+        'symbol': f'SYM{i}USDT',
+        'score': np.float64(42.5),
+        'rr': float('nan') if with_nan else 2.0,
+        'candle_index': np.int64(999),
+        'valid': np.bool_(True),
+        'details': {
+            'obv_slope': np.float32(1.5),
+            'oi_z_score': float('inf') if with_nan else 0.5,
+            'hist': [np.float64('nan') if with_nan else 1.0, 1, np.int32(2)],
+        },
+        'tags': ['RETEST'],
+    }
+
+
+def test_matches_clean_nans_pipeline():
+    feed = {'last_updated': 1, 'signals': [_signal(i) for i in range(5)]}
+    expected = json.loads(json.dumps(clean_nans(feed), default=lambda o: bool(o) if isinstance(o, np.bool_) else o))
+    assert json.loads(dumps(feed)) == expected
+    assert 'NaN' not in dumps(feed) and 'Infinity' not in dumps(feed)
+
+
+def test_fast_path_without_non_finite_values():
+    feed = {'signals': [_signal(i, with_nan=False) for i in range(3)]}
+    decoded = json.loads(dumps_bytes(feed))
+    assert decoded['signals'][0]['valid'] is True
+    assert decoded['signals'][0]['details']['hist'] == [1.0, 1, 2]
+
+
+def test_pandas_and_collections():
+    payload = {
+        'series': pd.Series([1.0, np.nan, 3.0]),
+        'array': np.array([1, 2, 3]),
+        'ts': pd.Timestamp('2026-01-01', tz='UTC'),
+        'missing': pd.NaT,
+        'set': {7},
+    }
+    decoded = json.loads(dumps(payload, indent=2))
+    assert decoded['series'] == [1.0, 0.0, 3.0]
+    assert decoded['array'] == [1, 2, 3]
+    assert decoded['ts'] == 1767225600000
+    assert decoded['missing'] is None
+    assert decoded['set'] == [7]
+
+
+def test_atomic_save_returns_written_bytes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'feed.json')
+        payload = atomic_save_json({'signals': [_signal(0)]}, path)
+        with open(path, 'rb') as f:
+            assert f.read() == payload
+        assert not math.isnan(json.loads(payload)['signals'][0]['rr'])
+
+
+if __name__ == "__main__":
+    test_matches_clean_nans_pipeline()
+    test_fast_path_without_non_finite_values()
+    test_pandas_and_collections()
+    test_atomic_save_returns_written_bytes()
+    print("✓ JSON encoder tests passed")
@@ -0,0 +1,176 @@
+"""
+Live Scanner Test - Verify incremental indicators and event-driven re-analysis.
+
+Checks:
+1. IncrementalIndicators match a full recomputation after N appended candles
+2. LTF events only re-run strategies that read the LTF
+3. Duplicate / old candles are ignored
+4. Updated signals are published as feed deltas
+"""
+
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from shared_context import SharedContext, FeatureFactory, create_default_config
+from incremental_indicators import IncrementalIndicators, _rma
+from trigger_table import wilder_averages
+from strategies_refactored import QuantProBreakoutRefactored, QuantProBreakoutV2Refactored
+from feed_delta import FeedDeltaWriter, FeedDeltaReader
+from live_scanner import LiveScanner, CandleEvent, parse_event, TIMEFRAME_MS
+
+
+def _frame(seed, n=400, step=TIMEFRAME_MS['htf']):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    spread = rng.uniform(0.002, 0.02, n)
+    return pd.DataFrame({
+        'timestamp': np.arange(n) * step,
+        'open': np.concatenate([[close[0]], close[:-1]]),
+        'high': close * (1 + spread),
+        'low': close * (1 - spread),
+        'close': close,
+        'volume': rng.uniform(100, 1000, n),
+    })
+
+
+def _reference(df, config):
+    """Full recomputation with the same recursions FeatureFactory converges to."""
+    close, high, low = df['close'], df['high'], df['low']
+    n = config['atr_period']
+    prev_close = close.shift(1).fillna(close.iloc[0])
+    tr = np.maximum.reduce([high - low, (high - prev_close).abs(), (low - prev_close).abs()])
+    up, down = high.diff().fillna(0), -low.diff().fillna(0)
+    plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+    minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+    atr_s, plus_s, minus_s = _rma(tr, n), _rma(plus_dm, n), _rma(minus_dm, n)
+    di_sum = plus_s + minus_s
+    dx = 100 * np.abs(plus_s - minus_s) / np.where(di_sum > 0, di_sum, 1.0)
+    avg_gain, avg_loss = wilder_averages(close.to_numpy(), config['rsi_period'])
+    bb_mid = close.rolling(config['bb_period']).mean()
+    bb_std = close.rolling(config['bb_period']).std(ddof=0)
+    return {
+        'rsi': pd.Series(100 - 100 / (1 + avg_gain / avg_loss)),
+        'ema_fast': close.ewm(span=config['ema_fast'], adjust=False).mean(),
+        'ema_slow': close.ewm(span=config['ema_slow'], adjust=False).mean(),
+        'atr': pd.Series(tr).ewm(alpha=1 / n, adjust=False).mean(),
+        'adx': pd.Series(_rma(dx, n)),
+        'di_plus': pd.Series(100 * plus_s / atr_s),
+        'obv': (np.sign(close.diff().fillna(0)) * df['volume']).cumsum(),
+        'bb_upper': bb_mid + config['bb_std'] * bb_std,
+        'bb_middle': bb_mid,
+        'volume_sma': df['volume'].rolling(config['volume_sma_period']).mean(),
+    }
+
+
+def test_incremental_matches_full_recompute():
+    config = create_default_config()
+    df = _frame(0, n=420)
+    full = _reference(df, config)
+    head = df.iloc[:400]
+    incremental = IncrementalIndicators(config, 'ltf')
+    assert incremental.seed(head, {k: v.iloc[:400] for k, v in full.items()})
+
+    for i in range(400, 420):
+        values = incremental.update(df.iloc[i].to_dict())
+        for key, series in full.items():
+            assert abs(values[key] - series.iloc[i]) < 1e-6 * max(1.0, abs(series.iloc[i])), f"{key} @ {i}"
+
+    # HTF keeps only the HTF feature set
+    htf = IncrementalIndicators(config, 'htf')
+    assert htf.seed(head, {k: v.iloc[:400] for k, v in full.items()})
+    assert set(htf.update(df.iloc[400].to_dict())) == {'rsi', 'ema_fast', 'ema_slow', 'atr', 'adx'}
+
+
+def test_unsupported_features_need_rebuild():
+    config = create_default_config()
+    config['enabled_features'] = config['enabled_features'] + ['macd']
+    df = _frame(1)
+    assert not IncrementalIndicators(config, 'ltf').seed(df, _reference(df, config))
+    # An empty list enables everything (FeatureFactory._is_enabled), MACD included
+    config['enabled_features'] = []
+    assert IncrementalIndicators(config, 'ltf').unsupported
+    assert IncrementalIndicators(config, 'htf').features == list(IncrementalIndicators.HTF_FEATURES)
+
+
+def _context(config):
+    ltf = _frame(2, n=300, step=TIMEFRAME_MS['ltf'])
+    htf = _frame(3, n=300)
+    context = SharedContext(symbol='TESTUSDT', canonical_symbol='TEST', exchange='MEXC',
+                            ltf_data=ltf, htf_data=htf, config=config)
+    for df, indicators in ((ltf, context.ltf_indicators), (htf, context.htf_indicators)):
+        full = _reference(df, config)
+        indicators.update({k: full[k] for k in ('rsi', 'atr', 'obv')})
+    FeatureFactory(config).detect_trendlines(context)
+    return context
+
+
+def test_events_rerun_affected_strategies_and_publish():
+    config = create_default_config()
+    config['enabled_features'] = ['rsi', 'atr', 'obv']
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = FeedDeltaWriter(os.path.join(tmp, 'deltas'))
+        scanner = LiveScanner([QuantProBreakoutRefactored({}), QuantProBreakoutV2Refactored({})],
+                              FeatureFactory(config), os.path.join(tmp, 'master_feed.json'),
+                              delta_writer=writer, emit=False)
+        context = _context(config)
+        scanner.attach(context, {'mcap': 0})
+        assert {s['strategy_name'] for s in scanner.signals()} == {'Breakout', 'BreakoutV2'}
+        writer.publish(scanner.signals(), 1)
+
+        last = context.ltf_data.iloc[-1]
+        candle = {'timestamp': int(last['timestamp']) + TIMEFRAME_MS['ltf'], 'open': last['close'],
+                  'high': last['close'] * 1.01, 'low': last['close'] * 0.99,
+                  'close': last['close'] * 1.005, 'volume': 500.0}
+        event = CandleEvent('MEXC', 'TESTUSDT', 'ltf', candle)
+        results = scanner.on_event(event)
+        assert [r['strategy_name'] for r in results] == ['BreakoutV2']
+        state = scanner.states[('MEXC', 'TESTUSDT')]
+        assert len(state.context.ltf_data) == 300
+        assert len(state.context.ltf_indicators['rsi']) == 300
+        assert state.context.ltf_indicators['rsi'].index[-1] == state.context.ltf_data.index[-1]
+
+        # Same candle again and unknown symbols are ignored
+        assert scanner.on_event(event) == []
+        assert scanner.on_event(CandleEvent('MEXC', 'OTHERUSDT', 'ltf', candle)) == []
+        assert scanner.stats['ignored'] == 2
+
+        last = context.htf_data.iloc[-1]
+        htf_candle = dict(candle, timestamp=int(last['timestamp']) + TIMEFRAME_MS['htf'], close=last['close'] * 1.2,
+                          high=last['close'] * 1.21)
+        results = scanner.on_event(CandleEvent('MEXC', 'TESTUSDT', 'htf', htf_candle))
+        assert {r['strategy_name'] for r in results} == {'Breakout', 'BreakoutV2'}
+
+        for result in results:
+            result['score'] = result.get('score', 0) + 1  # force a content change
+        scanner.publish(results)
+        seq, _ = FeedDeltaReader(os.path.join(tmp, 'deltas')).catch_up()
+        assert seq == 2
+
+        time.sleep(0.005)
+        scanner.write_master_feed()
+        # Same stamp as the newest delta: the dashboard keeps replaying deltas
+        with open(os.path.join(tmp, 'master_feed.json')) as f, \
+                open(os.path.join(tmp, 'deltas', 'index.json')) as g:
+            assert json.load(f)['last_updated'] == json.load(g)['last_updated']
+
+
+def test_parse_event_formats():
+    nested = parse_event({'exchange': 'mexc', 'symbol': 'BTCUSDT', 'timeframe': '4h',
+                          'candle': {'time': 1, 'open': 1, 'high': 2, 'low': 0.5, 'close': 1.5, 'volume': 10}})
+    flat = parse_event({'exchange': 'MEXC', 'symbol': 'BTCUSDT', 'timeframe': '4h',
+                        'timestamp': 1, 'open': 1, 'high': 2, 'low': 0.5, 'close': 1.5, 'volume': 10})
+    assert nested == flat
+    assert nested.timeframe == 'htf' and nested.close_time == 1 + TIMEFRAME_MS['htf']
+
+
+if __name__ == "__main__":
+    test_incremental_matches_full_recompute()
+    test_unsupported_features_need_rebuild()
+    test_events_rerun_affected_strategies_and_publish()
+    test_parse_event_formats()
+    print("✓ Live scanner tests passed")
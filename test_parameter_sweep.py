@@ -0,0 +1,135 @@
+"""
+Parameter Sweep Test - Verify search space expansion, caching and ranking.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from shared_context import SharedContext, create_default_config
+from trigger_table import wilder_averages
+from parameter_sweep import (
+    expand_space, split_config, simulate_outcome, context_at, rank_results,
+    SymbolSweep, INDICATOR_KEYS, _cache_key, LTF_MS, HTF_MS
+)
+
+
+def _frame(seed, n, step):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.03, n)))
+    return pd.DataFrame({
+        'timestamp': np.arange(n) * step,
+        'open': np.concatenate([[close[0]], close[:-1]]),
+        'high': close * 1.01,
+        'low': close * 0.99,
+        'close': close,
+        'volume': rng.uniform(100, 1000, n),
+    })
+
+
+def _base_context(config):
+    htf = _frame(4, 300, HTF_MS)
+    ltf = _frame(5, 300 * 16, LTF_MS)
+    context = SharedContext(symbol='TESTUSDT', canonical_symbol='TEST', exchange='MEXC',
+                            ltf_data=ltf, htf_data=htf, config=config)
+    for df, indicators in ((ltf, context.ltf_indicators), (htf, context.htf_indicators)):
+        avg_gain, avg_loss = wilder_averages(df['close'].to_numpy(), 14)
+        indicators['rsi'] = pd.Series(100 - 100 / (1 + avg_gain / avg_loss))
+        indicators['atr'] = (df['high'] - df['low']).ewm(alpha=1 / 14, adjust=False).mean()
+        indicators['obv'] = (np.sign(df['close'].diff().fillna(0)) * df['volume']).cumsum()
+    return context
+
+
+def test_expand_space():
+    grid = expand_space({'rsi_tolerance': [0.5, 1.0], 'min_rr_ratio': [2, 3, 4]})
+    assert len(grid) == 6 and {'rsi_tolerance': 1.0, 'min_rr_ratio': 4} in grid
+
+    sampled = expand_space({'rsi_pivot_order': {'min': 2, 'max': 4}, 'atr_stop_multiplier': {'min': 1.5, 'max': 3.5}},
+                           samples=20, seed=1)
+    assert len(sampled) == 20
+    assert all(isinstance(c['rsi_pivot_order'], int) and 2 <= c['rsi_pivot_order'] <= 4 for c in sampled)
+    assert all(1.5 <= c['atr_stop_multiplier'] <= 3.5 for c in sampled)
+
+    with pytest.raises(ValueError):
+        expand_space({'min_rr_ratio': {'min': 2, 'max': 3}})
+
+
+def test_split_config():
+    feature, strategy = split_config({'rsi_period': 21, 'rsi_tolerance': 0.5, 'min_rr_ratio': 2.5})
+    assert feature['rsi_period'] == 21 and feature['rsi_tolerance'] == 0.5
+    assert strategy == {'min_rr_ratio': 2.5}
+    assert 'rsi_period' in INDICATOR_KEYS and 'rsi_tolerance' not in INDICATOR_KEYS
+
+
+def test_simulate_outcome():
+    high = np.array([101.0, 103.0, 111.0])
+    low = np.array([99.0, 97.0, 100.0])
+    close = np.array([100.0, 100.0, 110.0])
+    assert simulate_outcome('LONG', 100, 98, 110, high, low, close) == ('LOSS', -1.0)
+    assert simulate_outcome('LONG', 100, 95, 110, high, low, close) == ('WIN', 2.0)
+    assert simulate_outcome('SHORT', 100, 112, 90, high, low, close) == ('OPEN', -10 / 12)
+
+
+def test_context_at_is_point_in_time():
+    base = _base_context(create_default_config())
+    context = context_at(base, 100)
+    assert len(context.htf_data) == 101 and len(context.htf_indicators['rsi']) == 101
+    close_time = context.htf_data['timestamp'].iloc[-1] + HTF_MS
+    assert context.ltf_data['timestamp'].iloc[-1] + LTF_MS == close_time
+    assert len(context.ltf_indicators['rsi']) == len(context.ltf_data)
+
+
+def test_context_at_cuts_external_data():
+    base = _base_context(create_default_config())
+    base.external_data['oi_z_score_valid'] = True  # derived from the latest fetch
+    # Coinalyze OI points in seconds, one per hour over the whole history
+    oi = [{'timestamp': int(t // 1000), 'value': 1000 + i} for i, t in enumerate(range(0, 300 * HTF_MS, HTF_MS // 4))]
+    external = {'oi_history': oi, 'funding_rate': 0.01, 'ls_ratio': 1.2, 'oi_status': 'resolved',
+                'liquidations': {'longs': 5, 'shorts': 7}, 'coinalyze_symbol': 'TEST_PERP.A'}
+    context = context_at(base, 100, external)
+    close_ms = 101 * HTF_MS
+    seen = context.external_data['open_interest']
+    assert len(seen) == 101 * 4 and all(p['timestamp'] * 1000 < close_ms for p in seen)
+    assert context.external_data['oi_value'] == 1000 + 101 * 4 - 1
+    assert not context.external_data['funding_available'] and not context.external_data['ls_ratio_available']
+
+    # No data at all (and nothing inherited from the base context)
+    context = context_at(base, 100)
+    assert not context.external_data['oi_available'] and not context.external_data['oi_z_score_valid']
+
+
+def test_trendlines_shared_across_downstream_configs():
+    configs = expand_space({'rsi_tolerance': [0.5, 1.5], 'min_rr_ratio': [2.0, 3.0]})
+    base = _base_context(create_default_config())
+    sweep = SymbolSweep('TESTUSDT', 'MEXC', base.ltf_data, base.htf_data)
+    # Indicator keys are identical across configs: one pre-built context serves all
+    sweep.contexts[_cache_key(split_config(configs[0])[0], INDICATOR_KEYS)] = base
+
+    totals = sweep.evaluate(configs, 'breakoutv2', points=20, horizon=10)
+    assert sweep.stats['indicator_builds'] == 0
+    assert len(sweep.trendlines) == 2 * 20
+    assert sweep.stats['trendline_runs'] <= 2 * 20
+    assert sweep.stats['analyses'] == 4 * 20
+    assert {strategy for _, strategy in totals} == {'BreakoutV2'}
+
+
+def test_rank_results():
+    configs = [{'min_rr_ratio': 2.0}, {'min_rr_ratio': 3.0}]
+    totals = {
+        (0, 'BreakoutV2'): {'signals': 4, 'wins': 1, 'losses': 3, 'open': 0, 'total_r': -1.0, 'errors': 0},
+        (1, 'BreakoutV2'): {'signals': 3, 'wins': 2, 'losses': 1, 'open': 0, 'total_r': 5.0, 'errors': 0},
+    }
+    rows = rank_results(configs, totals)
+    assert [r['config_id'] for r in rows] == [1, 0]
+    assert rows[0]['rank'] == 1 and rows[0]['min_rr_ratio'] == 3.0 and rows[0]['win_rate'] == 0.6667
+
+
+if __name__ == "__main__":
+    test_expand_space()
+    test_split_config()
+    test_simulate_outcome()
+    test_context_at_is_point_in_time()
+    test_context_at_cuts_external_data()
+    test_trendlines_shared_across_downstream_configs()
+    test_rank_results()
+    print("✓ Parameter sweep tests passed")
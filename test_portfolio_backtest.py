@@ -0,0 +1,110 @@
+"""
+Portfolio Backtest Test - Verify trade resolution, the merged event stream and
+the account rules.
+
+Checks:
+1. resolve_trade fills on a touch, exits stop-first, by time or at the data end
+2. Per-symbol candidates are identical with and without the trendline memo
+3. Position cap, one position per symbol and leverage room skip fills
+4. Equity, fees, drawdown and per-strategy attribution add up
+"""
+
+import numpy as np
+
+from shared_context import create_default_config
+from parameter_sweep import SymbolSweep, INDICATOR_KEYS, _cache_key, HTF_MS
+from trendline_cache import TrendlineCache
+from portfolio_backtest import (
+    resolve_trade, symbol_candidates, simulate_portfolio, build_report, max_drawdown
+)
+from test_parameter_sweep import _base_context
+
+
+def test_resolve_trade():
+    high = np.array([100.0, 99.0, 101.0, 104.0, 111.0, 103.0])
+    low = np.array([98.0, 97.0, 99.5, 97.0, 102.0, 101.0])
+    close = np.array([99.0, 98.0, 100.0, 103.0, 110.0, 102.0])
+    # Not touched at 100 on candle 1, filled on 2; candle 3 hits both stop and target -> stop
+    assert resolve_trade('LONG', 100, 97.5, 104, high, low, close, start=1) == (2, 3, 97.5, 'STOP')
+    assert resolve_trade('LONG', 100, 95, 110, high, low, close, start=1) == (2, 4, 110, 'TARGET')
+    assert resolve_trade('LONG', 100, 95, 120, high, low, close, start=1, max_hold=2) == (2, 4, 110.0, 'TIME')
+    assert resolve_trade('SHORT', 100, 120, 80, high, low, close, start=1) == (2, 5, 102.0, 'END')
+    assert resolve_trade('LONG', 90, 85, 100, high, low, close, start=1) is None
+    assert resolve_trade('LONG', 102, 99, 120, high, low, close, start=1, fill_bars=1) is None
+
+
+def test_candidates_identical_with_trendline_memo():
+    config = create_default_config()
+    base = _base_context(config)
+    results = []
+    for cache in (None, TrendlineCache()):
+        sweep = SymbolSweep('TESTUSDT', 'MEXC', base.ltf_data, base.htf_data, trendline_cache=cache)
+        sweep.contexts[_cache_key(config, INDICATOR_KEYS)] = base
+        results.append((symbol_candidates(sweep, 'all', {}, points=120), sweep.trendlines))
+    (plain, plain_lines), (memo, memo_lines) = results
+    assert plain == memo and plain_lines == memo_lines
+    candidates, stats = memo
+    assert stats['decision_points'] == 120 and stats['analyses'] == 3 * 120
+    assert stats['signals'] == len(candidates) + stats['unfilled']
+    assert [c['fill_time'] for c in candidates] == sorted(c['fill_time'] for c in candidates)
+    assert all(c['fill_time'] >= c['signal_time'] and c['exit_time'] > c['fill_time'] for c in candidates)
+
+
+def _candidate(symbol, fill, exit_, entry=100.0, stop=90.0, exit_price=110.0, strategy='Breakout', side='LONG'):
+    return {'symbol': symbol, 'exchange': 'MEXC', 'strategy': strategy, 'side': side, 'score': 50.0,
+            'signal_time': fill * HTF_MS, 'entry': entry, 'stop_loss': stop, 'take_profit': exit_price,
+            'fill_time': fill * HTF_MS, 'exit_time': exit_ * HTF_MS, 'exit_price': exit_price,
+            'exit_reason': 'TARGET'}
+
+
+def test_position_limits():
+    streams = [
+        [_candidate('AAA', 1, 5), _candidate('AAA', 2, 4)],          # second one: symbol busy
+        [_candidate('BBB', 1, 3, strategy='BreakoutV2')],
+        [_candidate('CCC', 2, 6), _candidate('CCC', 6, 8)],          # first: cap; second: after exits
+        [_candidate('DDD', 3, 7, stop=99.0)],                        # slot freed by BBB at t=3
+    ]
+    result = simulate_portfolio(streams, initial_capital=1000.0, risk_per_trade=0.01,
+                                max_positions=2, max_leverage=1.0, fee_bps=0.0)
+    assert [(t['symbol'], t['exit_time'] // HTF_MS) for t in result['trades']] == \
+        [('BBB', 3), ('AAA', 5), ('DDD', 7), ('CCC', 8)]
+    assert result['skipped'] == {'max_positions': 1, 'symbol_busy': 1, 'capital': 0}
+    assert result['max_open_positions'] == 2
+
+    # DDD wants 10 units (risk 10 at a 1.0 stop) = 1000 notional; AAA holds 100, so it gets 900
+    ddd = next(t for t in result['trades'] if t['symbol'] == 'DDD')
+    assert abs(ddd['notional'] - (1010.0 - 100.0)) < 1e-9  # equity after BBB's +10
+
+
+def test_report_and_attribution():
+    streams = [
+        [_candidate('AAA', 1, 2, exit_price=120.0), _candidate('AAA', 3, 4, exit_price=90.0)],
+        [_candidate('BBB', 5, 6, exit_price=95.0, strategy='Legacy', side='SHORT', stop=105.0)],
+    ]
+    result = simulate_portfolio(streams, initial_capital=1000.0, risk_per_trade=0.1,
+                                max_positions=5, max_leverage=10.0, fee_bps=1.0)
+    pnls = [t['pnl'] for t in result['trades']]
+    # 10% of realized equity at risk: 10 units (+200, 0.22 fees), then 11.9978 units at a 10.0 stop
+    assert abs(pnls[0] - 199.78) < 1e-9
+    assert abs(result['trades'][1]['size'] - 11.9978) < 1e-9 and abs(pnls[1] - (-119.978 - 11.9978 * 0.019)) < 1e-9
+    assert [t['r_multiple'] for t in result['trades']] == [2.0, -1.0, 1.0]
+
+    report = build_report(result, 1000.0)
+    summary = report['summary']
+    assert summary['final_equity'] == round(1000 + sum(pnls), 2)
+    assert summary['trades'] == 3 and summary['win_rate'] == 0.6667 and summary['total_r'] == 2.0
+    assert summary['max_drawdown'] == round(-pnls[1], 2)
+    assert report['equity_curve'][0] == [HTF_MS, 1000.0]
+    legacy, breakout = report['strategies']  # sorted by PnL
+    assert (breakout['strategy'], breakout['trades'], breakout['total_r']) == ('Breakout', 2, 1.0)
+    assert abs(breakout['pnl_share'] + legacy['pnl_share'] - 1.0) < 1e-3
+
+    assert max_drawdown([100, 120, 90, 130, 125]) == (30.0, 0.25)
+
+
+if __name__ == "__main__":
+    test_resolve_trade()
+    test_candidates_identical_with_trendline_memo()
+    test_position_limits()
+    test_report_and_attribution()
+    print("✓ Portfolio backtest tests passed")
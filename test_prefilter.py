@@ -0,0 +1,120 @@
+"""
+Prefilter Test - Verify cheap gates never skip a symbol that could produce a signal.
+
+Checks:
+1. trendline_possible() has no false negatives vs _detect_rsi_trendlines
+2. Skipped strategies still WAIT when analyzed without trendlines
+3. Liquidity gate marks every strategy with a skip reason
+4. Trendlines are detected only on timeframes a surviving strategy decides on;
+   skipped results carry empty rsi_visuals
+"""
+
+import numpy as np
+import pandas as pd
+from shared_context import SharedContext, FeatureFactory, create_default_config, trendline_possible
+from strategies_refactored import QuantProLegacyRefactored, QuantProBreakoutRefactored, QuantProBreakoutV2Refactored
+from market_scanner_refactored import evaluate_prefilters, trendline_timeframes
+
+
+def _rsi(close, period=14):
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / period, adjust=False).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / period, adjust=False).mean()
+    return 100 - 100 / (1 + gain / loss)
+
+
+def _frame(seed, n=300, vol=0.02):
+    rng = np.random.default_rng(seed)
+    close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, vol, n))))
+    volume = pd.Series(rng.uniform(100, 1000, n))
+    df = pd.DataFrame({
+        'timestamp': np.arange(n) * 14400000,
+        'open': close.shift(1).fillna(close[0]),
+        'high': close * 1.01,
+        'low': close * 0.99,
+        'close': close,
+        'volume': volume,
+    })
+    return df
+
+
+def _context(seed, vol=0.02):
+    config = create_default_config()
+    df = _frame(seed, vol=vol)
+    obv = (np.sign(df['close'].diff().fillna(0)) * df['volume']).cumsum()
+    context = SharedContext(symbol='TESTUSDT', canonical_symbol='TEST', exchange='MEXC',
+                            ltf_data=df, htf_data=df, config=config)
+    context.htf_indicators['rsi'] = _rsi(df['close'])
+    context.htf_indicators['obv'] = obv
+    return context
+
+
+def test_trendline_possible_has_no_false_negatives():
+    factory = FeatureFactory(create_default_config())
+    skipped = 0
+    for seed in range(60):
+        rsi = _rsi(_frame(seed, vol=0.005 + 0.0005 * seed)['close'])
+        lines = factory._detect_rsi_trendlines(rsi)
+        for direction, key in (('RESISTANCE', 'resistance'), ('SUPPORT', 'support')):
+            if not trendline_possible(rsi, direction, factory.config):
+                skipped += 1
+                assert key not in lines, f"seed {seed}: {direction} found but prefilter ruled it out"
+    assert skipped > 0, "low-volatility series should be ruled out cheaply"
+
+
+def test_skipped_strategies_still_wait():
+    strategies = [QuantProBreakoutRefactored({}), QuantProBreakoutV2Refactored({})]
+    decided = 0
+    for seed in range(30):
+        context = _context(seed, vol=0.004)
+        reasons = evaluate_prefilters(context, strategies)
+        for strategy in strategies:
+            if strategy.name in reasons:
+                decided += 1
+                assert strategy.analyze(context)['action'] == 'WAIT'
+    assert decided > 0
+
+
+def test_liquidity_gate():
+    context = _context(1)
+    context.config['prefilter_min_volume_24h'] = 1e12
+    strategies = [QuantProBreakoutRefactored({}), QuantProBreakoutV2Refactored({})]
+    reasons = evaluate_prefilters(context, strategies)
+    assert set(reasons) == {'Breakout', 'BreakoutV2'}
+    assert all(r.startswith('Illiquid') for r in reasons.values())
+
+
+def test_trendline_timeframes():
+    legacy, breakout, v2 = QuantProLegacyRefactored({}), QuantProBreakoutRefactored({}), QuantProBreakoutV2Refactored({})
+    strategies = [legacy, breakout, v2]
+    # Legacy alone never forces detection; a surviving breakout strategy needs HTF only
+    assert trendline_timeframes(strategies, {'Breakout': 'x', 'BreakoutV2': 'y'}) == ()
+    assert trendline_timeframes(strategies, {'Breakout': 'x'}) == ('htf',)
+    assert trendline_timeframes([legacy], {}) == ()
+
+    class Custom:
+        name = 'Custom'
+    assert trendline_timeframes([Custom()], {}) == ('ltf', 'htf')
+    assert trendline_timeframes([Custom()], {'Custom': 'x'}) == ()
+
+
+def test_skipped_payload_has_no_visuals():
+    v2 = QuantProBreakoutV2Refactored({})
+    for seed in range(30):
+        context = _context(seed, vol=0.004)
+        reason = evaluate_prefilters(context, [v2]).get('BreakoutV2')
+        if reason and reason.startswith('OBV'):
+            result = v2.analyze(context)
+            assert result['action'] == 'WAIT'
+            assert result['observability']['rsi_visuals'] == {}
+            return
+    assert False, "no seed tripped the OBV gate"
+
+
+if __name__ == "__main__":
+    test_trendline_possible_has_no_false_negatives()
+    test_skipped_strategies_still_wait()
+    test_liquidity_gate()
+    test_trendline_timeframes()
+    test_skipped_payload_has_no_visuals()
+    print("✓ Prefilter tests passed")
@@ -0,0 +1,115 @@
+"""
+Scan Checkpoint Test - Verify crash-safe per-symbol progress and resume.
+
+Checks:
+1. Entries survive a crash (torn last line ignored) and reload under the same key
+2. Changed inputs or --fresh start a new checkpoint
+3. A restarted directory scan assembles the feed from the checkpoint and removes it
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from scan_checkpoint import ScanCheckpoint, scan_key
+from scan_planner import plan_scan
+from market_scanner_refactored import list_data_files
+
+SCANNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'market_scanner_refactored.py')
+
+
+def _write_candles(directory, exchange, symbol, n=5):
+    now = 1768838400000
+    candles = [{'time': now - (n - 1 - i) * 900000, 'open': 1, 'high': 1, 'low': 1, 'close': 1, 'volume': 1}
+               for i in range(n)]
+    path = os.path.join(directory, f"{exchange}_{symbol}_15m.json")
+    with open(path, 'w') as f:
+        json.dump(candles, f)
+    return path
+
+
+def _entry(symbol, score):
+    signal = {'canonical_symbol': symbol, 'strategy_name': 'Breakout', 'exchange': 'MEXC',
+              'symbol': f"{symbol}USDT", 'action': 'WAIT', 'score': score}
+    return {'canonical_symbol': symbol, 'status': 'ok', 'results': [signal], 'triggers': [], 'errors': []}
+
+
+def test_checkpoint_survives_crash():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'scan_checkpoint.jsonl')
+        checkpoint = ScanCheckpoint(path, 'key-1')
+        checkpoint.record(0, _entry('BTC', 1.5))
+        checkpoint.record(2, _entry('ETH', float('nan')))
+        checkpoint.close()
+        with open(path, 'ab') as f:
+            f.write(b'{"index": 3, "canonical_sym')  # killed mid-write
+
+        resumed = ScanCheckpoint(path, 'key-1')
+        assert sorted(resumed.entries) == [0, 2]
+        assert resumed.entries[0]['results'][0]['score'] == 1.5
+        assert resumed.entries[2]['results'][0]['score'] == 0.0  # NaN sanitized like the feed
+        resumed.record(3, _entry('SOL', 2.0))
+        resumed.close()
+        assert sorted(ScanCheckpoint(path, 'key-1').entries) == [0, 2, 3]
+
+        assert ScanCheckpoint(path, 'key-2').entries == {}
+        assert ScanCheckpoint(path, 'key-2').entries == {}  # the new key's empty file
+        assert ScanCheckpoint(path, 'key-2', resume=False).entries == {}
+
+        checkpoint = ScanCheckpoint(path, 'key-2')
+        checkpoint.remove()
+        assert not os.path.exists(path)
+
+
+def test_scan_key_tracks_inputs():
+    with tempfile.TemporaryDirectory() as tmp:
+        _write_candles(tmp, 'MEXC', 'BTCUSDT')
+        groups = plan_scan(list_data_files(tmp))
+        key = scan_key(groups, {'strategy': 'all'})
+        assert key == scan_key(plan_scan(list_data_files(tmp)), {'strategy': 'all'})
+        assert key != scan_key(groups, {'strategy': 'breakout'})
+
+        time.sleep(0.01)
+        _write_candles(tmp, 'MEXC', 'BTCUSDT', n=6)  # new candle
+        assert key != scan_key(plan_scan(list_data_files(tmp)), {'strategy': 'all'})
+
+
+def test_restarted_scan_resumes_from_checkpoint():
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'data')
+        os.makedirs(data_dir)
+        _write_candles(data_dir, 'MEXC', 'BTCUSDT')
+        _write_candles(data_dir, 'MEXC', 'ETHUSDT')
+        output = os.path.join(data_dir, 'master_feed.json')
+        groups = plan_scan(list_data_files(data_dir))
+        key = scan_key(groups, {'strategy': 'all', 'config': {}, 'prefilter': True, 'triggers': True,
+                                'candles': 'fill'})
+
+        # Previous run finished every coin, then died before writing the feed
+        checkpoint = ScanCheckpoint(os.path.join(data_dir, 'scan_checkpoint.jsonl'), key)
+        for index, group in enumerate(groups):
+            checkpoint.record(index, _entry(group.canonical_symbol, index + 1.0))
+        checkpoint.close()
+
+        proc = subprocess.run([sys.executable, SCANNER, data_dir, '--output', output, '--no-delta'],
+                              cwd=tmp, capture_output=True, text=True, timeout=120)
+        assert proc.returncode == 0, proc.stderr
+        assert '[CHECKPOINT] Resuming: 2/2' in proc.stderr
+
+        with open(output) as f:
+            feed = json.load(f)
+        assert [s['canonical_symbol'] for s in feed['signals']] == [g.canonical_symbol for g in groups]
+        assert [s['score'] for s in feed['signals']] == [1.0, 2.0]
+        with open(os.path.join(data_dir, 'scan_status.json')) as f:
+            assert json.load(f)['resumed'] == 2
+        assert not os.path.exists(os.path.join(data_dir, 'scan_checkpoint.jsonl'))
+
+
+if __name__ == "__main__":
+    test_checkpoint_survives_crash()
+    test_scan_key_tracks_inputs()
+    test_restarted_scan_resumes_from_checkpoint()
+    print("✓ Scan checkpoint tests passed")
@@ -0,0 +1,127 @@
+"""
+Scan Logging Test - Verify level gating, rate limiting and the JSON-lines sink.
+
+Checks:
+1. Repeated messages are rate-limited and the next window reports the suppressed count
+2. DEBUG detail is off at the default level and never rate-limited when enabled
+3. The JSON-lines sink carries level, logger, tag and extra fields
+4. A directory scan only logs per-symbol detail with --log-level DEBUG
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from scan_logging import configure_logging, get_logger, suppressed_count
+
+SCANNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'market_scanner_refactored.py')
+
+
+def _capture(level='INFO', json_path=None, rate_window=60.0, rate_burst=5):
+    stream = io.StringIO()
+    original = sys.stderr
+    sys.stderr = stream
+    try:
+        configure_logging(level, json_path, rate_window=rate_window, rate_burst=rate_burst)
+    finally:
+        sys.stderr = original
+    return stream
+
+
+def test_repeated_messages_rate_limited():
+    logger = get_logger('test.rate')
+    try:
+        stream = _capture(rate_window=0.2, rate_burst=3)
+        for i in range(10):
+            logger.warning("[WARN] Fetch failed for %s", f"C{i}")
+        logger.warning("[WARN] Other failure")
+        lines = stream.getvalue().splitlines()
+        assert lines == ['[WARN] Fetch failed for C0', '[WARN] Fetch failed for C1',
+                         '[WARN] Fetch failed for C2', '[WARN] Other failure']
+        assert suppressed_count() == 7
+
+        time.sleep(0.25)
+        logger.warning("[WARN] Fetch failed for %s", 'C10')
+        assert stream.getvalue().splitlines()[-1] == '[WARN] Fetch failed for C10 (+7 similar suppressed)'
+    finally:
+        configure_logging()
+
+
+def test_debug_gated_and_not_rate_limited():
+    logger = get_logger('test.debug')
+    try:
+        stream = _capture('INFO', rate_burst=2)
+        logger.debug("[CONTEXT] Built for %s", 'BTC')
+        logger.info("[PROGRESS] done")
+        assert stream.getvalue() == '[PROGRESS] done\n'
+
+        stream = _capture('DEBUG', rate_burst=2)
+        for symbol in ('BTC', 'ETH', 'SOL', 'XRP'):
+            logger.debug("[CONTEXT] Built for %s", symbol)
+        assert len(stream.getvalue().splitlines()) == 4
+    finally:
+        configure_logging()
+
+
+def test_json_lines_sink():
+    logger = get_logger('test.json')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'logs', 'scan.jsonl')
+        try:
+            _capture('DEBUG', json_path=path)
+            logger.debug("[STRATEGY] %s → Score: %.1f", 'Breakout', 42.0)
+            logger.error("[ERROR] Processing %s", 'x.json', extra={'symbol': 'BTC', 'stage': 'trendlines'})
+        finally:
+            configure_logging()
+        with open(path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert [r['level'] for r in records] == ['DEBUG', 'ERROR']
+        assert records[0]['logger'] == 'quantopro.test.json'
+        assert records[0]['tag'] == 'STRATEGY' and records[0]['msg'] == '[STRATEGY] Breakout → Score: 42.0'
+        assert records[1]['symbol'] == 'BTC' and records[1]['stage'] == 'trendlines'
+        assert isinstance(records[1]['ts'], int)
+
+
+def _write_candles(directory, exchange, symbol, n=60):
+    now = 1768838400000
+    candles = [{'time': now - (n - 1 - i) * 900000, 'open': 1 + i, 'high': 2 + i, 'low': 0.5 + i,
+                'close': 1.5 + i, 'volume': 10} for i in range(n)]
+    with open(os.path.join(directory, f"{exchange}_{symbol}_15m.json"), 'w') as f:
+        json.dump(candles, f)
+
+
+def test_scanner_default_level_is_quiet():
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'data')
+        os.makedirs(data_dir)
+        for symbol in ('AAAUSDT', 'BBBUSDT'):
+            _write_candles(data_dir, 'MEXC', symbol)
+        base = [sys.executable, SCANNER, data_dir, '--output', os.path.join(data_dir, 'master_feed.json'),
+                '--no-delta', '--no-checkpoint', '--no-history']
+        env = {k: v for k, v in os.environ.items() if not k.startswith('QUANTOPRO_LOG')}
+
+        proc = subprocess.run(base, cwd=tmp, env=env, capture_output=True, text=True, timeout=120)
+        assert proc.returncode == 0, proc.stderr
+        assert '[CANONICAL]' not in proc.stderr and '[ENV-DEBUG]' not in proc.stderr
+        assert '[DIRECTORY MODE] Processed' in proc.stderr
+
+        json_path = os.path.join(tmp, 'scan.jsonl')
+        proc = subprocess.run(base + ['--log-level', 'DEBUG', '--log-json', json_path],
+                              cwd=tmp, env=env, capture_output=True, text=True, timeout=120)
+        assert proc.returncode == 0, proc.stderr
+        assert proc.stderr.count('[CANONICAL]') == 2
+        with open(json_path, encoding='utf-8') as f:
+            tags = {json.loads(line)['tag'] for line in f}
+        assert {'CANONICAL', 'DIRECTORY MODE', 'SUCCESS'} <= tags
+
+
+if __name__ == "__main__":
+    test_repeated_messages_rate_limited()
+    test_debug_gated_and_not_rate_limited()
+    test_json_lines_sink()
+    test_scanner_default_level_is_quiet()
+    print("✓ Scan logging tests passed")
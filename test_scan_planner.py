@@ -0,0 +1,54 @@
+"""
+Scan Planner Test - Verify cross-exchange grouping and primary source selection.
+"""
+
+import json
+import os
+import tempfile
+from scan_planner import plan_scan, read_last_candle_time, summarize_plan
+
+
+def _write_candles(directory, exchange, symbol, last_time, n=5):
+    path = os.path.join(directory, f"{exchange}_{symbol}_15m.json")
+    candles = [
+        {'time': last_time - (n - 1 - i) * 900000, 'open': 1, 'high': 1, 'low': 1, 'close': 1, 'volume': 1}
+        for i in range(n)
+    ]
+    with open(path, 'w') as f:
+        json.dump(candles, f)
+    return (path, symbol, exchange)
+
+
+def test_reads_last_candle_time_from_tail():
+    with tempfile.TemporaryDirectory() as tmp:
+        path, _, _ = _write_candles(tmp, 'MEXC', 'BTCUSDT', 1768838400000, n=500)
+        assert read_last_candle_time(path) == 1768838400000
+
+
+def test_primary_by_priority_then_freshness():
+    now = 1768838400000
+    with tempfile.TemporaryDirectory() as tmp:
+        files = [
+            _write_candles(tmp, 'MEXC', 'PEPEUSDT', now),
+            _write_candles(tmp, 'KUCOIN', 'PEPEUSDTM', now),
+            _write_candles(tmp, 'HYPERLIQUID', 'PEPEUSDT', now - 900000),  # within tolerance
+            # Hyperliquid copy of SOL stopped updating: Kucoin wins
+            _write_candles(tmp, 'HYPERLIQUID', 'SOLUSDT', now - 6 * 3600000),
+            _write_candles(tmp, 'KUCOIN', 'SOLUSDTM', now),
+            _write_candles(tmp, 'MEXC', 'ONLYUSDT', now),
+        ]
+        groups = {g.canonical_symbol: g for g in plan_scan(files)}
+
+        assert [s.exchange for s in groups['PEPE'].sources] == ['HYPERLIQUID', 'KUCOIN', 'MEXC']
+        assert groups['SOL'].primary.exchange == 'KUCOIN'
+        assert groups['SOL'].alternates[0].exchange == 'HYPERLIQUID'
+        assert groups['ONLY'].alternates == []
+
+        summary = summarize_plan(list(groups.values()))
+        assert summary == {'files': 6, 'canonical_symbols': 3, 'deferred_duplicates': 3, 'cross_listed': 2}
+
+
+if __name__ == "__main__":
+    test_reads_last_candle_time_from_tail()
+    test_primary_by_priority_then_freshness()
+    print("✓ Scan planner tests passed")
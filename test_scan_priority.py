@@ -0,0 +1,170 @@
+"""
+Scan Priority Test - Verify expected-value scan ordering and tiered publishing.
+
+Checks:
+1. Quote volume is read from the data file tail
+2. Coins near a trendline, with high recent scores or high volume go first
+3. Tiers are reported in order, resumed coins count as done, the last tier is not
+4. A partial feed holds fresh results plus the previous signals of pending coins,
+   and reaches delta consumers (the server's read path) as a feed delta
+5. A directory scan publishes after every tier
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from feed_delta import FeedDeltaWriter, FeedDeltaReader
+from scan_planner import plan_scan
+from scan_priority import prioritize, read_tail_quote_volume, trendline_distances, TierTracker
+from market_scanner_refactored import list_data_files, publish_partial_feed, load_last_known_signals
+from test_feed_delta import server_feed
+
+SCANNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'market_scanner_refactored.py')
+
+
+def _write_candles(directory, exchange, symbol, close=1.0, volume=1.0, n=60):
+    now = 1768838400000
+    candles = [{'time': now - (n - 1 - i) * 900000, 'open': close, 'high': close, 'low': close,
+                'close': close, 'volume': volume} for i in range(n)]
+    path = os.path.join(directory, f"{exchange}_{symbol}_15m.json")
+    with open(path, 'w') as f:
+        json.dump(candles, f, indent=2)
+    return path
+
+
+def _signal(symbol, score, price=100.0, exchange='MEXC'):
+    return {'canonical_symbol': symbol, 'symbol': f"{symbol}USDT", 'exchange': exchange,
+            'strategy_name': 'Breakout', 'action': 'WAIT', 'score': score, 'price': price, 'details': {}}
+
+
+def _write_feed(path, signals, last_updated=1768838400000):
+    with open(path, 'w') as f:
+        json.dump({'last_updated': last_updated, 'signals': signals}, f)
+
+
+def test_tail_quote_volume():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _write_candles(tmp, 'MEXC', 'BTCUSDT', close=2.0, volume=50.0)
+        assert read_tail_quote_volume(path) == 100.0
+        assert read_tail_quote_volume(os.path.join(tmp, 'missing.json')) == 0.0
+
+
+def test_priority_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        for symbol, volume in (('AAAUSDT', 1.0), ('BBBUSDT', 1.0), ('CCCUSDT', 1.0), ('DDDUSDT', 900.0)):
+            _write_candles(tmp, 'MEXC', symbol, close=100.0, volume=volume)
+        groups = plan_scan(list_data_files(tmp))
+        assert [g.canonical_symbol for g in groups] == ['AAA', 'BBB', 'CCC', 'DDD']
+
+        last_known = {'AAA': [_signal('AAA', 5)], 'BBB': [_signal('BBB', 10)], 'CCC': [_signal('CCC', 0)]}
+        triggers = [{'canonical_symbol': 'CCC', 'trigger_price': 100.5},   # 0.5% from the line
+                    {'canonical_symbol': 'AAA', 'trigger_price': 140.0}]
+        assert trendline_distances(triggers, last_known) == {'CCC': 0.5, 'AAA': 40.0}
+
+        order, priorities = prioritize(groups, last_known, triggers, history_scores={'BBB': 90.0})
+        assert [groups[i].canonical_symbol for i in order] == ['CCC', 'BBB', 'DDD', 'AAA']
+        assert all(0 <= p <= 1 for p in priorities)
+
+        # No previous scan: volume alone, ties keep plan order
+        order, _ = prioritize(groups, {})
+        assert [groups[i].canonical_symbol for i in order] == ['DDD', 'AAA', 'BBB', 'CCC']
+
+
+def test_tier_tracker():
+    tracker = TierTracker([3, 1, 0, 2, 4], tier_size=2)
+    assert tracker.tiers == [[3, 1], [0, 2], [4]]
+    assert tracker.complete(0) is False  # tier 2 before tier 1
+    assert tracker.complete(3) is False
+    assert tracker.complete(2) is False
+    assert tracker.complete(1) is True and tracker.published == 2  # tiers 1 and 2 at once
+    assert tracker.complete(4) is False  # the final publish covers the last tier
+
+    resumed = TierTracker([3, 1, 0, 2, 4], tier_size=2, done=[3, 1])
+    assert resumed.published == 1
+    assert TierTracker([0, 1], tier_size=0).complete(0) is False
+
+
+def test_partial_feed():
+    with tempfile.TemporaryDirectory() as tmp:
+        for symbol in ('AAAUSDT', 'BBBUSDT', 'CCCUSDT'):
+            _write_candles(tmp, 'MEXC', symbol)
+        groups = plan_scan(list_data_files(tmp))
+        output = os.path.join(tmp, 'master_feed.json')
+        _write_feed(output, [_signal('AAA', 1), _signal('BBB', 2), _signal('BBB', 3, exchange='KUCOIN'),
+                             _signal('CCC', 4)])
+        last_known = load_last_known_signals(output)
+
+        fresh = dict(_signal('BBB', 55), details={})
+        count = publish_partial_feed({1: [fresh], 2: []}, groups, last_known, output)
+        with open(output) as f:
+            feed = json.load(f)
+        assert count == 2
+        assert [(s['canonical_symbol'], s['score']) for s in feed['signals']] == [('AAA', 1), ('BBB', 55)]
+        assert feed['signals'][0]['details']['stale_since'] == 1768838400000
+        assert 'stale_since' not in feed['signals'][1]['details']
+
+
+def test_partial_feed_reaches_delta_consumers():
+    with tempfile.TemporaryDirectory() as tmp:
+        for symbol in ('AAAUSDT', 'BBBUSDT', 'CCCUSDT'):
+            _write_candles(tmp, 'MEXC', symbol)
+        groups = plan_scan(list_data_files(tmp))
+        output = os.path.join(tmp, 'master_feed.json')
+        previous = [_signal('AAA', 1), _signal('BBB', 2), _signal('CCC', 4)]
+        _write_feed(output, previous)
+        writer = FeedDeltaWriter(os.path.join(tmp, 'feed_deltas'))
+        writer.publish(previous, 1768838400000)  # the previous scan's final delta
+        last_known = load_last_known_signals(output)
+
+        # Tier 1 is CCC, tier 2 is BBB
+        publish_partial_feed({2: [_signal('CCC', 40)]}, groups, last_known, output, writer, fresh=[2])
+        reader = FeedDeltaReader(os.path.join(tmp, 'feed_deltas'))
+        reader.catch_up()
+        assert [(s['canonical_symbol'], s['score']) for s in reader.feed()['signals']] == \
+            [('AAA', 1), ('BBB', 2), ('CCC', 40)]
+
+        results = {2: [_signal('CCC', 40)], 1: [_signal('BBB', 20), _signal('BBB', 21, exchange='KUCOIN')]}
+        publish_partial_feed(results, groups, last_known, output, writer, fresh=[1])
+        with open(os.path.join(tmp, 'feed_deltas', 'delta_00000003.json')) as f:
+            delta = json.load(f)
+        assert [s['score'] for s in delta['changed']] == [20] and [s['score'] for s in delta['added']] == [21]
+
+        feeds = server_feed(tmp)
+        if feeds is not None:
+            assert [(s['canonical_symbol'], s['exchange'], s['score']) for s in feeds[0]['signals']] == \
+                [('AAA', 'MEXC', 1), ('BBB', 'MEXC', 20), ('BBB', 'KUCOIN', 21), ('CCC', 'MEXC', 40)]
+
+
+def test_scan_publishes_after_each_tier():
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'data')
+        os.makedirs(data_dir)
+        for symbol in ('AAAUSDT', 'BBBUSDT', 'CCCUSDT'):
+            _write_candles(data_dir, 'MEXC', symbol, close=100.0)
+        output = os.path.join(data_dir, 'master_feed.json')
+        _write_feed(output, [_signal('AAA', 1), _signal('BBB', 2), _signal('CCC', 3)])
+        with open(os.path.join(data_dir, 'trigger_table.json'), 'w') as f:
+            json.dump({'generated_at': 0, 'triggers': [{'canonical_symbol': 'BBB', 'trigger_price': 100.2}]}, f)
+
+        proc = subprocess.run([sys.executable, SCANNER, data_dir, '--output', output,
+                               '--no-history', '--no-checkpoint', '--tier-size', '1'],
+                              cwd=tmp, capture_output=True, text=True, timeout=120)
+        assert proc.returncode == 0, proc.stderr
+        assert '[PRIORITY] First: BBB' in proc.stderr
+        with open(os.path.join(data_dir, 'scan_status.json')) as f:
+            publishes = json.load(f)['partial_publishes']
+        assert [p['tier'] for p in publishes] == [1, 2]
+        assert [p['coins'] for p in publishes] == [1, 2]
+
+
+if __name__ == "__main__":
+    test_tail_quote_volume()
+    test_priority_order()
+    test_tier_tracker()
+    test_partial_feed()
+    test_partial_feed_reaches_delta_consumers()
+    test_scan_publishes_after_each_tier()
+    print("✓ Scan priority tests passed")
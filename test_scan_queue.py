@@ -0,0 +1,147 @@
+"""
+Scan Queue Test - Verify shard claims, lease expiry and the coordinator merge.
+
+Checks:
+1. Concurrent claims never return the same shard
+2. An expired lease is re-claimed and the late owner's result is rejected
+3. Shards past max_attempts are marked failed
+4. Partial feeds merge in plan order; timeouts/failed shards serve last known signals
+   and per-shard data-quality stats are merged
+5. coordinate + local worker processes publish a master feed with the
+   --bad-candles policy and data_quality in scan_status
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from scan_planner import ScanGroup, ScanSource
+from scan_queue import WorkQueue, run_worker, merge_scan
+
+SCAN_QUEUE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scan_queue.py')
+SETTINGS = {'strategy': 'breakout', 'config': {}, 'prefilter': True, 'triggers': True,
+            'symbol_timeout': 60, 'stage_timeouts': {}, 'candles': 'fill'}
+
+
+def _groups(n):
+    return [ScanGroup(f"C{i}", [ScanSource(f"MEXC_C{i}USDT_15m.json", f"C{i}USDT", 'MEXC', 0)]) for i in range(n)]
+
+
+def test_claims_and_lease_expiry():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, 'queue.db')
+        queue = WorkQueue(db, lease_seconds=0.2, max_attempts=2)
+        scan_id = queue.create_scan(_groups(5), SETTINGS, 2, tmp)
+        assert len(queue.shards(scan_id)) == 3
+
+        other = WorkQueue(db, lease_seconds=0.2, max_attempts=2)
+        a, b = queue.claim('a'), other.claim('b')
+        assert (a['shard'], b['shard']) == (0, 1)
+        assert [g.canonical_symbol for g in a['groups']] == ['C0', 'C1']
+        assert a['settings'] == SETTINGS
+
+        time.sleep(0.3)
+        assert other.renew(scan_id, 1, 'b')  # b keeps its lease alive
+        again = other.claim('c')
+        assert again['shard'] == 0 and again['attempt'] == 2  # a's lease expired
+        assert not queue.renew(scan_id, 0, 'a')
+        assert not queue.complete(scan_id, 0, 'a', 'late.json')
+        assert other.complete(scan_id, 0, 'c', 'c.json')
+        assert other.complete(scan_id, 1, 'b', 'b.json')
+
+        # Shard 2: two expired attempts, then it is failed instead of handed out again
+        assert queue.claim('d')['shard'] == 2
+        time.sleep(0.3)
+        assert queue.claim('e')['shard'] == 2
+        time.sleep(0.3)
+        assert queue.claim('f') is None
+        assert queue.progress(scan_id) == {'done': 2, 'failed': 1}
+
+        queue.close_scan(scan_id)
+        assert queue.claim('g') is None
+        queue.close()
+        other.close()
+
+
+def _fake_analyze(group, strategies, feature_factory, settings):
+    number = int(group.canonical_symbol[1:])
+    signal = {'canonical_symbol': group.canonical_symbol, 'strategy_name': 'Breakout', 'score': number}
+    quality = {group.primary.data_file: {'rows': 10, 'clean': number != 1, 'duplicates': int(number == 1)}}
+    if number == 3:
+        return {'canonical_symbol': group.canonical_symbol, 'status': 'timeout', 'results': [], 'triggers': None,
+                'errors': [{'file': 'x', 'error': 'trendlines exceeded 1.0s budget', 'stage': 'trendlines'}],
+                'data_quality': quality}
+    return {'canonical_symbol': group.canonical_symbol, 'status': 'ok', 'results': [signal],
+            'triggers': [{'canonical_symbol': group.canonical_symbol}], 'errors': [], 'data_quality': quality}
+
+
+def test_workers_and_merge_in_plan_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, 'queue.db')
+        queue = WorkQueue(db)
+        scan_id = queue.create_scan(_groups(7), SETTINGS, 3, os.path.join(tmp, 'shards'))
+
+        # One worker takes every shard; pretend the last one was lost to dead workers
+        assert run_worker(db, 'w1', idle_exit=0, analyze=_fake_analyze) == 3
+        with queue._transaction() as conn:
+            conn.execute("UPDATE shards SET state = 'failed' WHERE scan_id = ? AND shard = 2", (scan_id,))
+
+        last_known = {'C3': [{'canonical_symbol': 'C3', 'score': 30, 'details': {'stale_since': 1}}],
+                      'C6': [{'canonical_symbol': 'C6', 'score': 60, 'details': {'stale_since': 1}}]}
+        results, triggers, errors, counts, quality = merge_scan(queue, scan_id, last_known, True)
+        assert [r['score'] for r in results] == [0, 1, 2, 30, 4, 5, 60]
+        assert results[3]['details']['stale_reason'].startswith('Timeout in trendlines')
+        assert results[6]['details']['stale_reason'].startswith('Timeout in queue')
+        assert [t['canonical_symbol'] for t in triggers] == ['C0', 'C1', 'C2', 'C4', 'C5']
+        assert [e['stage'] for e in errors] == ['trendlines', 'queue']
+        assert counts == {'processed': 5, 'timed_out': 1, 'failed_shards': 1}
+        # Stats of the analyzed shards only (shard 2 never produced any)
+        assert sorted(quality) == [f"MEXC_C{i}USDT_15m.json" for i in range(6)]
+        assert quality['MEXC_C1USDT_15m.json']['duplicates'] == 1
+        queue.close()
+
+
+def _write_candles(directory, exchange, symbol, n=60, skip=()):
+    now = 1768838400000
+    candles = [{'time': now - (n - 1 - i) * 900000, 'open': 1 + i, 'high': 2 + i, 'low': 0.5 + i,
+                'close': 1.5 + i, 'volume': 10} for i in range(n) if i not in skip]
+    with open(os.path.join(directory, f"{exchange}_{symbol}_15m.json"), 'w') as f:
+        json.dump(candles, f)
+
+
+def test_coordinator_with_local_workers():
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'data')
+        os.makedirs(data_dir)
+        for symbol in ('AAAUSDT', 'BBBUSDT'):
+            _write_candles(data_dir, 'MEXC', symbol)
+        _write_candles(data_dir, 'MEXC', 'CCCUSDT', skip=(10, 11))
+        output = os.path.join(data_dir, 'master_feed.json')
+        proc = subprocess.run([sys.executable, SCAN_QUEUE, 'coordinate', data_dir, '--db',
+                               os.path.join(data_dir, 'queue.db'), '--shard-size', '2', '--workers', '2',
+                               '--output', output, '--no-delta', '--poll', '0.2',
+                               '--wait-timeout', '120', '--bad-candles', 'drop'],
+                              cwd=tmp, capture_output=True, text=True, timeout=180)
+        assert proc.returncode == 0, proc.stderr
+        assert os.path.exists(output)
+        with open(os.path.join(data_dir, 'scan_status.json')) as f:
+            status = json.load(f)
+        assert status['shards'] == 2 and status['total_files'] == 3
+        # Every coin was either analyzed or reported (environment without indicator deps)
+        assert status['processed_files'] + len({e['file'] for e in status['errors']}) == 3
+        # Load stats come back from the worker processes; drop leaves the gap alone
+        quality = status['data_quality']
+        assert quality['policy'] == 'drop' and quality['files_checked'] == 3
+        assert list(quality['files']) == [os.path.join(data_dir, 'MEXC_CCCUSDT_15m.json')]
+        assert quality['totals']['missing_bars'] == 2 and quality['totals']['filled'] == 0
+        assert os.listdir(os.path.join(data_dir, 'scan_shards')) == []
+
+
+if __name__ == "__main__":
+    test_claims_and_lease_expiry()
+    test_workers_and_merge_in_plan_order()
+    test_coordinator_with_local_workers()
+    print("✓ Scan queue tests passed")
@@ -0,0 +1,90 @@
+"""
+Scoring Engine Test - Verify batch scoring, settings reload and debug gating.
+
+Checks:
+1. calculate_scores_batch matches calculate_score element-wise
+2. Settings are re-read only when scoring_settings.json's mtime changes
+3. [SCORE-DEBUG] lines are only emitted at DEBUG level
+"""
+
+import io
+import json
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+import scoring_engine
+from scoring_engine import calculate_score, calculate_scores_batch, get_settings, set_log_level
+
+
+def test_batch_matches_scalar():
+    rng = np.random.default_rng(7)
+    n = 2000
+    change = rng.uniform(-30, 30, n)
+    duration = rng.integers(1, 400, n)
+    p_slope = rng.normal(0, 1, n)
+    r_slope = rng.normal(0, 1, n)
+    div = rng.integers(-1, 6, n)  # includes unknown types
+
+    batch = calculate_scores_batch(change, duration, p_slope, r_slope, div)
+    assert set(batch) == {'geometry', 'momentum', 'base', 'total'}
+    for i in range(0, n, 37):
+        single = calculate_score({'price_change_pct': change[i], 'duration_candles': int(duration[i]),
+                                  'price_slope': p_slope[i], 'rsi_slope': r_slope[i],
+                                  'divergence_type': int(div[i])})
+        assert np.isclose(batch['geometry'][i], single['geometry_component'])
+        assert np.isclose(batch['momentum'][i], single['momentum_component'])
+        assert np.isclose(batch['base'][i], single['base_component'])
+        assert np.isclose(batch['total'][i], single['total'])
+
+    # Scalars broadcast
+    assert calculate_scores_batch([5.0, 10.0], 40)['total'].shape == (2,)
+
+
+def test_settings_reload_on_mtime_change():
+    original_path = scoring_engine.SETTINGS_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'scoring_settings.json')
+        settings = dict(scoring_engine.DEFAULT_SETTINGS, BASE_WEIGHT=5.0)
+        with open(path, 'w') as f:
+            json.dump(settings, f)
+        try:
+            scoring_engine.SETTINGS_PATH = path
+            assert get_settings()['BASE_WEIGHT'] == 5.0
+            first = get_settings()
+            assert get_settings() is first  # unchanged file: no re-read
+
+            with open(path, 'w') as f:
+                json.dump(dict(settings, BASE_WEIGHT=7.0), f)
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            assert get_settings()['BASE_WEIGHT'] == 7.0
+            assert calculate_scores_batch([0.0], [0])['base'][0] == 7.0
+        finally:
+            scoring_engine.SETTINGS_PATH = original_path
+            get_settings()
+
+
+def test_debug_output_gated_by_level():
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    scoring_engine.logger.addHandler(handler)
+    try:
+        set_log_level('INFO')
+        calculate_score({'price_change_pct': 5.0, 'duration_candles': 40})
+        assert stream.getvalue() == ''
+        set_log_level('DEBUG')
+        calculate_score({'symbol': 'BTCUSDT', 'price_change_pct': 5.0, 'duration_candles': 40})
+        assert '[SCORE-DEBUG] BTCUSDT' in stream.getvalue()
+    finally:
+        scoring_engine.logger.removeHandler(handler)
+        set_log_level('INFO')
+
+
+if __name__ == "__main__":
+    test_batch_matches_scalar()
+    test_settings_reload_on_mtime_change()
+    test_debug_output_gated_by_level()
+    print("✓ Scoring engine tests passed")
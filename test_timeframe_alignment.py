@@ -0,0 +1,88 @@
+"""
+Timeframe Alignment Test - Verify the LTF/HTF index arrays in SharedContext.
+
+Checks:
+1. ltf_to_htf / htf_to_ltf match a brute-force "last closed bar" search,
+   including gaps and an LTF history that starts before the HTF one
+2. The forming HTF bar is never mapped (no look-ahead)
+3. Gathers give HTF values per LTF bar, NaN before the first closed HTF bar
+4. The index is built once per context and carried into point-in-time views
+"""
+
+import numpy as np
+import pandas as pd
+
+from shared_context import SharedContext, align_timeframes, bar_interval_ms, gather
+from parameter_sweep import context_at, LTF_MS, HTF_MS
+
+T0 = 1768838400000
+
+
+def _frame(times):
+    return pd.DataFrame({'timestamp': np.asarray(times, dtype=np.int64),
+                         'close': np.arange(len(times), dtype=float) + 100.0})
+
+
+def _brute_force(ltf_ts, htf_ts):
+    ltf_to_htf = [max([j for j, t in enumerate(htf_ts) if t + HTF_MS <= l + LTF_MS], default=-1) for l in ltf_ts]
+    htf_to_ltf = [max([i for i, l in enumerate(ltf_ts) if l + LTF_MS <= t + HTF_MS], default=-1) for t in htf_ts]
+    return ltf_to_htf, htf_to_ltf
+
+
+def test_matches_brute_force():
+    # LTF starts 2h before the HTF series, has a 3h gap, and ends mid-way through a forming HTF bar
+    ltf_ts = [T0 - 2 * 3600000 + k * LTF_MS for k in range(200) if not 40 <= k < 52]
+    htf_ts = [T0 + k * HTF_MS for k in range(13)]
+    ltf_to_htf, htf_to_ltf = align_timeframes(ltf_ts, htf_ts)
+    expected = _brute_force(ltf_ts, htf_ts)
+    assert ltf_to_htf.tolist() == expected[0]
+    assert htf_to_ltf.tolist() == expected[1]
+
+    assert bar_interval_ms(np.asarray(ltf_ts)) == LTF_MS
+    # The first HTF bar closes with the 24th LTF bar
+    assert ltf_to_htf[:23].tolist() == [-1] * 23 and ltf_to_htf[23] == 0
+    # The last HTF bar is still forming at the last LTF close
+    assert ltf_to_htf[-1] == len(htf_ts) - 2
+
+
+def test_gather_and_context():
+    ltf = _frame([T0 + k * LTF_MS for k in range(64)])
+    htf = _frame([T0 + k * HTF_MS for k in range(4)])
+    context = SharedContext(symbol='TESTUSDT', canonical_symbol='TEST', exchange='MEXC',
+                            ltf_data=ltf, htf_data=htf)
+    context.htf_indicators['rsi'] = pd.Series([40.0, 50.0, 60.0, 70.0])
+
+    ltf_to_htf, htf_to_ltf = context.alignment()
+    assert context.alignment()[0] is ltf_to_htf  # built once
+    assert htf_to_ltf.tolist() == [15, 31, 47, 63]
+
+    rsi = gather(context.htf_indicators['rsi'], ltf_to_htf)
+    assert np.isnan(rsi[:15]).all()
+    assert rsi[15] == 40.0 and rsi[16] == 40.0 and rsi[31] == 50.0 and rsi[-1] == 70.0
+    assert gather(htf['close'], ltf_to_htf)[47] == 102.0
+    assert np.isnan(gather([], np.array([0, -1]))).all()
+
+    no_htf = SharedContext(symbol='TESTUSDT', canonical_symbol='TEST', exchange='MEXC', ltf_data=ltf)
+    assert (no_htf.alignment()[0] == -1).all() and len(no_htf.alignment()[1]) == 0
+
+
+def test_point_in_time_views_reuse_index():
+    ltf = _frame([T0 + k * LTF_MS for k in range(16 * 30)])
+    htf = _frame([T0 + k * HTF_MS for k in range(30)])
+    base = SharedContext(symbol='TESTUSDT', canonical_symbol='TEST', exchange='MEXC', ltf_data=ltf, htf_data=htf)
+    base.alignment()
+    for htf_end in (0, 7, 29):
+        view = context_at(base, htf_end)
+        cutoff = int(htf['timestamp'].iloc[htf_end]) + HTF_MS
+        assert len(view.ltf_data) == int(np.searchsorted(ltf['timestamp'].to_numpy() + LTF_MS, cutoff, side='right'))
+        assert view.ltf_to_htf is not None and len(view.ltf_to_htf) == len(view.ltf_data)
+        # Carried over, so a one-bar HTF view (no interval to infer) still maps correctly
+        assert view.alignment()[0].tolist() == align_timeframes(view.ltf_data['timestamp'], view.htf_data['timestamp'],
+                                                                 LTF_MS, HTF_MS)[0].tolist()
+
+
+if __name__ == "__main__":
+    test_matches_brute_force()
+    test_gather_and_context()
+    test_point_in_time_views_reuse_index()
+    print("✓ Timeframe alignment tests passed")
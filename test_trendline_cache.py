@@ -0,0 +1,114 @@
+"""
+Trendline Cache Test - Verify memoized trendline searches stay exact.
+
+Checks:
+1. Bar-by-bar, cached detection equals the full search and mostly hits
+2. Unchanged HTF data is served from the cache files in a new process
+3. Changed pivots, a window end moving backwards or a winner leaving the
+   RSI range force the full search; unreadable files are ignored
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from shared_context import FeatureFactory, SharedContext, create_default_config
+from trendline_cache import TrendlineCache
+
+
+def _rsi(n, seed=3):
+    rng = np.random.default_rng(seed)
+    walk = np.cumsum(rng.normal(0, 1, n))
+    rsi = 50 + 30 * np.sin(np.arange(n) / 17) + 5 * np.sin(walk / 3) + rng.normal(0, 2, n)
+    return np.clip(rsi, 1, 99)
+
+
+def test_cached_search_matches_full_search():
+    config = create_default_config()
+    rsi = _rsi(700)
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = FeatureFactory(config)
+        cached = FeatureFactory(config, TrendlineCache(tmp))
+        memo = {}
+        for end in range(300, len(rsi)):
+            series = pd.Series(rsi[:end])
+            assert cached._detect_rsi_trendlines(series, None, memo, 'htf') == plain._detect_rsi_trendlines(series)
+        # A new bar every call is the worst case; most bars leave the pivot set alone
+        assert cached.trendline_cache.hit_rate() > 0.8
+
+
+def _context(rsi, timestamps):
+    htf = pd.DataFrame({'timestamp': timestamps, 'close': rsi})
+    context = SharedContext(symbol='BTCUSDT', canonical_symbol='BTC', exchange='MEXC',
+                            ltf_data=htf.copy(), htf_data=htf)
+    context.htf_indicators['rsi'] = pd.Series(rsi)
+    return context
+
+
+def test_unchanged_data_reused_across_processes():
+    config = create_default_config()
+    rsi = _rsi(400, seed=7)
+    timestamps = 1768838400000 + np.arange(len(rsi)) * 14400000
+    with tempfile.TemporaryDirectory() as tmp:
+        first = FeatureFactory(config, TrendlineCache(tmp))
+        context = _context(rsi, timestamps)
+        first.detect_trendlines(context, timeframes=('htf',))
+        assert first.trendline_cache.stats == {'hits': 0, 'misses': 2}
+        assert os.listdir(tmp) == ['MEXC_BTCUSDT.json']
+
+        # Next scan, same 4h candles: no search at all
+        second = FeatureFactory(config, TrendlineCache(tmp))
+        again = _context(rsi, timestamps)
+        second.detect_trendlines(again, timeframes=('htf',))
+        assert second.trendline_cache.stats == {'hits': 2, 'misses': 0}
+        assert again.htf_indicators['rsi_trendlines'] == context.htf_indicators['rsi_trendlines']
+        assert again.htf_indicators['rsi_trendlines'] == \
+            FeatureFactory(config)._detect_rsi_trendlines(pd.Series(rsi), pd.Series(timestamps))
+
+
+def test_invalidation():
+    config = create_default_config()
+    cache = TrendlineCache(tempfile.gettempdir())
+    rsi = np.full(61, 50.0)
+    rsi[5], rsi[25] = 40.0, 60.0  # slope 1.0 line through both pivots
+    pivots = [{'index': 5, 'value': 40.0}, {'index': 25, 'value': 60.0}]
+    winner = {'p1_idx': 5, 'p2_idx': 25, 'slope': 1.0, 'intercept': 35.0, 'duration': 20,
+              'pivots_touched': 2, 'pivot_indices': [5, 25], 'score': 70}
+    memo = {}
+    cache.store(memo, 'htf:RESISTANCE', rsi, pivots, 'RESISTANCE', config, winner)
+
+    hit, line = cache.lookup(memo, 'htf:RESISTANCE', rsi, pivots, 'RESISTANCE', config)
+    assert hit and line == winner
+
+    # Same pivots, window slid forward by 10 bars (first pivot at 15): still exact
+    slid = np.concatenate([np.full(10, 50.0), rsi])
+    shifted = [{'index': p['index'] + 10, 'value': p['value']} for p in pivots]
+    hit, line = cache.lookup(memo, 'htf:RESISTANCE', slid, shifted, 'RESISTANCE', config)
+    assert hit and (line['p1_idx'], line['p2_idx'], line['slope']) == (15, 35, 1.0)
+
+    # Projected value at the last bar: 35 + 100 = 135 > 110
+    longer = np.concatenate([rsi, np.full(40, 50.0)])
+    assert cache.lookup(memo, 'htf:RESISTANCE', longer, pivots, 'RESISTANCE', config) == (False, None)
+    # Window end before the cached one
+    assert cache.lookup(memo, 'htf:RESISTANCE', rsi[:50], pivots, 'RESISTANCE', config) == (False, None)
+    # A bar between the pivots changed
+    changed = rsi.copy()
+    changed[12] = 45.0
+    assert cache.lookup(memo, 'htf:RESISTANCE', changed, pivots, 'RESISTANCE', config) == (False, None)
+    # Different search parameters
+    assert cache.lookup(memo, 'htf:RESISTANCE', rsi, pivots, 'RESISTANCE',
+                        dict(config, rsi_tolerance=2.0)) == (False, None)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'MEXC_BTCUSDT.json'), 'w') as f:
+            f.write('{"htf:RESIST')
+        assert TrendlineCache(tmp).load('MEXC', 'BTCUSDT') == {}
+
+
+if __name__ == "__main__":
+    test_cached_search_matches_full_search()
+    test_unchanged_data_reused_across_processes()
+    test_invalidation()
+    print("✓ Trendline cache tests passed")
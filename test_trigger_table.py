@@ -0,0 +1,106 @@
+"""
+Trigger Table Test - Verify reverse-RSI trigger prices and watchlist evaluation.
+"""
+
+import numpy as np
+import pandas as pd
+from shared_context import SharedContext, create_default_config
+from strategies_refactored import QuantProBreakoutRefactored, QuantProBreakoutV2Refactored, QuantProLegacyRefactored
+from trigger_table import wilder_averages, reverse_rsi_price, build_symbol_triggers, TriggerWatchlist
+
+
+def _loop_averages(close, period=14):
+    """Reference: the SMA-seeded loop from services/indicators.ts."""
+    diff = np.diff(close)
+    g, l = np.clip(diff, 0, None), np.clip(-diff, 0, None)
+    avg_g, avg_l = g[:period].mean(), l[:period].mean()
+    out = [(avg_g, avg_l)]
+    for i in range(period, len(diff)):
+        avg_g = (avg_g * (period - 1) + g[i]) / period
+        avg_l = (avg_l * (period - 1) + l[i]) / period
+        out.append((avg_g, avg_l))
+    return out
+
+
+def _rsi_from(close, period=14):
+    avg_gain, avg_loss = wilder_averages(np.asarray(close, dtype=float), period)
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def _close(seed, n=400):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+
+
+def test_wilder_averages_match_reference_loop():
+    close = _close(0)
+    avg_gain, avg_loss = wilder_averages(close)
+    reference = _loop_averages(close)
+    assert np.allclose(avg_gain[14:], [g for g, _ in reference])
+    assert np.allclose(avg_loss[14:], [l for _, l in reference])
+
+
+def test_reverse_rsi_hits_target():
+    close = _close(1)
+    avg_gain, avg_loss = wilder_averages(close)
+    current = _rsi_from(close)[-1]
+    for target in (current + 7.5, current - 7.5):
+        price = reverse_rsi_price(target, close[-1], avg_gain[-1], avg_loss[-1])
+        assert abs(_rsi_from(np.append(close, price))[-1] - target) < 1e-9
+
+
+def _context(close, slope, intercept, side_key):
+    df = pd.DataFrame({'timestamp': np.arange(len(close)) * 14400000, 'close': close})
+    context = SharedContext(symbol='TESTUSDT', canonical_symbol='TEST', exchange='MEXC',
+                            ltf_data=df, htf_data=df, config=create_default_config())
+    context.htf_indicators['rsi'] = pd.Series(_rsi_from(close))
+    context.htf_indicators['rsi_trendlines'] = {side_key: {'slope': slope, 'intercept': intercept}}
+    return context
+
+
+def test_trigger_rows_close_rsi_on_the_line():
+    close = _close(2)
+    forming = close.copy()
+    rsi_prev = _rsi_from(close[:-1])[-1]
+    idx = len(close) - 1
+    # Flat resistance 5 points above the last closed RSI
+    context = _context(forming, 0.0, rsi_prev + 5, 'resistance')
+    strategies = [QuantProBreakoutRefactored({}), QuantProBreakoutV2Refactored({}), QuantProLegacyRefactored({})]
+    rows = build_symbol_triggers(context, strategies)
+
+    assert {r['strategy'] for r in rows} == {'Breakout', 'BreakoutV2'}
+    assert all(r['side'] == 'LONG' and r['valid_until'] == idx * 14400000 + 14400000 for r in rows)
+    for row in rows:
+        rsi_at_trigger = _rsi_from(np.append(close[:-1], row['trigger_price']))[-1]
+        assert abs(rsi_at_trigger - row['target_rsi']) < 1e-3
+    by_strategy = {r['strategy']: r['trigger_price'] for r in rows}
+    assert by_strategy['BreakoutV2'] > by_strategy['Breakout']
+
+    # Already above the line on the last closed candle: no trigger
+    assert build_symbol_triggers(_context(forming, 0.0, rsi_prev - 5, 'resistance'), strategies) == []
+
+
+def test_watchlist_fires_once_per_trigger():
+    rows = [
+        {'exchange': 'MEXC', 'symbol': 'AUSDT', 'side': 'LONG', 'trigger_price': p, 'valid_until': 1000, 'strategy': 'Breakout'}
+        for p in (105.0, 101.0, 103.0)
+    ] + [
+        {'exchange': 'MEXC', 'symbol': 'AUSDT', 'side': 'SHORT', 'trigger_price': 95.0, 'valid_until': 1000, 'strategy': 'Breakout'}
+    ]
+    watchlist = TriggerWatchlist(rows)
+    assert len(watchlist) == 4
+    assert watchlist.on_tick('MEXC', 'AUSDT', 100.0, 10) == []
+    assert [a['trigger_price'] for a in watchlist.on_tick('MEXC', 'AUSDT', 103.5, 20)] == [101.0, 103.0]
+    assert watchlist.on_tick('MEXC', 'AUSDT', 103.5, 30) == []
+    assert watchlist.on_tick('KUCOIN', 'AUSDT', 200.0, 30) == []
+    # Expired trigger is dropped, not fired
+    assert watchlist.on_tick('MEXC', 'AUSDT', 106.0, 2000) == []
+    assert [a['side'] for a in watchlist.on_tick('MEXC', 'AUSDT', 94.0, 500)] == ['SHORT']
+
+
+if __name__ == "__main__":
+    test_wilder_averages_match_reference_loop()
+    test_reverse_rsi_hits_target()
+    test_trigger_rows_close_rsi_on_the_line()
+    test_watchlist_fires_once_per_trigger()
+    print("✓ Trigger table tests passed")
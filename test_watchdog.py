@@ -0,0 +1,138 @@
+"""
+Watchdog Test - Verify per-symbol time budgets and the killable worker pool.
+
+Checks:
+1. check_budget() is a no-op without an active budget and raises with the stage name
+2. The trendline pivot-pair search cancels cooperatively
+3. WatchdogPool kills a stuck worker, reports its stage and keeps serving tasks
+4. Timed-out symbols are served their last known signals, marked stale
+"""
+
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from shared_context import SharedContext, FeatureFactory, create_default_config
+from watchdog import (TimeBudget, BudgetExceeded, WatchdogPool, active_budget, budget_stage,
+                      check_budget, parse_stage_budgets)
+from market_scanner_refactored import load_last_known_signals, serve_last_known
+
+
+def test_budget_stages():
+    check_budget()  # no active budget
+
+    budget = TimeBudget(stage_seconds={'trendlines': 0.01})
+    with active_budget(budget):
+        with budget_stage('indicators'):
+            time.sleep(0.02)
+            check_budget()  # no budget for this stage
+        try:
+            with budget_stage('trendlines'):
+                time.sleep(0.02)
+                check_budget()
+            assert False, "stage budget not enforced"
+        except BudgetExceeded as e:
+            assert e.stage == 'trendlines'
+
+    # Exhausted symbol budget fails at the next stage boundary
+    budget = TimeBudget(symbol_seconds=0.01)
+    time.sleep(0.02)
+    try:
+        with active_budget(budget), budget_stage('strategies'):
+            pass
+        assert False, "symbol budget not enforced"
+    except BudgetExceeded as e:
+        assert e.stage == 'strategies'
+
+    # Broad `except Exception` handlers must not swallow it
+    assert not issubclass(BudgetExceeded, Exception)
+
+    assert parse_stage_budgets('trendlines=10, strategies=2.5') == {'trendlines': 10.0, 'strategies': 2.5}
+    try:
+        parse_stage_budgets('pivots=1')
+        assert False, "unknown stage accepted"
+    except ValueError:
+        pass
+
+
+def _oscillating_context():
+    t = np.arange(300)
+    rsi = pd.Series(50 + 30 * np.sin(t / 4.0) * np.exp(-t / 400.0))
+    df = pd.DataFrame({'timestamp': t * 60_000, 'close': 100.0 + t})
+    context = SharedContext(symbol='TESTUSDT', canonical_symbol='TEST', exchange='MEXC',
+                            ltf_data=df, htf_data=df, config=create_default_config())
+    context.ltf_indicators['rsi'] = rsi
+    context.htf_indicators['rsi'] = rsi
+    return context
+
+
+def test_trendline_search_cancels():
+    factory = FeatureFactory(create_default_config())
+    context = _oscillating_context()
+    factory.detect_trendlines(context)  # unbudgeted: completes
+
+    budget = TimeBudget(symbol_seconds=1e-9)
+    try:
+        with active_budget(budget):
+            budget.current_stage = 'trendlines'
+            factory.detect_trendlines(_oscillating_context())
+        assert False, "trendline search did not cancel"
+    except BudgetExceeded as e:
+        assert e.stage == 'trendlines'
+
+
+def _task(seconds):
+    if seconds < 0:
+        raise ValueError("bad file")
+    with active_budget(TimeBudget()), budget_stage('trendlines'):
+        time.sleep(seconds)
+    return seconds
+
+
+def test_pool_kills_stuck_worker():
+    with WatchdogPool(_task, workers=2, hard_timeout=0.5) as pool:
+        for key, seconds in (('fast', 0.01), ('stuck', 30), ('bad', -1), ('after', 0.01)):
+            pool.submit(key, seconds)
+        started = time.monotonic()
+        outcomes = {key: (status, payload) for key, status, payload in pool.results()}
+        assert time.monotonic() - started < 10
+
+    assert outcomes['fast'] == ('ok', 0.01)
+    assert outcomes['after'] == ('ok', 0.01)
+    assert outcomes['bad'][0] == 'error' and 'bad file' in outcomes['bad'][1]['error']
+    status, payload = outcomes['stuck']
+    assert status == 'killed' and payload['stage'] == 'trendlines'
+    assert pool.killed == 1
+
+
+def test_last_known_signals():
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'master_feed.json')
+        assert load_last_known_signals(output) == {}
+        feed = {'last_updated': 123, 'signals': [
+            {'canonical_symbol': 'TEST', 'strategy_name': 'Breakout', 'details': {'score': 1}},
+            {'canonical_symbol': 'TEST', 'strategy_name': 'Legacy', 'details': {'stale_since': 7}},
+            {'canonical_symbol': 'OTHER', 'strategy_name': 'Breakout'},
+        ]}
+        with open(output, 'w') as f:
+            json.dump(feed, f)
+
+        last_known = load_last_known_signals(output)
+        served = serve_last_known(last_known, 'TEST', 'Timeout in trendlines')
+        assert [s['strategy_name'] for s in served] == ['Breakout', 'Legacy']
+        assert all(s['details']['stale_reason'] == 'Timeout in trendlines' for s in served)
+        assert [s['details']['stale_since'] for s in served] == [123, 7]
+        assert serve_last_known(last_known, 'MISSING', 'x') == []
+        assert 'stale_reason' not in last_known['TEST'][0]['details']
+
+
+if __name__ == "__main__":
+    test_budget_stages()
+    test_trendline_search_cancels()
+    test_pool_kills_stuck_worker()
+    test_last_known_signals()
+    print("✓ Watchdog tests passed")
@@ -0,0 +1,174 @@
+"""
+Trendline Cache - Persistent per-symbol memo of the RSI trendline search
+
+FeatureFactory._find_valid_trendline tries every (extreme pivot, later pivot)
+pair and validates each candidate bar by bar. Its result only depends on:
+- the pivot set: pivot positions relative to the first pivot and the RSI values
+  from the first to the last pivot (bars between pivots are validated, pivots
+  after P2 add touches)
+- the distance from the first pivot to the end of the lookback window (the
+  "projects out of RSI bounds at the last bar" filter)
+- the search parameters
+
+The fingerprint covers the first and third (values rounded to 1e-6, positions
+relative to the first pivot, so a window that merely slides forward still
+matches). For the second: as the window end moves forward a candidate line
+only drifts further in the direction of its slope, so candidates rejected by
+the bounds filter stay rejected. A cached result is therefore exact if the
+fingerprint matches, the window end has not moved backwards and the cached
+winner still passes the bounds filter; otherwise the full search runs.
+
+Bars after P2 are not validated by the search (a break of the line is what
+the strategies look for), so new bars crossing the cached line do not
+invalidate it - the search would return the same line.
+
+One JSON file per symbol in the cache directory:
+    {"htf:RESISTANCE": {"fingerprint": "...", "end": 97, "line": {...} | null}, ...}
+"""
+
+import os
+import json
+import hashlib
+from typing import Dict, Any, Optional, List, Tuple
+
+import numpy as np
+
+from scan_logging import get_logger
+
+logger = get_logger('trendline_cache')
+
+DEFAULT_CACHE_DIR_NAME = 'trendline_cache'
+FINGERPRINT_DECIMALS = 6
+
+# Config keys that change the outcome of the pivot/trendline search
+SEARCH_KEYS = (
+    'rsi_pivot_order', 'rsi_trendline_lookback', 'rsi_min_slope', 'rsi_max_slope',
+    'rsi_tolerance', 'rsi_first_pivot_resistance_min', 'rsi_first_pivot_support_max',
+    'rsi_min_pivot_distance'
+)
+
+# Same bounds as the projected_end filter in FeatureFactory._find_valid_trendline
+PROJECTION_MIN = -10
+PROJECTION_MAX = 110
+
+
+def pivot_fingerprint(rsi_values: np.ndarray, pivots: List[Dict[str, Any]], direction: str,
+                      config: Dict[str, Any]) -> str:
+    """Hash of everything the trendline search reads except the window end."""
+    first, last = pivots[0]['index'], pivots[-1]['index']
+    digest = hashlib.sha256()
+    digest.update(direction.encode('utf-8'))
+    digest.update(json.dumps([config.get(key) for key in SEARCH_KEYS]).encode('utf-8'))
+    digest.update(np.asarray([p['index'] - first for p in pivots], dtype=np.int64).tobytes())
+    values = np.round(np.asarray(rsi_values[first:last + 1], dtype=np.float64), FINGERPRINT_DECIMALS)
+    digest.update((values + 0.0).tobytes())  # + 0.0 folds -0.0 into 0.0
+    return digest.hexdigest()[:32]
+
+
+def _encode_line(trendline: Optional[Dict[str, Any]], first: int) -> Optional[Dict[str, Any]]:
+    """Search result with indices relative to the first pivot."""
+    if trendline is None:
+        return None
+    return {
+        'p1': int(trendline['p1_idx'] - first),
+        'p2': int(trendline['p2_idx'] - first),
+        'touches': [int(idx - first) for idx in trendline['pivot_indices']],
+        'pivots_touched': int(trendline['pivots_touched']),
+        'score': float(trendline['score'])
+    }
+
+
+def _decode_line(line: Dict[str, Any], first: int, rsi_values: np.ndarray) -> Dict[str, Any]:
+    """Rebuild the _find_valid_trendline result on the current window."""
+    p1_idx, p2_idx = first + line['p1'], first + line['p2']
+    duration = p2_idx - p1_idx
+    slope = (float(rsi_values[p2_idx]) - float(rsi_values[p1_idx])) / duration
+    return {
+        'p1_idx': p1_idx,
+        'p2_idx': p2_idx,
+        'slope': slope,
+        'intercept': float(rsi_values[p1_idx]) - slope * p1_idx,
+        'duration': duration,
+        'pivots_touched': line['pivots_touched'],
+        'pivot_indices': [first + offset for offset in line['touches']],
+        'score': line['score']
+    }
+
+
+class TrendlineCache:
+    """
+    Per-symbol trendline memo files plus hit/miss counters.
+
+    FeatureFactory.detect_trendlines loads a symbol's entries once, passes them
+    through lookup/store for each timeframe and direction, and saves them if
+    anything was (re)computed. Without a directory only lookup/store on
+    caller-held entries are available (in-process memo, e.g. the backtests).
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def _path(self, exchange: str, symbol: str) -> str:
+        return os.path.join(self.directory, f"{exchange.upper()}_{symbol}.json")
+
+    def load(self, exchange: str, symbol: str) -> Dict[str, Any]:
+        try:
+            with open(self._path(exchange, symbol), 'r') as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("[TRENDLINE-CACHE] Ignoring unreadable cache for %s_%s: %s", exchange, symbol, e)
+            return {}
+
+    def save(self, exchange: str, symbol: str, entries: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(exchange, symbol)
+        temp_file = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_file, 'w') as f:
+                json.dump(entries, f)
+            os.replace(temp_file, path)
+        except OSError as e:
+            logger.warning("[TRENDLINE-CACHE] Failed to save %s: %s", path, e)
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+    def lookup(self, entries: Dict[str, Any], key: str, rsi_values: np.ndarray, pivots: List[Dict[str, Any]],
+               direction: str, config: Dict[str, Any]) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        (True, trendline or None) if the cached search result for `key` is still
+        exact for this window, (False, None) if the full search has to run.
+        """
+        entry = entries.get(key)
+        first = pivots[0]['index']
+        end = len(rsi_values) - 1 - first
+        if (entry is None or entry.get('end', end + 1) > end
+                or entry.get('fingerprint') != pivot_fingerprint(rsi_values, pivots, direction, config)):
+            self.stats['misses'] += 1
+            return False, None
+        line = entry.get('line')
+        trendline = _decode_line(line, first, rsi_values) if line else None
+        if trendline is not None:
+            projected_end = trendline['slope'] * (len(rsi_values) - 1) + trendline['intercept']
+            if projected_end < PROJECTION_MIN or projected_end > PROJECTION_MAX:
+                # The winner left the RSI range; a runner-up may take over
+                self.stats['misses'] += 1
+                return False, None
+        self.stats['hits'] += 1
+        return True, trendline
+
+    def store(self, entries: Dict[str, Any], key: str, rsi_values: np.ndarray, pivots: List[Dict[str, Any]],
+              direction: str, config: Dict[str, Any], trendline: Optional[Dict[str, Any]]) -> None:
+        first = pivots[0]['index']
+        entries[key] = {
+            'fingerprint': pivot_fingerprint(rsi_values, pivots, direction, config),
+            'end': len(rsi_values) - 1 - first,
+            'line': _encode_line(trendline, first)
+        }
+
+    def hit_rate(self) -> Optional[float]:
+        total = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / total if total else None
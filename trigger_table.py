@@ -0,0 +1,238 @@
+"""
+Trigger Table - Reverse-RSI breakout prices and a tick-level watchlist.
+
+For every HTF RSI trendline the scanner already knows the line value at the
+forming candle and the Wilder averages up to the last closed candle. That is
+enough to solve for the exact price at which RSI crosses the line (the
+reverse-RSI math of QuantProBreakout.calculate_reverse_rsi). The scanner
+exports these prices as a compact table; TriggerWatchlist then checks price
+ticks against thousands of triggers with a binary search per tick, without
+running any indicator code.
+
+Table row:
+    {symbol, canonical_symbol, exchange, strategy, side,
+     trigger_price, target_rsi, valid_until}
+
+A LONG trigger fires when price >= trigger_price, a SHORT trigger when
+price <= trigger_price, until valid_until (close time of the forming HTF
+candle; the line moves with every new candle).
+"""
+
+import os
+import sys
+import json
+import bisect
+import argparse
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+import numpy as np
+from scipy.signal import lfilter
+
+from shared_context import SharedContext
+
+
+DEFAULT_TRIGGER_FILE = os.path.join(os.path.dirname(__file__), 'data', 'trigger_table.json')
+
+
+def wilder_averages(close: np.ndarray, period: int = 14) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Wilder (RMA) average gain/loss per candle, SMA-seeded like services/indicators.ts.
+    Values before index `period` are NaN. Implemented with lfilter, no Python loop.
+    """
+    n = len(close)
+    avg_gain = np.full(n, np.nan)
+    avg_loss = np.full(n, np.nan)
+    if n < period + 1:
+        return avg_gain, avg_loss
+
+    delta = np.diff(close)
+    gains = np.clip(delta, 0, None)
+    losses = np.clip(-delta, 0, None)
+
+    # y[i] = y[i-1] * (N-1)/N + x[i] / N, seeded with the SMA of the first N moves
+    b, a = [1.0 / period], [1.0, -(period - 1) / period]
+    for src, dst in ((gains, avg_gain), (losses, avg_loss)):
+        seed = src[:period].mean()
+        dst[period] = seed
+        if n > period + 1:
+            zi = [seed * (period - 1) / period]
+            dst[period + 1:], _ = lfilter(b, a, src[period:], zi=zi)
+    return avg_gain, avg_loss
+
+
+def reverse_rsi_price(rsi_target: float, close_prev: float, avg_gain_prev: float,
+                      avg_loss_prev: float, period: int = 14) -> Optional[float]:
+    """
+    Price at which the next candle's RSI equals rsi_target.
+    Same formula as QuantProBreakout.calculate_reverse_rsi; None if unreachable.
+    """
+    if not 0 < rsi_target < 100:
+        return None
+    rs_target = rsi_target / (100 - rsi_target)
+
+    # Upside move: the new candle adds only to the gain average
+    delta_up = (period - 1) * (rs_target * avg_loss_prev - avg_gain_prev)
+    if delta_up >= 0:
+        return float(close_prev + delta_up)
+
+    # Downside move: the new candle adds only to the loss average
+    delta_down = (period - 1) * (avg_loss_prev - avg_gain_prev / rs_target)
+    price = close_prev + delta_down
+    return float(price) if price > 0 else None
+
+
+def build_symbol_triggers(context: SharedContext, strategies: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Trigger rows for one symbol from its HTF RSI trendlines.
+
+    Strategies opt in with a `trigger_rsi_buffer` attribute (RSI points beyond
+    the line their analyze() requires). The line is evaluated at the same
+    index the strategies use (len(rsi_series) - 1). Lines the last closed
+    candle has already crossed are skipped: the scan itself handles those.
+    """
+    df = context.htf_data
+    trendlines = context.get_htf_indicator('rsi_trendlines', {})
+    rsi_series = context.get_htf_indicator('rsi')
+    buffers = [(s.name, s.trigger_rsi_buffer) for s in strategies if hasattr(s, 'trigger_rsi_buffer')]
+    if df is None or len(df) < 3 or not trendlines or rsi_series is None or not buffers:
+        return []
+
+    period = context.config.get('rsi_period', 14)
+    close = df['close'].to_numpy(dtype=float)
+    avg_gain, avg_loss = wilder_averages(close, period)
+    prev = len(close) - 2
+    if np.isnan(avg_gain[prev]) or np.isnan(avg_loss[prev]):
+        return []
+
+    valid_until = 0
+    if 'timestamp' in df.columns:
+        ts = df['timestamp'].to_numpy()
+        valid_until = int(ts[-1] + (ts[-1] - ts[-2]))
+
+    current_idx = len(rsi_series) - 1
+    rsi_prev = rsi_series.iloc[-2]
+    rows = []
+    for key, side in (('resistance', 'LONG'), ('support', 'SHORT')):
+        line = trendlines.get(key)
+        if not line:
+            continue
+        line_val = line['slope'] * current_idx + line['intercept']
+        line_prev = line['slope'] * (current_idx - 1) + line['intercept']
+        if side == 'LONG' and rsi_prev > line_prev:
+            continue
+        if side == 'SHORT' and rsi_prev < line_prev:
+            continue
+
+        for strategy_name, buffer in buffers:
+            target = line_val + buffer if side == 'LONG' else line_val - buffer
+            price = reverse_rsi_price(target, close[prev], avg_gain[prev], avg_loss[prev], period)
+            if price is None:
+                continue
+            rows.append({
+                'symbol': context.symbol,
+                'canonical_symbol': context.canonical_symbol,
+                'exchange': context.exchange,
+                'strategy': strategy_name,
+                'side': side,
+                'trigger_price': price,
+                'target_rsi': round(float(target), 4),
+                'valid_until': valid_until
+            })
+    return rows
+
+
+@dataclass
+class _SideIndex:
+    """Triggers of one symbol and side, sorted by how soon price reaches them."""
+    keys: List[float] = field(default_factory=list)
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    fired: int = 0  # keys[:fired] have already fired
+
+
+class TriggerWatchlist:
+    """
+    Evaluates price ticks against a trigger table.
+
+    Per (exchange, symbol) the LONG triggers are sorted ascending and the SHORT
+    triggers by descending price (stored negated), so the triggers a tick
+    crosses are always a prefix found with one bisect: O(log n) per tick plus
+    the alerts emitted. Each trigger fires at most once.
+    """
+
+    def __init__(self, triggers: Iterable[Dict[str, Any]]):
+        self._index: Dict[Tuple[str, str, str], _SideIndex] = {}
+        entries: Dict[Tuple[str, str, str], List[Tuple[float, Dict[str, Any]]]] = {}
+        for row in triggers:
+            side = row['side']
+            key = (row['exchange'], row['symbol'], side)
+            sort_key = row['trigger_price'] if side == 'LONG' else -row['trigger_price']
+            entries.setdefault(key, []).append((sort_key, row))
+        for key, items in entries.items():
+            items.sort(key=lambda item: item[0])
+            self._index[key] = _SideIndex(keys=[k for k, _ in items], rows=[r for _, r in items])
+
+    def __len__(self) -> int:
+        return sum(len(idx.keys) for idx in self._index.values())
+
+    def on_tick(self, exchange: str, symbol: str, price: float, timestamp: int = 0) -> List[Dict[str, Any]]:
+        """Return the triggers crossed by this tick (expired triggers are dropped)."""
+        alerts = []
+        for side, sort_key in (('LONG', price), ('SHORT', -price)):
+            idx = self._index.get((exchange, symbol, side))
+            if idx is None:
+                continue
+            end = bisect.bisect_right(idx.keys, sort_key)
+            for row in idx.rows[idx.fired:end]:
+                if timestamp and row.get('valid_until') and timestamp > row['valid_until']:
+                    continue
+                alerts.append({**row, 'price': price, 'time': timestamp})
+            idx.fired = max(idx.fired, end)
+        return alerts
+
+
+def save_trigger_table(triggers: List[Dict[str, Any]], filename: str, generated_at: int) -> None:
+    """Atomically write the trigger table."""
+    temp_file = filename + '.tmp'
+    with open(temp_file, 'w') as f:
+        json.dump({'generated_at': generated_at, 'triggers': triggers}, f, separators=(',', ':'))
+    os.replace(temp_file, filename)
+
+
+def load_trigger_table(filename: str) -> List[Dict[str, Any]]:
+    with open(filename, 'r') as f:
+        return json.load(f).get('triggers', [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check price ticks against the scanner trigger table')
+    parser.add_argument('--table', default=DEFAULT_TRIGGER_FILE, help='Trigger table JSON')
+    parser.add_argument('--ticks', default='-',
+                        help='JSON-lines ticks {exchange, symbol, price, time} (default: stdin)')
+    args = parser.parse_args()
+
+    watchlist = TriggerWatchlist(load_trigger_table(args.table))
+    print(f"[WATCHLIST] Loaded {len(watchlist)} triggers from {args.table}", file=sys.stderr)
+
+    stream = sys.stdin if args.ticks == '-' else open(args.ticks, 'r')
+    try:
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                tick = json.loads(line)
+                alerts = watchlist.on_tick(tick['exchange'], tick['symbol'],
+                                           float(tick['price']), int(tick.get('time', 0)))
+            except (ValueError, KeyError) as e:
+                print(f"[WARN] Bad tick {line[:80]}: {e}", file=sys.stderr)
+                continue
+            for alert in alerts:
+                print(json.dumps(alert), flush=True)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+if __name__ == "__main__":
+    main()
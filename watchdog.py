@@ -0,0 +1,260 @@
+"""
+Watchdog - Per-symbol time budgets and a killable worker pool for directory scans.
+
+Cooperative cancellation:
+    TimeBudget holds a per-symbol budget and optional per-stage budgets
+    (load, indicators, prefilter, trendlines, triggers, strategies).
+    scan_data_file/analyze_symbol activate it for one symbol and mark each stage;
+    long loops (the pivot-pair search in FeatureFactory._find_valid_trendline,
+    the strategy loop) call check_budget(), which raises BudgetExceeded once
+    the symbol or the current stage is over budget. Without an active budget
+    check_budget() is a no-op.
+
+Hard kill:
+    Cooperative checks cannot interrupt a stuck pandas/numpy call.
+    WatchdogPool runs tasks in worker processes, one task per worker at a
+    time, and kills (then replaces) a worker whose task exceeds
+    `hard_timeout`. Each worker publishes its current stage in shared memory
+    so a killed task is still reported with the stage it was in.
+"""
+
+import time
+import contextvars
+import multiprocessing as mp
+from multiprocessing.connection import wait
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable, Iterator, Tuple, List
+
+
+STAGES = ('load', 'indicators', 'prefilter', 'trendlines', 'triggers', 'strategies')
+
+_current_budget: contextvars.ContextVar = contextvars.ContextVar('scan_budget', default=None)
+
+# Set in pool workers: shared buffer the parent reads when it has to kill the worker
+_stage_sink = None
+
+
+class BudgetExceeded(BaseException):
+    """
+    Raised by check_budget() when a symbol or stage runs over its budget.
+
+    Derives from BaseException (like asyncio.CancelledError) so the broad
+    `except Exception` handlers in the feature and strategy code let it through.
+    """
+
+    def __init__(self, stage: str, elapsed: float, limit: float):
+        self.stage = stage
+        self.elapsed = elapsed
+        self.limit = limit
+        super().__init__(f"{stage} exceeded {limit:.1f}s budget ({elapsed:.1f}s)")
+
+
+class TimeBudget:
+    """
+    Time budget for one symbol.
+
+    Args:
+        symbol_seconds: Budget for the whole symbol (None/0 = unlimited)
+        stage_seconds: Optional budget per stage name
+    """
+
+    def __init__(self, symbol_seconds: Optional[float] = None,
+                 stage_seconds: Optional[Dict[str, float]] = None):
+        self.symbol_seconds = symbol_seconds or None
+        self.stage_seconds = stage_seconds or {}
+        self.started = time.monotonic()
+        self.current_stage = 'symbol'
+        self.last_stage = None  # last stage entered (where an error surfaced)
+        self._stage_started = self.started
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mark the current stage; checks the budget on entry."""
+        previous = self.current_stage
+        self.current_stage = self.last_stage = name
+        self._stage_started = time.monotonic()
+        _report_stage(name)
+        try:
+            self.check()
+            yield self
+        finally:
+            self.current_stage = previous
+
+    def check(self) -> None:
+        now = time.monotonic()
+        if self.symbol_seconds and now - self.started > self.symbol_seconds:
+            raise BudgetExceeded(self.current_stage, now - self.started, self.symbol_seconds)
+        limit = self.stage_seconds.get(self.current_stage)
+        if limit and now - self._stage_started > limit:
+            raise BudgetExceeded(self.current_stage, now - self._stage_started, limit)
+
+
+@contextmanager
+def active_budget(budget: Optional[TimeBudget]):
+    """Make `budget` the one check_budget() consults (per thread / context)."""
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+
+@contextmanager
+def budget_stage(name: str):
+    """Enter a stage of the active budget (no-op without one)."""
+    budget = _current_budget.get()
+    if budget is None:
+        yield None
+        return
+    with budget.stage(name):
+        yield budget
+
+
+def check_budget() -> None:
+    """Cooperative cancellation point."""
+    budget = _current_budget.get()
+    if budget is not None:
+        budget.check()
+
+
+def parse_stage_budgets(spec: Optional[str]) -> Dict[str, float]:
+    """Parse 'trendlines=10,strategies=5' into {stage: seconds}."""
+    budgets: Dict[str, float] = {}
+    for part in (spec or '').split(','):
+        if not part.strip():
+            continue
+        name, _, seconds = part.partition('=')
+        name = name.strip()
+        if name not in STAGES:
+            raise ValueError(f"Unknown stage '{name}' (expected one of {', '.join(STAGES)})")
+        budgets[name] = float(seconds)
+    return budgets
+
+
+def _report_stage(name: str) -> None:
+    if _stage_sink is not None:
+        _stage_sink.value = name.encode()[:31]
+
+
+def _worker_main(conn, stage, fn, initializer, initargs):
+    global _stage_sink
+    _stage_sink = stage
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        key, args = message
+        stage.value = b'start'
+        try:
+            conn.send((key, 'ok', fn(*args)))
+        except BudgetExceeded as e:
+            conn.send((key, 'timeout', {'stage': e.stage, 'error': str(e)}))
+        except Exception as e:
+            conn.send((key, 'error', {'stage': stage.value.decode(), 'error': f"{type(e).__name__}: {e}"}))
+
+
+class _Worker:
+    def __init__(self, ctx, fn, initializer, initargs):
+        self.conn, child_conn = ctx.Pipe()
+        self.stage = ctx.Array('c', 32)
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, self.stage, fn, initializer, initargs),
+                                   daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.key = None
+        self.started = 0.0
+
+
+class WatchdogPool:
+    """
+    Process pool that enforces a hard per-task timeout by killing the worker.
+
+    results() yields (key, status, payload) as tasks finish; status is 'ok'
+    (payload = return value), 'timeout' (cooperative BudgetExceeded),
+    'killed' (hard timeout) or 'error'. For 'timeout', 'killed' and 'error'
+    the payload is {'stage', 'error'}. Tasks may be submitted while iterating.
+    """
+
+    def __init__(self, fn: Callable, workers: int, hard_timeout: Optional[float] = None,
+                 initializer: Optional[Callable] = None, initargs: Tuple = ()):
+        self._ctx = mp.get_context()
+        self._fn = fn
+        self._initializer = initializer
+        self._initargs = initargs
+        self.hard_timeout = hard_timeout or None
+        self._workers: List[_Worker] = [self._spawn() for _ in range(max(1, workers))]
+        self._pending: List[Tuple[Any, Tuple]] = []
+        self.killed = 0
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._ctx, self._fn, self._initializer, self._initargs)
+
+    def submit(self, key: Any, *args) -> None:
+        self._pending.append((key, args))
+
+    def _dispatch(self) -> None:
+        for worker in self._workers:
+            if worker.key is None and self._pending:
+                key, args = self._pending.pop(0)
+                worker.key, worker.started = key, time.monotonic()
+                worker.conn.send((key, args))
+
+    def results(self) -> Iterator[Tuple[Any, str, Any]]:
+        while True:
+            self._dispatch()
+            busy = [w for w in self._workers if w.key is not None]
+            if not busy:
+                return
+            timeout = 1.0
+            if self.hard_timeout:
+                remaining = min(w.started + self.hard_timeout for w in busy) - time.monotonic()
+                timeout = max(0.0, min(timeout, remaining))
+            ready = wait([w.conn for w in busy], timeout=timeout)
+
+            for worker in busy:
+                if worker.conn in ready:
+                    try:
+                        key, status, payload = worker.conn.recv()
+                    except EOFError:
+                        # Worker died (e.g. OOM killer): replace it
+                        key, status, payload = worker.key, 'error', {
+                            'stage': worker.stage.value.decode(), 'error': 'Worker process exited'}
+                        self._replace(worker)
+                    worker.key = None
+                    yield key, status, payload
+                elif self.hard_timeout and time.monotonic() - worker.started > self.hard_timeout:
+                    key, stage = worker.key, worker.stage.value.decode() or 'unknown'
+                    elapsed = time.monotonic() - worker.started
+                    self._replace(worker)
+                    self.killed += 1
+                    yield key, 'killed', {
+                        'stage': stage,
+                        'error': f"Watchdog killed worker in {stage} after {elapsed:.1f}s "
+                                 f"(hard timeout {self.hard_timeout:.1f}s)"
+                    }
+
+    def _replace(self, worker: _Worker) -> None:
+        worker.process.kill()
+        worker.process.join()
+        worker.conn.close()
+        self._workers[self._workers.index(worker)] = self._spawn()
+
+    def close(self) -> None:
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.kill()
+
+    def __enter__(self) -> 'WatchdogPool':
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.close()
+        return False